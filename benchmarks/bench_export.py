@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Export pipeline benchmark
+
+Generates synthetic casts (see castgen.py) and times each SessionExporter
+phase - parse, ANSI strip, incremental-typing clean, secret redaction - plus every export_*
+format. Each case runs in a fresh subprocess so peak RSS is per case.
+
+    python benchmarks/bench_export.py
+    python benchmarks/bench_export.py --kinds tui --sizes 1MB 100MB 1GB
+    python benchmarks/bench_export.py --compare benchmarks/results/before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+CACHE_DIR = BENCH_DIR / '.cache'
+RESULTS_DIR = BENCH_DIR / 'results'
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(REPO_ROOT))
+
+from castgen import KINDS, generate_cast, parse_size  # noqa: E402
+
+FORMATS = ['txt', 'md', 'json', 'ndjson', 'chunks', 'html', 'player', 'cast']
+PHASES = {'parse': 'export.convert', 'strip': 'export.strip', 'clean': 'export.clean',
+          'redact': 'export.redact'}
+
+
+def cast_for(kind: str, size: str, seed: int) -> Path:
+    """Generate (or reuse) the cached cast for one case"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{kind}-{size.lower()}-{seed}.cast"
+    if not path.exists():
+        partial = path.with_suffix('.partial')
+        generate_cast(partial, kind, parse_size(size), seed)
+        partial.rename(path)
+    return path
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(cast_file: Path) -> Dict:
+    """Measure one cast in this process (called in the worker subprocess)"""
+    from src.core.metrics import metrics
+    from src.export import Redactor, SessionExporter
+
+    size_mb = cast_file.stat().st_size / (1024 * 1024)
+    baseline_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    # Redacting, as exports do by default
+    exporter = SessionExporter(cast_file, {'duration': 0, 'terminal_id': 'bench'}, redactor=Redactor())
+    total = time.perf_counter() - started
+
+    phases = {}
+    for phase, name in PHASES.items():
+        hist = metrics.histograms.get(name)
+        seconds = hist.total / 1000 if hist else 0.0
+        phases[phase] = {
+            'seconds': round(seconds, 4),
+            'mb_per_s': round(size_mb / seconds, 2) if seconds else None,
+        }
+
+    exports = {}
+    with tempfile.TemporaryDirectory(prefix='reccli_bench_') as tmp:
+        for fmt in FORMATS:
+            out = Path(tmp) / f"session.{fmt}"
+            started = time.perf_counter()
+            ok = exporter.export(out, fmt)
+            seconds = time.perf_counter() - started
+            exports[fmt] = {
+                'ok': ok,
+                'seconds': round(seconds, 4),
+                'output_mb': round(out.stat().st_size / (1024 * 1024), 3) if out.exists() else 0,
+                'mb_per_s': round(size_mb / seconds, 2) if seconds else None,
+            }
+
+    return {
+        'cast_mb': round(size_mb, 3),
+        'text_mb': round(len(exporter.terminal_output.encode('utf-8')) / (1024 * 1024), 3),
+        'load_seconds': round(total, 4),
+        'load_mb_per_s': round(size_mb / total, 2) if total else None,
+        'phases': phases,
+        'exports': exports,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'peak_rss_delta_mb': round(peak_rss_mb() - baseline_rss, 1),
+    }
+
+
+def worker_env(use_asciinema: bool) -> Dict[str, str]:
+    """Environment for the worker; hides asciinema so the in-repo parser is measured"""
+    env = dict(os.environ)
+    if not use_asciinema:
+        env['PATH'] = os.pathsep.join(
+            d for d in env.get('PATH', '').split(os.pathsep)
+            if d and not (Path(d) / 'asciinema').exists()
+        )
+    return env
+
+
+def run_suite(kinds: List[str], sizes: List[str], seed: int, use_asciinema: bool) -> Dict:
+    cases = []
+    for kind in kinds:
+        for size in sizes:
+            print(f"⏱  {kind} {size} ...", end=' ', flush=True)
+            cast_file = cast_for(kind, size, seed)
+            proc = subprocess.run(
+                [sys.executable, __file__, '--worker', str(cast_file)],
+                capture_output=True, text=True, env=worker_env(use_asciinema),
+            )
+            if proc.returncode != 0:
+                print("failed")
+                print(proc.stderr.strip())
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result.update({'kind': kind, 'size': size})
+            cases.append(result)
+            print(f"{result['load_mb_per_s']} MB/s load, peak {result['peak_rss_mb']} MB")
+
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'asciinema': bool(use_asciinema and shutil.which('asciinema')),
+        'seed': seed,
+        'cases': cases,
+    }
+
+
+def print_comparison(current: Dict, previous: Dict):
+    """Print load time and peak memory deltas against an earlier results file"""
+    before = {(c['kind'], c['size']): c for c in previous.get('cases', [])}
+    print(f"\n{'case':<20} {'load s':>18} {'peak MB':>18}")
+    for case in current['cases']:
+        old = before.get((case['kind'], case['size']))
+        name = f"{case['kind']} {case['size']}"
+        if not old:
+            print(f"{name:<20} {case['load_seconds']:>18} {case['peak_rss_mb']:>18}")
+            continue
+
+        def delta(new, prev):
+            change = (new - prev) / prev * 100 if prev else 0
+            return f"{new} ({change:+.0f}%)"
+
+        print(f"{name:<20} {delta(case['load_seconds'], old['load_seconds']):>18} "
+              f"{delta(case['peak_rss_mb'], old['peak_rss_mb']):>18}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark the export pipeline')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=KINDS)
+    parser.add_argument('--sizes', nargs='+', default=['1MB', '10MB'],
+                        help="Cast sizes, e.g. 1MB 100MB 1GB")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help="Results file (default: results/<timestamp>.json)")
+    parser.add_argument('--compare', type=Path, help="Earlier results file to diff against")
+    parser.add_argument('--use-asciinema', action='store_true',
+                        help="Let SessionExporter use 'asciinema convert' if installed")
+    parser.add_argument('--worker', type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_case(args.worker)))
+        return
+
+    results = run_suite(args.kinds, args.sizes, args.seed, args.use_asciinema)
+
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n✅ Results written to {output}")
+
+    if args.compare:
+        print_comparison(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == '__main__':
+    main()
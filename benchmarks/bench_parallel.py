@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Parallel cleaning scaling benchmark
+
+Times strip+clean of one large synthetic transcript serially and on 2..N
+worker processes, checks every parallel result is identical to the
+serial one, and records the speedups.
+
+    python benchmarks/bench_parallel.py
+    python benchmarks/bench_parallel.py --kind logflood --size 256MB --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from bench_export import RESULTS_DIR, cast_for  # noqa: E402
+from castgen import KINDS  # noqa: E402
+
+
+def load_transcript(cast_file: Path) -> str:
+    """Decoded output of a cast, exactly as SessionExporter's parser builds it"""
+    output = []
+    with open(cast_file, 'r', encoding='utf-8') as f:
+        next(f)  # Header
+        for line in f:
+            event = json.loads(line)
+            if len(event) >= 3 and event[1] == 'o':
+                output.append(event[2])
+    return ''.join(output)
+
+
+def default_worker_counts() -> List[int]:
+    counts, n = [1], 2
+    cpus = os.cpu_count() or 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    if cpus > 1:
+        counts.append(cpus)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark parallel strip+clean scaling')
+    parser.add_argument('--kind', choices=KINDS, default='tui')
+    parser.add_argument('--size', default='64MB', help="Cast size, e.g. 64MB, 1GB")
+    parser.add_argument('--workers', type=int, nargs='+', help="Worker counts (default: 1, 2, 4 .. CPUs)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help="Results file (default: results/parallel-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    from src.export import cleaning
+
+    # Let every requested worker count actually split, whatever the size
+    cleaning.PARALLEL_MIN_CHARS = 0
+    cleaning.MIN_SEGMENT_CHARS = 1
+
+    raw = load_transcript(cast_for(args.kind, args.size, args.seed))
+    chars = len(raw)
+    print(f"⏱  {args.kind} {args.size}: {chars / 1e6:.1f}M chars, {os.cpu_count()} CPUs")
+
+    started = time.perf_counter()
+    reference = cleaning.strip_and_clean(raw, workers=1)
+    serial = time.perf_counter() - started
+    print(f"   serial      {serial:>7.2f}s")
+
+    runs = [{'workers': 1, 'seconds': round(serial, 3), 'speedup': 1.0, 'segments': 1, 'identical': True}]
+    for workers in args.workers or default_worker_counts():
+        if workers == 1:
+            continue
+        segments = len(cleaning.find_boundaries(raw, workers)) + 1
+        started = time.perf_counter()
+        result = cleaning.strip_and_clean(raw, workers=workers)
+        seconds = time.perf_counter() - started
+        identical = result == reference
+        runs.append({'workers': workers, 'seconds': round(seconds, 3), 'speedup': round(serial / seconds, 2),
+                     'segments': segments, 'identical': identical})
+        print(f"   {workers:>2} workers  {seconds:>7.2f}s  {serial / seconds:>5.2f}x  "
+              f"{segments} segments  {'identical' if identical else '❌ OUTPUT DIFFERS'}")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'kind': args.kind,
+        'size': args.size,
+        'chars': chars,
+        'runs': runs,
+    }
+    output = args.output or RESULTS_DIR / f"parallel-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n✅ Results written to {output}")
+
+    if not all(run['identical'] for run in runs):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Concurrent recording benchmark
+
+Records N commands at once on one RecordingEngine - one event loop, one
+core - each printing at a steady rate, and reports aggregate and
+per-session throughput, the recorder's own CPU time and event-loop lag.
+Stepping N up shows how many sessions one core sustains: a session falls
+short when the recorder can't keep up, because an unread terminal blocks
+its command.
+
+    python benchmarks/bench_record.py
+    python benchmarks/bench_record.py --sessions 50 100 200 400 --rate 20KB --seconds 10
+    python benchmarks/bench_record.py --sessions 4 --rate 0    # flood: exercises backpressure
+
+The commands run on the same machine; on a small one their own CPU use
+competes with the recorder's, so read the recorder CPU column as well.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from bench_export import RESULTS_DIR  # noqa: E402
+from castgen import parse_size  # noqa: E402
+
+# Prints rate bytes/s of log-like lines in 50ms ticks for the given
+# seconds (rate 0: as fast as the terminal takes them)
+PRODUCER = r'''
+import os, sys, time
+rate, seconds = int(sys.argv[1]), float(sys.argv[2])
+line = b'2025-01-01 12:00:00 INFO worker: processed batch \x1b[32mok\x1b[0m items=%06d\r\n'
+block = b''.join(line % i for i in range(1000))
+end = time.monotonic() + seconds
+if rate == 0:
+    while time.monotonic() < end:
+        os.write(1, block)
+    sys.exit(0)
+tick = 0.05
+per_tick = max(1, int(rate * tick))
+data = (block * (per_tick // len(block) + 1))[:per_tick]
+deadline = time.monotonic()
+while deadline < end:
+    os.write(1, data)
+    deadline += tick
+    time.sleep(max(0.0, deadline - time.monotonic()))
+'''
+
+LAG_TICK = 0.05
+SUSTAINED_FRACTION = 0.95  # Of each session's target bytes
+SUSTAINED_LAG_MS = 100     # p99 event-loop lag
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process (all threads, not the recorded commands)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def watch_lag(lags: List[float], stop: asyncio.Event):
+    """Sample how late the event loop runs a LAG_TICK sleep"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(LAG_TICK)
+        lags.append((loop.time() - started - LAG_TICK) * 1000)
+
+
+async def run_case(sessions: int, rate: int, seconds: float, directory: Path) -> Dict:
+    from src.core.recording import RecordingEngine
+
+    engine = RecordingEngine()
+    command = [sys.executable, '-S', '-c', PRODUCER, str(rate), str(seconds)]
+    started_sessions = await asyncio.gather(*(
+        engine.start_session(directory / f"session-{i}.cast", command) for i in range(sessions)))
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(watch_lag(lags, stop))
+    peak_buffered = 0
+    cpu_before, wall_before = cpu_seconds(), time.perf_counter()
+    while any(s.running for s in started_sessions):
+        await asyncio.sleep(0.1)
+        peak_buffered = max(peak_buffered, sum(len(s.pending) for s in started_sessions))
+    wall = time.perf_counter() - wall_before
+    cpu = cpu_seconds() - cpu_before
+    stop.set()
+    await lag_task
+
+    stats = engine.stats()
+    per_session = [s['bytes_read'] for s in stats['sessions']]
+    target = rate * seconds
+    lags.sort()
+    result = {
+        'sessions': sessions,
+        'rate_bytes': rate,
+        'seconds': seconds,
+        'wall_seconds': round(wall, 3),
+        'aggregate_mb_per_s': round(sum(per_session) / wall / (1024 * 1024), 3),
+        'session_mb_per_s_median': round(median(per_session) / wall / (1024 * 1024), 4),
+        'session_target_fraction_min': round(min(per_session) / target, 3) if target else None,
+        'recorder_cpu_percent': round(cpu / wall * 100, 1),
+        'lag_ms_p50': round(lags[len(lags) // 2], 2) if lags else None,
+        'lag_ms_p99': round(lags[int(len(lags) * 0.99)], 2) if lags else None,
+        'pauses': sum(s['pauses'] for s in stats['sessions']),
+        'peak_buffered_mb': round(peak_buffered / (1024 * 1024), 2),
+    }
+    result['sustained'] = bool(
+        target and result['session_target_fraction_min'] >= SUSTAINED_FRACTION
+        and result['lag_ms_p99'] is not None and result['lag_ms_p99'] <= SUSTAINED_LAG_MS)
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark concurrent recording on one event loop')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10, 50, 100, 200])
+    parser.add_argument('--rate', default='20KB', help="Output per session per second, e.g. 20KB, 1MB (0 = flood)")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--output', type=Path, help="Results file (default: results/record-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    rate = parse_size(args.rate)
+
+    print(f"⏱  {args.rate + '/s' if rate else 'flood'} per session for {args.seconds:g}s, {os.cpu_count()} CPUs")
+    print(f"   {'sessions':>8} {'total MB/s':>10} {'worst':>7} {'cpu':>6} {'lag p99':>9} {'pauses':>7} {'buffered':>9}")
+    cases = []
+    for sessions in args.sessions:
+        with tempfile.TemporaryDirectory(prefix='reccli_bench_') as tmp:
+            case = asyncio.run(run_case(sessions, rate, args.seconds, Path(tmp)))
+        cases.append(case)
+        worst = f"{case['session_target_fraction_min'] * 100:.0f}%" if rate else '-'
+        print(f"   {sessions:>8} {case['aggregate_mb_per_s']:>10.2f} {worst:>7} "
+              f"{case['recorder_cpu_percent']:>5.0f}% {case['lag_ms_p99']:>7.1f}ms {case['pauses']:>7} "
+              f"{case['peak_buffered_mb']:>7.1f}MB{'' if case['sustained'] or not rate else '  ✗'}")
+
+    sustained = [c['sessions'] for c in cases if c['sustained']]
+    if rate:
+        print(f"\n{'✅' if sustained else '❌'} One event loop sustained "
+              f"{max(sustained) if sustained else 0} sessions at {args.rate}/s each "
+              f"(every session ≥{SUSTAINED_FRACTION:.0%} of its output, p99 lag ≤{SUSTAINED_LAG_MS}ms)")
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'cases': cases,
+    }
+    output = args.output or RESULTS_DIR / f"record-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\n✅ Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Search index benchmark
+
+Indexes synthetic casts (see castgen.py) into a throwaway SearchIndex,
+timing the build, then tiles the indexed rows up to --rows and times
+'ask' queries and a 'similar' lookup against it.
+
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --sizes 10MB 10MB --rows 1000000
+    python benchmarks/bench_search.py --no-numpy
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench_export import cast_for  # noqa: E402
+from castgen import KINDS  # noqa: E402
+
+QUERIES = ['permission denied', 'git push origin main', 'npm install', 'connection refused',
+           'docker compose up', 'traceback error', 'make test', 'ssh deploy']
+
+
+def tile(index, rows: int) -> int:
+    """Repeat the index's rows (as extra sessions) until it has at least rows of them"""
+    with index._locked():
+        meta = index._read_meta()
+        base, base_bytes = meta['rows'], meta['rows_bytes']
+        vectors = index._path('vectors.f32').read_bytes()
+        lines = index._path('rows.jsonl').read_bytes()
+        offsets = index._offsets(base)
+        sessions = list(meta['sessions'].items())
+        with open(index._path('vectors.f32'), 'ab') as v, open(index._path('rows.jsonl'), 'ab') as r, \
+                open(index._path('offsets.u64'), 'ab') as o:
+            copy = 0
+            while meta['rows'] < rows:
+                copy += 1
+                shift, first = meta['rows_bytes'], meta['rows']
+                v.write(vectors)
+                r.write(lines)
+                array('Q', (offset + shift for offset in offsets)).tofile(o)
+                for key, entry in sessions:
+                    start, end = entry['rows']
+                    meta['sessions'][f'{key}#{copy}'] = dict(entry, rows=[start + first, end + first])
+                meta['rows'] += base
+                meta['rows_bytes'] += base_bytes
+        index._write_meta(meta)
+    return meta['rows']
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark semantic session search')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=['shell'])
+    parser.add_argument('--sizes', nargs='+', default=['10MB'], help="Cast sizes, one session each")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rows', type=int, default=100000, help="Rows to search (tiled from the indexed ones)")
+    parser.add_argument('--no-numpy', action='store_true', help="Measure the pure Python fallback")
+    args = parser.parse_args(argv)
+
+    from src.search import SearchIndex
+
+    casts = [cast_for(kind, size, args.seed) for kind in args.kinds for size in args.sizes]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='reccli_bench_') as tmp:
+        index = SearchIndex(directory=Path(tmp))
+        if args.no_numpy:
+            index.np = None
+
+        started = time.perf_counter()
+        stats = index.update(casts)
+        seconds = time.perf_counter() - started
+        results['index'] = {'sessions': stats['indexed'], 'rows': stats['rows'], 'seconds': round(seconds, 3),
+                            'rows_per_s': round(stats['rows'] / seconds) if seconds else None}
+        print(f"📚 Indexed {stats['rows']} blocks of {len(casts)} casts in {seconds:.2f}s")
+
+        rows = tile(index, args.rows)
+        index.ask(QUERIES[0])  # Warm the page cache
+        timings = []
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.ask(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        results['ask'] = {'rows': rows, 'median_ms': round(statistics.median(timings), 2),
+                          'max_ms': round(max(timings), 2), 'numpy': index.vectorized}
+        print(f"🔎 ask over {rows} blocks: median {results['ask']['median_ms']} ms, max {results['ask']['max_ms']} ms")
+
+        started = time.perf_counter()
+        index.similar(casts[0])
+        results['similar_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        print(f"🔗 similar over {rows} blocks: {results['similar_ms']} ms (includes reading the session)")
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Synthetic asciinema cast generator for RecCli benchmarks
+Deterministic (seeded) shell, TUI and log-flood sessions of any size
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+KINDS = ['shell', 'tui', 'logflood']
+
+WIDTH = 120
+HEIGHT = 40
+
+COMMANDS = [
+    'git status', 'ls -la', 'python -m pytest -q', 'make build', 'npm run test',
+    'cat README.md', 'grep -rn TODO src/', 'docker ps', 'cargo build --release',
+    'kubectl get pods -A', 'tail -n 50 app.log', 'pip install -r requirements.txt',
+]
+WORDS = [
+    'config', 'server', 'request', 'handler', 'cache', 'worker', 'session', 'token',
+    'export', 'module', 'timeout', 'retry', 'buffer', 'socket', 'parser', 'render',
+    'window', 'record', 'stream', 'record', 'thread', 'queue', 'index', 'update',
+]
+SPINNER_WORDS = ['Galloping', 'Warping', 'Deliberating', 'Combobulating', 'Musing',
+                 'Prestidigitating', 'Finagling', 'Whatchamacalliting']
+SPINNER_FRAMES = ['·', '✢', '✳', '✶', '✻', '✽']
+COLORS = ['\x1b[31m', '\x1b[32m', '\x1b[33m', '\x1b[34m', '\x1b[36m', '\x1b[1m']
+RESET = '\x1b[0m'
+PROMPT = '\x1b[32muser@host\x1b[0m:\x1b[34m~/project\x1b[0m$ '
+
+Event = Tuple[float, str]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def shell_session(rng: random.Random) -> Iterator[Event]:
+    """Prompt, command typed one echoed character at a time, coloured output"""
+    while True:
+        yield rng.uniform(0.2, 2.0), PROMPT
+        for ch in rng.choice(COMMANDS):
+            yield rng.uniform(0.03, 0.2), ch
+        yield rng.uniform(0.05, 0.3), '\r\n'
+        for _ in range(rng.randint(1, 40)):
+            color = rng.choice(COLORS) if rng.random() < 0.3 else ''
+            line = f"{color}{_sentence(rng, rng.randint(3, 14))}{RESET if color else ''}\r\n"
+            yield rng.uniform(0.0, 0.02), line
+
+
+def tui_session(rng: random.Random) -> Iterator[Event]:
+    """Claude/Codex-style redraw-heavy session: prompt box, incremental typing, spinners"""
+    separator = '─' * WIDTH
+    while True:
+        # Prompt box redrawn on every keystroke
+        text = _sentence(rng, rng.randint(3, 12))
+        for i in range(1, len(text) + 1):
+            frame = f"\x1b[2K\r{separator}\r\n\x1b[2K> {text[:i]}\r\n\x1b[2K{separator}\r\n\x1b[3A"
+            yield rng.uniform(0.03, 0.15), frame
+        yield 0.1, f"\r\n\x1b[2K> {text}\r\n  ? for shortcuts\r\n"
+
+        # Spinner while "thinking"
+        word = rng.choice(SPINNER_WORDS)
+        for i in range(rng.randint(10, 80)):
+            glyph = SPINNER_FRAMES[i % len(SPINNER_FRAMES)]
+            yield 0.1, f"\x1b[2K\r{glyph} {word}… ({i // 10}s · esc to interrupt)"
+        yield 0.05, '\x1b[2K\r'
+
+        # Response streamed in small chunks
+        yield 0.05, '⏺ '
+        for _ in range(rng.randint(2, 30)):
+            line = _sentence(rng, rng.randint(4, 16))
+            for start in range(0, len(line), 12):
+                yield rng.uniform(0.005, 0.05), line[start:start + 12]
+            yield 0.01, '\r\n'
+
+
+def logflood_session(rng: random.Random) -> Iterator[Event]:
+    """Bursts of many log lines per event, like a tailing server log"""
+    levels = ['\x1b[32mINFO\x1b[0m', '\x1b[33mWARN\x1b[0m', '\x1b[31mERROR\x1b[0m', 'DEBUG']
+    clock = 0.0
+    while True:
+        lines = []
+        for _ in range(rng.randint(5, 60)):
+            clock += rng.uniform(0.0001, 0.01)
+            lines.append(f"2025-01-01T00:{int(clock // 60) % 60:02d}:{clock % 60:06.3f}Z "
+                         f"{rng.choice(levels)} [{rng.choice(WORDS)}] {_sentence(rng, rng.randint(4, 18))}\r\n")
+        yield rng.uniform(0.001, 0.05), ''.join(lines)
+
+
+GENERATORS = {
+    'shell': shell_session,
+    'tui': tui_session,
+    'logflood': logflood_session,
+}
+
+
+def parse_size(text: str) -> int:
+    """Parse sizes like '512KB', '10MB' or '1GB' into bytes"""
+    text = text.strip().upper()
+    for suffix, factor in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024), ('B', 1)):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def generate_cast(path: Path, kind: str, size_bytes: int, seed: int = 0) -> int:
+    """
+    Write a synthetic asciinema v2 cast of roughly size_bytes
+
+    Args:
+        path: Output .cast file
+        kind: 'shell', 'tui' or 'logflood'
+        size_bytes: Stop once the file reaches this size
+        seed: Random seed - the same arguments always produce the same file
+
+    Returns:
+        Number of events written
+    """
+    rng = random.Random(f"{kind}-{seed}")
+    header = {
+        'version': 2, 'width': WIDTH, 'height': HEIGHT, 'timestamp': 1735689600,
+        'env': {'SHELL': '/bin/zsh', 'TERM': 'xterm-256color'},
+        'title': f"synthetic {kind} session",
+    }
+
+    events = 0
+    written = 0
+    clock = 0.0
+    buffer: List[str] = []
+    with open(path, 'w', encoding='utf-8') as f:
+        line = json.dumps(header) + '\n'
+        f.write(line)
+        written += len(line.encode('utf-8'))
+        for delay, data in GENERATORS[kind](rng):
+            clock += delay
+            line = json.dumps([round(clock, 6), 'o', data], ensure_ascii=False) + '\n'
+            buffer.append(line)
+            written += len(line.encode('utf-8'))
+            events += 1
+            if len(buffer) >= 4096:
+                f.write(''.join(buffer))
+                buffer.clear()
+            if written >= size_bytes:
+                break
+        f.write(''.join(buffer))
+    return events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic asciinema casts')
+    parser.add_argument('kind', choices=KINDS)
+    parser.add_argument('size', help="Target size, e.g. 1MB, 100MB, 1GB")
+    parser.add_argument('output', type=Path)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    events = generate_cast(args.output, args.kind, parse_size(args.size), args.seed)
+    print(f"✅ Wrote {args.output} ({events} events)")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,35 +11,193 @@ import json
 import subprocess
 import datetime
 import shutil
+import queue
+import signal
 from pathlib import Path
-from typing import Dict, Tuple, Optional
-
-# Debug logging to file
-DEBUG_LOG = Path("/tmp/reccli_debug.log")
-def debug_log(msg):
-    with open(DEBUG_LOG, "a") as f:
-        f.write(f"{datetime.datetime.now().strftime('%H:%M:%S.%f')[:-3]} - {msg}\n")
-        f.flush()
-
-try:
-    import tkinter as tk
-    from tkinter import ttk, messagebox
-    HAS_GUI = True
-except ImportError:
-    HAS_GUI = False
+from typing import Callable, Dict, List, Tuple, Optional
+
+# GUI and export modules are heavy (tkinter alone is most of our startup
+# time) and only the GUI commands need them - see load_gui()/load_export()
+tk = ttk = messagebox = None
+ExportDialog = SettingsDialog = format_duration = None
+HAS_GUI = None
+HAS_EXPORT = None
+
+def load_gui() -> bool:
+    """Import tkinter on first use; returns whether the GUI is available"""
+    global tk, ttk, messagebox, HAS_GUI
+    if HAS_GUI is None:
+        try:
+            import tkinter as tk
+            from tkinter import ttk, messagebox
+            HAS_GUI = True
+        except ImportError:
+            HAS_GUI = False
+    return HAS_GUI
+
+def load_export() -> bool:
+    """Import the export/UI modules on first use; returns whether they are available"""
+    global ExportDialog, SettingsDialog, format_duration, HAS_EXPORT
+    if HAS_EXPORT is None:
+        try:
+            from src.ui import ExportDialog, SettingsDialog
+            from src.export import format_duration
+            HAS_EXPORT = True
+        except ImportError:
+            HAS_EXPORT = False
+            print("⚠️  Export modules not found. Basic recording only.")
+    return HAS_EXPORT
 
 # Import RecCli modules
 sys.path.insert(0, str(Path(__file__).parent))
-try:
-    from src.ui import ExportDialog, SettingsDialog
-    from src.export import format_duration
-    HAS_EXPORT = True
-except ImportError:
-    HAS_EXPORT = False
-    print("⚠️  Export modules not found. Basic recording only.")
+
+# Leveled debug log (/tmp/reccli_debug.log) - off unless --log-level or
+# $RECCLI_LOG_LEVEL enables it, so hot loops only pay a level check
+from src.core.log import logger as log
+
+# Always-on counters/histograms, dumped by 'reccli metrics'
+from src.core.metrics import metrics
+
+# What each subcommand imports before it runs - everything else stays unloaded
+COMMAND_MODULES = {
+    'gui': ['gui', 'export', 'src.core.scheduler'],
+    'host': ['gui', 'export', 'src.core.scheduler', 'src.core.ipc'],
+    'zygote': ['src.core.zygote'],
+    'launch': ['src.core.ipc', 'src.core.registry'],
+    'watch': ['src.core.ipc', 'src.core.registry', 'src.watcher', 'src.storage'],
+    'notify': ['src.core.ipc'],
+    'killall': ['src.core.registry'],
+    'status': ['src.core.registry'],
+    'metrics': ['src.core.registry'],
+    'export': ['src.export'],
+    'redact': ['src.export'],
+    'storage': ['src.storage'],
+    'daemon': ['src.core.ipc', 'src.core.recording'],
+    'start': ['src.core.ipc'],
+    'stop': ['src.core.ipc'],
+    'serve': ['src.export', 'src.export.server'],
+    'ask': ['src.search'],
+    'similar': ['src.search'],
+}
+
+# Cold-start budgets in ms above a bare interpreter start, checked by --startup-profile
+STARTUP_BUDGETS_MS = {
+    'gui': 250,
+    'host': 250,
+    'zygote': 150,
+    'launch': 150,
+    'watch': 150,
+    'notify': 150,
+    'killall': 150,
+    'status': 150,
+    'metrics': 150,
+    'export': 150,
+    'redact': 150,
+    'storage': 150,
+    'daemon': 150,
+    'start': 130,
+    'stop': 130,
+    'serve': 200,
+    'ask': 150,
+    'similar': 150,
+}
+
+def load_command_modules(command: str):
+    """Import everything a subcommand needs (and nothing else)"""
+    import importlib
+
+    for name in COMMAND_MODULES.get(command, []):
+        if name == 'gui':
+            load_gui()
+        elif name == 'export':
+            load_export()
+        else:
+            importlib.import_module(name)
+
+def startup_profile(commands) -> int:
+    """
+    Print cold-start timing for subcommands and check them against their budgets
+
+    Returns:
+        Exit code - 1 if any subcommand is over budget
+    """
+    from src.core import profile_command, interpreter_baseline_ms
+
+    script_path = Path(__file__).resolve()
+    baseline = interpreter_baseline_ms()
+    over_budget = []
+
+    print("⏱️  reccli cold-start profile")
+    print(f"   Bare interpreter: {baseline:.1f}ms (budgets apply to time above this)")
+    print(f"   {'command':<10} {'wall':>8} {'above':>8} {'budget':>8} {'imports':>9}  top imports")
+    for command in commands:
+        result = profile_command(script_path, command)
+        overhead = result['wall_ms'] - baseline
+        budget = STARTUP_BUDGETS_MS.get(command)
+        ok = budget is None or overhead <= budget
+        if not ok:
+            over_budget.append(command)
+        top = ', '.join(f"{name} {ms:g}ms" for name, ms in result['top_imports'][:3])
+        print(f"{'  ' if ok else '❌'} {command:<10} {result['wall_ms']:>6.1f}ms {overhead:>6.1f}ms "
+              f"{budget or '-':>6}ms {result['import_ms']:>7.1f}ms  {top}")
+
+    if 'gui' in commands and hasattr(os, 'fork'):
+        # What the zygote (watch --isolated) saves per popup over a cold start
+        from src.core import profile_zygote
+        try:
+            forked = profile_zygote(script_path, 'gui', ZYGOTE_PRELOAD)
+            cold = profile_command(script_path, 'gui')['wall_ms']
+            print(f"\n   gui forked from the zygote: {forked:.1f}ms vs {cold:.1f}ms cold "
+                  f"({cold - forked:+.1f}ms saved)")
+        except (OSError, RuntimeError) as e:
+            print(f"\n   gui forked from the zygote: not measured ({e})")
+
+    if over_budget:
+        print(f"\n❌ Over budget: {', '.join(over_budget)}")
+        return 1
+    print("\n✅ All subcommands within budget")
+    return 0
+
 
 # Configuration
 VERSION = "1.0.0"
+HOST_SOCKET = Path("/tmp/reccli_host.sock")
+WATCHER_SOCKET = Path("/tmp/reccli_watcher.sock")
+ZYGOTE_SOCKET = Path("/tmp/reccli_zygote.sock")
+DAEMON_SOCKET = Path("/tmp/reccli_daemon.sock")
+DAEMON_REAP_INTERVAL = 1.0  # Seconds between checks for recordings whose command exited
+FOLLOW_IDLE = 10  # export --follow: stop this long after an unflagged session last grew
+# Imported once by the zygote so forked GUI instances start warm. Nothing
+# that loads Tk (tkinter, src.ui): Tk/Cocoa aren't fork-safe on macOS, so
+# each child imports those itself, after the fork
+ZYGOTE_PRELOAD = ['src.export', 'src.core.scheduler', 'src.core.log']
+WATCHER_HOST_CHECK_INTERVAL = 5  # Seconds between GUI host liveness checks
+WATCHER_ADD_RETRY_INTERVAL = 2  # Seconds before retrying a popup that failed to open
+
+# Terminal position tracking: 50ms while the terminal moves or focus changes,
+# backing off to TRACK_MAX_INTERVAL while everything is stable
+TRACK_MIN_INTERVAL = 0.05
+TRACK_MAX_INTERVAL = 2.0
+TRACK_STATS_INTERVAL = 60  # Seconds between tick-rate reports in the debug log
+# osascript calls block for up to seconds - buttons run them on a shared
+# pool and pick up the results from the Tk thread every BACKGROUND_POLL_MS
+OSASCRIPT_WORKERS = 4
+BACKGROUND_POLL_MS = 20
+
+def run_osascript(name: str, args, **kwargs):
+    """subprocess.run for osascript, timed into the osascript.<name> histogram"""
+    with metrics.timer(f'osascript.{name}'):
+        return subprocess.run(args, **kwargs)
+
+_osascript_pool = None
+
+def osascript_pool():
+    """Threads for blocking osascript work, shared by every button in the process"""
+    global _osascript_pool
+    if _osascript_pool is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _osascript_pool = ThreadPoolExecutor(max_workers=OSASCRIPT_WORKERS, thread_name_prefix='osascript')
+    return _osascript_pool
 
 class ReccliConfig:
     """Manage configuration and stats"""
@@ -66,10 +224,27 @@ class ReccliConfig:
             # Export settings
             'default_export_format': 'md',
             'default_save_location': str(Path.home() / 'Documents' / 'reccli_sessions'),
+            # Mask API keys, tokens and passwords in exports (extra regexes in redact_patterns)
+            'redact_exports': True,
+            'redact_entropy': False,
+            'redact_patterns': [],
+            # 'reccli serve': localhost port and disk cache for rendered exports
+            'serve_port': 8470,
+            'serve_cache_mb': 512,
+            # 'chunks' exports: token budget per chunk, and tokenizer (auto = tiktoken if installed)
+            'chunk_tokens': 8000,
+            'tokenizer': 'auto',
+            # 'reccli ask/similar': embedder - hashing[:dim], or sentence-transformers:<model> if installed
+            'search_model': 'hashing',
             # Recording settings
             'show_recording_indicator': True,
             'show_duration_timer': True,
-            'auto_pause_on_idle': False
+            'auto_pause_on_idle': False,
+            # Retention of sessions reccli recorded (enforced by the watcher; 0 = off)
+            'retention_quota_mb': 0,
+            'retention_max_age_days': 0,
+            'retention_compress_after_days': 0,
+            'retention_io_mb_per_s': 8
         }
         # Create default save location
         Path(config['default_save_location']).mkdir(parents=True, exist_ok=True)
@@ -103,6 +278,7 @@ class CLIRecorder:
         self.output_file = None
         self.start_time = None
         self.terminal_id = None  # Track which terminal window is being recorded
+        self.pty = None  # PtyRecording when recording headless (no terminal window)
 
         # Check for recording tools
         self.has_asciinema = shutil.which('asciinema') is not None
@@ -112,14 +288,22 @@ class CLIRecorder:
             print("⚠️  Warning: Install 'asciinema' for best recording quality")
             print("   Run: pip install asciinema")
 
-    def start(self, filename=None, auto_launch_claude=False, tool_name="claude", terminal_id=None) -> Tuple[bool, str]:
-        """Start recording session using asciinema (nested shell approach)"""
+    def start(self, filename=None, auto_launch_claude=False, tool_name="claude", terminal_id=None,
+              command: Optional[List[str]] = None, cwd: Optional[str] = None) -> Tuple[bool, str]:
+        """
+        Start recording session using asciinema (nested shell approach)
+
+        With a command, records it headless on a pseudo-terminal instead
+        (any platform, no terminal window needed) - see PtyRecording.
+        """
         if self.recording:
             return False, "Already recording"
+        if command:
+            return self._start_headless(filename, command, cwd)
 
         # Store terminal_id for targeting during stop
         self.terminal_id = terminal_id
-        debug_log(f"CLIRecorder.start() - Stored terminal_id: {self.terminal_id}")
+        log.debug("CLIRecorder.start() - Stored terminal_id: %s", self.terminal_id)
 
         # Generate filename
         if not filename:
@@ -173,9 +357,12 @@ class CLIRecorder:
                 '''
 
             try:
-                result = subprocess.run(['osascript', '-e', script_text], check=True, capture_output=True, text=True)
+                result = run_osascript('start_recording', ['osascript', '-e', script_text], check=True, capture_output=True, text=True)
                 print(f"AppleScript result: stdout={result.stdout}, stderr={result.stderr}")
                 self.recording = True
+                # Keep retention away from the file while asciinema writes it
+                from src.storage import SessionIndex
+                SessionIndex().set_recording(Path.home() / simple_filename, True)
                 return True, str(self.output_file)
             except Exception as e:
                 print(f"AppleScript error: {e}")
@@ -183,17 +370,44 @@ class CLIRecorder:
         else:
             return False, "Currently only macOS is supported"
 
+    def _start_headless(self, filename: Optional[str], command: List[str], cwd: Optional[str]) -> Tuple[bool, str]:
+        from src.core import PtyRecording
+
+        if not filename:
+            filename = f"session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.output_file = self.output_dir / f"{filename}.cast"
+        try:
+            self.pty = PtyRecording(self.output_file, command, cwd=cwd).start()
+        except OSError as e:
+            self.pty = None
+            return False, f"Failed to start recording: {e}"
+        self.start_time = self.pty.start_time
+        self.recording = True
+        from src.storage import SessionIndex
+        SessionIndex().set_recording(self.output_file, True)
+        return True, str(self.output_file)
+
     def stop(self) -> Tuple[bool, str, float]:
         """Stop recording session by typing exit to exit nested shells"""
         if not self.recording:
             return False, "Not recording", 0
 
+        if self.pty:
+            duration = self.pty.stop()
+            self.pty = None
+            self.recording = False
+            from src.storage import SessionIndex
+            index = SessionIndex()
+            index.set_recording(self.output_file, False)
+            index.touch(self.output_file)
+            return True, str(self.output_file), duration
+
         duration = time.time() - self.start_time if self.start_time else 0
 
         if sys.platform == 'darwin':  # macOS
             # Send Ctrl+D to the SPECIFIC terminal window that's being recorded
             # This prevents Ctrl+D from being sent to other terminal windows
-            debug_log(f"CLIRecorder.stop() - Using terminal_id: {self.terminal_id}")
+            log.debug("CLIRecorder.stop() - Using terminal_id: %s", self.terminal_id)
 
             if self.terminal_id:
                 # Target specific window by ID
@@ -212,7 +426,7 @@ class CLIRecorder:
                 '''
             else:
                 # Fallback to old behavior if terminal_id not available
-                debug_log("WARNING: No terminal_id available, using frontmost window")
+                log.warning("No terminal_id available, using frontmost window")
                 script_text = '''
                 tell application "Terminal"
                     activate
@@ -226,7 +440,7 @@ class CLIRecorder:
                 '''
 
             try:
-                subprocess.run(['osascript', '-e', script_text], check=True, capture_output=True)
+                run_osascript('stop_recording', ['osascript', '-e', script_text], check=True, capture_output=True)
                 # Give asciinema time to finish writing and close
                 time.sleep(1.0)
 
@@ -239,6 +453,12 @@ class CLIRecorder:
 
         self.recording = False
         self.terminal_id = None  # Clear terminal_id after stopping
+        if self.output_file:
+            from src.storage import SessionIndex
+            index = SessionIndex()
+            if getattr(self, 'temp_filename', None):
+                index.set_recording(Path.home() / self.temp_filename, False)
+            index.touch(self.output_file)
         return True, str(self.output_file), duration
 
     def _get_linux_terminal_cmd(self, cmd):
@@ -260,22 +480,48 @@ class CLIRecorder:
 class ReccliGUI:
     """Floating button GUI attached to terminal window"""
 
-    def __init__(self, terminal_id=None):
-        self.config = ReccliConfig()
+    def __init__(self, terminal_id=None, master=None, config=None, on_close=None, requested_at=None,
+                 dark_mode=None):
+        """
+        Initialize floating button
+
+        Args:
+            terminal_id: Terminal window to attach to (frontmost if None)
+            master: Tk root of a ReccliHost - the button becomes a Toplevel
+                    of it instead of owning its own Tk instance
+            config: Shared ReccliConfig (a new one is loaded if None)
+            on_close: Called with the terminal ID when a hosted button closes
+            requested_at: time.time() when the watcher asked for this button,
+                          used to report time-to-button
+            dark_mode: System appearance, if the caller knows it (detected if None)
+        """
+        from src.core import instance_logger
+        self.log = instance_logger(f"gui:{terminal_id or 'frontmost'}")
+        self.requested_at = requested_at
+        self.time_to_button = None
+        self.config = config or ReccliConfig()
         self.recorder = CLIRecorder()
+        self.on_close = on_close
+        self.master = master
+        self.closed = False
+        self.busy = False  # A start/stop is running in the background - ignore clicks
+        self.query_pending = False  # A tracking query is running in the background
+        self.profiler = None  # Spans a recording when profiling is enabled (Tk thread)
+        self.scheduler = None
+        self.recording = False  # quit() may run before the GUI is fully built
         self.terminal_window = None
         self.last_terminal_position = None
         self.current_terminal_id = None  # Current active terminal window ID
         self.my_terminal_id = terminal_id  # The specific terminal this instance is attached to (never changes)
         self.last_terminal_id = None  # Track last terminal ID to detect changes
         self.terminal_is_frontmost = False  # Track if terminal is the frontmost app
-        self.is_dark_mode = self._detect_dark_mode()  # Detect system appearance
+        self.is_dark_mode = self._detect_dark_mode() if dark_mode is None else dark_mode
         self.last_appearance_check = None  # Track last appearance check
         self.popup_hidden = False  # Track if popup is hidden due to terminal minimize
         print(f"DEBUG: Initialized with dark mode = {self.is_dark_mode}")
 
-        # Create GUI
-        self.root = tk.Tk()
+        # Create GUI - a Toplevel when hosted, otherwise our own Tk instance
+        self.root = tk.Toplevel(master) if master is not None else tk.Tk()
         self.root.title("RecCli")  # Window title shows full brand name
 
         # Try different approach for macOS rounded corners
@@ -299,15 +545,24 @@ class ReccliGUI:
         print(f"DEBUG: Root bg_color = {bg_color} (is_dark_mode={self.is_dark_mode})")
 
         # Get terminal window position and attach to it
-        if self.my_terminal_id:
+        if self.my_terminal_id and master is not None:
+            # Hosted: the first tracking tick finds the terminal (off the Tk
+            # thread) and shows the button - or closes it if it's gone
+            self.root.withdraw()
+            self.popup_hidden = True
+        elif self.my_terminal_id:
             # Terminal ID specified - lock onto it immediately
-            debug_log(f"ReccliGUI initialized with specified terminal ID: {self.my_terminal_id}")
+            self.log.debug("ReccliGUI initialized with specified terminal ID: %s", self.my_terminal_id)
             self.find_terminal_by_id(self.my_terminal_id)
         else:
             # No terminal ID specified - use frontmost terminal at launch
             self.find_terminal_window()
             self.my_terminal_id = self.current_terminal_id  # Lock onto this terminal forever
-            debug_log(f"ReccliGUI initialized - locked to frontmost terminal ID: {self.my_terminal_id}")
+            self.log = instance_logger(f"gui:{self.my_terminal_id}")
+            self.log.debug("ReccliGUI initialized - locked to frontmost terminal ID: %s", self.my_terminal_id)
+        if self.closed:
+            # Hosted button whose terminal vanished before we were built
+            return
         self.position_window()
 
         # Create canvas for text + button
@@ -329,6 +584,10 @@ class ReccliGUI:
         self.canvas.bind("<B1-Motion>", self.on_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
         self.canvas.bind("<Button-3>", self.show_menu)  # Right-click
+        # Any pointer activity near the button means the user is about to
+        # interact - poll at full speed until things settle again
+        self.canvas.bind("<Enter>", self.wake_tracking, add='+')
+        self.root.bind("<FocusIn>", self.wake_tracking, add='+')
 
         # Create right-click menu
         self.menu = tk.Menu(self.root, tearoff=0)
@@ -347,9 +606,49 @@ class ReccliGUI:
         self.tooltip = None  # Tooltip window
 
         # Start position tracking loop
-        self.track_terminal_position()
+        from src.core import AdaptiveScheduler
+        self.scheduler = AdaptiveScheduler(
+            self.root.after, self.root.after_cancel, self.track_terminal_position,
+            min_interval=TRACK_MIN_INTERVAL, max_interval=TRACK_MAX_INTERVAL,
+            metric='tracking.tick'
+        )
+        self.scheduler.start()
+        self.report_tracking_stats()
+
+        if self.requested_at and master is None:
+            # Idle callbacks run once the window has been mapped and drawn
+            self.root.after_idle(self.report_time_to_button)
+
+    def _in_background(self, work: Callable, done: Callable, tk=None):
+        """
+        Run work() on the osascript pool, then done(result) on the Tk thread
+
+        Args:
+            work: Blocking call - must not touch Tk
+            done: Gets work's result (None if it raised)
+            tk: Widget whose after() polls for the result (default: the
+                button; pass the host's root to outlive the button)
+        """
+        future = osascript_pool().submit(work)
+        tk = tk or self.root
+
+        def check():
+            if self.closed and tk is self.root:
+                return  # Destroyed meanwhile - nothing left to update
+            if not future.done():
+                tk.after(BACKGROUND_POLL_MS, check)
+                return
+            try:
+                result = future.result()
+            except Exception as e:
+                self.log.warning("Background call failed: %s", e)
+                result = None
+            done(result)
+
+        tk.after(BACKGROUND_POLL_MS, check)
 
-    def _detect_dark_mode(self):
+    @staticmethod
+    def _detect_dark_mode():
         """Detect if macOS is in dark mode"""
         try:
             result = subprocess.run(
@@ -367,7 +666,7 @@ class ReccliGUI:
     def _get_terminal_window_index(self, target_id):
         """Get the z-order index (window stack position) of a terminal window"""
         try:
-            result = subprocess.run([
+            result = run_osascript('window_index', [
                 'osascript',
                 '-e', 'tell application "Terminal"',
                 '-e', f'set targetWindow to first window whose id is {target_id}',
@@ -377,19 +676,25 @@ class ReccliGUI:
 
             if result.returncode == 0 and result.stdout.strip():
                 index = int(result.stdout.strip())
-                debug_log(f"Terminal {target_id} has z-index: {index}")
+                self.log.debug("Terminal %s has z-index: %s", target_id, index)
                 return index
             return None
         except Exception as e:
-            debug_log(f"Error getting terminal z-index: {e}")
+            self.log.warning("Error getting terminal z-index: %s", e)
             return None
 
-    def find_terminal_by_id(self, target_id):
-        """Find a specific terminal window by its numeric ID"""
+    def _query_terminal_by_id(self, target_id) -> Optional[str]:
+        """
+        Ask Terminal where a window is (blocking - safe off the Tk thread)
+
+        Returns:
+            "x, ,, y, ,, width, ,, height, ,, id", "MINIMIZED" or "NOT_FOUND";
+            None if osascript failed
+        """
         try:
             # Query all Terminal windows and find the one matching target_id
             # Only check if minimized (not 'visible' since that's false on different Space)
-            result = subprocess.run([
+            result = run_osascript('find_terminal_by_id', [
                 'osascript',
                 '-e', 'tell application "Terminal"',
                 '-e', 'repeat with w in windows',
@@ -407,63 +712,83 @@ class ReccliGUI:
                 '-e', 'return "NOT_FOUND"',
                 '-e', 'end tell'
             ], capture_output=True, text=True, timeout=2)
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout.strip()
-                if output == "MINIMIZED":
-                    debug_log(f"Instance {self.my_terminal_id}: Terminal minimized")
-                    # If recording, just hide the popup, don't quit
-                    if self.recorder.recording:
-                        # Only hide if not already hidden
-                        if not self.popup_hidden:
-                            debug_log(f"Instance {self.my_terminal_id}: Recording active, hiding popup")
-                            self.root.withdraw()  # Hide the popup window completely
-                            self.popup_hidden = True
-                        return
-                    else:
-                        # Not recording, safe to quit
-                        debug_log(f"Instance {self.my_terminal_id}: Not recording, quitting")
-                        self.quit()
-                        return
-                elif output != "NOT_FOUND":
-                    # Terminal is visible and not minimized
-                    # If popup was hidden, restore it
-                    if self.popup_hidden:
-                        debug_log(f"Instance {self.my_terminal_id}: Terminal restored, showing popup (recording={self.recorder.recording})")
-                        self.root.deiconify()
-                        self.popup_hidden = False
-                        # Redraw button with correct recording state from recorder
-                        self.draw_button(recording=self.recorder.recording)
-                        # Sync GUI state with recorder
-                        self.recording = self.recorder.recording
-                        # Update last_terminal_id to prevent double-redraw in track_terminal_position
-                        self.last_terminal_id = self.my_terminal_id
-
-                    # Parse the window info - format is "x, ,, y, ,, width, ,, height, ,, id"
-                    parts = [p.strip() for p in output.replace(',,', ',').split(',') if p.strip()]
-                    if len(parts) >= 5:
-                        window_id = parts[4]
-                        self.current_terminal_id = window_id
-                        self.terminal_window = {
-                            'x': int(parts[0]),
-                            'y': int(parts[1]),
-                            'width': int(parts[2]),
-                            'height': int(parts[3]),
-                            'id': window_id
-                        }
-                        debug_log(f"Instance {self.my_terminal_id}: Found terminal at ({parts[0]}, {parts[1]})")
-                        return
+        except Exception as e:
+            self.log.warning("Error finding terminal by ID: %s", e)
+            return None
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+        return None
+
+    def _apply_terminal_by_id(self, output: Optional[str]):
+        """Follow our terminal's window (see _query_terminal_by_id) - Tk thread"""
+        if output is None:
+            return
+        try:
+            if output == "MINIMIZED":
+                self.log.debug("Terminal minimized")
+                # If recording, just hide the popup, don't quit
+                if self.recorder.recording:
+                    # Only hide if not already hidden
+                    if not self.popup_hidden:
+                        self.log.debug("Recording active, hiding popup")
+                        self.root.withdraw()  # Hide the popup window completely
+                        self.popup_hidden = True
+                    return
                 else:
-                    debug_log(f"Instance {self.my_terminal_id}: Terminal NOT_FOUND - quitting")
+                    # Not recording, safe to quit
+                    self.log.info("Not recording, quitting")
                     self.quit()
-            # If we didn't find it, quit
+                    return
+            elif output != "NOT_FOUND":
+                # Terminal is visible and not minimized
+                # If popup was hidden, restore it
+                if self.popup_hidden:
+                    self.log.debug("Terminal restored, showing popup (recording=%s)", self.recorder.recording)
+                    self.root.deiconify()
+                    self.popup_hidden = False
+                    # Redraw button with correct recording state from recorder
+                    self.draw_button(recording=self.recorder.recording)
+                    # Sync GUI state with recorder
+                    self.recording = self.recorder.recording
+                    # Update last_terminal_id to prevent double-redraw in track_terminal_position
+                    self.last_terminal_id = self.my_terminal_id
+                    if self.requested_at and self.time_to_button is None:
+                        # A hosted button is first shown here
+                        self.root.after_idle(self.report_time_to_button)
+
+                # Parse the window info - format is "x, ,, y, ,, width, ,, height, ,, id"
+                parts = [p.strip() for p in output.replace(',,', ',').split(',') if p.strip()]
+                if len(parts) >= 5:
+                    window_id = parts[4]
+                    self.current_terminal_id = window_id
+                    self.terminal_window = {
+                        'x': int(parts[0]),
+                        'y': int(parts[1]),
+                        'width': int(parts[2]),
+                        'height': int(parts[3]),
+                        'id': window_id
+                    }
+                    self.log.debug("Found terminal at (%s, %s)", parts[0], parts[1])
+                    return
+            else:
+                self.log.info("Terminal NOT_FOUND - quitting")
+                self.quit()
         except Exception as e:
-            debug_log(f"Instance {self.my_terminal_id}: Error finding terminal by ID: {e}")
-            pass
+            self.log.warning("Error finding terminal by ID: %s", e)
 
-    def find_terminal_window(self):
-        """Find the active terminal window position using AppleScript"""
+    def find_terminal_by_id(self, target_id):
+        """Find a specific terminal window by its numeric ID"""
+        self._apply_terminal_by_id(self._query_terminal_by_id(target_id))
+
+    def _query_front_terminal(self) -> Optional[str]:
+        """
+        Ask which Terminal window is in front, if Terminal is (blocking)
+
+        Returns:
+            "x, ,, y, ,, width, ,, height, ,, id" or "NOT_TERMINAL"; None if osascript failed
+        """
         try:
-            result = subprocess.run([
+            result = run_osascript('find_terminal_window', [
                 'osascript',
                 '-e', 'tell application "System Events"',
                 '-e', 'set frontApp to name of first application process whose frontmost is true',
@@ -480,106 +805,173 @@ class ReccliGUI:
                 '-e', 'end if',
                 '-e', 'end tell'
             ], capture_output=True, text=True, timeout=2)
-            debug_log(f"AppleScript result: returncode={result.returncode}, stdout='{result.stdout.strip()}', stderr='{result.stderr.strip()}'")
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout.strip()
-                if output == "NOT_TERMINAL":
-                    # Not focused on terminal - keep last_terminal_id!
-                    self.terminal_window = None
-                    self.current_terminal_id = None
-                    self.terminal_is_frontmost = False
-                    # Don't clear last_terminal_id - we need it when button is clicked
-                    return
-                else:
-                    # Terminal is frontmost
-                    self.terminal_is_frontmost = True
+        except Exception as e:
+            self.log.warning("Exception in find_terminal_window: %s", e)
+            return None
+        self.log.debug("AppleScript result: returncode=%s, stdout='%s', stderr='%s'", result.returncode, result.stdout.strip(), result.stderr.strip())
+        if result.returncode == 0 and result.stdout.strip():
+            return result.stdout.strip()
+        self.log.warning("AppleScript failed or no output")
+        return None
 
-                # Parse output - format is "x, ,, y, ,, width, ,, height, ,, id"
-                # Remove empty strings and extra commas
-                parts = [p.strip() for p in output.replace(',,', ',').split(',') if p.strip()]
-                debug_log(f"Parsed terminal window parts: {parts}")
-                if len(parts) >= 5:
-                    window_id = parts[4]  # Numeric terminal window ID
-                    self.current_terminal_id = window_id
-                    self.last_terminal_id = window_id  # Update last known ID
-                    self.terminal_window = {
-                        'x': int(parts[0]),
-                        'y': int(parts[1]),
-                        'width': int(parts[2]),
-                        'height': int(parts[3]),
-                        'id': window_id
-                    }
-                    debug_log(f"Terminal window found: {self.terminal_window}")
-                else:
-                    debug_log(f"Not enough parts in output: {len(parts)}")
-                    self.terminal_window = None
-                    self.current_terminal_id = None
+    def _apply_front_terminal(self, output: Optional[str]):
+        """Follow the frontmost terminal window (see _query_front_terminal) - Tk thread"""
+        if output is None:
+            self.terminal_window = None
+            self.current_terminal_id = None
+            return
+        if output == "NOT_TERMINAL":
+            # Not focused on terminal - keep last_terminal_id!
+            self.terminal_window = None
+            self.current_terminal_id = None
+            self.terminal_is_frontmost = False
+            # Don't clear last_terminal_id - we need it when button is clicked
+            return
+        # Terminal is frontmost
+        self.terminal_is_frontmost = True
+
+        # Parse output - format is "x, ,, y, ,, width, ,, height, ,, id"
+        # Remove empty strings and extra commas
+        parts = [p.strip() for p in output.replace(',,', ',').split(',') if p.strip()]
+        self.log.debug("Parsed terminal window parts: %s", parts)
+        try:
+            if len(parts) >= 5:
+                window_id = parts[4]  # Numeric terminal window ID
+                self.current_terminal_id = window_id
+                self.last_terminal_id = window_id  # Update last known ID
+                self.terminal_window = {
+                    'x': int(parts[0]),
+                    'y': int(parts[1]),
+                    'width': int(parts[2]),
+                    'height': int(parts[3]),
+                    'id': window_id
+                }
+                self.log.debug("Terminal window found: %s", self.terminal_window)
             else:
-                debug_log(f"AppleScript failed or no output")
+                self.log.debug("Not enough parts in output: %s", len(parts))
                 self.terminal_window = None
                 self.current_terminal_id = None
-        except Exception as e:
-            debug_log(f"Exception in find_terminal_window: {e}")
+        except ValueError as e:
+            self.log.warning("Exception in find_terminal_window: %s", e)
             self.terminal_window = None
             self.current_terminal_id = None
 
-    def track_terminal_position(self):
-        """Continuously track terminal position and update button position"""
-        # Don't update position if user is dragging
-        if not self.is_dragging:
+    def find_terminal_window(self):
+        """Find the active terminal window position using AppleScript"""
+        self._apply_front_terminal(self._query_front_terminal())
+
+    def _query_frontmost_app(self) -> Optional[str]:
+        """Name of the frontmost application (blocking), None if osascript failed"""
+        try:
+            result = run_osascript('frontmost_app', [
+                'osascript',
+                '-e', 'tell application "System Events"',
+                '-e', 'set frontApp to name of first application process whose frontmost is true',
+                '-e', 'return frontApp',
+                '-e', 'end tell'
+            ], capture_output=True, text=True, timeout=1)
+        except Exception:
+            return None
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    def track_terminal_position(self) -> bool:
+        """
+        One tick of terminal position tracking, driven by self.scheduler
+
+        The osascript queries run on the shared pool, so a tick only
+        starts them; _apply_tracking picks up the answer on the Tk thread
+        and wakes the scheduler if anything changed, which keeps it
+        polling at full speed.
+
+        Returns:
+            True while the user drags the button, else False
+        """
+        # Keep ticking fast while the user drags the button
+        if self.is_dragging:
+            return True
+        if self.query_pending:
+            return False
+        self.query_pending = True
+        target_id = self.my_terminal_id
+        if target_id:
             # ALWAYS track only our specific terminal (the one we're attached to)
-            if self.my_terminal_id:
-                # Query all terminal windows and find the one matching my_terminal_id
-                self.find_terminal_by_id(self.my_terminal_id)
+            work = lambda: (self._query_terminal_by_id(target_id), self._query_frontmost_app())
+        else:
+            # Fallback - no terminal ID set yet
+            work = lambda: (self._query_front_terminal(), None)
+        self._in_background(work, self._apply_tracking)
+        return False
+
+    def _apply_tracking(self, answers: Optional[Tuple[Optional[str], Optional[str]]]):
+        """Apply a tracking tick's osascript answers - Tk thread"""
+        self.query_pending = False
+        if self.closed or answers is None:
+            return
+        terminal, front_app = answers
+        was_frontmost = self.terminal_is_frontmost
+        was_hidden = self.popup_hidden
+        changed = False
 
-                # Check if our specific terminal is frontmost
-                try:
-                    result = subprocess.run([
-                        'osascript',
-                        '-e', 'tell application "System Events"',
-                        '-e', 'set frontApp to name of first application process whose frontmost is true',
-                        '-e', 'return frontApp',
-                        '-e', 'end tell'
-                    ], capture_output=True, text=True, timeout=1)
-                    is_terminal_frontmost = result.returncode == 0 and result.stdout.strip() == "Terminal"
-                    # Check if OUR specific terminal is the frontmost one
-                    self.terminal_is_frontmost = is_terminal_frontmost and self.current_terminal_id == self.my_terminal_id
-                except:
-                    self.terminal_is_frontmost = False
+        if self.my_terminal_id:
+            self._apply_terminal_by_id(terminal)
+            if self.closed:
+                return
+            # Check if OUR specific terminal is the frontmost one
+            self.terminal_is_frontmost = front_app == "Terminal" and self.current_terminal_id == self.my_terminal_id
+        else:
+            self._apply_front_terminal(terminal)
+
+        # Simple window layering - just topmost when our terminal is focused
+        try:
+            if self.terminal_is_frontmost:
+                # Our terminal is frontmost
+                self.root.attributes('-topmost', True)
             else:
-                # Fallback - no terminal ID set yet
-                self.find_terminal_window()
+                # Our terminal is NOT frontmost
+                self.root.attributes('-topmost', False)
+        except Exception as e:
+            self.log.warning("Error managing window layering: %s", e)
 
-            # Simple window layering - just topmost when our terminal is focused
-            try:
-                if self.terminal_is_frontmost:
-                    # Our terminal is frontmost
-                    self.root.attributes('-topmost', True)
-                else:
-                    # Our terminal is NOT frontmost
-                    self.root.attributes('-topmost', False)
-            except Exception as e:
-                debug_log(f"Error managing window layering: {e}")
-
-            # Only update button if terminal changed
-            if self.current_terminal_id != self.last_terminal_id:
-                # Redraw button with actual recorder state (source of truth)
-                actual_recording = self.recorder.recording
-                debug_log(f"Terminal changed to {self.current_terminal_id}, recording={actual_recording}")
-                self.draw_button(recording=actual_recording)
-                # Sync GUI state
-                self.recording = actual_recording
-                # Only update last_terminal_id if current is not None (preserve last known terminal)
-                if self.current_terminal_id is not None:
-                    self.last_terminal_id = self.current_terminal_id
-
-            # Only update position if it changed
-            if self.terminal_window != self.last_terminal_position:
-                debug_log(f"Position changed, updating window position")
-                self.position_window()
-                self.last_terminal_position = self.terminal_window.copy() if self.terminal_window else None
-        # Check position every 50ms for smooth tracking
-        self.root.after(50, self.track_terminal_position)
+        # Only update button if terminal changed
+        if self.current_terminal_id != self.last_terminal_id:
+            changed = True
+            # Redraw button with actual recorder state (source of truth)
+            actual_recording = self.recorder.recording
+            self.log.debug("Terminal changed to %s, recording=%s", self.current_terminal_id, actual_recording)
+            self.draw_button(recording=actual_recording)
+            # Sync GUI state
+            self.recording = actual_recording
+            # Only update last_terminal_id if current is not None (preserve last known terminal)
+            if self.current_terminal_id is not None:
+                self.last_terminal_id = self.current_terminal_id
+
+        # Only update position if it changed
+        if self.terminal_window != self.last_terminal_position:
+            self.log.debug("Position changed, updating window position")
+            changed = True
+            self.position_window()
+            self.last_terminal_position = self.terminal_window.copy() if self.terminal_window else None
+
+        if changed or was_frontmost != self.terminal_is_frontmost or was_hidden != self.popup_hidden:
+            self.wake_tracking()
+
+    def report_time_to_button(self):
+        """Log how long the button took to appear after the watcher asked for it"""
+        self.time_to_button = time.time() - self.requested_at
+        self.log.debug("time-to-button %.1fms", self.time_to_button * 1000)
+
+    def wake_tracking(self, event=None):
+        """Poll immediately and at full speed (mouse, drag or focus activity)"""
+        if self.scheduler:
+            self.scheduler.wake()
+
+    def report_tracking_stats(self):
+        """Log tick rate and per-tick cost so idle CPU use can be verified"""
+        if self.closed or not self.scheduler:
+            return
+        self.log.debug("tracking stats %s", self.scheduler.stats())
+        self.scheduler.reset_stats()
+        self.root.after(TRACK_STATS_INTERVAL * 1000, self.report_tracking_stats)
 
     def position_window(self):
         """Position window in top-right corner of terminal or screen"""
@@ -681,7 +1073,7 @@ class ReccliGUI:
             end tell
             '''
 
-            result = subprocess.run(
+            result = run_osascript('check_active_tools',
                 ['osascript', '-e', script],
                 capture_output=True,
                 text=True,
@@ -690,7 +1082,7 @@ class ReccliGUI:
 
             return result.returncode == 0 and "FOUND" in result.stdout
         except Exception as e:
-            debug_log(f"Error checking for active tools: {e}")
+            self.log.warning("Error checking for active tools: %s", e)
             return False
 
     def show_tool_warning(self):
@@ -725,15 +1117,23 @@ class ReccliGUI:
         tooltip.after(3000, tooltip.destroy)
 
     def start_recording(self):
-        """Start recording"""
+        """Start recording - once a check for running tools comes back from the background"""
+        self.busy = True
+        self._in_background(self._check_for_active_tools, self._choose_tool, tk=self.master)
+
+    def _choose_tool(self, tools_running: Optional[bool]):
+        """Ask which tool to launch and start recording (Tk thread)"""
+        self.busy = False
+        if self.closed:
+            return
         # Check if tools are already running
-        if self._check_for_active_tools():
+        if tools_running:
             self.show_tool_warning()
             return
 
         # Always use our specific terminal ID (the one this instance is attached to)
         self.target_terminal_id = self.my_terminal_id
-        debug_log(f"Start recording - target_terminal_id set to: {self.target_terminal_id} (my_terminal_id={self.my_terminal_id})")
+        self.log.debug("Start recording - target_terminal_id set to: %s (my_terminal_id=%s)", self.target_terminal_id, self.my_terminal_id)
 
         try:
             # Ask user which tool to launch
@@ -791,21 +1191,17 @@ class ReccliGUI:
             tool = selected_tool.get()
             dialog.destroy()
 
+            terminal_id = self.target_terminal_id
             if tool == "none":
-                success, result = self.recorder.start(auto_launch_claude=False, terminal_id=self.target_terminal_id)
+                start = lambda: self.recorder.start(auto_launch_claude=False, terminal_id=terminal_id)
                 notification = "Recording started"
             else:
-                success, result = self.recorder.start(auto_launch_claude=True, tool_name=tool, terminal_id=self.target_terminal_id)
+                start = lambda: self.recorder.start(auto_launch_claude=True, tool_name=tool, terminal_id=terminal_id)
                 notification = f"Recording started - {tool} launching"
-
-            if success:
-                self.recording = True
-                self.recording_start_time = datetime.datetime.now()
-                debug_log(f"!!! RECORDING STARTED: terminal_id={self.target_terminal_id}, recording={self.recording}")
-                self.draw_button(recording=True)
-                self.show_notification(notification, "#27ae60")
-            else:
-                messagebox.showerror("Error", f"Failed to start: {result}")
+            # Typing into the terminal takes a second or more - not on the Tk thread
+            self.busy = True
+            self._in_background(start, lambda outcome: self._recording_started(outcome, notification),
+                                tk=self.master)
 
         def cancel():
             dialog.destroy()
@@ -818,9 +1214,52 @@ class ReccliGUI:
 
         dialog.wait_window()
 
+    def _recording_started(self, outcome: Optional[Tuple[bool, str]], notification: str):
+        """Show a recording started in the background (Tk thread)"""
+        self.busy = False
+        success, result = outcome or (False, "Failed to start recording")
+        if self.closed:
+            # The button went away meanwhile - don't leave the recording running
+            if success:
+                self._in_background(self.recorder.stop, self._count_recording, tk=self.master)
+            return
+        if success:
+            # Started here, not with the recorder: cProfile only sees the thread that enables it
+            from src.core import Profiler
+            self.profiler = Profiler(f"record-{self.target_terminal_id or 'session'}").start()
+            self.recording = True
+            self.recording_start_time = datetime.datetime.now()
+            self.log.info("Recording started: terminal_id=%s, recording=%s", self.target_terminal_id, self.recording)
+            self.draw_button(recording=True)
+            self.show_notification(notification, "#27ae60")
+        else:
+            messagebox.showerror("Error", f"Failed to start: {result}")
+
     def stop_recording(self):
-        """Stop recording"""
-        success, result, duration = self.recorder.stop()
+        """Stop recording - the keystrokes and the wait for asciinema run in the background"""
+        self.busy = True
+        self._in_background(self.recorder.stop, self._recording_stopped, tk=self.master)
+
+    def _stop_profiler(self):
+        """Write the profile of a recording that ended (Tk thread, where it started)"""
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
+
+    def _count_recording(self, outcome: Optional[Tuple[bool, str, float]]):
+        """Add a stopped recording to the stats"""
+        self._stop_profiler()
+        if outcome and outcome[0]:
+            self.config.increment_stats(outcome[2])
+
+    def _recording_stopped(self, outcome: Optional[Tuple[bool, str, float]]):
+        """Show a stopped recording and offer to export it (Tk thread)"""
+        self.busy = False
+        self._stop_profiler()
+        if self.closed:
+            self._count_recording(outcome)
+            return
+        success, result, duration = outcome or (False, "Failed to stop recording", 0)
         if success:
             self.recording = False
             print(f"DEBUG: Recording stopped, showing 'Stopped' state")
@@ -835,7 +1274,7 @@ class ReccliGUI:
             self.config.increment_stats(duration)
 
             # Show export dialog if available
-            if HAS_EXPORT:
+            if load_export():
                 self.show_export_dialog(Path(result), recorded_duration)
             else:
                 # Just show notification
@@ -883,6 +1322,11 @@ class ReccliGUI:
         dialog = ExportDialog(self.root, session_file, metadata, self.config.config)
         result = dialog.show()
 
+        # Exported sessions are the last to be evicted
+        if result:
+            from src.storage import SessionIndex
+            SessionIndex().touch(session_file)
+
         if result:
             # Successfully exported
             filename = result['output_file'].name
@@ -919,8 +1363,7 @@ class ReccliGUI:
 
     def show_settings(self):
         """Show settings dialog"""
-        if HAS_EXPORT:
-            from src.ui import SettingsDialog
+        if load_export():
             dialog = SettingsDialog(self.root, self.config.config, self.config.save_config)
             dialog.show()
         else:
@@ -970,6 +1413,7 @@ Share your stats on X!"""
         """Start drag tracking"""
         self.start_pos = (event.x, event.y)
         self.is_dragging = False
+        self.wake_tracking()
 
     def on_drag(self, event):
         """Handle window dragging"""
@@ -982,7 +1426,7 @@ Share your stats on X!"""
     def on_release(self, event):
         """Handle mouse button release"""
         # Only trigger click if we weren't dragging
-        if not self.is_dragging:
+        if not self.is_dragging and not self.busy:
             # Check actual recorder state (source of truth)
             actual_recording = self.recorder.recording
             print(f"Button clicked! GUI recording={self.recording}, Recorder recording={actual_recording}")
@@ -993,24 +1437,386 @@ Share your stats on X!"""
         # Reset dragging state
         self.is_dragging = False
         self.start_pos = None
+        self.wake_tracking()
 
     def quit(self):
         """Quit application"""
         if self.recording:
-            if messagebox.askyesno("Recording in progress", "Stop recording and quit?"):
-                self.stop_recording()
-            else:
+            if not messagebox.askyesno("Recording in progress", "Stop recording and quit?"):
                 return
-        self.root.quit()
+            if not self.on_close:
+                # Our own process is about to exit - stop (and offer the export) first
+                self._recording_stopped(self.recorder.stop())
+        if self.on_close:
+            self.close()  # Stops the recording itself
+        else:
+            self.root.quit()
+
+    def close(self):
+        """Destroy a hosted button without prompting and notify the host, stopping its recording first"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.scheduler:
+            self.scheduler.stop()
+        if self.recorder.recording and not self.busy:
+            # Finish the session rather than leave asciinema running and the
+            # file flagged as recording (a start/stop in flight finishes itself)
+            self.log.info("Closing while recording - stopping it")
+            if self.master is not None:
+                self._in_background(self.recorder.stop, self._count_recording, tk=self.master)
+            else:
+                self._count_recording(self.recorder.stop())
+        self.root.destroy()
+        if self.on_close:
+            self.on_close(self.my_terminal_id)
 
     def run(self):
         """Run the GUI"""
         self.root.mainloop()
 
+class ReccliHost:
+    """One process, one Tk root, one floating button per terminal window"""
+
+    def __init__(self):
+        self.config = ReccliConfig()
+        self.windows: Dict[str, ReccliGUI] = {}
+        self.commands = queue.Queue()  # (cmd, terminal_id) from the socket thread
+
+        # Hidden root - every button is a Toplevel of it
+        self.root = tk.Tk()
+        self.root.withdraw()
+        # Looked up once, not by every button on the Tk thread
+        self.dark_mode = ReccliGUI._detect_dark_mode()
+
+        from src.core import UnixCommandServer
+        self.server = UnixCommandServer(HOST_SOCKET, self._handle_request)
+
+    def _handle_request(self, request: Dict) -> Dict:
+        """Socket-thread handler - only queues work for the Tk thread"""
+        cmd = request.get('cmd')
+        if cmd in ('add', 'remove'):
+            terminal_id = str(request.get('terminal_id', '')).strip()
+            if not terminal_id:
+                return {'ok': False, 'error': 'terminal_id required'}
+            self.commands.put((cmd, terminal_id, request.get('requested_at')))
+            return {'ok': True, 'pid': os.getpid()}
+        if cmd == 'list':
+            return {'ok': True, 'terminals': sorted(self.windows)}
+        if cmd == 'stats':
+            # Per-window tracking tick rate and cost
+            return {'ok': True, 'tracking': {
+                terminal_id: dict(gui.scheduler.stats(), time_to_button_ms=(
+                    round(gui.time_to_button * 1000, 1) if gui.time_to_button else None))
+                for terminal_id, gui in list(self.windows.items()) if gui.scheduler
+            }}
+        return {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+    def _drain_commands(self):
+        """Apply queued add/remove commands on the Tk thread"""
+        while True:
+            try:
+                cmd, terminal_id, requested_at = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if cmd == 'add':
+                self.add_window(terminal_id, requested_at)
+            else:
+                self.remove_window(terminal_id)
+        self.root.after(100, self._drain_commands)
+
+    def add_window(self, terminal_id: str, requested_at: Optional[float] = None):
+        """Create a floating button for a terminal (no-op if it already has one)"""
+        if terminal_id in self.windows:
+            return
+        log.info("Adding window for terminal %s", terminal_id)
+        try:
+            gui = ReccliGUI(terminal_id=terminal_id, master=self.root, config=self.config,
+                            dark_mode=self.dark_mode,
+                            on_close=self._window_closed, requested_at=requested_at)
+        except Exception as e:
+            log.warning("Failed to create window for %s: %s", terminal_id, e)
+            return
+        # The button may have found its terminal gone and closed during init
+        if not gui.closed:
+            self.windows[terminal_id] = gui
+
+    def remove_window(self, terminal_id: str):
+        """Close the floating button for a terminal"""
+        gui = self.windows.get(terminal_id)
+        if gui:
+            log.info("Removing window for terminal %s", terminal_id)
+            gui.close()
+
+    def _window_closed(self, terminal_id: str):
+        """Forget a button once it has closed itself or been removed"""
+        self.windows.pop(terminal_id, None)
+
+    def run(self):
+        """Serve add/remove commands and run the shared Tk mainloop"""
+        self.server.start()
+        log.info("Listening on %s (PID: %s)", HOST_SOCKET, os.getpid())
+        try:
+            self._drain_commands()
+            self.root.mainloop()
+        finally:
+            self.server.close()
+
+class RecordingDaemon:
+    """
+    Background owner of CLIRecorder instances, driven over a Unix socket
+
+    Lets 'reccli start'/'reccli stop' (and scripts or CI jobs speaking
+    the same line-delimited JSON) control recordings without the GUI:
+    start returns as soon as the recording runs, and the recorder lives
+    on here until stopped. Recordings whose command exits by itself are
+    finished in the background and stay listed until stopped.
+    """
+
+    def __init__(self):
+        import threading
+        from src.core import UnixCommandServer
+
+        self.recorders: Dict[str, CLIRecorder] = {}
+        self.commands: Dict[str, List[str]] = {}
+        self.finished: Dict[str, Dict] = {}
+        self.profiler = None  # Spans the time any recording runs, with --profile / $RECCLI_PROFILE
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.server = UnixCommandServer(DAEMON_SOCKET, self._handle_request)
+
+    def _handle_request(self, request: Dict) -> Dict:
+        """Socket-thread handler for start/stop/list/stats/shutdown"""
+        cmd = request.get('cmd')
+        if cmd == 'start':
+            return self.start(request.get('command'), request.get('output'), request.get('cwd'))
+        if cmd == 'stop':
+            return self.stop(request.get('id'))
+        if cmd == 'list':
+            return {'ok': True, 'recordings': self.list()}
+        if cmd == 'stats':
+            from src.core import RecordingEngine
+            return {'ok': True, **RecordingEngine.shared().stats()}
+        if cmd == 'shutdown':
+            self.stopping.set()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+    def _new_id(self, output_dir: Path, name: str) -> str:
+        """name, or name_2, name_3... if a recording or file already has it"""
+        candidate, n = name, 1
+        while (candidate in self.recorders or candidate in self.finished
+               or (output_dir / f"{candidate}.cast").exists()):
+            n += 1
+            candidate = f"{name}_{n}"
+        return candidate
+
+    def start(self, command: Optional[List[str]] = None, output: Optional[str] = None,
+              cwd: Optional[str] = None) -> Dict:
+        """
+        Start a recording
+
+        Args:
+            command: argv to record headless; None records the frontmost
+                     terminal window instead (macOS)
+            output: .cast path (default: ~/.reccli/recordings/session_<time>.cast);
+                    relative to cwd, not to the daemon's working directory
+            cwd: Working directory for the command
+
+        Returns:
+            Response with the recording's id and file
+        """
+        if command is not None and (not isinstance(command, list) or not command
+                                    or not all(isinstance(arg, str) for arg in command)):
+            return {'ok': False, 'error': 'command must be a non-empty list of strings'}
+        output_path = Path(output).expanduser() if output else None
+        if output_path and not output_path.is_absolute():
+            output_path = Path(cwd or Path.home()) / output_path
+        with self.lock:
+            recorder = CLIRecorder(output_path.parent if output_path else None)
+            name = output_path.stem if output_path else \
+                f"session_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            recording_id = self._new_id(recorder.output_dir, name)
+            ok, message = recorder.start(recording_id, command=command, cwd=cwd)
+            if not ok:
+                return {'ok': False, 'error': message}
+            self.recorders[recording_id] = recorder
+            self.commands[recording_id] = command or []
+            self._update_profiler()
+        log.info("Started recording %s -> %s", recording_id, message)
+        return {'ok': True, 'id': recording_id, 'file': message,
+                'pid': recorder.pty.pid if recorder.pty else None}
+
+    def stop(self, recording_id: Optional[str] = None) -> Dict:
+        """
+        Stop one recording, or every one if recording_id is None
+
+        Returns:
+            Response with the stopped recordings' id, file and duration
+        """
+        with self.lock:
+            if recording_id is not None and recording_id not in self.recorders \
+                    and recording_id not in self.finished:
+                return {'ok': False, 'error': f"No recording {recording_id}"}
+            ids = [recording_id] if recording_id is not None else list(self.recorders) + list(self.finished)
+            recorders = {rid: self.recorders.pop(rid) for rid in ids if rid in self.recorders}
+            finished = [self.finished.pop(rid) for rid in ids if rid in self.finished]
+            for rid in ids:
+                self.commands.pop(rid, None)
+
+        # Outside the lock (list and start keep answering), and concurrently:
+        # each headless command may take up to three STOP_GRACE steps to exit
+        sessions = [recorder.pty.session for recorder in recorders.values() if recorder.pty and recorder.pty.session]
+        if sessions:
+            from src.core import RecordingEngine
+            engine = RecordingEngine.shared()
+            engine.call(engine.stop_all(sessions=sessions))
+        stopped = []
+        for rid, recorder in recorders.items():
+            _, output_file, duration = recorder.stop()  # Headless ones have already exited
+            stopped.append({'id': rid, 'file': output_file, 'duration': round(duration, 3)})
+        stopped.extend(finished)
+
+        with self.lock:
+            self._update_profiler()
+        for entry in stopped:
+            log.info("Stopped recording %s (%.1fs)", entry['id'], entry['duration'])
+        return {'ok': True, 'stopped': stopped}
+
+    def list(self) -> List[Dict]:
+        """Running and finished-but-not-stopped recordings, oldest first"""
+        with self.lock:
+            recordings = [{
+                'id': rid,
+                'file': str(recorder.output_file),
+                'command': self.commands.get(rid, []),
+                'pid': recorder.pty.pid if recorder.pty else None,
+                'started': recorder.start_time,
+                'duration': round(time.time() - recorder.start_time, 3) if recorder.start_time else 0,
+                'running': True,
+            } for rid, recorder in self.recorders.items()]
+            recordings.extend(dict(entry, running=False) for entry in self.finished.values())
+        return sorted(recordings, key=lambda r: r['started'] or 0)
+
+    def _reap(self):
+        """Finish headless recordings whose command has exited"""
+        with self.lock:
+            done = [rid for rid, recorder in self.recorders.items() if recorder.pty and not recorder.pty.running]
+            for rid in done:
+                recorder = self.recorders.pop(rid)
+                started = recorder.start_time
+                _, output_file, duration = recorder.stop()
+                self.finished[rid] = {'id': rid, 'file': output_file, 'command': self.commands.pop(rid, []),
+                                      'pid': None, 'started': started, 'duration': round(duration, 3)}
+                log.info("Recording %s finished on its own (%.1fs)", rid, duration)
+            if done:
+                self._update_profiler()
+
+    def _update_profiler(self):
+        """
+        Profile the recording loop while any headless recording runs
+
+        Recordings run on the RecordingEngine's loop thread, and cProfile
+        only sees the thread that enables it - so the profiler is started
+        and stopped there. Call with self.lock held.
+        """
+        from src.core.profiling import profiling_enabled
+        running = any(recorder.pty for recorder in self.recorders.values())
+        if running and self.profiler is None and profiling_enabled():
+            from src.core import Profiler, RecordingEngine
+            self.profiler = RecordingEngine.shared().run_on_loop(Profiler('daemon-recordings').start)
+        elif not running and self.profiler is not None:
+            from src.core import RecordingEngine
+            path = RecordingEngine.shared().run_on_loop(self.profiler.stop)
+            self.profiler = None
+            if path:
+                log.info("Recording profile written to %s", path)
+
+    def run(self):
+        """Serve until a shutdown command or SIGTERM, then stop every recording"""
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stopping.set())
+        self.server.start()
+        log.info("Listening on %s (PID: %s)", DAEMON_SOCKET, os.getpid())
+        try:
+            while not self.stopping.wait(DAEMON_REAP_INTERVAL):
+                self._reap()
+        finally:
+            self.server.close()
+            self.stop()
+
+def daemon_request(request: Dict, start: bool = False, timeout: float = 10.0) -> Optional[Dict]:
+    """
+    Send a command to the recording daemon
+
+    Args:
+        request: Request dict (see RecordingDaemon)
+        start: Start the daemon first if it isn't running
+        timeout: Seconds to wait for the reply
+
+    Returns:
+        Response dict, or None if no daemon answered in time
+    """
+    from src.core import send_command
+
+    if start and ensure_service(DAEMON_SOCKET, 'daemon') is None:
+        return None
+    return send_command(DAEMON_SOCKET, request, timeout=timeout)
+
+def start_recording_cli(command: List[str], output: Optional[str] = None) -> bool:
+    """
+    'reccli start' - record a command (or, on macOS with no command, the frontmost terminal)
+
+    Returns:
+        True if the recording started
+    """
+    # The daemon runs elsewhere - a relative --output means relative to here
+    output = str(Path(output).expanduser().resolve()) if output else None
+    response = daemon_request({'cmd': 'start', 'command': command or None, 'output': output,
+                               'cwd': os.getcwd()}, start=True)
+    if response is None:
+        print("❌ Couldn't reach the recording daemon")
+        return False
+    if not response.get('ok'):
+        print(f"❌ {response.get('error')}")
+        if not command:
+            print("   Record a command instead: reccli start -- COMMAND [ARGS...]")
+        return False
+    print(f"🔴 Recording {response['id']} → {response['file']}")
+    return True
+
+def stop_recording_cli(recording_id: Optional[str] = None) -> bool:
+    """
+    'reccli stop' - stop one recording, or all of them
+
+    Returns:
+        True if something was stopped
+    """
+    from src.core import send_command
+    from src.core.recording import STOP_GRACE
+
+    # Recordings stop concurrently, each within three signals and the cast
+    # being finished, up to STOP_GRACE apiece
+    response = daemon_request({'cmd': 'stop', 'id': recording_id}, timeout=4 * STOP_GRACE + 5.0)
+    if response is None:
+        if send_command(DAEMON_SOCKET, {'cmd': 'ping'}, timeout=0.5) is not None:
+            print("❌ The recording daemon is still stopping recordings - check with 'reccli status'")
+        else:
+            print("❌ No recordings running (the recording daemon isn't)")
+        return False
+    if not response.get('ok'):
+        print(f"❌ {response.get('error')}")
+        return False
+    if not response['stopped']:
+        print("❌ No recordings running")
+        return False
+    for entry in response['stopped']:
+        print(f"⏹  Stopped {entry['id']} ({entry['duration']:.1f}s) → {entry['file']}")
+    return True
+
 def get_all_terminal_ids():
     """Get IDs of all visible, non-minimized Terminal windows"""
     try:
-        result = subprocess.run([
+        result = run_osascript('list_visible_windows', [
             'osascript',
             '-e', 'tell application "Terminal"',
             '-e', 'set windowIDs to {}',
@@ -1026,17 +1832,23 @@ def get_all_terminal_ids():
         if result.returncode == 0 and result.stdout.strip():
             # Parse comma-separated IDs
             ids = [id.strip() for id in result.stdout.strip().split(',') if id.strip()]
-            debug_log(f"Found visible terminal IDs: {ids}")
+            log.debug("Found visible terminal IDs: %s", ids)
             return ids
         return []
     except Exception as e:
-        debug_log(f"Error getting terminal IDs: {e}")
+        log.warning("Error getting terminal IDs: %s", e)
         return []
 
-def get_all_terminal_ids_including_minimized():
-    """Get IDs of ALL Terminal windows, including minimized ones"""
+def get_all_terminal_ids_including_minimized() -> Optional[List[str]]:
+    """
+    Get IDs of ALL Terminal windows, including minimized ones
+
+    Returns:
+        Window IDs, or None if Terminal couldn't be queried - not the same
+        as no windows, which would close every popup
+    """
     try:
-        result = subprocess.run([
+        result = run_osascript('list_all_windows', [
             'osascript',
             '-e', 'tell application "Terminal"',
             '-e', 'set windowIDs to {}',
@@ -1051,13 +1863,118 @@ def get_all_terminal_ids_including_minimized():
             # Parse comma-separated IDs
             ids = [id.strip() for id in result.stdout.strip().split(',') if id.strip()]
             return ids
-        return []
+        if result.returncode == 0:
+            return []
+        log.warning("Listing terminal windows failed: %s", result.stderr.strip())
+        return None
     except Exception as e:
-        debug_log(f"Error getting all terminal IDs: {e}")
-        return []
+        log.warning("Error getting all terminal IDs: %s", e)
+        return None
+
+def ensure_service(socket_path: Path, command: str) -> Optional[int]:
+    """
+    Return the PID of a reccli background service, starting it if needed
+
+    Args:
+        socket_path: The service's Unix socket
+        command: reccli subcommand that runs the service ('host', 'zygote')
+
+    Returns:
+        Service PID, or None if it could not be started
+    """
+    from src.core import send_command
+
+    response = send_command(socket_path, {'cmd': 'ping'}, timeout=0.5)
+    if response:
+        return response.get('pid')
+
+    script_path = Path(__file__).resolve()
+    # --profile reaches the service through the environment it inherits
+    from src.core.profiling import PROFILE_ENV, profiling_enabled
+    env = dict(os.environ, **{PROFILE_ENV: '1'}) if profiling_enabled() else None
+    try:
+        subprocess.Popen(
+            [sys.executable, str(script_path), command],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            env=env
+        )
+    except Exception as e:
+        log.warning("Failed to start reccli %s: %s", command, e)
+        return None
+
+    # Wait for the service to bind its socket
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        response = send_command(socket_path, {'cmd': 'ping'}, timeout=0.5)
+        if response:
+            log.info("reccli %s started (PID: %s)", command, response.get('pid'))
+            return response.get('pid')
+        time.sleep(0.1)
+    return None
+
+def ensure_gui_host() -> Optional[int]:
+    """Return the PID of the running GUI host, starting one if needed"""
+    return ensure_service(HOST_SOCKET, 'host')
+
+def host_add_window(term_id: str) -> Optional[int]:
+    """
+    Ask the GUI host to create a floating button for a terminal
+
+    Returns:
+        Host PID, or None if the host didn't accept the window
+    """
+    from src.core import send_command
+
+    response = send_command(HOST_SOCKET, {'cmd': 'add', 'terminal_id': term_id, 'requested_at': time.time()})
+    if response and response.get('ok'):
+        return response.get('pid')
+    return None
+
+def host_remove_window(term_id: str) -> bool:
+    """Ask the GUI host to close the floating button for a terminal"""
+    from src.core import send_command
+
+    response = send_command(HOST_SOCKET, {'cmd': 'remove', 'terminal_id': term_id})
+    return bool(response and response.get('ok'))
+
+def spawn_gui_process(term_id: str) -> Optional[int]:
+    """
+    Start a separate GUI process for a terminal (isolated mode)
+
+    Forks from the pre-warmed zygote when one is running, falling back to
+    a cold interpreter start.
+
+    Returns:
+        PID of the GUI process, or None on failure
+    """
+    from src.core import zygote_spawn
+
+    argv = ['gui', '--terminal-id', term_id, '--requested-at', repr(time.time())]
+
+    pid = zygote_spawn(ZYGOTE_SOCKET, argv)
+    if pid is None and ensure_service(ZYGOTE_SOCKET, 'zygote'):
+        pid = zygote_spawn(ZYGOTE_SOCKET, argv)
+    if pid is not None:
+        return pid
+
+    log.warning("Zygote unavailable, cold-starting GUI for terminal %s", term_id)
+    script_path = Path(__file__).resolve()
+    try:
+        proc = subprocess.Popen(
+            [sys.executable, str(script_path)] + argv,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        return proc.pid
+    except Exception as e:
+        log.warning("Error launching GUI for %s: %s", term_id, e)
+        return None
 
 def launch_all_terminals():
-    """Launch one reccli instance for each open terminal window"""
+    """Add one floating button per open terminal window to the GUI host"""
     terminal_ids = get_all_terminal_ids()
 
     if not terminal_ids:
@@ -1067,173 +1984,719 @@ def launch_all_terminals():
     print(f"📺 Found {len(terminal_ids)} Terminal windows")
     print(f"🚀 Launching reccli for each terminal...")
 
-    # Store process info in a file for tracking
-    processes_file = Path("/tmp/reccli_processes.json")
-    processes = {}
-
-    script_path = Path(__file__).resolve()
+    host_pid = ensure_gui_host()
+    if not host_pid:
+        print("❌ Failed to start the reccli GUI host")
+        return
 
+    processes = {}
     for term_id in terminal_ids:
-        try:
-            # Launch reccli in background for this specific terminal
-            # Use --terminal-id to specify which terminal to attach to
-            proc = subprocess.Popen(
-                [sys.executable, str(script_path), 'gui', '--terminal-id', term_id],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True
-            )
-            processes[term_id] = proc.pid
-            print(f"  ✓ Launched for terminal {term_id} (PID: {proc.pid})")
-        except Exception as e:
-            print(f"  ✗ Failed to launch for terminal {term_id}: {e}")
+        if host_add_window(term_id):
+            processes[term_id] = host_pid
+            print(f"  ✓ Launched for terminal {term_id} (host PID: {host_pid})")
+        else:
+            print(f"  ✗ Failed to launch for terminal {term_id}")
 
-    # Save process info
-    with open(processes_file, 'w') as f:
-        json.dump(processes, f, indent=2)
+    # Record process info for watch/killall/status
+    from src.core import ProcessRegistry
+    registry = ProcessRegistry()
+    registry.update(added=processes)
 
-    print(f"\n✅ Launched {len(processes)} reccli instances")
-    print(f"📝 Process info saved to {processes_file}")
+    print(f"\n✅ Launched {len(processes)} reccli windows")
+    print(f"📝 Process info saved to {registry.path}")
 
 def killall_reccli():
     """Kill all running reccli instances"""
+    from src.core import ProcessRegistry, pid_commands
+
     try:
-        result = subprocess.run(['pkill', '-f', 'reccli.py gui'], capture_output=True, text=True)
+        registry = ProcessRegistry()
+
+        # Registered processes first - only those that are still reccli (a
+        # stale entry's PID may since have gone to an unrelated process)
+        for pid, command in pid_commands(registry.alive().values()).items():
+            if 'reccli.py' not in command:
+                log.info("Not killing PID %s - no longer reccli: %s", pid, command)
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+        # Recordings owned by the daemon are stopped cleanly, not killed
+        from src.core import send_command
+        send_command(DAEMON_SOCKET, {'cmd': 'shutdown'}, timeout=0.5)
+
+        # Unregistered GUI processes, the GUI host and the zygote
+        subprocess.run(['pkill', '-f', 'reccli.py (gui|host|zygote)'], capture_output=True, text=True)
         print("✅ All reccli instances stopped")
 
-        # Clean up tracking file
-        processes_file = Path("/tmp/reccli_processes.json")
-        if processes_file.exists():
-            processes_file.unlink()
-            print("📝 Cleaned up process tracking file")
+        for socket_path in (HOST_SOCKET, ZYGOTE_SOCKET):
+            if socket_path.exists():
+                socket_path.unlink()
+
+        # Empty the registry under its lock rather than deleting it from
+        # under a running watcher
+        registry.clear()
+        print("📝 Cleared process registry")
     except Exception as e:
         print(f"❌ Error stopping instances: {e}")
 
-def watch_terminals():
-    """Watch for new Terminal windows and auto-launch reccli instances"""
+def watch_terminals(backend=None, isolated=False, sink=None, duration=None):
+    """
+    Watch for Terminal windows opening and closing and keep the popups in sync
+
+    Args:
+        backend: WindowBackend to take events from (osascript polling if None)
+        isolated: One GUI process per terminal, forked from the zygote,
+                  instead of a window in the shared GUI host
+        sink: (add_window, remove_window) replacing the GUI entirely - for
+              benchmarks; add_window returns a PID or None
+        duration: Stop after this many seconds (runs until Ctrl+C if None)
+    """
     print("👀 RecCli watcher started")
     print("   Monitoring for new Terminal windows...")
     print("   Press Ctrl+C to stop")
 
-    processes_file = Path("/tmp/reccli_processes.json")
-    script_path = Path(__file__).resolve()
-
-    # Track which terminals we've already launched for
-    tracked_terminals = set()
+    from src.core import UnixCommandServer, send_command, ProcessRegistry
+    from src.watcher import PollingBackend, WindowEvent
+
+    if backend is None:
+        # Get ALL terminals (including minimized and across Spaces)
+        # Don't use get_all_terminal_ids() because it filters by 'visible'
+        # which can be false when terminal is on different Space
+        backend = PollingBackend(get_all_terminal_ids_including_minimized)
+
+    use_host = not isolated and sink is None
+    registry = ProcessRegistry() if sink is None else None
+    if sink:
+        add_window, remove_window = sink
+    elif isolated:
+        ensure_service(ZYGOTE_SOCKET, 'zygote')
+        # Isolated popups quit by themselves when their terminal closes
+        add_window, remove_window = spawn_gui_process, lambda term_id: None
+    else:
+        add_window, remove_window = host_add_window, host_remove_window
 
-    # Load existing processes if any
-    if processes_file.exists():
-        try:
-            with open(processes_file, 'r') as f:
-                existing = json.load(f)
-                tracked_terminals = set(existing.keys())
-                debug_log(f"Watcher: Loaded {len(tracked_terminals)} existing terminals: {tracked_terminals}")
-        except:
-            pass
+    def handle_request(request):
+        # 'reccli notify' (e.g. from a shell startup hook) wakes us immediately
+        if request.get('cmd') == 'wake':
+            backend.wake()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown command: {request.get('cmd')}"}
 
+    wake_server = UnixCommandServer(WATCHER_SOCKET, handle_request)
     try:
-        while True:
-            # Get ALL terminals (including minimized and across Spaces)
-            # Don't use get_all_terminal_ids() because it filters by 'visible'
-            # which can be false when terminal is on different Space
-            all_terminals = set(get_all_terminal_ids_including_minimized())
-
-            # Find new terminals (in all_terminals but not tracked)
-            new_terminals = all_terminals - tracked_terminals
-
-            # Find closed terminals (tracked but not in all_terminals)
-            # This only removes from tracking when terminal is actually closed
-            closed_terminals = tracked_terminals - all_terminals
-
-            # Launch popups for new terminals
-            for term_id in new_terminals:
-                # Double-check: is there already a running process for this terminal?
-                # This prevents race conditions during Space changes
-                existing_pid = None
-                if processes_file.exists():
-                    try:
-                        with open(processes_file, 'r') as f:
-                            processes = json.load(f)
-                            existing_pid = processes.get(term_id)
-                    except:
-                        pass
-
-                # Check if existing process is still alive
-                if existing_pid:
-                    try:
-                        os.kill(int(existing_pid), 0)  # Signal 0 = check if process exists
-                        debug_log(f"Watcher: Terminal {term_id} already has running popup (PID: {existing_pid}), skipping")
-                        tracked_terminals.add(term_id)  # Add to tracking to prevent future attempts
-                        continue  # Skip launching duplicate
-                    except (OSError, ValueError):
-                        # Process is dead, safe to launch new one
-                        debug_log(f"Watcher: Terminal {term_id} had dead process {existing_pid}, launching new one")
-                        pass
+        wake_server.start()
+    except (OSError, RuntimeError) as e:
+        log.warning("Wake socket unavailable: %s", e)
+        wake_server = None
+
+    # Retention (quota, age limits, compression) runs in our idle time
+    retention = None
+    if sink is None:
+        from src.storage import RetentionEngine, RetentionPolicy, RetentionWorker
+        policy = RetentionPolicy.from_config(ReccliConfig().config)
+        if policy.enabled:
+            retention = RetentionWorker(RetentionEngine(policy))
+            retention.start()
+
+    host_pid = None
+    deadline = time.monotonic() + duration if duration else None
+    # The backend reports a window once - a popup that failed to open is
+    # retried from here (terminal_id -> time.monotonic() to retry at)
+    retry_at: Dict[str, float] = {}
 
-                try:
-                    proc = subprocess.Popen(
-                        [sys.executable, str(script_path), 'gui', '--terminal-id', term_id],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                        start_new_session=True
-                    )
-                    print(f"  ✓ Launched reccli for new terminal {term_id} (PID: {proc.pid})")
-                    debug_log(f"Watcher: Launched for new terminal {term_id}, PID: {proc.pid}")
-                    tracked_terminals.add(term_id)
-
-                    # Update processes file
-                    if processes_file.exists():
-                        with open(processes_file, 'r') as f:
-                            processes = json.load(f)
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            if use_host:
+                # (Re)start the host if it is not running - a fresh host has no
+                # windows, so every known terminal must be re-added
+                response = send_command(HOST_SOCKET, {'cmd': 'ping'}, timeout=0.5)
+                if not response or response.get('pid') != host_pid:
+                    host_pid = ensure_gui_host()
+                    log.info("Using GUI host PID %s", host_pid)
+                    if not host_pid:
+                        print("  ✗ Failed to start reccli GUI host, retrying")
+                        time.sleep(2)
+                        continue
+                    for term_id in sorted(backend.known):
+                        add_window(term_id)
+                    registry.replace({t: host_pid for t in backend.known})
+
+            timeout = WATCHER_HOST_CHECK_INTERVAL
+            if retry_at:
+                timeout = min(timeout, min(retry_at.values()) - time.monotonic())
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+            events = backend.wait_events(timeout=max(0, timeout))
+            cycle_started = time.perf_counter()
+
+            # Failed adds that are due again, as if their terminal had just opened
+            now = time.monotonic()
+            due = sorted(t for t, at in retry_at.items() if at <= now)
+            for term_id in due:
+                del retry_at[term_id]
+            events += [WindowEvent('opened', t, time.time()) for t in due if t in backend.known]
+            if events and retention:
+                retention.busy()
+
+            # Isolated mode: a popup from before a watcher restart may still
+            # be alive - one liveness pass for the whole batch
+            running = registry.alive() if registry and isolated and events else {}
+
+            added, removed = {}, []
+            for event in events:
+                if event.kind == 'opened':
+                    if event.terminal_id in running:
+                        log.debug("Terminal %s already has running popup (PID: %s), skipping",
+                                  event.terminal_id, running[event.terminal_id])
+                        continue
+                    # The host ignores duplicates, so Space changes can't
+                    # produce a second button
+                    pid = add_window(event.terminal_id)
+                    if pid:
+                        added[event.terminal_id] = pid
+                        log.info("Added popup for new terminal %s (PID: %s)", event.terminal_id, pid)
                     else:
-                        processes = {}
-                    processes[term_id] = proc.pid
-                    with open(processes_file, 'w') as f:
-                        json.dump(processes, f, indent=2)
-                except Exception as e:
-                    print(f"  ✗ Failed to launch for terminal {term_id}: {e}")
-                    debug_log(f"Watcher: Error launching for {term_id}: {e}")
-
-            # Clean up closed terminals from tracking
-            if closed_terminals:
-                debug_log(f"Watcher: Terminals closed: {closed_terminals}")
-                tracked_terminals -= closed_terminals
-
-                # Update processes file
-                if processes_file.exists():
-                    try:
-                        with open(processes_file, 'r') as f:
-                            processes = json.load(f)
-                        for term_id in closed_terminals:
-                            processes.pop(term_id, None)
-                        with open(processes_file, 'w') as f:
-                            json.dump(processes, f, indent=2)
-                    except:
-                        pass
-
-            # Check every 2 seconds
-            time.sleep(2)
+                        retry_at[event.terminal_id] = time.monotonic() + WATCHER_ADD_RETRY_INTERVAL
+                        log.warning("Failed to add popup for terminal %s, retrying in %ss",
+                                    event.terminal_id, WATCHER_ADD_RETRY_INTERVAL)
+                else:
+                    retry_at.pop(event.terminal_id, None)
+                    remove_window(event.terminal_id)
+                    removed.append(event.terminal_id)
+                    log.info("Terminal closed: %s", event.terminal_id)
+
+            # Keep the registry in sync for killall/status - one transaction
+            # per batch of events
+            if registry and (added or removed):
+                try:
+                    registry.update(added=added, removed=removed)
+                except OSError as e:
+                    log.warning("Failed to update registry: %s", e)
+
+            if events:
+                metrics.observe('watcher.cycle', (time.perf_counter() - cycle_started) * 1000)
 
     except KeyboardInterrupt:
         print("\n👋 Watcher stopped")
-        debug_log("Watcher: Stopped by user")
+        log.info("Stopped by user")
+    finally:
+        backend.close()
+        if wake_server:
+            wake_server.close()
+        if retention:
+            retention.stop()
+
+def benchmark_watcher(windows: int, seconds: float, churn_rate: float, push: bool = True):
+    """Run the watcher loop against a simulated window system and print scaling stats"""
+    from src.watcher import FakeWindowSystem, FakeBackend
+
+    system = FakeWindowSystem(initial_windows=windows)
+    backend = FakeBackend(system, churn_rate=churn_rate, push=push)
+    buttons = set()
+
+    def add_window(term_id):
+        buttons.add(term_id)
+        return os.getpid()
+
+    watch_terminals(backend, sink=(add_window, buttons.discard), duration=seconds)
+
+    stats = backend.stats()
+    print(f"\n📊 Fake watcher: {windows} windows, {churn_rate:g} changes/s, "
+          f"{'push' if push else 'polling only'}, {seconds:g}s")
+    for key, value in stats.items():
+        print(f"   {key}: {value}")
+    print(f"   in sync: {buttons == set(system.list_windows())}")
+
+def show_metrics(as_json: bool = False, reset: bool = False):
+    """Print counters and latency histograms aggregated across all reccli processes"""
+    from src.core.metrics import load_snapshots, aggregate, reset_snapshots
+
+    if reset:
+        print(f"🧹 Removed {reset_snapshots()} metrics snapshots")
+        return
+
+    data = aggregate(load_snapshots())
+    if as_json:
+        print(json.dumps(data, indent=2))
+        return
+
+    print(f"📈 reccli metrics ({len(data['processes'])} processes)")
+    if data['histograms']:
+        print(f"\n   {'timing':<32} {'count':>8} {'avg':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name, h in data['histograms'].items():
+            cells = ''.join(f" {h[k]:>7.2f}ms" if h[k] is not None else f" {'-':>9}"
+                            for k in ('avg_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'))
+            print(f"   {name:<32} {h['count']:>8}{cells}")
+    if data['counters']:
+        print(f"\n   {'counter':<32} {'value':>8}")
+        for name, value in data['counters'].items():
+            print(f"   {name:<32} {value:>8}")
+    if not data['histograms'] and not data['counters']:
+        print("   No metrics recorded yet")
+
+def export_session(session_file: str, fmt: Optional[str] = None, output: Optional[str] = None,
+                   redact: bool = True, follow: bool = False, max_tokens: Optional[int] = None,
+                   tokenizer: Optional[str] = None) -> bool:
+    """
+    Export a recorded session from the command line
+
+    Args:
+        session_file: Recorded .cast (or script .txt) file
+        fmt: Export format (default: the configured default_export_format)
+        output: Output path (default: next to the session, with the format's extension)
+        redact: Mask secrets as configured (redact_exports); False exports them as recorded
+        follow: Keep a txt/md export current while the session is still recording
+        max_tokens: Token budget per chunk of a chunks export (default: chunk_tokens setting)
+        tokenizer: Tokenizer for chunks - auto, tiktoken or estimate (default: tokenizer setting)
+
+    Returns:
+        True if successful
+    """
+    from src.export import Redactor, SessionExporter, export_extension, session_metadata
+
+    session_path = Path(session_file).expanduser()
+    if not session_path.exists():
+        print(f"❌ Session not found: {session_path}")
+        return False
+
+    if session_path.suffix in ('.gz', '.dedup'):
+        # A stored session whose data is gone must fail, not export empty
+        from src.export import open_session
+        try:
+            with open_session(session_path, 'rb') as f:
+                f.read(1)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"❌ Can't read {session_path.name}: {e}")
+            return False
+
+    config = ReccliConfig().config
+    fmt = (fmt or config.get('default_export_format', 'md')).lower().lstrip('.')
+    # session.cast.gz / .cast.dedup (stored by retention) -> session.<fmt>
+    base = session_path.with_suffix('') if session_path.suffix in ('.gz', '.dedup') else session_path
+    output_path = Path(output).expanduser() if output else base.with_name(f'{base.stem}.{export_extension(fmt)}')
+    if output_path.resolve() == session_path.resolve():
+        print("❌ Refusing to overwrite the session itself; pass --output")
+        return False
+
+    redactor = Redactor.from_config(config) if redact else None
+    if follow:
+        return follow_export(session_path, output_path, fmt, redactor)
+    metadata = session_metadata(session_path)
+    exporter = SessionExporter(session_path, metadata, redactor=redactor,
+                               chunk_tokens=max_tokens or config.get('chunk_tokens'),
+                               tokenizer=tokenizer or config.get('tokenizer', 'auto'))
+    if not exporter.export(output_path, fmt):
+        return False
+    from src.storage import SessionIndex
+    SessionIndex().touch(session_path)
+    print(f"✅ Exported {session_path.name} → {output_path}")
+    if redactor is not None and redactor.hits:
+        print(f"🔒 Redacted {redactor.hits} secret{'s' if redactor.hits != 1 else ''}")
+    return True
+
+def follow_export(session_path: Path, output_path: Path, fmt: str, redactor=None) -> bool:
+    """
+    'reccli export --follow' - keep an export current while the session records
+
+    Follows until the session is no longer flagged as recording and hasn't
+    grown for FOLLOW_IDLE seconds, or until Ctrl+C.
+
+    Returns:
+        True if successful
+    """
+    from src.export import LiveExporter
+    from src.storage import SessionIndex
+
+    if session_path.suffix in ('.gz', '.dedup'):
+        print(f"❌ {session_path.name} is stored by retention and no longer recording")
+        return False
+    try:
+        live = LiveExporter(session_path, output_path, fmt, redactor=redactor)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+
+    index = SessionIndex()
+    key = str(session_path.resolve())
+
+    def finished() -> bool:
+        if SessionIndex.is_recording(index.load().get(key, {})):
+            return False
+        try:
+            return time.time() - session_path.stat().st_mtime > FOLLOW_IDLE
+        except OSError:
+            return True  # Moved or deleted
+
+    print(f"👀 Following {session_path.name} → {output_path} (Ctrl+C to stop)")
+    try:
+        live.follow(finished)
+    except OSError as e:
+        print(f"❌ Following {session_path.name} failed: {e}")
+        return False
+    print(f"✅ Exported {session_path.name} → {output_path}")
+    if redactor is not None and redactor.hits:
+        print(f"🔒 Redacted {redactor.hits} secret{'s' if redactor.hits != 1 else ''}")
+    return True
+
+def redact_session(session_file: str, output: Optional[str] = None) -> bool:
+    """
+    'reccli redact' - mask secrets in a recording itself
+
+    Args:
+        session_file: Recorded .cast or .txt file
+        output: Write the masked copy here instead of replacing the recording
+
+    Returns:
+        True if successful
+    """
+    from src.export import Redactor
+
+    session_path = Path(session_file).expanduser()
+    if not session_path.exists():
+        print(f"❌ Session not found: {session_path}")
+        return False
+    if session_path.suffix in ('.gz', '.dedup') and not output:
+        print("❌ Stored sessions can't be rewritten in place; pass --output")
+        return False
+
+    config = ReccliConfig().config
+    redactor = Redactor(patterns=config.get('redact_patterns', []),
+                        entropy=config.get('redact_entropy', False))
+    try:
+        count = redactor.redact_file(session_path, Path(output).expanduser() if output else None)
+    except (OSError, ValueError) as e:
+        print(f"❌ Couldn't redact {session_path.name}: {e}")
+        return False
+    target = output or session_path.name
+    print(f"🔒 Masked {count} secret{'s' if count != 1 else ''} in {target}" if count
+          else f"✅ No secrets found in {session_path.name}")
+    return True
+
+def serve_recordings(folder: Optional[str] = None, port: Optional[int] = None, redact: bool = True) -> bool:
+    """
+    'reccli serve' - browse and export recordings over HTTP on localhost
+
+    Args:
+        folder: Recordings folder (default: ~/.reccli/recordings)
+        port: Port on 127.0.0.1 (default: the serve_port setting)
+        redact: Mask secrets as configured (redact_exports)
+
+    Returns:
+        False if the server couldn't start
+    """
+    from src.export.server import SessionServer
+
+    root = Path(folder).expanduser() if folder else Path.home() / '.reccli' / 'recordings'
+    if not root.is_dir():
+        print(f"❌ Not a folder: {root}")
+        return False
+    config = ReccliConfig().config
+    port = config.get('serve_port', 8470) if port is None else port
+    try:
+        server = SessionServer(root, port, config=config, redact=redact)
+    except OSError as e:
+        print(f"❌ Couldn't listen on 127.0.0.1:{port}: {e}")
+        return False
+    print(f"🌐 Serving {root} at {server.url} (Ctrl+C to stop)")
+    if not server.redact:
+        print("⚠️  Secrets are not redacted")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return True
 
-def main():
-    """Main entry point"""
+def open_search_index(config: Dict, redact: bool = True):
+    """
+    The search index, brought up to date with the recordings on disk
+
+    Args:
+        config: Settings (search_model, redaction)
+        redact: Mask secrets as configured (redact_exports) in what gets indexed
+
+    Returns:
+        (SearchIndex, redactor), or (None, None) if the embedder can't be loaded
+    """
+    from src.export import Redactor
+    from src.search import SearchIndex, load_embedder
+    from src.storage import find_sessions
+
+    try:
+        embedder = load_embedder(config.get('search_model', 'hashing'))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None, None
+    index = SearchIndex(embedder)
+    if not index.vectorized:
+        print("⚠️  numpy isn't installed - searching in pure Python (pip install numpy for millisecond searches)")
+    redactor = Redactor.from_config(config) if redact else None
+
+    def progress(done: int, total: int):
+        if sys.stdout.isatty():
+            print(f"\r📚 Indexing sessions: {done}/{total}", end='\n' if done == total else '', flush=True)
+        elif done == total:
+            print(f"📚 Indexed {total} session{'s' if total != 1 else ''}")
+
+    index.update(find_sessions(), redactor, prune=True, progress=progress)
+    return index, redactor
+
+def print_search_hits(hits: List[Dict], as_json: bool = False):
+    """Print search results - score, session and block, then the start of the block"""
+    for hit in hits:
+        if as_json:
+            print(json.dumps(hit, ensure_ascii=False))
+            continue
+        first, last = hit['blocks']
+        blocks = f"block {first}" if first == last else f"blocks {first}-{last}"
+        print(f"  {hit['score']:.3f}  {Path(hit['session']).name}  {blocks} (lines {hit['lines'][0] + 1}-{hit['lines'][1]})")
+        for line in hit['text'].split('\n')[:4]:
+            print(f"         {line.rstrip()[:100]}")
+
+def ask_sessions(query: str, limit: int = 10, as_json: bool = False, redact: bool = True) -> bool:
+    """
+    'reccli ask' - command blocks across all recordings most like a query
+
+    Args:
+        query: Free text - commands, errors, words
+        limit: Blocks to show
+        as_json: Print one JSON object per block
+        redact: Mask secrets as configured (redact_exports)
+
+    Returns:
+        False if the search couldn't run
+    """
+    index, _ = open_search_index(ReccliConfig().config, redact)
+    if index is None:
+        return False
+    started = time.perf_counter()
+    hits = index.ask(query, limit)
+    if not as_json:
+        print(f"🔎 {len(hits)} block{'s' if len(hits) != 1 else ''} for \"{query}\" "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    print_search_hits(hits, as_json)
+    return True
+
+def similar_sessions(session_file: str, limit: int = 10, as_json: bool = False, redact: bool = True) -> bool:
+    """
+    'reccli similar' - recordings most like a session
+
+    Args:
+        session_file: Session to compare (indexed first if it isn't already)
+        limit: Sessions to show
+        as_json: Print one JSON object per session
+        redact: Mask secrets as configured (redact_exports)
+
+    Returns:
+        False if the session doesn't exist or the search couldn't run
+    """
+    session_path = Path(session_file).expanduser()
+    if not session_path.is_file():
+        print(f"❌ Session not found: {session_path}")
+        return False
+    index, redactor = open_search_index(ReccliConfig().config, redact)
+    if index is None:
+        return False
+    started = time.perf_counter()
+    hits = index.similar(session_path, redactor, limit)
+    if not as_json:
+        print(f"🔗 {len(hits)} session{'s' if len(hits) != 1 else ''} like {session_path.name} "
+              f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    print_search_hits(hits, as_json)
+    return True
+
+def format_bytes(size: float) -> str:
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(size) < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+def manage_storage(args: List[str], dry_run: bool = False) -> bool:
+    """
+    'reccli storage' - inspect recordings and apply the retention policy
+
+    Args:
+        args: ['list'], ['stats'], ['pin', FILE], ['unpin', FILE], ['dedup', FILE] or ['gc']
+        dry_run: gc only prints the plan
+
+    Returns:
+        True if successful
+    """
+    from src.storage import RetentionEngine, RetentionPolicy, SessionIndex
+
+    action = args[0] if args else 'list'
+    policy = RetentionPolicy.from_config(ReccliConfig().config)
+    engine = RetentionEngine(policy)
+
+    if action in ('pin', 'unpin'):
+        if len(args) != 2 or not Path(args[1]).expanduser().exists():
+            print(f"❌ Usage: reccli storage {action} SESSION_FILE (an existing recording)")
+            return False
+        SessionIndex().pin(Path(args[1]), pinned=(action == 'pin'))
+        print(f"{'📌 Pinned' if action == 'pin' else '✅ Unpinned'} {args[1]}")
+        return True
+
+    if action == 'gc':
+        if dry_run:
+            actions = engine.plan()
+            for name, session in actions:
+                print(f"   {name:<9} {format_bytes(session.size):>9}  {session.path}")
+            print(f"🧹 {len(actions)} actions planned" if actions else "✅ Nothing to do")
+            return True
+        stats = engine.run()
+        print(f"🧹 Expired {stats['expired']}, compressed {stats['compressed']}, "
+              f"evicted {stats['evicted']} - freed {format_bytes(stats['freed_bytes'])}")
+        return True
+
+    if action == 'dedup':
+        # Move a session into the deduplicated chunk store right away
+        source = Path(args[1]).expanduser().resolve() if len(args) == 2 else None
+        if source is None or not source.is_file() or source.suffix not in ('.cast', '.txt'):
+            print("❌ Usage: reccli storage dedup SESSION_FILE (a .cast or .txt recording)")
+            return False
+        stub = source.with_name(source.name + '.dedup')
+        if engine.store.ingest(source, stub) is None:
+            return False
+        source.unlink()
+        SessionIndex().moved(source, stub)
+        print(f"✅ Stored {source.name} → {stub.name}")
+        return True
+
+    if action == 'stats':
+        sessions = engine.scan()
+        by_kind = {}
+        for s in sessions:
+            kind = s.path.suffix if s.path.suffix in ('.gz', '.dedup') else 'plain'
+            count, size = by_kind.get(kind, (0, 0))
+            by_kind[kind] = (count + 1, size + s.size)
+        print(f"💾 {len(sessions)} sessions, {format_bytes(sum(s.size for s in sessions))} on disk "
+              f"(compression: {policy.compress_with})")
+        for kind, (count, size) in sorted(by_kind.items()):
+            print(f"   {kind:<7} {count:>6} sessions {format_bytes(size):>10}")
+        if engine.store.path.exists():
+            store = engine.store.stats()
+            print(f"🧩 Dedup store: {store['sessions']} sessions, {store['chunks']} unique chunks")
+            print(f"   Logical {format_bytes(store['logical_bytes'])}, unique {format_bytes(store['unique_bytes'])}, "
+                  f"stored {format_bytes(store['stored_bytes'])}")
+            print(f"   Dedup ratio {store['dedup_ratio'] or '-'}x, with compression {store['total_ratio'] or '-'}x")
+        return True
+
+    if action != 'list':
+        print(f"❌ Unknown storage action '{action}' (list, stats, pin, unpin, dedup, gc)")
+        return False
+
+    sessions = engine.scan()
+    total = sum(s.size for s in sessions)
+    now = time.time()
+    for s in sorted(sessions, key=lambda s: s.last_used, reverse=True):
+        flags = ('📌' if s.pinned else '  ') + ('⏺ ' if s.active else '  ')
+        age = (now - s.last_used) / 86400
+        print(f"   {flags} {format_bytes(s.size):>9} {age:>6.1f}d  {s.path}")
+    quota = f" of {format_bytes(policy.quota_bytes)} quota" if policy.quota_bytes else ""
+    print(f"💾 {len(sessions)} sessions, {format_bytes(total)}{quota}")
+    return True
+
+def main(argv=None):
+    """
+    Main entry point
+
+    Args:
+        argv: Arguments without the program name (sys.argv[1:] if None);
+              the zygote calls this directly in forked children
+    """
     import argparse
 
     parser = argparse.ArgumentParser(description='reccli - One-click CLI recorder')
-    parser.add_argument('command', nargs='?', default='watch',
-                       choices=['gui', 'launch', 'watch', 'killall', 'start', 'stop', 'status'],
+    parser.add_argument('command', nargs='?', default=None,
+                       choices=['gui', 'host', 'zygote', 'launch', 'watch', 'notify', 'killall', 'start', 'stop', 'status',
+                                'metrics', 'export', 'redact', 'storage', 'daemon', 'serve', 'ask', 'similar'],
                        help='Command to execute (default: watch)')
+    parser.add_argument('args', nargs='*',
+                       help='Command arguments (start: -- COMMAND [ARGS...]; stop: [RECORDING_ID]; '
+                            'export/redact/similar: SESSION_FILE; ask: QUERY...; serve: [RECORDINGS_DIR]; storage: list | stats | pin FILE | unpin FILE | dedup FILE | gc)')
     parser.add_argument('--terminal-id', type=str, help='Specific terminal ID to attach to (internal use)')
+    parser.add_argument('--requested-at', type=float, help='When the watcher requested this popup (internal use)')
+    parser.add_argument('--isolated', action='store_true',
+                       help='watch: one GUI process per terminal, forked from the zygote')
+    parser.add_argument('--backend', choices=['osascript', 'fake'], default='osascript',
+                       help='Window event backend for watch (fake = simulated benchmark)')
+    parser.add_argument('--fake-windows', type=int, default=200, help='Simulated windows for --backend fake')
+    parser.add_argument('--fake-seconds', type=float, default=10, help='Benchmark length for --backend fake')
+    parser.add_argument('--fake-churn', type=float, default=20, help='Window opens/closes per second for --backend fake')
+    parser.add_argument('--no-push', action='store_true', help='Disable simulated push events for --backend fake')
     parser.add_argument('--version', action='version', version=f'reccli {VERSION}')
+    parser.add_argument('--startup-profile', action='store_true',
+                       help='Report cold-start time and import breakdown per subcommand (or just COMMAND) and check budgets')
+    parser.add_argument('--startup-check', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--json', action='store_true', help='metrics: print JSON instead of a table; '
+                                                            'ask/similar: one JSON object per result')
+    parser.add_argument('--limit', type=int, default=10, help='ask/similar: results to show (default: 10)')
+    parser.add_argument('--reset', action='store_true', help='metrics: delete all collected metrics')
+    parser.add_argument('--format', '-f', help='export: output format (default: from settings)')
+    parser.add_argument('--output', '-o', help='export: output file; redact: write a copy instead of rewriting the '
+                                               'session; start: .cast file to record to')
+    parser.add_argument('--follow', action='store_true',
+                       help='export: keep a txt/md export current while the session is still recording')
+    parser.add_argument('--max-tokens', type=int,
+                       help='export -f chunks: token budget per chunk (default: chunk_tokens setting)')
+    parser.add_argument('--tokenizer', choices=['auto', 'tiktoken', 'estimate'],
+                       help='export -f chunks: how tokens are counted (default: tokenizer setting)')
+    parser.add_argument('--no-redact', action='store_true',
+                       help='export/serve/ask/similar: keep secrets (API keys, tokens, passwords) instead of masking them')
+    parser.add_argument('--port', type=int, help='serve: port on 127.0.0.1 (default: serve_port setting)')
+    parser.add_argument('--dry-run', action='store_true', help='storage gc: show what would happen')
+    parser.add_argument('--profile', action='store_true',
+                       help='Write cProfile/tracemalloc profiles of exports and recordings to ~/.reccli/profiles '
+                            '(GUI processes: set RECCLI_PROFILE=1; start: applies if it starts the daemon)')
+    parser.add_argument('--log-level', choices=['off', 'error', 'warning', 'info', 'debug'],
+                       help='Debug log level for /tmp/reccli_debug.log (default: $RECCLI_LOG_LEVEL or off)')
+
+    # 'reccli start [-o FILE] -- COMMAND ARGS...' - argparse can't take
+    # positionals after options, so the command is split off first
+    argv = sys.argv[1:] if argv is None else list(argv)
+    recorded_command = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, recorded_command = argv[:split], argv[split + 1:]
+    args = parser.parse_args(argv)
+    if recorded_command and args.command != 'start':
+        parser.error("'-- COMMAND' is only accepted by start")
+
+    if args.startup_profile:
+        commands = [args.command] if args.command else list(COMMAND_MODULES)
+        sys.exit(startup_profile(commands))
+
+    args.command = args.command or 'watch'
+    load_command_modules(args.command)
+    if args.startup_check:
+        # Used by --startup-profile: imports done, don't actually run
+        return
 
-    args = parser.parse_args()
+    # The zygote must stay single-threaded until it forks - its children
+    # set up their own logging when they run main()
+    if args.command != 'zygote':
+        from src.core import setup_logging
+        tag = f"{args.command}:{args.terminal_id}" if args.terminal_id else args.command
+        setup_logging(tag, args.log_level)
+        metrics.configure(tag)
+        if args.profile:
+            from src.core import enable_profiling
+            enable_profiling()
 
     if args.command == 'watch':
         # Default command: watch for new terminals and auto-launch
-        watch_terminals()
+        if args.backend == 'fake':
+            benchmark_watcher(args.fake_windows, args.fake_seconds, args.fake_churn, push=not args.no_push)
+        else:
+            watch_terminals(isolated=args.isolated)
+
+    elif args.command == 'notify':
+        # Shell hook: tell the watcher a terminal probably just opened
+        from src.core import send_command
+        send_command(WATCHER_SOCKET, {'cmd': 'wake'}, timeout=0.5)
 
     elif args.command == 'launch':
         # Launch one instance per current terminal
@@ -1244,16 +2707,88 @@ def main():
         killall_reccli()
 
     elif args.command == 'gui':
-        if not HAS_GUI:
+        if not load_gui():
             print("❌ GUI not available. Install tkinter:")
             print("   Ubuntu/Debian: sudo apt-get install python3-tk")
             print("   macOS: brew install python-tk")
             sys.exit(1)
 
         # Pass terminal_id if specified (from launcher)
-        app = ReccliGUI(terminal_id=args.terminal_id)
+        app = ReccliGUI(terminal_id=args.terminal_id, requested_at=args.requested_at)
         app.run()
 
+    elif args.command == 'zygote':
+        # Pre-warmed fork server for isolated GUI instances (started by watch --isolated)
+        from src.core import Zygote
+        Zygote(ZYGOTE_SOCKET, main, preload=ZYGOTE_PRELOAD).serve_forever()
+
+    elif args.command == 'host':
+        if not load_gui():
+            print("❌ GUI not available. Install tkinter:")
+            print("   Ubuntu/Debian: sudo apt-get install python3-tk")
+            print("   macOS: brew install python-tk")
+            sys.exit(1)
+
+        # One process hosting a floating button per terminal (started by watch/launch)
+        host = ReccliHost()
+        host.run()
+
+    elif args.command == 'metrics':
+        show_metrics(as_json=args.json, reset=args.reset)
+
+    elif args.command == 'storage':
+        if not manage_storage(args.args, dry_run=args.dry_run):
+            sys.exit(1)
+
+    elif args.command == 'export':
+        if len(args.args) != 1:
+            parser.error("export takes exactly one SESSION_FILE")
+        if not export_session(args.args[0], args.format, args.output, redact=not args.no_redact,
+                              follow=args.follow, max_tokens=args.max_tokens, tokenizer=args.tokenizer):
+            sys.exit(1)
+        if args.profile:
+            from src.core.profiling import written
+            for path in written:
+                print(f"📊 Profile: {path} (and {path.with_suffix('.txt').name})")
+
+    elif args.command == 'redact':
+        if len(args.args) != 1:
+            parser.error("redact takes exactly one SESSION_FILE")
+        if not redact_session(args.args[0], args.output):
+            sys.exit(1)
+
+    elif args.command == 'start':
+        if not start_recording_cli(args.args + recorded_command, args.output):
+            sys.exit(1)
+
+    elif args.command == 'stop':
+        if len(args.args) > 1:
+            parser.error("stop takes at most one RECORDING_ID")
+        if not stop_recording_cli(args.args[0] if args.args else None):
+            sys.exit(1)
+
+    elif args.command == 'serve':
+        if len(args.args) > 1:
+            parser.error("serve takes at most one RECORDINGS_DIR")
+        if not serve_recordings(args.args[0] if args.args else None, args.port, redact=not args.no_redact):
+            sys.exit(1)
+
+    elif args.command == 'ask':
+        if not args.args:
+            parser.error("ask takes a QUERY")
+        if not ask_sessions(' '.join(args.args), args.limit, as_json=args.json, redact=not args.no_redact):
+            sys.exit(1)
+
+    elif args.command == 'similar':
+        if len(args.args) != 1:
+            parser.error("similar takes exactly one SESSION_FILE")
+        if not similar_sessions(args.args[0], args.limit, as_json=args.json, redact=not args.no_redact):
+            sys.exit(1)
+
+    elif args.command == 'daemon':
+        # Owns recordings started with 'reccli start' (started on demand)
+        RecordingDaemon().run()
+
     elif args.command == 'status':
         config = ReccliConfig()
         stats = config.config
@@ -1261,6 +2796,19 @@ def main():
         print(f"   Recordings: {stats.get('recordings_count', 0)}")
         print(f"   Time saved: {stats.get('total_time_recorded', 0)/3600:.1f} hours")
         print(f"   Recordings folder: ~/.reccli/recordings")
+        from src.core import ProcessRegistry
+        print(f"   Active popups: {len(ProcessRegistry().alive())}")
+        response = daemon_request({'cmd': 'list'})
+        if response and response.get('ok'):
+            print(f"   Background recordings: {sum(r['running'] for r in response['recordings'])}")
+            for r in response['recordings']:
+                state = f"⏺  {r['duration']:>7.1f}s" if r['running'] else f"⏹  {r['duration']:>7.1f}s"
+                print(f"      {state}  {r['id']:<28} {' '.join(r['command'])}")
+            stats = daemon_request({'cmd': 'stats'})
+            if stats and stats.get('ok') and stats['total']['sessions']:
+                total = stats['total']
+                print(f"   Recorded: {total['bytes_read'] / (1024 * 1024):.1f} MB "
+                      f"({total['mb_per_s']:.2f} MB/s, {total['paused']} paused)")
 
     else:
         print(f"Command '{args.command}' not implemented yet")
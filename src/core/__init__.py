@@ -0,0 +1,40 @@
+"""
+RecCli Core Module
+Process plumbing shared by the GUI, watcher and CLI
+
+Exports are resolved on first access so each reccli subcommand only pays
+for the submodules it actually uses.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'UnixCommandServer': 'ipc',
+    'send_command': 'ipc',
+    'AdaptiveScheduler': 'scheduler',
+    'ProcessRegistry': 'registry',
+    'pid_alive': 'registry',
+    'pid_commands': 'registry',
+    'PtyRecording': 'recording',
+    'RecordingEngine': 'recording',
+    'Zygote': 'zygote',
+    'zygote_spawn': 'zygote',
+    'parse_importtime': 'startup',
+    'profile_command': 'startup',
+    'profile_zygote': 'startup',
+    'interpreter_baseline_ms': 'startup',
+    'setup_logging': 'log',
+    'instance_logger': 'log',
+    'Profiler': 'profiling',
+    'profiled': 'profiling',
+    'enable_profiling': 'profiling',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module(f'.{_EXPORTS[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
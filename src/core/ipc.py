@@ -0,0 +1,108 @@
+"""
+Local IPC for RecCli
+Line-delimited JSON commands over Unix domain sockets
+"""
+
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+class UnixCommandServer:
+    """Serve JSON commands on a Unix socket from background threads"""
+
+    def __init__(self, socket_path: Path, handler: Callable[[Dict], Dict]):
+        """
+        Initialize server
+
+        Args:
+            socket_path: Path of the Unix socket to listen on
+            handler: Called with each request dict, returns the response dict.
+                     Runs on a worker thread, so it must not touch Tk directly.
+        """
+        self.socket_path = Path(socket_path)
+        self.handler = handler
+        self.sock = None
+
+    def start(self):
+        """Bind the socket and start accepting connections"""
+        if self.socket_path.exists():
+            # Either another live server or a stale socket from a crashed one
+            if send_command(self.socket_path, {'cmd': 'ping'}, timeout=0.5) is not None:
+                raise RuntimeError(f"Another process is already serving {self.socket_path}")
+            self.socket_path.unlink()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self.sock.listen(16)
+
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        """Accept connections until the socket is closed"""
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        """Answer every request line on one connection"""
+        with conn, conn.makefile('rwb') as stream:
+            for raw in stream:
+                try:
+                    request = json.loads(raw)
+                except ValueError:
+                    response = {'ok': False, 'error': 'Malformed request'}
+                else:
+                    if request.get('cmd') == 'ping':
+                        response = {'ok': True, 'pid': os.getpid()}
+                    else:
+                        try:
+                            response = self.handler(request)
+                        except Exception as e:
+                            response = {'ok': False, 'error': str(e)}
+                try:
+                    stream.write(json.dumps(response).encode('utf-8') + b'\n')
+                    stream.flush()
+                except OSError:
+                    return
+
+    def close(self):
+        """Stop serving and remove the socket file"""
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+        try:
+            self.socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def send_command(socket_path: Path, request: Dict, timeout: float = 2.0) -> Optional[Dict]:
+    """
+    Send one command to a UnixCommandServer
+
+    Args:
+        socket_path: Path of the server's Unix socket
+        request: Request dict, must contain 'cmd'
+        timeout: Seconds to wait for connect and reply
+
+    Returns:
+        Response dict, or None if no server answered
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as stream:
+                line = stream.readline()
+        return json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,173 @@
+"""
+Logging for RecCli
+Leveled, queue-buffered, size-rotated debug log shared by every process
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_LOG_FILE = Path("/tmp/reccli_debug.log")
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+
+# Disabled by default; logger.debug() then costs one cached level check
+OFF = logging.CRITICAL + 10
+LEVELS = {
+    'off': OFF,
+    'error': logging.ERROR,
+    'warning': logging.WARNING,
+    'info': logging.INFO,
+    'debug': logging.DEBUG,
+}
+
+logger = logging.getLogger('reccli')
+logger.setLevel(OFF)
+logger.propagate = False
+
+_listener = None
+
+
+class _SharedRotatingHandler(logging.FileHandler):
+    """
+    Size-rotated log file appended to by several processes at once
+
+    RotatingFileHandler assumes it is the only writer: two processes
+    rotating the same file rename each other's backups away and keep
+    writing to unlinked files. Here every process appends and reopens the
+    file once someone else has renamed it (like WatchedFileHandler), and
+    rotation happens under an exclusive lock on <log>.lock after
+    re-checking the size, so exactly one process rotates.
+    """
+
+    def __init__(self, filename: Path, max_bytes: int, backups: int):
+        super().__init__(filename, mode='a', encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock_path = self.baseFilename + '.lock'
+        self._identity = self._stat_identity()
+
+    def _stat_identity(self):
+        try:
+            st = os.stat(self.baseFilename)
+        except OSError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _rotate(self):
+        """Shift the backups and move the log to .1 - if nobody else just did"""
+        import fcntl
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if os.path.getsize(self.baseFilename) < self.max_bytes:
+                    return  # Rotated by another process while we waited
+                for i in range(self.backups - 1, 0, -1):
+                    older = f"{self.baseFilename}.{i}"
+                    if os.path.exists(older):
+                        os.replace(older, f"{self.baseFilename}.{i + 1}")
+                if self.backups:
+                    os.replace(self.baseFilename, f"{self.baseFilename}.1")
+                else:
+                    os.remove(self.baseFilename)
+            except FileNotFoundError:
+                pass
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            if self.stream is not None and os.fstat(self.stream.fileno()).st_size >= self.max_bytes:
+                self._rotate()
+            identity = self._stat_identity()
+            if identity != self._identity:
+                # Rotated (by us or another process) - write to the new file
+                if self.stream is not None:
+                    self.stream.close()
+                    self.stream = None
+                self.stream = self._open()
+                self._identity = self._stat_identity()
+        except OSError:
+            self.handleError(record)
+            return
+        super().emit(record)
+
+
+class _TagFilter(logging.Filter):
+    """Give records without an instance tag the process-wide one"""
+
+    def __init__(self, tag: str):
+        super().__init__()
+        self.tag = tag
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'tag'):
+            record.tag = self.tag
+        return True
+
+
+def setup_logging(tag: str, level: Optional[str] = None, log_file: Path = DEFAULT_LOG_FILE) -> bool:
+    """
+    Configure the 'reccli' logger for this process
+
+    Records go through a QueueHandler, so callers never block on disk;
+    a listener thread writes them to the log file, which every reccli
+    process shares (see _SharedRotatingHandler). Must not be called in a
+    process that will fork afterwards (the zygote).
+
+    Args:
+        tag: Process tag written on every line, e.g. 'watch' or 'host'
+        level: 'off', 'error', 'warning', 'info' or 'debug' (defaults to
+               $RECCLI_LOG_LEVEL, then 'off')
+        log_file: Log path; rotated at LOG_MAX_BYTES keeping LOG_BACKUPS files
+
+    Returns:
+        True if logging is enabled
+    """
+    import atexit
+    import logging.handlers
+    import queue
+
+    global _listener
+
+    level = (level or os.environ.get('RECCLI_LOG_LEVEL') or 'off').lower()
+    logger.setLevel(LEVELS.get(level, OFF))
+    if logger.level >= OFF or _listener is not None:
+        return logger.level < OFF
+
+    file_handler = _SharedRotatingHandler(log_file, LOG_MAX_BYTES, LOG_BACKUPS)
+    file_handler.setFormatter(logging.Formatter(
+        '%(asctime)s.%(msecs)03d %(process)d [%(tag)s] %(levelname)s: %(message)s',
+        datefmt='%H:%M:%S'
+    ))
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(_TagFilter(tag))
+    logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(records, file_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return True
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def instance_logger(tag: str) -> logging.LoggerAdapter:
+    """
+    Logger that tags its lines with one instance (e.g. one terminal's button)
+
+    Args:
+        tag: Instance tag, e.g. 'gui:12345'
+    """
+    return logging.LoggerAdapter(logger, {'tag': tag})
@@ -0,0 +1,243 @@
+"""
+Hot-path metrics for RecCli
+In-process counters and latency histograms, aggregated across processes
+through per-process snapshot files
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+METRICS_DIR = Path.home() / '.reccli' / 'metrics'
+FLUSH_INTERVAL = 30  # Seconds between snapshot writes
+STALE_SNAPSHOT_AGE = 7 * 24 * 3600  # Dead processes' snapshots are dropped after this
+
+# Histogram bucket upper bounds in ms: 1/8ms .. ~16s, doubling
+BUCKETS = [0.125 * 2 ** i for i in range(18)]
+
+
+class Histogram:
+    """Fixed log-scale latency histogram"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        """Record one value (ms)"""
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram'):
+        """Add another histogram's observations into this one"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Estimate a percentile as the upper bound of its bucket"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {'counts': self.counts, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Histogram':
+        hist = cls()
+        counts = data.get('counts', [])
+        if len(counts) == len(hist.counts):
+            hist.counts = list(counts)
+        hist.count = data.get('count', 0)
+        hist.total = data.get('total', 0.0)
+        hist.min = data.get('min')
+        hist.max = data.get('max')
+        return hist
+
+
+class Metrics:
+    """
+    Counters and histograms for one process
+
+    Recording is a lock plus a dict lookup and a bisect, cheap enough to
+    leave on everywhere. Once configure()d, the process writes a snapshot
+    to METRICS_DIR at most every FLUSH_INTERVAL seconds and at exit;
+    `reccli metrics` merges all snapshots.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.snapshot_file: Optional[Path] = None
+        self.started = time.time()
+        self.next_flush = time.monotonic() + FLUSH_INTERVAL
+
+    def configure(self, tag: str, directory: Path = METRICS_DIR):
+        """
+        Enable snapshot files for this process
+
+        Args:
+            tag: Process tag used in the snapshot name, e.g. 'watch'
+            directory: Where snapshots are written
+        """
+        safe_tag = ''.join(c if c.isalnum() or c in '-_' else '_' for c in tag)
+        self.snapshot_file = Path(directory) / f"{safe_tag}-{os.getpid()}.json"
+        atexit.register(self.flush)
+
+    def incr(self, name: str, amount: int = 1):
+        """Add to a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name: str, value_ms: float):
+        """Record a duration in ms"""
+        with self.lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(value_ms)
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time a block into histogram name"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def _maybe_flush(self):
+        """Write a snapshot if the flush interval has passed"""
+        if self.snapshot_file is not None and time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def snapshot(self) -> Dict:
+        """Serializable copy of everything recorded so far"""
+        with self.lock:
+            return {
+                'pid': os.getpid(),
+                'started': self.started,
+                'updated': time.time(),
+                'counters': dict(self.counters),
+                'histograms': {name: h.to_dict() for name, h in self.histograms.items()},
+            }
+
+    def flush(self):
+        """Atomically write this process's snapshot"""
+        self.next_flush = time.monotonic() + FLUSH_INTERVAL
+        if self.snapshot_file is None or not (self.counters or self.histograms):
+            return
+        import tempfile
+        try:
+            self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.metrics-', dir=str(self.snapshot_file.parent))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, self.snapshot_file)
+        except OSError:
+            pass
+
+
+def load_snapshots(directory: Path = METRICS_DIR) -> List[Dict]:
+    """
+    Read all process snapshots, deleting stale ones from dead processes
+
+    Returns:
+        Snapshot dicts, each with an added 'source' (file stem)
+    """
+    from .registry import pid_alive
+
+    snapshots = []
+    now = time.time()
+    for path in sorted(Path(directory).glob('*.json')):
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not pid_alive(data.get('pid', 0)) and now - data.get('updated', 0) > STALE_SNAPSHOT_AGE:
+            path.unlink(missing_ok=True)
+            continue
+        data['source'] = path.stem
+        snapshots.append(data)
+    return snapshots
+
+
+def aggregate(snapshots: List[Dict]) -> Dict:
+    """
+    Merge snapshots: counters are summed, histograms merged bucket-wise
+
+    Returns:
+        Dict with 'processes', 'counters' and 'histograms' (summary rows
+        with count, avg_ms, p50_ms, p95_ms, p99_ms and max_ms)
+    """
+    counters: Dict[str, int] = {}
+    histograms: Dict[str, Histogram] = {}
+    for snap in snapshots:
+        for name, value in snap.get('counters', {}).items():
+            counters[name] = counters.get(name, 0) + value
+        for name, data in snap.get('histograms', {}).items():
+            histograms.setdefault(name, Histogram()).merge(Histogram.from_dict(data))
+
+    def rnd(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'processes': [s['source'] for s in snapshots],
+        'counters': dict(sorted(counters.items())),
+        'histograms': {
+            name: {
+                'count': h.count,
+                'avg_ms': rnd(h.total / h.count if h.count else None),
+                'p50_ms': rnd(h.percentile(0.50)),
+                'p95_ms': rnd(h.percentile(0.95)),
+                'p99_ms': rnd(h.percentile(0.99)),
+                'max_ms': rnd(h.max),
+            }
+            for name, h in sorted(histograms.items())
+        },
+    }
+
+
+def reset_snapshots(directory: Path = METRICS_DIR) -> int:
+    """Delete all snapshot files; returns how many were removed"""
+    removed = 0
+    for path in Path(directory).glob('*.json'):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+# Process-wide instance used by all instrumentation
+metrics = Metrics()
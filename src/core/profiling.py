@@ -0,0 +1,134 @@
+"""
+Opt-in profiling for RecCli
+cProfile + tracemalloc around export phases and recordings, enabled by
+--profile or $RECCLI_PROFILE (for GUI processes started by the watcher)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .log import logger as log
+
+PROFILE_DIR = Path.home() / '.reccli' / 'profiles'
+PROFILE_ENV = 'RECCLI_PROFILE'
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 30
+
+_enabled = os.environ.get(PROFILE_ENV, '').lower() not in ('', '0', 'off', 'false', 'no')
+_active: Optional['Profiler'] = None
+written: List[Path] = []  # Profiles written by this process, newest last
+
+
+def enable_profiling(enabled: bool = True):
+    """Turn profiling on (or off) for this process"""
+    global _enabled
+    _enabled = enabled
+
+
+def profiling_enabled() -> bool:
+    return _enabled
+
+
+class Profiler:
+    """
+    One profiling session, written to PROFILE_DIR when stopped
+
+    Produces <name>-<time>-<pid>.prof (load with pstats.Stats or snakeviz)
+    and a matching .txt summary with the hottest functions and the top
+    tracemalloc allocation sites.
+
+    Only one session runs at a time; nested sessions are no-ops so the
+    outer one captures everything.
+    """
+
+    def __init__(self, name: str, directory: Path = PROFILE_DIR):
+        self.name = name
+        self.directory = directory
+        self.profile = None
+        self.started_at = None
+        self.owns_tracemalloc = False
+        self.path: Optional[Path] = None
+
+    def start(self) -> 'Profiler':
+        global _active
+        if not _enabled or _active is not None:
+            return self
+        # Imported here: nobody should pay for cProfile/pstats unless profiling
+        import cProfile
+        import tracemalloc
+
+        _active = self
+        self.owns_tracemalloc = not tracemalloc.is_tracing()
+        if self.owns_tracemalloc:
+            tracemalloc.start()
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        self.started_at = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        return self
+
+    def stop(self) -> Optional[Path]:
+        """Stop and write the profile; returns the .prof path (None if nothing ran)"""
+        global _active
+        if self.profile is None:
+            return None
+        import tracemalloc
+
+        self.profile.disable()
+        elapsed = time.perf_counter() - self.started_at
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self.owns_tracemalloc:
+            tracemalloc.stop()
+        _active = None
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            safe_name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in self.name)
+            stem = f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+            self.path = self.directory / f"{stem}.prof"
+            self.profile.dump_stats(str(self.path))
+            self._write_summary(self.directory / f"{stem}.txt", elapsed, snapshot, current, peak)
+        except OSError as e:
+            log.error("Could not write profile %s: %s", self.name, e)
+            return None
+        finally:
+            self.profile = None
+
+        written.append(self.path)
+        log.info("Profile %s: %.1fms, peak %.1fMB -> %s", self.name, elapsed * 1000, peak / 1e6, self.path)
+        return self.path
+
+    def _write_summary(self, path: Path, elapsed: float, snapshot, current: int, peak: int):
+        import pstats
+        import tracemalloc
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ])
+        with open(path, 'w') as f:
+            f.write(f"Profile: {self.name}\n")
+            f.write(f"Wall time: {elapsed * 1000:.1f}ms\n")
+            f.write(f"Traced memory: {current / 1e6:.2f}MB at end, {peak / 1e6:.2f}MB peak\n")
+            f.write(f"\nTop {TOP_ALLOCATIONS} allocation sites (still allocated at end):\n")
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                frame = stat.traceback[0]
+                f.write(f"  {stat.size / 1024:>10.1f}KB {stat.count:>8} blocks  {frame.filename}:{frame.lineno}\n")
+            f.write(f"\nTop {TOP_FUNCTIONS} functions by cumulative time:\n")
+            stats = pstats.Stats(self.profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+
+@contextmanager
+def profiled(name: str) -> Iterator[Profiler]:
+    """Profile the enclosed block if profiling is enabled (no-op otherwise)"""
+    profiler = Profiler(name).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
@@ -0,0 +1,465 @@
+"""
+Headless recording for RecCli
+Runs commands on pseudo-terminals and writes their output as asciicasts,
+any number of them multiplexed on one asyncio event loop
+"""
+
+import asyncio
+import codecs
+import fcntl
+import json
+import os
+import pty
+import shlex
+import signal
+import struct
+import termios
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .log import logger as log
+from .metrics import metrics
+
+READ_SIZE = 64 * 1024
+STOP_GRACE = 2.0  # Seconds between SIGHUP, SIGTERM and SIGKILL on stop
+
+# Per-session write buffer: flushed at FLUSH_BYTES or after FLUSH_INTERVAL;
+# at HIGH_WATER the session's terminal stops being read (its command then
+# blocks on a full pty) until the buffer drains below LOW_WATER
+FLUSH_BYTES = 64 * 1024
+FLUSH_INTERVAL = 0.25
+HIGH_WATER = 1024 * 1024
+LOW_WATER = 256 * 1024
+WRITE_THREADS = 4  # Disk writes run here, never on the event loop
+
+
+class Session:
+    """One command being recorded by a RecordingEngine"""
+
+    def __init__(self, session_id: str, output_file: Path, command: List[str]):
+        self.id = session_id
+        self.output_file = output_file
+        self.command = command
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.master: Optional[int] = None
+        self.file = None
+        self.started = time.time()
+        self.clock = time.monotonic()
+        self.ended: Optional[float] = None
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.pending = bytearray()  # Encoded event lines not yet written
+        self.eof = False
+        self.paused = False
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.events = 0
+        self.pauses = 0
+        self.paused_seconds = 0.0
+        self.paused_at = 0.0
+        self.wakeup: Optional[asyncio.Event] = None
+        self.done: Optional[asyncio.Event] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def running(self) -> bool:
+        """Whether the session is still being recorded"""
+        return self.ended is None
+
+    @property
+    def duration(self) -> float:
+        """Seconds recorded so far (or in total, once finished)"""
+        return (self.ended or time.time()) - self.started
+
+    def stats(self) -> Dict:
+        """Counters and throughput of this session"""
+        duration = self.duration
+        return {
+            'id': self.id,
+            'file': str(self.output_file),
+            'command': self.command,
+            'pid': self.pid,
+            'running': self.running,
+            'duration': round(duration, 3),
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'events': self.events,
+            'buffered': len(self.pending),
+            'paused': self.paused,
+            'pauses': self.pauses,
+            'paused_seconds': round(self.paused_seconds, 3),
+            'mb_per_s': round(self.bytes_read / duration / (1024 * 1024), 3) if duration else 0.0,
+        }
+
+
+def _open_cast(output_file: Path, header: Dict):
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    f = open(output_file, 'wb')
+    f.write(json.dumps(header).encode('utf-8') + b'\n')
+    f.flush()
+    return f
+
+
+def _write(f, data: bytes):
+    f.write(data)
+    f.flush()
+
+
+class RecordingEngine:
+    """
+    Records many commands on one event loop
+
+    Each session's pty master is a non-blocking fd watched by the loop;
+    output is timestamped and encoded as asciicast events into the
+    session's buffer, and a writer task per session hands full buffers
+    to a small thread pool, so a slow disk never stalls the loop. A
+    session whose buffer passes the high-water mark is no longer read:
+    its command blocks writing to the full terminal, exactly as it would
+    on a slow real terminal, until the writer catches up. Memory is
+    bounded at about HIGH_WATER per session however fast commands print.
+
+    Coroutines must run on the engine's loop - from other threads, go
+    through call() on the engine returned by shared().
+    """
+
+    _shared: Optional['RecordingEngine'] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, write_threads: int = WRITE_THREADS, flush_bytes: int = FLUSH_BYTES,
+                 flush_interval: float = FLUSH_INTERVAL, high_water: int = HIGH_WATER,
+                 low_water: int = LOW_WATER):
+        """
+        Initialize engine
+
+        Args:
+            write_threads: Threads writing session files
+            flush_bytes: Buffered bytes that trigger a write
+            flush_interval: Longest time output stays buffered (seconds)
+            high_water: Buffered bytes at which a session stops being read
+            low_water: Buffered bytes at which reading resumes
+        """
+        self.sessions: Dict[str, Session] = {}
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.high_water = high_water
+        self.low_water = low_water
+        self.started = time.time()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writers = ThreadPoolExecutor(write_threads, thread_name_prefix='reccli-write')
+
+    @classmethod
+    def shared(cls) -> 'RecordingEngine':
+        """The process-wide engine, its loop running on a background thread"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                engine = cls()
+                engine.run_in_thread()
+                cls._shared = engine
+        return cls._shared
+
+    def run_in_thread(self):
+        """Run a new event loop for this engine on a daemon thread"""
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self.loop = loop
+        threading.Thread(target=run, name='reccli-recording', daemon=True).start()
+        ready.wait()
+
+    def call(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the engine's loop from another thread and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def run_on_loop(self, func: Callable, *args):
+        """Run a plain function on the engine's loop thread and wait for its result"""
+        async def run():
+            return func(*args)
+        return self.call(run())
+
+    def _unique_id(self, name: str) -> str:
+        candidate, n = name, 1
+        while candidate in self.sessions:
+            n += 1
+            candidate = f"{name}_{n}"
+        return candidate
+
+    async def start_session(self, output_file: Path, command: List[str], cwd: Optional[str] = None,
+                            env: Optional[Dict[str, str]] = None, width: int = 80, height: int = 24,
+                            session_id: Optional[str] = None) -> Session:
+        """
+        Spawn a command on a new pseudo-terminal and start recording it
+
+        Args:
+            output_file: .cast file to write
+            command: argv to run
+            cwd: Working directory for the command (default: ours)
+            env: Extra environment variables for the command
+            width, height: Terminal size the command sees
+            session_id: Key in self.sessions (default: the file's stem, made unique)
+
+        Returns:
+            The running session
+        """
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        output_file = Path(output_file)
+        session = Session(self._unique_id(session_id or output_file.stem), output_file, list(command))
+
+        environment = dict(os.environ, TERM=os.environ.get('TERM', 'xterm-256color'), **(env or {}))
+        header = {
+            'version': 2,
+            'width': width,
+            'height': height,
+            'timestamp': int(session.started),
+            'command': shlex.join(session.command),
+            'env': {'SHELL': os.environ.get('SHELL', ''), 'TERM': environment['TERM']},
+        }
+        session.file = await loop.run_in_executor(self._writers, _open_cast, output_file, header)
+
+        master, slave = pty.openpty()
+        try:
+            fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack('HHHH', height, width, 0, 0))
+            session.process = await asyncio.create_subprocess_exec(
+                *session.command, stdin=slave, stdout=slave, stderr=slave, cwd=cwd, env=environment,
+                start_new_session=True)
+        except BaseException:
+            os.close(master)
+            await loop.run_in_executor(self._writers, session.file.close)
+            raise
+        finally:
+            os.close(slave)
+        os.set_blocking(master, False)
+        session.master = master
+        session.started, session.clock = time.time(), time.monotonic()
+
+        session.wakeup = asyncio.Event()
+        session.done = asyncio.Event()
+        self.sessions[session.id] = session
+        loop.add_reader(master, self._on_readable, session)
+        loop.create_task(self._write_loop(session))
+        log.info("Recording %s (PID %s) to %s", session.command, session.pid, output_file)
+        return session
+
+    def _event(self, session: Session, text: str):
+        session.pending += (json.dumps([round(time.monotonic() - session.clock, 6), 'o', text]) + '\n').encode('utf-8')
+        session.events += 1
+
+    def _on_readable(self, session: Session):
+        """Loop callback: one read from a session's terminal"""
+        try:
+            chunk = os.read(session.master, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            chunk = b''  # EIO: every process on the terminal has gone
+        if not chunk:
+            self.loop.remove_reader(session.master)
+            text = session.decoder.decode(b'', final=True)
+            if text:
+                self._event(session, text)
+            session.eof = True
+            session.wakeup.set()
+            return
+
+        session.bytes_read += len(chunk)
+        text = session.decoder.decode(chunk)
+        if text:
+            self._event(session, text)
+        if len(session.pending) >= self.flush_bytes:
+            session.wakeup.set()
+        if len(session.pending) >= self.high_water:
+            # Backpressure: leave the rest in the kernel until the writer catches up
+            self.loop.remove_reader(session.master)
+            session.paused = True
+            session.pauses += 1
+            session.paused_at = time.monotonic()
+
+    async def _write_loop(self, session: Session):
+        """Writer task: flush a session's buffer until it has hung up and drained"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not session.eof:
+                    try:
+                        # Idle sessions sleep until there is something to write
+                        await asyncio.wait_for(session.wakeup.wait(),
+                                               self.flush_interval if session.pending else None)
+                    except asyncio.TimeoutError:
+                        pass
+                session.wakeup.clear()
+
+                if session.pending:
+                    data, session.pending = session.pending, bytearray()
+                    started = time.perf_counter()
+                    await loop.run_in_executor(self._writers, _write, session.file, data)
+                    metrics.observe('record.write', (time.perf_counter() - started) * 1000)
+                    session.bytes_written += len(data)
+
+                if session.paused and len(session.pending) < self.low_water:
+                    session.paused = False
+                    session.paused_seconds += time.monotonic() - session.paused_at
+                    loop.add_reader(session.master, self._on_readable, session)
+                if session.eof and not session.pending:
+                    break
+        except Exception as e:
+            # Closing the terminal below hangs up the command
+            log.warning("Recording %s failed: %s", session.id, e)
+            loop.remove_reader(session.master)
+        finally:
+            await loop.run_in_executor(self._writers, session.file.close)
+            os.close(session.master)
+            await session.process.wait()
+            session.ended = time.time()
+            metrics.incr('record.bytes', session.bytes_read)
+            session.done.set()
+
+    async def stop_session(self, session: Session, grace: float = STOP_GRACE) -> Session:
+        """
+        Hang up a session's command and wait for its cast to be finished
+
+        Sends SIGHUP to the command's process group, as closing a terminal
+        window would, escalating to SIGTERM and SIGKILL if it lingers.
+        """
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGKILL):
+            if session.process.returncode is not None:
+                break
+            try:
+                os.killpg(session.pid, sig)
+            except (ProcessLookupError, PermissionError):
+                break
+            try:
+                await asyncio.wait_for(session.process.wait(), grace)
+                break
+            except asyncio.TimeoutError:
+                log.warning("%s ignored %s", session.command, signal.Signals(sig).name)
+        try:
+            await asyncio.wait_for(session.done.wait(), grace)
+        except asyncio.TimeoutError:
+            # Children that kept the terminal open die with the process group
+            try:
+                os.killpg(session.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            await session.done.wait()
+        return session
+
+    async def stop_all(self, grace: float = STOP_GRACE, sessions: Optional[List[Session]] = None):
+        """Stop every running session (or just the given ones), concurrently"""
+        if sessions is None:
+            sessions = list(self.sessions.values())
+        await asyncio.gather(*(self.stop_session(s, grace) for s in sessions if s.running))
+
+    def forget(self, session_id: str):
+        """Drop a finished session from self.sessions"""
+        session = self.sessions.get(session_id)
+        if session is not None and not session.running:
+            del self.sessions[session_id]
+
+    def stats(self) -> Dict:
+        """
+        Per-session and aggregate counters
+
+        Returns:
+            {'sessions': [Session.stats()...], 'total': {...}} - the total's
+            mb_per_s is bytes read by all sessions over the engine's uptime
+        """
+        sessions = [s.stats() for s in list(self.sessions.values())]
+        uptime = time.time() - self.started
+        total_read = sum(s['bytes_read'] for s in sessions)
+        return {
+            'sessions': sessions,
+            'total': {
+                'sessions': len(sessions),
+                'running': sum(s['running'] for s in sessions),
+                'paused': sum(s['paused'] for s in sessions),
+                'bytes_read': total_read,
+                'bytes_written': sum(s['bytes_written'] for s in sessions),
+                'buffered': sum(s['buffered'] for s in sessions),
+                'uptime': round(uptime, 3),
+                'mb_per_s': round(total_read / uptime / (1024 * 1024), 3) if uptime else 0.0,
+            },
+        }
+
+
+class PtyRecording:
+    """
+    One command recorded without a terminal window
+
+    The command runs in its own session on a new pseudo-terminal and its
+    output goes to an asciicast v2 file (the format asciinema writes),
+    flushed at least every FLUSH_INTERVAL so the file can be followed or
+    exported while it grows. Nothing is typed into the terminal - the
+    recording ends when the command exits or stop() hangs it up.
+
+    A blocking handle on a session of the shared RecordingEngine, so
+    every recording in the process shares one event loop.
+    """
+
+    def __init__(self, output_file: Path, command: List[str], cwd: Optional[str] = None,
+                 env: Optional[Dict[str, str]] = None, width: int = 80, height: int = 24):
+        """
+        Initialize recording
+
+        Args:
+            output_file: .cast file to write
+            command: argv to run
+            cwd: Working directory for the command (default: ours)
+            env: Extra environment variables for the command
+            width, height: Terminal size the command sees
+        """
+        self.output_file = Path(output_file)
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = dict(env or {})
+        self.width = width
+        self.height = height
+        self.engine: Optional[RecordingEngine] = None
+        self.session: Optional[Session] = None
+
+    def start(self) -> 'PtyRecording':
+        """Spawn the command and start recording its output"""
+        self.engine = RecordingEngine.shared()
+        self.session = self.engine.call(self.engine.start_session(
+            self.output_file, self.command, cwd=self.cwd, env=self.env, width=self.width, height=self.height))
+        return self
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.session.pid if self.session else None
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self.session.started if self.session else None
+
+    @property
+    def running(self) -> bool:
+        """Whether output is still being recorded"""
+        return self.session is not None and self.session.running
+
+    @property
+    def duration(self) -> float:
+        """Seconds recorded so far (or in total, once finished)"""
+        return self.session.duration if self.session else 0.0
+
+    def stop(self, timeout: float = STOP_GRACE) -> float:
+        """
+        Hang up the command and finish the cast
+
+        Returns:
+            Recorded duration in seconds
+        """
+        if self.session is None:
+            return 0.0
+        self.engine.call(self.engine.stop_session(self.session, timeout))
+        self.engine.loop.call_soon_threadsafe(self.engine.forget, self.session.id)
+        return self.session.duration
@@ -0,0 +1,244 @@
+"""
+Process registry for RecCli
+Locked, atomically rewritten map of terminal ID -> owning process ID
+(and the LockedJSONFile base other shared state files build on)
+"""
+
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+DEFAULT_REGISTRY = Path("/tmp/reccli_processes.json")
+
+
+def _copy(entries: Dict) -> Dict:
+    """Copy entries deep enough that callers can't mutate the cache (values are scalars or dicts)"""
+    return {k: (dict(v) if isinstance(v, dict) else v) for k, v in entries.items()}
+
+
+class LockedJSONFile:
+    """
+    JSON file shared between processes
+
+    Every update runs as a transaction: an exclusive fcntl lock on a
+    sidecar .lock file, read, modify, then write to a temp file and
+    rename it over the original. Readers therefore always see a complete
+    file, and concurrent writers never lose each other's updates.
+    Reads are cached in memory and only hit the disk when the file's
+    mtime/size/inode change.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize store
+
+        Args:
+            path: JSON file (created on first write)
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._cache: Dict = {}
+        self._cache_key = None
+
+    def _decode(self, data) -> Dict:
+        """Validate/convert freshly loaded JSON (raise ValueError/AttributeError if foreign)"""
+        return dict(data)
+
+    def _stat_key(self):
+        """Identity of the file on disk, or None if it doesn't exist"""
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read(self) -> Dict:
+        """Read the file, using the in-memory copy if it is unchanged"""
+        key = self._stat_key()
+        if key is None:
+            self._cache, self._cache_key = {}, None
+            return {}
+        if key != self._cache_key:
+            try:
+                with open(self.path, 'r') as f:
+                    self._cache = self._decode(json.load(f))
+            except (OSError, ValueError, AttributeError, TypeError):
+                # Corrupt or foreign file - treat as empty, next write repairs it
+                self._cache = {}
+            self._cache_key = key
+        return _copy(self._cache)
+
+    def _write(self, entries: Dict):
+        """Atomically replace the file"""
+        fd, tmp = tempfile.mkstemp(prefix=self.path.name + '.', dir=str(self.path.parent))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._cache = _copy(entries)
+        self._cache_key = self._stat_key()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the file's exclusive lock"""
+        with open(self.lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict]:
+        """
+        Read-modify-write the file under the lock
+
+        Yields:
+            Mutable dict, written back on success if it changed
+        """
+        with self._locked():
+            entries = self._read()
+            before = _copy(entries)
+            yield entries
+            if entries != before:
+                self._write(entries)
+
+    def load(self) -> Dict:
+        """Current entries (cached, lock-free - writes are atomic renames)"""
+        return self._read()
+
+
+class ProcessRegistry(LockedJSONFile):
+    """
+    Terminal -> PID registry shared by launch, watch and killall
+
+    Updates are locked, atomic transactions (see LockedJSONFile), so a
+    watcher, launch and killall running at once never corrupt it.
+    """
+
+    def __init__(self, path: Path = DEFAULT_REGISTRY):
+        """
+        Initialize registry
+
+        Args:
+            path: JSON registry file (created on first write)
+        """
+        super().__init__(path)
+
+    def _decode(self, data) -> Dict[str, int]:
+        return {str(k): int(v) for k, v in data.items()}
+
+    def update(self, added: Optional[Dict[str, int]] = None, removed: Iterable[str] = ()):
+        """
+        Add and remove entries in a single transaction
+
+        Args:
+            added: terminal ID -> PID to register
+            removed: terminal IDs to forget
+        """
+        with self.transaction() as entries:
+            for terminal_id in removed:
+                entries.pop(str(terminal_id), None)
+            for terminal_id, pid in (added or {}).items():
+                entries[str(terminal_id)] = int(pid)
+
+    def register(self, terminal_id: str, pid: int):
+        """Record that pid owns the button for terminal_id"""
+        self.update(added={terminal_id: pid})
+
+    def unregister(self, *terminal_ids: str):
+        """Forget terminals"""
+        self.update(removed=terminal_ids)
+
+    def replace(self, entries: Dict[str, int]):
+        """Replace all entries"""
+        with self.transaction() as current:
+            current.clear()
+            current.update({str(k): int(v) for k, v in entries.items()})
+
+    def clear(self):
+        """Remove all entries (the file itself stays, so holders never see it vanish)"""
+        self.replace({})
+
+    def alive(self, entries: Optional[Dict[str, int]] = None) -> Dict[str, int]:
+        """
+        Entries whose process is still running
+
+        Each distinct PID is checked once, so a host owning hundreds of
+        terminals costs a single kill(pid, 0).
+
+        Args:
+            entries: Entries to check (the current registry if None)
+
+        Returns:
+            The subset of entries with a live PID
+        """
+        entries = self.load() if entries is None else entries
+        live = {pid for pid in set(entries.values()) if pid_alive(pid)}
+        return {t: pid for t, pid in entries.items() if pid in live}
+
+    def prune(self) -> Dict[str, int]:
+        """
+        Drop entries whose process has died
+
+        Returns:
+            The removed entries
+        """
+        with self.transaction() as entries:
+            live = self.alive(entries)
+            dead = {t: pid for t, pid in entries.items() if t not in live}
+            for terminal_id in dead:
+                del entries[terminal_id]
+        return dead
+
+
+def pid_alive(pid: int) -> bool:
+    """Check whether a process exists (signal 0)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by someone else
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def pid_commands(pids: Iterable[int]) -> Dict[int, str]:
+    """
+    Command lines of running processes, one ps call for all of them
+
+    A registered PID may have been reused by an unrelated process since
+    it was recorded - check this before signalling it.
+
+    Returns:
+        PID -> command line, for the PIDs that are running
+    """
+    pids = sorted({int(pid) for pid in pids})
+    if not pids:
+        return {}
+    import subprocess
+    try:
+        result = subprocess.run(['ps', '-o', 'pid=,command=', '-p', ','.join(map(str, pids))],
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    commands = {}
+    for line in result.stdout.splitlines():
+        pid, _, command = line.strip().partition(' ')
+        if pid.isdigit():
+            commands[int(pid)] = command.strip()
+    return commands
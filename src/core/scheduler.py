@@ -0,0 +1,166 @@
+"""
+Adaptive tick scheduler for RecCli
+Polls fast while things change, backs off exponentially while stable
+"""
+
+import time
+from typing import Callable, Dict, Optional
+
+from .log import logger as log
+
+
+class AdaptiveScheduler:
+    """
+    Reschedule a polling callback with an interval that adapts to activity
+
+    The callback returns True when it saw a change (window moved, focus
+    changed, ...). A change drops the interval back to min_interval; after
+    hold_ticks unchanged ticks the interval grows by backoff per tick up to
+    max_interval. wake() forces an immediate tick, e.g. on mouse events.
+    A callback that raises is logged and the next tick is still scheduled.
+
+    Scheduling is delegated to after/cancel callables with Tk's
+    after(ms, func) / after_cancel(job) signatures.
+    """
+
+    def __init__(self, after: Callable, cancel: Callable, callback: Callable[[], bool],
+                 min_interval: float = 0.05, max_interval: float = 2.0,
+                 backoff: float = 2.0, hold_ticks: int = 10, metric: Optional[str] = None):
+        """
+        Initialize scheduler
+
+        Args:
+            after: Schedules func after ms milliseconds, returns a job handle
+            cancel: Cancels a job handle returned by after
+            callback: One polling tick, returns True if something changed
+            min_interval: Seconds between ticks while active
+            max_interval: Ceiling in seconds for the backed-off interval
+            backoff: Interval multiplier per stable tick once backing off
+            hold_ticks: Stable ticks to stay at min_interval before backing off
+            metric: Histogram to record every tick's duration into (see src.core.metrics)
+        """
+        self.after = after
+        self.cancel = cancel
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.hold_ticks = hold_ticks
+        self.metric = metric
+
+        self.interval = min_interval
+        self.stable_ticks = 0
+        self.job = None
+        self.running = False
+
+        # Stats since the last reset_stats()
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.wakeups = 0
+        self.window_start = time.monotonic()
+
+    def start(self):
+        """Run the first tick immediately"""
+        self.running = True
+        self._schedule(0)
+
+    def stop(self):
+        """Cancel the pending tick and stop rescheduling"""
+        self.running = False
+        if self.job is not None:
+            try:
+                self.cancel(self.job)
+            except Exception:
+                pass
+            self.job = None
+
+    def wake(self):
+        """Drop to the fast interval and tick now (mouse, drag or focus event)"""
+        if not self.running:
+            return
+        self.wakeups += 1
+        self.interval = self.min_interval
+        self.stable_ticks = 0
+        if self.job is not None:
+            try:
+                self.cancel(self.job)
+            except Exception:
+                pass
+        self._schedule(0)
+
+    def _schedule(self, delay: float):
+        """Schedule the next tick after delay seconds"""
+        self.job = self.after(int(delay * 1000), self._tick)
+
+    def _tick(self):
+        """Run the callback, record its cost and pick the next interval"""
+        self.job = None
+        started = time.perf_counter()
+        try:
+            changed = self.callback()
+        except Exception:
+            # One bad tick mustn't stop polling for good; a failure that
+            # keeps happening backs off like a stable tick
+            log.exception("Scheduler tick failed")
+            changed = False
+        finally:
+            elapsed = time.perf_counter() - started
+            self.ticks += 1
+            self.tick_time += elapsed
+            self.max_tick_time = max(self.max_tick_time, elapsed)
+            if self.metric:
+                from .metrics import metrics
+                metrics.observe(self.metric, elapsed * 1000)
+
+        if not self.running:
+            return
+
+        self.interval = self.next_interval(bool(changed))
+        self._schedule(self.interval)
+
+    def next_interval(self, changed: bool) -> float:
+        """
+        Compute the interval following a tick
+
+        Args:
+            changed: Whether the tick observed a change
+
+        Returns:
+            Seconds until the next tick
+        """
+        if changed:
+            self.stable_ticks = 0
+            return self.min_interval
+
+        self.stable_ticks += 1
+        if self.stable_ticks <= self.hold_ticks:
+            return self.min_interval
+        return min(self.interval * self.backoff, self.max_interval)
+
+    def stats(self) -> Dict:
+        """
+        Tick rate and per-tick cost since the last reset
+
+        Returns:
+            Dict with ticks, tick_rate_hz, avg_tick_ms, max_tick_ms,
+            interval_ms and wakeups
+        """
+        window = max(time.monotonic() - self.window_start, 1e-9)
+        return {
+            'ticks': self.ticks,
+            'tick_rate_hz': round(self.ticks / window, 3),
+            'avg_tick_ms': round(self.tick_time / self.ticks * 1000, 3) if self.ticks else 0.0,
+            'max_tick_ms': round(self.max_tick_time * 1000, 3),
+            'interval_ms': round(self.interval * 1000, 1),
+            'wakeups': self.wakeups,
+            'window_seconds': round(window, 1),
+        }
+
+    def reset_stats(self):
+        """Start a new stats window"""
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.max_tick_time = 0.0
+        self.wakeups = 0
+        self.window_start = time.monotonic()
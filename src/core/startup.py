@@ -0,0 +1,139 @@
+"""
+Startup profiling for RecCli
+Cold-start wall time and -X importtime breakdown per subcommand
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    Parse python -X importtime output
+
+    Args:
+        output: stderr of a python -X importtime run
+
+    Returns:
+        One dict per import: module, depth (0 = imported directly by the
+        program), self_us and cumulative_us
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Header line
+        name = parts[2].rstrip()
+        stripped = name.lstrip(' ')
+        entries.append({
+            'module': stripped,
+            'depth': (len(name) - len(stripped) - 1) // 2,
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+        })
+    return entries
+
+
+def _median_wall_ms(argv: List[str], runs: int) -> float:
+    """Median wall time of running argv in a fresh process"""
+    walls = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        walls.append((time.perf_counter() - started) * 1000)
+    return statistics.median(walls)
+
+
+def interpreter_baseline_ms(runs: int = 5) -> float:
+    """
+    Cold start of a bare interpreter on this machine
+
+    Budgets are checked against time above this, so they don't depend
+    on how fast the machine starts Python at all.
+    """
+    return round(_median_wall_ms([sys.executable, '-c', 'pass'], runs), 1)
+
+
+def profile_command(script: Path, command: str, runs: int = 5) -> Dict:
+    """
+    Measure the cold start of one reccli subcommand
+
+    Runs `script command --startup-check` (which performs the command's
+    imports and exits) in fresh interpreters: `runs` times for wall clock,
+    plus once under -X importtime for the per-module breakdown.
+
+    Args:
+        script: Path to reccli.py
+        command: Subcommand to profile
+        runs: Number of timed runs (the median is reported)
+
+    Returns:
+        Dict with command, wall_ms (median), import_ms (total of top-level
+        imports) and top_imports (five most expensive top-level imports)
+    """
+    argv = [sys.executable, str(script), command, '--startup-check']
+    wall_ms = _median_wall_ms(argv, runs)
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + argv[1:],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+    top_level = [e for e in parse_importtime(result.stderr) if e['depth'] == 0]
+    top_level.sort(key=lambda e: e['cumulative_us'], reverse=True)
+
+    return {
+        'command': command,
+        'wall_ms': round(wall_ms, 1),
+        'import_ms': round(sum(e['cumulative_us'] for e in top_level) / 1000, 1),
+        'top_imports': [(e['module'], round(e['cumulative_us'] / 1000, 1)) for e in top_level[:5]],
+    }
+
+
+def profile_zygote(script: Path, command: str, preload: List[str], runs: int = 5) -> float:
+    """
+    Measure starting a subcommand by forking it from a zygote
+
+    Starts a throwaway zygote (preloading as the real one does) on a
+    private socket, then times spawn request -> forked child exiting
+    after `command --startup-check`, for comparison with a cold start.
+
+    Returns:
+        Median milliseconds per forked start
+    """
+    import tempfile
+    from .ipc import send_command
+    from .registry import pid_alive
+    from .zygote import zygote_spawn
+
+    with tempfile.TemporaryDirectory(prefix='reccli_zygote_') as tmp:
+        socket_path = Path(tmp) / 'zygote.sock'
+        server = subprocess.Popen([sys.executable, '-c', (
+            "import sys; sys.path.insert(0, sys.argv[1]); import reccli; from src.core import Zygote; "
+            "Zygote(sys.argv[2], reccli.main, preload=sys.argv[3:]).serve_forever()"),
+            str(script.parent), str(socket_path)] + list(preload),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 10
+            while send_command(socket_path, {'cmd': 'ping'}, timeout=0.5) is None:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("Zygote didn't start")
+                time.sleep(0.01)
+            walls = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                pid = zygote_spawn(socket_path, [command, '--startup-check'])
+                if pid is None:
+                    raise RuntimeError("Zygote didn't fork")
+                while pid_alive(pid):  # Reaped by the zygote (SIGCHLD ignored)
+                    time.sleep(0.0005)
+                walls.append((time.perf_counter() - started) * 1000)
+        finally:
+            server.terminate()
+            server.wait()
+    return round(statistics.median(walls), 1)
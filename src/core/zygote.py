@@ -0,0 +1,173 @@
+"""
+Fork server for RecCli
+Pre-imports the GUI modules once and forks ready-to-run instances on request
+"""
+
+import importlib
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from .ipc import send_command
+
+# Loaded by tkinter - Tk (and Cocoa under it on macOS) is not fork-safe, so
+# a child forked after it was loaded can crash as soon as it opens a window
+FORK_UNSAFE_MODULES = ('_tkinter',)
+
+
+class Zygote:
+    """
+    Pre-warmed process that forks GUI instances
+
+    The zygote imports the heavy modules (e.g. src.export) once, then
+    forks a child per spawn request; the child runs entry(argv) with
+    everything already imported. It is deliberately single-threaded -
+    forking a multi-threaded process can leave locks held in the child -
+    and must never load Tk: children import tkinter after the fork.
+    """
+
+    def __init__(self, socket_path: Path, entry: Callable[[List[str]], None],
+                 preload: Iterable[str] = ()):
+        """
+        Initialize zygote
+
+        Args:
+            socket_path: Unix socket to accept spawn requests on
+            entry: Run in each forked child with the requested argv
+            preload: Module names to import before serving
+        """
+        self.socket_path = Path(socket_path)
+        self.entry = entry
+        self.preload = list(preload)
+        self.sock = None
+
+    def warm_up(self) -> float:
+        """
+        Import the preload modules
+
+        Returns:
+            Seconds spent importing
+
+        Raises:
+            RuntimeError: A preload module loaded Tk (see FORK_UNSAFE_MODULES)
+        """
+        started = time.perf_counter()
+        for name in self.preload:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+            unsafe = [module for module in FORK_UNSAFE_MODULES if module in sys.modules]
+            if unsafe:
+                raise RuntimeError(f"Preloading {name} loaded {', '.join(unsafe)}, which is not fork-safe")
+        return time.perf_counter() - started
+
+    def serve_forever(self):
+        """Warm up, bind the socket and fork on every spawn request"""
+        self.warm_up()
+
+        if self.socket_path.exists():
+            if send_command(self.socket_path, {'cmd': 'ping'}, timeout=0.5) is not None:
+                raise RuntimeError(f"Another process is already serving {self.socket_path}")
+            self.socket_path.unlink()
+
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self.sock.listen(16)
+
+        # Children are never waited on - let the kernel reap them
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        # killall sends SIGTERM - unwind so the socket file is removed
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+        try:
+            while True:
+                conn, _ = self.sock.accept()
+                with conn:
+                    self._handle(conn)
+        finally:
+            self.sock.close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _handle(self, conn: socket.socket):
+        """Answer one request"""
+        conn.settimeout(2)
+        try:
+            with conn.makefile('rb') as stream:
+                request = json.loads(stream.readline())
+        except (OSError, ValueError):
+            return
+
+        cmd = request.get('cmd')
+        if cmd == 'ping':
+            response = {'ok': True, 'pid': os.getpid()}
+        elif cmd == 'spawn':
+            response = {'ok': True, 'pid': self._fork(request.get('argv', []), conn)}
+        else:
+            response = {'ok': False, 'error': f"Unknown command: {cmd}"}
+
+        try:
+            conn.sendall(json.dumps(response).encode('utf-8') + b'\n')
+        except OSError:
+            pass
+
+    def _fork(self, argv: List[str], conn: socket.socket) -> int:
+        """Fork a child running entry(argv); returns the child PID in the parent"""
+        pid = os.fork()
+        if pid:
+            return pid
+
+        # Child: drop the server's resources and detach like start_new_session
+        code = 0
+        try:
+            conn.close()
+            self.sock.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.setsid()
+            devnull = os.open(os.devnull, os.O_RDWR)
+            for fd in (0, 1, 2):
+                os.dup2(devnull, fd)
+            self.entry(list(argv))
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 0
+        except BaseException:
+            code = 1
+        finally:
+            # os._exit skips atexit - write out what the child's metrics and
+            # logging would have flushed there
+            try:
+                from .log import shutdown_logging
+                from .metrics import metrics
+                metrics.flush()
+                shutdown_logging()
+                sys.stdout.flush()
+            finally:
+                os._exit(code)
+
+
+def zygote_spawn(socket_path: Path, argv: List[str], timeout: float = 2.0) -> Optional[int]:
+    """
+    Ask a running zygote to fork an instance
+
+    Args:
+        socket_path: The zygote's Unix socket
+        argv: Arguments for the zygote's entry function
+        timeout: Seconds to wait for the reply
+
+    Returns:
+        PID of the forked instance, or None if no zygote answered
+    """
+    response = send_command(socket_path, {'cmd': 'spawn', 'argv': argv}, timeout=timeout)
+    if response and response.get('ok'):
+        return response.get('pid')
+    return None
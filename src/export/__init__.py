@@ -3,6 +3,25 @@ RecCli Export Module
 Multiple format export for recorded sessions
 """
 
-from .exporters import SessionExporter, format_duration
+from .exporters import (SessionExporter, format_duration, cast_duration, export_extension, open_session,
+                        session_metadata)
+from .events import Event, EventStore
+from .live import LiveExporter
+from .redact import Redactor
 
-__all__ = ['SessionExporter', 'format_duration']
+# Imported on first use - http.server isn't needed by plain exports
+_LAZY = {
+    'SessionServer': 'server',
+    'RenderCache': 'server',
+}
+
+__all__ = ['SessionExporter', 'format_duration', 'cast_duration', 'export_extension', 'open_session',
+           'session_metadata', 'Event', 'EventStore', 'LiveExporter', 'Redactor', *_LAZY]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        module = importlib.import_module(f'.{_LAZY[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,448 @@
+"""
+Transcript cleaning for RecCli exports
+ANSI stripping and incremental-typing cleanup, serial or on a process pool
+
+Everything here accepts decoded text or UTF-8 bytes (see reader.py); byte
+input is stripped as bytes and only decoded into lines for cleaning.
+"""
+
+import os
+import re
+from typing import Iterator, List, Optional, Set, Tuple, Union
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from .reader import decode_lines
+
+# Escape sequences never contain a newline, so stripping is line-local
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# Same pattern for bytes - every byte it matches is ASCII, so it can't cut a UTF-8 sequence
+ANSI_ESCAPE_BYTES = re.compile(ANSI_ESCAPE.pattern.encode())
+
+LOADING_MARKERS = ['Galloping', 'Warping', 'Deliberating', 'Combobulating',
+                   'Musing', 'Prestidigitating', 'Finagling', 'Whatchamacalliting',
+                   '(esc to interrupt)']
+EXIT_MARKERS = ['Press Ctrl-D', 'again to exit']
+UI_MARKERS = ['? for shortcuts', 'Thinking off', 'tab to toggle']
+
+# Prompts further apart than this (in lines) are separate commands
+PROMPT_GROUP_GAP = 10
+
+# Below this much raw text (characters, or bytes) a process pool costs more than it saves
+PARALLEL_MIN_CHARS = 32 * 1024 * 1024
+MIN_SEGMENT_CHARS = 4 * 1024 * 1024
+WORKERS_ENV = 'RECCLI_EXPORT_WORKERS'
+
+# (line, dedup key) - lines with a key are kept only at their first occurrence
+Entry = Tuple[str, Optional[str]]
+
+Text = Union[str, bytes, bytearray, memoryview]
+
+
+def strip_ansi(text: Text) -> Text:
+    if isinstance(text, str):
+        return ANSI_ESCAPE.sub('', text)
+    return ANSI_ESCAPE_BYTES.sub(b'', text)
+
+
+def _split_lines(stripped: Text) -> List[str]:
+    if isinstance(stripped, str):
+        return stripped.split('\n')
+    return decode_lines(stripped)
+
+
+def is_prompt(line: str) -> bool:
+    """A typed prompt line - each kept one starts a command block"""
+    return line.strip().startswith('>')
+
+
+def _clean_entries(lines: List[str]) -> List[Entry]:
+    """
+    Classify lines, keeping only the final version of each typed prompt
+
+    Returns:
+        Kept lines; UI/status lines carry a dedup key so only their first
+        occurrence survives (applied by _dedup, possibly across segments)
+    """
+    return [(lines[i], key) for i, key in _classify(lines)]
+
+
+def _classify(lines: List[str]) -> List[Tuple[int, Optional[str]]]:
+    """_clean_entries by line index: (index, dedup key) of each kept line"""
+    prompt_positions = [i for i, line in enumerate(lines) if is_prompt(line)]
+
+    # Group prompts that are part of incremental typing
+    # Look for prompts that are close together (incremental typing vs separate commands)
+    # A large gap (>10 lines) or a response from Claude indicates a new command
+    prompt_groups = []
+    if prompt_positions:
+        current_group = [prompt_positions[0]]
+
+        for i in range(1, len(prompt_positions)):
+            prev_pos = prompt_positions[i-1]
+            curr_pos = prompt_positions[i]
+
+            # Check if there's a Claude response (⏺) between the two prompts
+            has_response = False
+            for j in range(prev_pos + 1, curr_pos):
+                if '⏺' in lines[j]:
+                    has_response = True
+                    break
+
+            # If there's a response or large gap, start new group
+            if has_response or (curr_pos - prev_pos > PROMPT_GROUP_GAP):
+                prompt_groups.append(current_group)
+                current_group = [curr_pos]
+            else:
+                # Same group (incremental typing)
+                current_group.append(curr_pos)
+
+        # Don't forget the last group
+        prompt_groups.append(current_group)
+
+    # Determine which lines to keep
+    lines_to_keep = set()
+    for group in prompt_groups:
+        # For each group, find the prompt with actual content (not just whitespace)
+        non_empty_prompts = [pos for pos in group if lines[pos].strip() not in ['>', '> ']]
+
+        if non_empty_prompts:
+            # Keep the last non-empty prompt
+            lines_to_keep.add(non_empty_prompts[-1])
+        elif len(group) == 1:
+            # Single empty prompt might be intentional
+            lines_to_keep.add(group[0])
+
+    # Build cleaned output - remove duplicates and unnecessary lines
+    entries: List[Tuple[int, Optional[str]]] = []
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+
+        # Skip separators
+        if all(c in '─' for c in stripped) and stripped:
+            continue
+
+        # Keep selected prompt lines (but only if they have content)
+        if i in lines_to_keep:
+            if stripped not in ['>', '> ']:
+                entries.append((i, None))
+            continue
+
+        # Skip other prompt lines
+        if stripped.startswith('>'):
+            continue
+
+        # Skip empty lines
+        if not stripped:
+            continue
+
+        # Skip ALL loading animations (don't keep any)
+        if any(x in stripped for x in LOADING_MARKERS):
+            continue
+
+        # Skip "Press Ctrl-D" and exit messages first (before checking UI elements)
+        if any(x in stripped for x in EXIT_MARKERS):
+            continue
+
+        # Skip duplicate UI elements and status messages - only keep first occurrence
+        if any(x in stripped for x in UI_MARKERS) or 'Claude Opus limit reached' in stripped:
+            entries.append((i, stripped))
+            continue
+
+        # Keep everything else
+        entries.append((i, None))
+
+    return entries
+
+
+def _dedup(entries: List[Entry], seen: Set[str]) -> List[str]:
+    """Drop keyed entries already in seen (updating it), in order"""
+    kept = []
+    for line, key in entries:
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return kept
+
+
+def clean_incremental_typing(content: str) -> str:
+    """
+    Remove incremental typing artifacts from terminal output.
+    Keeps only final versions of lines (after Enter was pressed).
+    """
+    lines = content.split('\n')
+    if not any(is_prompt(line) for line in lines):
+        return content
+    return '\n'.join(_dedup(_clean_entries(lines), set()))
+
+
+def kept_lines(lines: List[str]) -> Iterator[int]:
+    """
+    Indices of the lines clean_incremental_typing keeps, in order
+
+    Lets callers carry per-line data (timestamps) through cleaning.
+    """
+    if not any(is_prompt(line) for line in lines):
+        yield from range(len(lines))
+        return
+    yield from kept_block(lines, set())
+
+
+def kept_block(lines: List[str], seen: Set[str]) -> Iterator[int]:
+    """kept_lines for one block of a transcript that has prompts (see clean_block)"""
+    for i, key in _classify(lines):
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        yield i
+
+
+def clean_lines(lines: List[str]) -> str:
+    """clean_incremental_typing for text already split into lines"""
+    if not any(is_prompt(line) for line in lines):
+        return '\n'.join(lines)
+    return '\n'.join(_dedup(_clean_entries(lines), set()))
+
+
+def clean_block(lines: List[str], seen: Set[str]) -> List[str]:
+    """
+    clean_lines for one block of a transcript that has prompts
+
+    Blocks must be cut where no prompt group spans the cut (see
+    settled_lines); first-occurrence dedup carries over through seen, so
+    cleaning consecutive blocks gives the lines cleaning them at once would.
+    """
+    return _dedup(_clean_entries(lines), seen)
+
+
+def settled_lines(lines: List[str]) -> int:
+    """
+    How many leading lines of a growing transcript no later line can change
+
+    Only the last prompt group is still open: a prompt yet to come joins
+    it if it lands within PROMPT_GROUP_GAP lines with no response (⏺) in
+    between. Everything before that group is final.
+
+    Args:
+        lines: Complete lines so far (a line still being written counts as later)
+
+    Returns:
+        Number of lines that can be cleaned (with clean_block) for good
+    """
+    prompts = [i for i, line in enumerate(lines) if is_prompt(line)]
+    if not prompts:
+        return len(lines)
+    start = prompts[-1]
+    if len(lines) - start > PROMPT_GROUP_GAP or any('⏺' in line for line in lines[start + 1:]):
+        return len(lines)
+    for previous in reversed(prompts[:-1]):
+        if start - previous > PROMPT_GROUP_GAP or any('⏺' in line for line in lines[previous + 1:start]):
+            break
+        start = previous
+    return start
+
+
+class SettledLines:
+    """
+    settled_lines for a transcript that grows a line at a time
+
+    Follows the last prompt group as lines are added, so each add() costs
+    O(1) instead of a rescan of every line not yet taken.
+    """
+
+    def __init__(self):
+        self.lines = 0             # Lines added and not taken yet
+        self.start = 0             # First prompt of the last group
+        self.last = None           # Last prompt (None: no prompt yet)
+        self.responded = False     # A response (⏺) follows the last prompt
+
+    def _closed(self, end: int) -> bool:
+        return self.last is None or self.responded or end - self.last > PROMPT_GROUP_GAP
+
+    def add(self, line: str) -> int:
+        """Add the next complete line, returning how many lines are settled"""
+        if is_prompt(line):
+            if self._closed(self.lines):
+                self.start = self.lines
+            self.last = self.lines
+            self.responded = False
+        elif '⏺' in line:
+            self.responded = True
+        self.lines += 1
+        return self.lines if self._closed(self.lines) else self.start
+
+    def take(self, count: int):
+        """Drop the first count lines (cleaned for good)"""
+        self.lines -= count
+        self.start -= count
+        if self.last is not None:
+            self.last -= count
+
+
+def _line(text: Text, start: int, end: int) -> str:
+    line = strip_ansi(text[start:end])
+    return line if isinstance(line, str) else line.decode('utf-8', 'ignore')
+
+
+def _lines_around(text: Text, newline: int, count: int) -> Tuple[List[str], List[str]]:
+    """
+    Up to count stripped lines on each side of a newline
+
+    Returns:
+        (before, after) - before nearest-first, after nearest-first
+    """
+    nl = '\n' if isinstance(text, str) else b'\n'
+    before = []
+    cursor = newline
+    while len(before) < count:
+        previous = text.rfind(nl, 0, cursor)
+        before.append(_line(text, previous + 1, cursor))
+        if previous == -1:
+            break
+        cursor = previous
+
+    after = []
+    cursor = newline
+    while len(after) < count and cursor != -1:
+        following = text.find(nl, cursor + 1)
+        after.append(_line(text, cursor + 1, following if following != -1 else len(text)))
+        cursor = following
+    return before, after
+
+
+def _safe_cut(text: Text, newline: int) -> bool:
+    """
+    Whether splitting at a newline keeps every prompt group intact
+
+    The first prompt after the cut must start a new group: a prompt
+    group only spans prompts at most PROMPT_GROUP_GAP lines apart with
+    no response (⏺) between them, so a window of that many lines on each
+    side decides it.
+    """
+    before, after = _lines_around(text, newline, PROMPT_GROUP_GAP)
+    response = False
+    for a, line in enumerate(after, 1):
+        if is_prompt(line):
+            break
+        response = response or '⏺' in line
+    else:
+        return True  # No prompt soon after the cut
+
+    # Previous prompt close enough (gap = a + b - 1 <= 10) with no response between?
+    for line in before[:PROMPT_GROUP_GAP + 1 - a]:
+        if is_prompt(line):
+            return response
+        response = response or '⏺' in line
+    return True
+
+
+def find_boundaries(text: Text, segments: int) -> List[int]:
+    """
+    Safe places to split raw (unstripped) text for parallel cleaning
+
+    A boundary is a newline no prompt group spans - typically right
+    before a prompt that follows a response, or anywhere in output with
+    no prompt within ten lines. Splitting there leaves prompt grouping
+    unchanged, and since escape sequences can't span a newline no
+    sequence is ever cut open.
+
+    Returns:
+        Sorted newline offsets (at most segments - 1)
+    """
+    nl = '\n' if isinstance(text, str) else b'\n'
+    boundaries = []
+    step = len(text) // segments
+    position = step
+    while len(boundaries) < segments - 1 and position < len(text):
+        newline = text.find(nl, position)
+        while newline != -1 and newline - position < step and not _safe_cut(text, newline):
+            newline = text.find(nl, newline + 1)
+        if newline == -1 or newline - position >= step:
+            break
+        boundaries.append(newline)
+        position = newline + step
+    return boundaries
+
+
+def _process_segment(raw: Text) -> Tuple[bool, List[Entry], Optional[str]]:
+    """
+    Worker: strip and clean one segment
+
+    Returns:
+        (has_prompt, entries, stripped text if there was no prompt) - a
+        transcript with no prompt anywhere is returned merely stripped,
+        which only the parent can tell
+    """
+    lines = _split_lines(strip_ansi(raw))
+    has_prompt = any(is_prompt(line) for line in lines)
+    return has_prompt, _clean_entries(lines), None if has_prompt else '\n'.join(lines)
+
+
+def default_workers() -> int:
+    """Worker count from $RECCLI_EXPORT_WORKERS, else one per CPU"""
+    try:
+        return max(1, int(os.environ.get(WORKERS_ENV, '')))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def strip_and_clean(raw: Text, workers: Optional[int] = None) -> str:
+    """
+    strip_ansi + clean_incremental_typing, in parallel for huge transcripts
+
+    Output is identical to the serial pipeline: segments are cut only at
+    safe boundaries (see find_boundaries) and first-occurrence dedup is
+    applied across segments in order when stitching.
+
+    Args:
+        raw: Terminal output - text, or UTF-8 bytes (bytes, bytearray,
+             mmap), decoded only after stripping
+        workers: Process count (default: default_workers()); 1 forces serial
+    """
+    workers = workers or default_workers()
+    segments = min(workers, len(raw) // MIN_SEGMENT_CHARS)
+    if workers > 1 and len(raw) >= PARALLEL_MIN_CHARS and segments > 1:
+        boundaries = find_boundaries(raw, segments)
+        if boundaries:
+            try:
+                with metrics.timer('export.strip_clean.parallel'):
+                    return _parallel(raw, boundaries, workers)
+            except (OSError, RuntimeError) as e:
+                # BrokenProcessPool is a RuntimeError - fall back to serial
+                log.warning("Parallel cleaning failed, continuing serially: %s", e)
+
+    with metrics.timer('export.strip'):
+        cleaned = strip_ansi(raw)
+    with metrics.timer('export.clean'):
+        if isinstance(cleaned, str):
+            return clean_incremental_typing(cleaned)
+        return clean_lines(decode_lines(cleaned))
+
+
+def _parallel(raw: Text, boundaries: List[int], workers: int) -> str:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Segments partition the lines exactly: each boundary newline is the
+    # separator the final join puts back
+    starts = [0] + [b + 1 for b in boundaries]
+    ends = boundaries + [len(raw)]
+    pieces = [raw[s:e] for s, e in zip(starts, ends)]
+
+    # spawn: never fork a process that may be running Tk
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=min(workers, len(pieces)), mp_context=context) as pool:
+        results = list(pool.map(_process_segment, pieces))
+
+    if not any(has_prompt for has_prompt, _, _ in results):
+        return '\n'.join(stripped for _, _, stripped in results)
+
+    seen: Set[str] = set()
+    lines: List[str] = []
+    for _, entries, _ in results:
+        lines.extend(_dedup(entries, seen))
+    return '\n'.join(lines)
@@ -0,0 +1,153 @@
+"""
+Compact in-memory event store for RecCli casts
+Timestamps, codes and payloads in flat arrays instead of one list per event
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+from .reader import cast_events, mapped
+
+
+class Event(NamedTuple):
+    time: float
+    code: str          # 'o' output, 'i' input, 'm' marker, 'r' resize
+    data: memoryview   # UTF-8 payload, a view into the store's buffer
+
+
+class EventStore:
+    """
+    Cast events held in four flat buffers
+
+    Times live in array('d'), codes in array('B'), payloads back to back
+    in one bytearray with their start offsets in array('Q') - about 17
+    bytes per event plus the payload, against well over 100 for a
+    json.loads list. Indexing is O(1), time lookups bisect the (sorted)
+    times, and slicing returns a view sharing the same buffers.
+
+    Payloads are returned as memoryviews into the buffer; while one is
+    held the store can't grow (appending raises BufferError), so fill it
+    first (from_cast) and read it afterwards.
+    """
+
+    def __init__(self):
+        self._times = array('d')
+        self._codes = array('B')
+        self._offsets = array('Q', [0])
+        self._data = bytearray()
+        self._start = 0
+        self._stop = 0
+
+    @classmethod
+    def from_cast(cls, session_file: Path) -> 'EventStore':
+        """
+        Load every event of a cast (plain, .gz or .dedup)
+
+        Events whose code isn't a single character (malformed lines like
+        [0.2, "ox", "x"]) are skipped, and events timed before the one
+        ahead of them are moved up to its time so lookups can bisect.
+
+        Args:
+            session_file: Path to the .cast file
+
+        Returns:
+            Filled store
+        """
+        store = cls()
+        last = 0.0
+        with mapped(session_file) as data:
+            for time, code, payload in cast_events(data):
+                if len(code) != 1 or ord(code) > 0xff:
+                    continue
+                last = max(last, time)
+                store.append(last, code, payload)
+        return store
+
+    def append(self, time: float, code: str, payload: bytes):
+        """
+        Add an event at the end (times must not decrease)
+
+        Raises:
+            ValueError: Appending to a slice, code isn't one Latin-1 character,
+                or time is before the last event's
+        """
+        if self._stop != len(self._times):
+            raise ValueError("Can't append to a slice of an EventStore")
+        if len(code) != 1 or ord(code) > 0xff:
+            raise ValueError(f"Event code must be a single character: {code!r}")
+        if self._times and time < self._times[-1]:
+            raise ValueError(f"Event time {time} is before the previous event ({self._times[-1]})")
+        self._data += payload
+        self._times.append(time)
+        self._codes.append(ord(code))
+        self._offsets.append(len(self._data))
+        self._stop += 1
+
+    def __len__(self) -> int:
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("EventStore slices must be contiguous")
+            return self._view(self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event index out of range")
+        i = self._start + index
+        return Event(self._times[i], chr(self._codes[i]), self._payload(i, i + 1))
+
+    def __iter__(self) -> Iterator[Event]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def _view(self, start: int, stop: int) -> 'EventStore':
+        view = EventStore.__new__(EventStore)
+        view._times, view._codes = self._times, self._codes
+        view._offsets, view._data = self._offsets, self._data
+        view._start, view._stop = start, stop
+        return view
+
+    def _payload(self, start: int, stop: int) -> memoryview:
+        return memoryview(self._data)[self._offsets[start]:self._offsets[stop]]
+
+    @property
+    def duration(self) -> float:
+        """Time of the last event (0.0 if empty)"""
+        return self._times[self._stop - 1] if len(self) else 0.0
+
+    def index_at(self, time: float) -> int:
+        """
+        Index of the last event at or before a time
+
+        Returns:
+            Index into this store, or -1 if every event is later
+        """
+        return bisect_right(self._times, time, self._start, self._stop) - 1 - self._start
+
+    def between(self, start: float, end: Optional[float] = None) -> 'EventStore':
+        """View of the events with start <= time < end (to the last event if end is None)"""
+        first = bisect_left(self._times, start, self._start, self._stop)
+        last = self._stop if end is None else bisect_left(self._times, end, first, self._stop)
+        return self._view(first, last)
+
+    def data(self) -> memoryview:
+        """Payloads of every event in this store, back to back (no copy)"""
+        return self._payload(self._start, self._stop)
+
+    def output(self, code: str = 'o') -> Iterator[memoryview]:
+        """Payloads of one kind of event, in order - join them for the full output"""
+        wanted = ord(code)
+        for i in range(self._start, self._stop):
+            if self._codes[i] == wanted and self._offsets[i + 1] > self._offsets[i]:
+                yield self._payload(i, i + 1)
+
+    def nbytes(self) -> int:
+        """Memory held by the store's buffers (shared with any views)"""
+        return (len(self._data) + self._times.itemsize * len(self._times)
+                + self._codes.itemsize * len(self._codes)
+                + self._offsets.itemsize * len(self._offsets))
@@ -4,214 +4,246 @@ Converts asciinema recordings to various formats
 """
 
 import json
+import re
 import subprocess
+import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.core.metrics import metrics
+from src.core.profiling import profiled
+from .cleaning import SettledLines, clean_incremental_typing, is_prompt, kept_block, strip_and_clean, strip_ansi
+from .reader import cast_events, cast_output, mapped, text_output
+from .redact import Redactor, unsplit_keys
+
+
+# Suffixes retention leaves on stored sessions (session.cast.gz, session.cast.dedup)
+STORED_SUFFIXES = ('.gz', '.dedup')
+
+# Longer transcripts are exported as the chunked HTML viewer instead of one <div>
+HTML_INLINE_CHARS = 1024 * 1024
+
+# A .txt session is read this much at a time (cut after a newline) by iter_records
+TEXT_BLOCK = 4 * 1024 * 1024
+
+# Every prompt line has one of these (a '>', maybe JSON-escaped) in the session file
+PROMPT_MARK = re.compile(rb'>|\\u003[eE]')
+
+# Settled lines iter_records cleans and redacts at a time (fewer, larger redact calls)
+RECORD_BATCH = 1024
+
+# File extensions of formats not named after theirs
+EXTENSIONS = {'player': 'player.html', 'chunks': 'chunks.jsonl'}
+
+
+def export_extension(fmt: str) -> str:
+    """Extension (without the dot) of an export format's files"""
+    return EXTENSIONS.get(fmt, fmt)
+
+
+def open_session(session_file: Path, mode: str = 'r'):
+    """Open a session file, transparently reading retention-compressed (.gz) and deduplicated (.dedup) ones"""
+    session_file = Path(session_file)
+    if session_file.suffix == '.dedup':
+        import io
+        from src.storage.dedup import open_stub
+        raw = open_stub(session_file)
+        if 'b' in mode:
+            return raw
+        return io.TextIOWrapper(raw, encoding='utf-8', errors='ignore')
+    if session_file.suffix == '.gz':
+        import gzip
+        if 'b' in mode:
+            return gzip.open(session_file, 'rb')
+        return gzip.open(session_file, 'rt', encoding='utf-8', errors='ignore')
+    if 'b' in mode:
+        return open(session_file, 'rb')
+    return open(session_file, 'r', encoding='utf-8', errors='ignore')
+
+
+def transcript_document(fmt: str, session_id: str, duration: str, timestamp: str) -> Tuple[str, str]:
+    """
+    Text around the transcript in a txt or md export
+
+    Returns:
+        (head, tail) - the export is head + transcript + tail
+    """
+    if fmt == 'md':
+        return (f"""# Session: {session_id}
+
+**Duration:** {duration}
+**Date:** {timestamp}
+
+## Terminal Output
+
+```
+""", """
+```
+
+---
+
+*Recorded with [RecCli](https://github.com/willluecke/RecCli)*
+""")
+    return (f"""Session: {session_id}
+Duration: {duration}
+Date: {timestamp}
+
+{'=' * 60}
+Terminal Output
+{'=' * 60}
+
+""", "\n")
+
+
+def _text_events(data) -> Iterator[Tuple[None, str, bytes]]:
+    """A .txt session as untimed output events of about TEXT_BLOCK each"""
+    start = 0
+    while start < len(data):
+        # Cut after a newline, so text_output never sees a \r\n split in two
+        end = data.find(b'\n', start + TEXT_BLOCK) + 1 or len(data)
+        yield None, 'o', text_output(data[start:end])
+        start = end
+
+
+def _timed_lines(events: Iterable[Tuple[Optional[float], str, bytes]]) -> Iterator[Tuple[Optional[float], str, str]]:
+    """
+    Output events as ANSI-stripped lines, each timed by the event it starts in
+
+    Input and marker events are passed through (stripped) where they come,
+    other kinds dropped. Stripping never removes a newline, so the lines
+    are those of the session's whole output stripped at once.
+
+    Yields:
+        (time, stream, text) - stream 'o' for output lines
+    """
+    line = bytearray()  # Output after the last newline
+    line_started = None
+    for started, code, payload in events:
+        if code in ('i', 'm'):
+            yield started, code, strip_ansi(payload).decode('utf-8', 'ignore')
+        if code != 'o' or not payload:
+            continue
+        if not line:
+            line_started = started
+        cut = payload.rfind(b'\n')
+        if cut == -1:
+            line += payload
+            continue
+        if line:
+            line += payload[:cut]
+            head, line = line, bytearray()
+        else:
+            head = payload[:cut]
+        # No UTF-8 sequence contains a newline, so lines decode on their own
+        texts = strip_ansi(head).decode('utf-8', 'ignore').split('\n')
+        yield line_started, 'o', texts[0]
+        for text in texts[1:]:
+            yield started, 'o', text
+        if cut + 1 < len(payload):
+            line += payload[cut + 1:]
+        line_started = started
+    if line:
+        yield line_started, 'o', strip_ansi(line).decode('utf-8', 'ignore')
 
 
 class SessionExporter:
     """Export recorded sessions to various formats"""
 
-    def __init__(self, session_file: Path, metadata: Optional[Dict] = None):
+    def __init__(self, session_file: Path, metadata: Optional[Dict] = None, workers: Optional[int] = None,
+                 redactor: Optional[Redactor] = None, chunk_tokens: Optional[int] = None, tokenizer: str = 'auto'):
         """
         Initialize exporter
 
         Args:
             session_file: Path to asciinema .cast file
             metadata: Optional metadata (session_id, duration, etc.)
+            workers: Processes for cleaning huge sessions (default: one per
+                     CPU or $RECCLI_EXPORT_WORKERS; 1 = always serial)
+            redactor: Masks secrets in every format (see Redactor.from_config);
+                      None exports the session as recorded
+            chunk_tokens: Token budget per chunk of a chunks export (default 8000)
+            tokenizer: Counts tokens for chunks - 'auto', 'tiktoken' or 'estimate'
         """
         self.session_file = Path(session_file)
         self.metadata = metadata or {}
+        self.workers = workers
+        self.redactor = redactor
+        self.chunk_tokens = chunk_tokens
+        self.tokenizer = tokenizer
 
         # Try to extract terminal output from .cast file
-        self.terminal_output = self._extract_terminal_output()
+        with profiled('export-load'):
+            self.terminal_output = self._extract_terminal_output()
+            if self.redactor is not None:
+                self.terminal_output = self.redactor.redact(self.terminal_output)
 
     def _clean_incremental_typing(self, content: str) -> str:
         """
         Remove incremental typing artifacts from terminal output.
         Keeps only final versions of lines (after Enter was pressed).
         """
-        import re
-
-        lines = content.split('\n')
-
-        # First pass: identify all prompt lines and group them
-        prompt_positions = []
-        for i, line in enumerate(lines):
-            if line.strip().startswith('>'):
-                prompt_positions.append(i)
-
-        if not prompt_positions:
-            return content
-
-        # Group prompts that are part of incremental typing
-        # Look for prompts that are close together (incremental typing vs separate commands)
-        # A large gap (>10 lines) or a response from Claude indicates a new command
-        prompt_groups = []
-        current_group = [prompt_positions[0]]
-
-        for i in range(1, len(prompt_positions)):
-            prev_pos = prompt_positions[i-1]
-            curr_pos = prompt_positions[i]
-
-            # Check if there's a Claude response (⏺) between the two prompts
-            has_response = False
-            for j in range(prev_pos + 1, curr_pos):
-                if '⏺' in lines[j]:
-                    has_response = True
-                    break
-
-            # If there's a response or large gap, start new group
-            if has_response or (curr_pos - prev_pos > 10):
-                prompt_groups.append(current_group)
-                current_group = [curr_pos]
-            else:
-                # Same group (incremental typing)
-                current_group.append(curr_pos)
-
-        # Don't forget the last group
-        prompt_groups.append(current_group)
-
-        # Determine which lines to keep
-        lines_to_keep = set()
-        for group in prompt_groups:
-            # For each group, find the prompt with actual content (not just whitespace)
-            non_empty_prompts = [pos for pos in group if lines[pos].strip() not in ['>', '> ']]
-
-            if non_empty_prompts:
-                # Keep the last non-empty prompt
-                lines_to_keep.add(non_empty_prompts[-1])
-            elif len(group) == 1:
-                # Single empty prompt might be intentional
-                lines_to_keep.add(group[0])
-
-        # Build cleaned output - remove duplicates and unnecessary lines
-        cleaned_lines = []
-        seen_lines = set()
-
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-
-            # Skip separators
-            if all(c in '─' for c in stripped) and stripped:
-                continue
-
-            # Keep selected prompt lines (but only if they have content)
-            if i in lines_to_keep:
-                if stripped not in ['>', '> ']:
-                    cleaned_lines.append(line)
-                continue
-
-            # Skip other prompt lines
-            if stripped.startswith('>'):
-                continue
-
-            # Skip empty lines
-            if not stripped:
-                continue
-
-            # Skip ALL loading animations (don't keep any)
-            if any(x in stripped for x in ['Galloping', 'Warping', 'Deliberating', 'Combobulating',
-                                           'Musing', 'Prestidigitating', 'Finagling', 'Whatchamacalliting',
-                                           '(esc to interrupt)']):
-                continue
-
-            # Skip "Press Ctrl-D" and exit messages first (before checking UI elements)
-            if any(x in stripped for x in ['Press Ctrl-D', 'again to exit']):
-                continue
-
-            # Skip duplicate UI elements - only keep first occurrence
-            if any(x in stripped for x in ['? for shortcuts', 'Thinking off', 'tab to toggle']):
-                if stripped not in seen_lines:
-                    seen_lines.add(stripped)
-                    cleaned_lines.append(line)
-                continue
-
-            # Skip duplicate status messages
-            if 'Claude Opus limit reached' in stripped:
-                # Only keep one
-                if stripped not in seen_lines:
-                    seen_lines.add(stripped)
-                    cleaned_lines.append(line)
-                continue
-
-            # Keep everything else
-            cleaned_lines.append(line)
-
-        return '\n'.join(cleaned_lines)
+        return clean_incremental_typing(content)
 
     def _extract_terminal_output(self) -> str:
         """Extract plain text output from session file (.cast or .txt)"""
         if not self.session_file.exists():
             return ""
 
+        # Retention compresses old sessions to .cast.gz/.txt.gz (or .dedup stubs)
+        compressed = self.session_file.suffix in STORED_SUFFIXES
+        kind = Path(self.session_file.stem).suffix if compressed else self.session_file.suffix
+
         # Check if it's a plain text file from script command
-        if self.session_file.suffix == '.txt':
+        if kind == '.txt':
             try:
-                with open(self.session_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    # Strip terminal control codes for cleaner output
-                    import re
-                    # Remove ANSI escape sequences
-                    ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-                    cleaned = ansi_escape.sub('', content)
-                    # Remove incremental typing artifacts
-                    cleaned = self._clean_incremental_typing(cleaned)
-                    return cleaned
+                with mapped(self.session_file) as data:
+                    with metrics.timer('export.convert'):
+                        content = text_output(data)
+                    # Strip ANSI escape sequences and incremental typing artifacts
+                    # (on bytes - decoded only once stripped)
+                    return strip_and_clean(content, self.workers)
             except Exception as e:
                 print(f"Error reading txt file: {e}")
                 return ""
 
         # Handle .cast files
         try:
+            if compressed:
+                raise FileNotFoundError  # asciinema can't read these - parse it ourselves
             # Use asciinema convert to get plain text output (asciinema 3.x)
-            result = subprocess.run(
-                ['asciinema', 'convert', '-f', 'raw', str(self.session_file), '-'],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
+            with metrics.timer('export.convert'):
+                result = subprocess.run(
+                    ['asciinema', 'convert', '-f', 'raw', str(self.session_file), '-'],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
             if result.returncode == 0:
                 # Apply the same cleaning as for .txt files
-                import re
-                content = result.stdout
-                # Remove ANSI escape sequences
-                ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-                cleaned = ansi_escape.sub('', content)
-                # Remove incremental typing artifacts
-                cleaned = self._clean_incremental_typing(cleaned)
-                return cleaned
+                return strip_and_clean(result.stdout, self.workers)
         except (subprocess.SubprocessError, FileNotFoundError):
             pass
 
         # Fallback: parse .cast file manually
         try:
-            with open(self.session_file, 'r') as f:
-                lines = f.readlines()
-
-            output = []
-            for line in lines[1:]:  # Skip header
-                try:
-                    event = json.loads(line)
-                    if len(event) >= 3 and event[1] == 'o':  # Output event
-                        output.append(event[2])
-                except json.JSONDecodeError:
-                    continue
-
-            content = ''.join(output)
+            started = time.perf_counter()
+            with mapped(self.session_file) as data:
+                # Output events as UTF-8 bytes, sliced out of the mapped file
+                content = cast_output(data)
+            metrics.observe('export.convert', (time.perf_counter() - started) * 1000)
 
             # Apply the same cleaning as for other methods
-            import re
-            # Remove ANSI escape sequences
-            ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-            cleaned = ansi_escape.sub('', content)
-            # Remove incremental typing artifacts
-            cleaned = self._clean_incremental_typing(cleaned)
-            return cleaned
+            return strip_and_clean(content, self.workers)
         except Exception:
             return ""
 
+    def _document(self, fmt: str) -> Tuple[str, str]:
+        return transcript_document(fmt, self.metadata.get('session_id', self.session_file.stem),
+                                   self.metadata.get('duration', 'Unknown'),
+                                   self.metadata.get('timestamp', datetime.now().isoformat()))
+
     def export_txt(self, output_file: Path) -> bool:
         """
         Export as plain text
@@ -223,23 +255,9 @@ class SessionExporter:
             True if successful
         """
         try:
-            session_id = self.metadata.get('session_id', self.session_file.stem)
-            duration = self.metadata.get('duration', 'Unknown')
-            timestamp = self.metadata.get('timestamp', datetime.now().isoformat())
-
-            content = f"""Session: {session_id}
-Duration: {duration}
-Date: {timestamp}
-
-{'=' * 60}
-Terminal Output
-{'=' * 60}
-
-{self.terminal_output}
-"""
-
+            head, tail = self._document('txt')
             with open(output_file, 'w') as f:
-                f.write(content)
+                f.write(head + self.terminal_output + tail)
 
             return True
         except Exception as e:
@@ -257,28 +275,9 @@ Terminal Output
             True if successful
         """
         try:
-            session_id = self.metadata.get('session_id', self.session_file.stem)
-            duration = self.metadata.get('duration', 'Unknown')
-            timestamp = self.metadata.get('timestamp', datetime.now().isoformat())
-
-            content = f"""# Session: {session_id}
-
-**Duration:** {duration}
-**Date:** {timestamp}
-
-## Terminal Output
-
-```
-{self.terminal_output}
-```
-
----
-
-*Recorded with [RecCli](https://github.com/willluecke/RecCli)*
-"""
-
+            head, tail = self._document('md')
             with open(output_file, 'w') as f:
-                f.write(content)
+                f.write(head + self.terminal_output + tail)
 
             return True
         except Exception as e:
@@ -319,10 +318,169 @@ Terminal Output
             print(f"Error exporting to json: {e}")
             return False
 
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Cleaned output as timestamped records, one per non-empty line
+
+        Reads the session's events itself (terminal_output has no timing).
+        Input and marker events, if recorded, are interleaved by time.
+        Events are streamed and cleaned (and redacted) a block of lines at
+        a time, as they settle (see SettledLines) - only whether the
+        session has any prompt is found up front, by a first pass that
+        stops at the first one (skipped if no '>' is in the file).
+
+        Yields:
+            {'time', 'stream', 'text', 'block'} - time in seconds from the
+            start of the recording (None for .txt sessions, which have no
+            timing), stream 'o' (output), 'i' (input) or 'm' (marker), and
+            block the number of commands (kept prompts) seen so far
+        """
+        compressed = self.session_file.suffix in STORED_SUFFIXES
+        kind = Path(self.session_file.stem).suffix if compressed else self.session_file.suffix
+
+        with mapped(self.session_file) as data:
+            def timed():
+                return _timed_lines(_text_events(data) if kind == '.txt' else cast_events(data))
+
+            # Without a prompt anywhere, cleaning keeps every line (see kept_lines)
+            cleaning = PROMPT_MARK.search(data) is not None \
+                and any(stream == 'o' and is_prompt(text) for _, stream, text in timed())
+            block = 0
+            seen: Set[str] = set()
+            lines: List[str] = []                        # Output lines not cleaned yet
+            times: List[Optional[float]] = []
+            events: deque = deque()                      # (time, stream, text) of input/marker events
+            groups = SettledLines()
+
+            def flush(count):
+                nonlocal block
+                for record in self._block_records(lines[:count], times[:count], events, seen, cleaning):
+                    if record['stream'] == 'o' and is_prompt(record['text']):
+                        block += 1
+                    record['block'] = block
+                    yield record
+                del lines[:count], times[:count]
+                groups.take(count)
+
+            for started, stream, text in timed():
+                if stream != 'o':
+                    if self.redactor is not None:
+                        text = self.redactor.redact(text)
+                    events.append((started, stream, text))
+                    continue
+                lines.append(text)
+                times.append(started)
+                settled = groups.add(text) if cleaning else len(lines)
+                if settled < RECORD_BATCH:
+                    continue
+                if self.redactor is not None:
+                    settled = unsplit_keys(lines, settled)
+                    if not settled:
+                        continue
+                yield from flush(settled)
+
+            yield from flush(len(lines))
+            for started, stream, text in events:
+                yield {'time': started, 'stream': stream, 'text': text, 'block': block}
+
+    def _block_records(self, lines: List[str], times: List[Optional[float]], events: deque,
+                       seen: Set[str], cleaning: bool) -> Iterator[Dict]:
+        """Records of a settled block of output lines, with the events timed up to each (block left to the caller)"""
+        if self.redactor is not None:
+            # Masks keep line counts, so the times still line up
+            lines = self.redactor.redact('\n'.join(lines)).split('\n')
+        for i in (kept_block(lines, seen) if cleaning else range(len(lines))):
+            text = lines[i]
+            if not text.strip():
+                continue
+            started = times[i]
+            while events and started is not None and events[0][0] <= started:
+                event = events.popleft()
+                yield {'time': event[0], 'stream': event[1], 'text': event[2]}
+            yield {'time': started, 'stream': 'o', 'text': text.rstrip('\r')}
+
+    def export_ndjson(self, output_file: Path) -> bool:
+        """
+        Export as newline-delimited JSON (one record per line, see iter_records)
+
+        Records are written as they are produced, so the file can be
+        consumed with jq or a log pipeline without loading the session.
+
+        Args:
+            output_file: Path to save .ndjson file
+
+        Returns:
+            True if successful
+        """
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for record in self.iter_records():
+                    f.write(json.dumps(record, ensure_ascii=False))
+                    f.write('\n')
+            return True
+        except Exception as e:
+            print(f"Error exporting to ndjson: {e}")
+            return False
+
+    def iter_chunks(self, max_tokens: Optional[int] = None, merge: bool = True) -> Iterator[Dict]:
+        """
+        Cleaned transcript in chunks that fit a token budget, for LLM context
+
+        Chunks hold whole command blocks where they can (see
+        tokens.chunk_lines). Per-line token counts are cached per session
+        (~/.reccli/cache/tokens), so chunking it again - for any budget -
+        doesn't tokenize it again.
+
+        Args:
+            max_tokens: Budget per chunk (default: chunk_tokens, else 8000)
+            merge: False puts each command block in its own chunk(s)
+
+        Yields:
+            {'chunk', 'tokens', 'tokenizer', 'blocks', 'lines', 'text'} -
+            blocks is [first, last] command block (numbered as in NDJSON
+            exports), lines [start, end) in the transcript
+
+        Raises:
+            ValueError: The tokenizer is 'tiktoken' and it isn't available
+        """
+        from .tokens import DEFAULT_CHUNK_TOKENS, TokenCache, TokenCounter, chunk_lines
+        counter = TokenCounter(self.tokenizer)
+        lines = self.terminal_output.split('\n')
+        counts = TokenCache().line_counts(self.session_file, lines, counter)
+        budget = max_tokens or self.chunk_tokens or DEFAULT_CHUNK_TOKENS
+        for i, chunk in enumerate(chunk_lines(lines, counts, budget, counter, merge)):
+            yield {'chunk': i, 'tokens': chunk['tokens'], 'tokenizer': counter.name,
+                   'blocks': chunk['blocks'], 'lines': chunk['lines'], 'text': chunk['text']}
+
+    def export_chunks(self, output_file: Path) -> bool:
+        """
+        Export as token-budgeted chunks, one JSON record per line (see iter_chunks)
+
+        Args:
+            output_file: Path to save .chunks.jsonl file
+
+        Returns:
+            True if successful
+        """
+        try:
+            session_id = self.metadata.get('session_id', self.session_file.stem)
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for chunk in self.iter_chunks():
+                    f.write(json.dumps({'session': session_id, **chunk}, ensure_ascii=False))
+                    f.write('\n')
+            return True
+        except Exception as e:
+            print(f"Error exporting to chunks: {e}")
+            return False
+
     def export_html(self, output_file: Path) -> bool:
         """
         Export as HTML with styled terminal output
 
+        Transcripts over HTML_INLINE_CHARS are written as a chunked viewer
+        (see viewer.py): compressed, drawn only where visible and
+        searchable, so huge sessions open quickly in a browser.
+
         Args:
             output_file: Path to save .html file
 
@@ -334,6 +492,12 @@ Terminal Output
             duration = self.metadata.get('duration', 'Unknown')
             timestamp = self.metadata.get('timestamp', datetime.now().isoformat())
 
+            if len(self.terminal_output) > HTML_INLINE_CHARS:
+                from .viewer import write_viewer
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    write_viewer(f, self.terminal_output, session_id, duration, timestamp)
+                return True
+
             # Escape HTML
             output_escaped = (
                 self.terminal_output
@@ -425,9 +589,51 @@ Terminal Output
             print(f"Error exporting to html: {e}")
             return False
 
+    def export_player(self, output_file: Path) -> bool:
+        """
+        Export as a self-contained HTML page that plays the recording back
+
+        The cast's events are embedded compactly with a small JS terminal
+        (see player.py), so the page replays the session exactly, offline.
+        Secrets are masked in the events as in a cast export.
+
+        Args:
+            output_file: Path to save .player.html file
+
+        Returns:
+            True if successful
+        """
+        try:
+            compressed = self.session_file.suffix in STORED_SUFFIXES
+            kind = Path(self.session_file.stem).suffix if compressed else self.session_file.suffix
+            if kind != '.cast':
+                print("Error exporting to player: needs a .cast recording (a .txt one has no timing)")
+                return False
+
+            from .player import write_player
+            session_id = self.metadata.get('session_id', self.session_file.stem)
+            duration = self.metadata.get('duration', 'Unknown')
+            timestamp = self.metadata.get('timestamp', datetime.now().isoformat())
+
+            if self.redactor is None:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    write_player(f, self.session_file, session_id, duration, timestamp)
+                return True
+
+            import tempfile
+            with tempfile.TemporaryDirectory(prefix='reccli-player-') as tmp:
+                masked = Path(tmp) / 'session.cast'
+                self.redactor.redact_file(self.session_file, masked)
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    write_player(f, masked, session_id, duration, timestamp)
+            return True
+        except Exception as e:
+            print(f"Error exporting to player: {e}")
+            return False
+
     def export_cast(self, output_file: Path) -> bool:
         """
-        Export as asciinema .cast (just copy the file)
+        Export as asciinema .cast (a copy, with secrets masked if redacting)
 
         Args:
             output_file: Path to save .cast file
@@ -437,7 +643,13 @@ Terminal Output
         """
         try:
             import shutil
-            shutil.copy2(self.session_file, output_file)
+            if self.redactor is not None:
+                self.redactor.redact_file(self.session_file, output_file)
+            elif self.session_file.suffix in STORED_SUFFIXES:
+                with open_session(self.session_file, 'rb') as src, open(output_file, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                shutil.copy2(self.session_file, output_file)
             return True
         except Exception as e:
             print(f"Error exporting to cast: {e}")
@@ -449,7 +661,7 @@ Terminal Output
 
         Args:
             output_file: Path to save file
-            format: Format type ('txt', 'md', 'json', 'html', 'cast')
+            format: Format type ('txt', 'md', 'json', 'ndjson', 'chunks', 'html', 'player', 'cast')
 
         Returns:
             True if successful
@@ -460,7 +672,10 @@ Terminal Output
             'txt': self.export_txt,
             'md': self.export_md,
             'json': self.export_json,
+            'ndjson': self.export_ndjson,
+            'chunks': self.export_chunks,
             'html': self.export_html,
+            'player': self.export_player,
             'cast': self.export_cast
         }
 
@@ -468,7 +683,8 @@ Terminal Output
             print(f"Unknown format: {format}")
             return False
 
-        return exporters[format](output_file)
+        with metrics.timer(f'export.write.{format}'), profiled(f'export-{format}'):
+            return exporters[format](output_file)
 
 
 def format_duration(seconds: float) -> str:
@@ -493,3 +709,58 @@ def format_duration(seconds: float) -> str:
     hours = minutes // 60
     mins = minutes % 60
     return f"{hours}h {mins}m"
+
+
+def cast_duration(session_file: Path) -> float:
+    """
+    Duration of a .cast recording, from the timestamp of its last event
+
+    Only the tail of the file is read, so this is cheap for huge sessions
+    (compressed sessions have to be streamed through).
+
+    Returns:
+        Seconds (0 if the file isn't a readable cast)
+    """
+    try:
+        if Path(session_file).suffix in STORED_SUFFIXES:
+            from collections import deque
+            with open_session(session_file, 'rb') as f:
+                lines = list(deque(f, maxlen=16))
+        else:
+            with open(session_file, 'rb') as f:
+                f.seek(0, 2)
+                size = f.tell()
+                f.seek(max(0, size - 65536))
+                lines = f.read().splitlines()
+        for line in reversed(lines):
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # Partial line at the cut or at the end
+            if isinstance(event, list) and event:
+                return float(event[0])
+    except (OSError, TypeError, ValueError):
+        pass
+    return 0.0
+
+
+def session_metadata(session_file: Path) -> Dict:
+    """
+    Export metadata of a recorded session (id, duration, date)
+
+    Args:
+        session_file: Recorded .cast or .txt file (plain or stored)
+
+    Returns:
+        Metadata dict for SessionExporter
+    """
+    session_file = Path(session_file)
+    # session.cast.gz / .cast.dedup (stored by retention) -> session
+    base = session_file.with_suffix('') if session_file.suffix in STORED_SUFFIXES else session_file
+    duration = cast_duration(session_file)
+    return {
+        'session_id': base.stem,
+        'duration': format_duration(duration),
+        'duration_seconds': duration,
+        'timestamp': datetime.fromtimestamp(session_file.stat().st_mtime).isoformat()
+    }
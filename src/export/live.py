@@ -0,0 +1,239 @@
+"""
+Live exports for RecCli
+Keeps a .txt/.md transcript current while its session is still being recorded
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+from src.core.metrics import metrics
+from .cleaning import clean_block, is_prompt, settled_lines, strip_ansi
+from .exporters import format_duration, transcript_document
+from .reader import cast_output, decode_lines, parse_event, text_output
+from .redact import Redactor, unsplit_keys
+
+READ_BLOCK = 8 * 1024 * 1024
+FOLLOW_INTERVAL = 1.0
+# The header's duration is padded to this width so it can be rewritten in place
+DURATION_WIDTH = 10
+
+
+class LiveExporter:
+    """
+    A txt or md export that follows a growing session
+
+    Each update() reads only what was appended to the session since the
+    last one - complete lines; a final line still being written is left
+    for the next update - and appends the newly settled transcript lines
+    to the output. Cleaning merges incremental typing within a prompt
+    group, so the lines of the last, still open group (see settled_lines)
+    are rendered as if the session ended there and rewritten on the next
+    update, along with the closing text and the header's duration.
+
+    The output matches a regular export of the session at that point.
+    One exception to the incremental work: until the first prompt shows
+    up a transcript is only stripped, and the first prompt turns cleaning
+    on for the whole session, so that update starts over from the
+    beginning (once).
+    """
+
+    def __init__(self, session_file: Path, output_file: Path, fmt: str = 'md',
+                 redactor: Optional[Redactor] = None):
+        """
+        Initialize live export
+
+        Args:
+            session_file: Session being recorded (.cast or script .txt)
+            output_file: Export to keep current
+            fmt: 'txt' or 'md'
+            redactor: Masks secrets in the transcript (None exports them as recorded)
+        """
+        fmt = fmt.lower().lstrip('.')
+        if fmt not in ('txt', 'md'):
+            raise ValueError(f"Live export supports txt and md, not {fmt}")
+        self.session_file = Path(session_file)
+        self.output_file = Path(output_file)
+        self.fmt = fmt
+        self.redactor = redactor
+        self.is_cast = self.session_file.suffix != '.txt'
+        self.timestamp = ''  # Date line - fixed when the output is opened
+        self.tail_hits = 0
+        self.file = None
+        self._reset(cleaning=False)
+
+    def _reset(self, cleaning: bool):
+        self.offset = 0                 # Session bytes consumed (whole lines only)
+        self.duration = 0.0             # Time of the last event read
+        self.raw = bytearray()          # Output after its last newline
+        self.unfinished = b''           # A .txt session's final line, still being written
+        self.pending: List[str] = []    # Complete lines not settled yet
+        self.cleaning = cleaning
+        self.seen: Set[str] = set()
+        self.written = False            # Any transcript line committed to the output
+        self.committed_end = 0          # Output offset where committed lines end
+
+    def close(self):
+        if self.redactor is not None:
+            self.redactor.hits += self.tail_hits
+            self.tail_hits = 0
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def _head(self) -> bytes:
+        head, _ = transcript_document(self.fmt, self.session_file.stem,
+                                      f"{format_duration(self.duration):>{DURATION_WIDTH}}", self.timestamp)
+        return head.encode('utf-8')
+
+    def _open(self):
+        # Recording start from the cast header, else the session's last change
+        started = self.session_file.stat().st_mtime
+        if self.is_cast:
+            with open(self.session_file, 'rb') as f:
+                try:
+                    started = float(json.loads(f.readline())['timestamp'])
+                except (ValueError, KeyError, TypeError):
+                    pass
+        self.timestamp = datetime.fromtimestamp(started).isoformat()
+        self.file = open(self.output_file, 'w+b')
+        self.file.write(self._head())
+        self.committed_end = self.file.tell()
+
+    def update(self) -> bool:
+        """
+        Bring the output up to date with the session
+
+        Returns:
+            True if the session had grown since the last update
+        """
+        if self.file is None:
+            self._open()
+        with metrics.timer('export.live.update'), open(self.session_file, 'rb') as f:
+            size = f.seek(0, 2)
+            if size < self.offset:
+                self._restart()  # Replaced or truncated - start over
+            grew = False
+            while True:
+                f.seek(self.offset)
+                data = f.read(READ_BLOCK)
+                end = data.rfind(b'\n') + 1
+                if not end and len(data) == READ_BLOCK:
+                    data += f.readline()  # One line longer than a block
+                    end = data.rfind(b'\n') + 1
+                if not end:
+                    break
+                start = self.offset
+                self.offset += end
+                grew = True
+                self._consume(data[:end], start)
+                self._commit()
+                if len(data) < READ_BLOCK and self.offset:
+                    break  # At the end (offset 0: the first prompt restarted cleaning)
+            if not self.is_cast:
+                # Script output needs no newline to be output - show it in the tail
+                f.seek(self.offset)
+                self.unfinished = text_output(f.read())
+            self._write_tail()
+        return grew
+
+    def _consume(self, chunk: bytes, start: int):
+        """Turn complete session lines into transcript lines"""
+        if not self.is_cast:
+            self._add_output(text_output(chunk))
+            return
+
+        events = chunk.find(b'\n') + 1 if start == 0 else 0  # After the header
+        last_line = chunk.rfind(b'\n', events, len(chunk) - 1) + 1
+        event = parse_event(chunk[max(last_line, events):-1])
+        if event is not None:
+            self.duration = event[0]
+        self._add_output(cast_output(chunk, events))
+
+    def _add_output(self, output: bytes):
+        raw = self.raw + output
+        cut = raw.rfind(b'\n')
+        if cut == -1:
+            self.raw = raw
+            return
+        lines = decode_lines(strip_ansi(raw[:cut]))
+        self.raw = raw[cut + 1:]
+        if not self.cleaning and any(is_prompt(line) for line in lines):
+            self._restart(cleaning=True)
+            return
+        self.pending.extend(lines)
+
+    def _restart(self, cleaning: Optional[bool] = None):
+        self._reset(self.cleaning if cleaning is None else cleaning)
+        self.committed_end = len(self._head())
+        self.file.truncate(self.committed_end)
+
+    def _settled(self) -> int:
+        """Lines of pending that can be committed"""
+        settled = settled_lines(self.pending) if self.cleaning else len(self.pending)
+        if self.redactor is not None:
+            settled = unsplit_keys(self.pending, settled)
+        return settled
+
+    def _render(self, lines: List[str], seen: Set[str]) -> Optional[str]:
+        """Transcript text for lines following the committed ones (None if cleaning drops them all)"""
+        if self.cleaning:
+            lines = clean_block(lines, seen)
+        if not lines:
+            return None
+        text = '\n'.join(lines)
+        if self.redactor is not None:
+            text = self.redactor.redact(text)
+        return ('\n' if self.written else '') + text
+
+    def _commit(self):
+        """Append the lines that just settled to the output, for good"""
+        settled = self._settled()
+        if not settled:
+            return
+        text = self._render(self.pending[:settled], self.seen)
+        del self.pending[:settled]
+        if text is not None:
+            self.written = True
+            self.file.seek(self.committed_end)
+            self.file.write(text.encode('utf-8'))
+            self.committed_end = self.file.tell()
+
+    def _write_tail(self):
+        """Rewrite what follows the committed lines, and the header's duration"""
+        # Unsettled lines and the line being written, as if the session ended now
+        rest = decode_lines(strip_ansi(self.raw + self.unfinished))
+        hits = self.redactor.hits if self.redactor is not None else 0
+        tail = self._render(self.pending + rest, set(self.seen)) or ''
+        if self.redactor is not None:
+            # Rewritten on every update - only the final tail's secrets count
+            self.tail_hits, self.redactor.hits = self.redactor.hits - hits, hits
+        _, closing = transcript_document(self.fmt, '', '', '')
+        self.file.seek(self.committed_end)
+        self.file.write((tail + closing).encode('utf-8'))
+        self.file.truncate()
+        self.file.seek(0)
+        self.file.write(self._head())
+        self.file.flush()
+
+    def follow(self, until: Callable[[], bool], interval: float = FOLLOW_INTERVAL):
+        """
+        Update every interval until until() returns True (or Ctrl+C), then once more
+
+        Args:
+            until: Checked after each update that found nothing new
+            interval: Seconds between polls
+        """
+        try:
+            try:
+                while True:
+                    if not self.update() and until():
+                        break
+                    time.sleep(interval)
+            except KeyboardInterrupt:
+                pass
+            self.update()
+        finally:
+            self.close()
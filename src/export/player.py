@@ -0,0 +1,1318 @@
+"""
+Self-contained HTML player for RecCli casts
+The recording's events, compacted and embedded with a small JS terminal
+"""
+
+import base64
+import json
+import os
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple, Union
+
+from .reader import cast_events, mapped
+
+# A new keyframe (and segment) starts after this much playback or output
+KEYFRAME_MS = 10_000
+KEYFRAME_BYTES = 128 * 1024
+# Longest cycle of repeated frames (a spinner) collapsed into one run
+MAX_CYCLE = 16
+COMPRESS_LEVEL = 6
+# An escape sequence cut off by the end of an event waits for the next
+# one - unless it's this long, then it's malformed
+MAX_PENDING = 4096
+
+DEFAULT_ATTR = (-1, -1, 0)    # (fg, bg, flags) - colors: -1 default, 0-255 palette, 256 + 0xRRGGBB
+BOLD, DIM, ITALIC, UNDERLINE, INVERSE, STRIKE = 1, 2, 4, 8, 16, 32
+SGR_ON = {1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 7: INVERSE, 9: STRIKE}
+SGR_OFF = {22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE, 27: INVERSE, 29: STRIKE}
+
+# CSI (params, intermediates, final) | OSC | DCS/SOS/PM/APC | ESC with
+# intermediates | ESC final | control | printable run
+TOKEN = re.compile(
+    r'\x1b\[([0-?]*)([ -/]*)([@-~])'
+    r'|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)'
+    r'|\x1b[PX^_][^\x1b]*\x1b\\'
+    r'|\x1b[ -/]+[0-~]'
+    r'|\x1b([0-OQ-WYZ\\`-~])'
+    r'|([\x00-\x1a\x1c-\x1f\x7f])'
+    r'|([^\x00-\x1f\x7f]+)')
+PARTIAL = re.compile(r'\x1b(?:\[[0-?]*[ -/]*|\][^\x07\x1b]*\x1b?|[PX^_][^\x1b]*\x1b?|[ -/]*)\Z')
+
+
+def _number(param: str) -> Optional[int]:
+    """A numeric escape parameter ('' is 0), None if it isn't one"""
+    if not param:
+        return 0
+    return min(int(param), 65535) if param.isdigit() else None
+
+
+class Screen:
+    """
+    Minimal terminal emulator, the source of the player's keyframes
+
+    The page's JS terminal implements exactly the same operations with
+    the same simplifications - every character is one cell wide, autowrap
+    is always on, cursor moves ignore the scroll region, unknown sequences
+    are dropped - so a keyframe restored in the browser shows what
+    playing up to it would have drawn.
+    """
+
+    def __init__(self, cols: int, rows: int):
+        self.cols, self.rows = max(1, cols), max(1, rows)
+        self.pending = ''
+        self.reset()
+
+    def reset(self):
+        self.attr = DEFAULT_ATTR
+        self.chars, self.attrs = self._blank_screen()
+        self.main = None  # (chars, attrs) of the main screen while the alternate one is shown
+        self.x = self.y = 0
+        self.wrap = False
+        self.top, self.bottom = 0, self.rows - 1
+        self.hidden = False
+        self.saved = None
+
+    def _blank_screen(self) -> Tuple[List[List[str]], List[List[tuple]]]:
+        return ([[' '] * self.cols for _ in range(self.rows)],
+                [[DEFAULT_ATTR] * self.cols for _ in range(self.rows)])
+
+    def _fill(self) -> tuple:
+        """Attribute of erased cells (the current background)"""
+        return -1, self.attr[1], 0
+
+    def feed(self, text: str):
+        """Apply output to the screen"""
+        if self.pending:
+            text = self.pending + text
+            self.pending = ''
+        position, end = 0, len(text)
+        while position < end:
+            match = TOKEN.match(text, position)
+            if match is None:
+                if end - position < MAX_PENDING and PARTIAL.match(text, position):
+                    self.pending = text[position:]
+                    return
+                position += 1  # Malformed - drop the ESC
+                continue
+            position = match.end()
+            kind = match.lastindex
+            if kind == 6:
+                self._print(match.group(6))
+            elif kind == 5:
+                self._control(match.group(5))
+            elif kind == 3:
+                self._csi(match.group(1), match.group(2), match.group(3))
+            elif kind == 4:
+                self._esc(match.group(4))
+
+    def _print(self, run: str):
+        start, end = 0, len(run)
+        while start < end:
+            if self.wrap:
+                self.x = 0
+                self._linefeed()
+                self.wrap = False
+            x = self.x
+            n = min(end - start, self.cols - x)
+            self.chars[self.y][x:x + n] = run[start:start + n]
+            self.attrs[self.y][x:x + n] = [self.attr] * n
+            start += n
+            if x + n >= self.cols:
+                self.x = self.cols - 1
+                self.wrap = True
+            else:
+                self.x = x + n
+
+    def _control(self, char: str):
+        if char == '\r':
+            self.x = 0
+        elif char in '\n\x0b\x0c':
+            self._linefeed()
+        elif char == '\b':
+            self.x = max(0, self.x - 1)
+        elif char == '\t':
+            self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+        else:
+            return
+        self.wrap = False
+
+    def _esc(self, final: str):
+        if final == '7':
+            self._save()
+            return
+        if final == '8':
+            self._restore()
+        elif final == 'c':
+            self.reset()
+        elif final == 'D':
+            self._linefeed()
+        elif final == 'E':
+            self.x = 0
+            self._linefeed()
+        elif final == 'M':
+            if self.y == self.top:
+                self._scroll_down(1)
+            elif self.y > 0:
+                self.y -= 1
+        else:
+            return
+        self.wrap = False
+
+    def _linefeed(self):
+        if self.y == self.bottom:
+            self._scroll_up(1)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def _blank_rows(self, n: int) -> Tuple[List[List[str]], List[List[tuple]]]:
+        fill = self._fill()
+        return [[' '] * self.cols for _ in range(n)], [[fill] * self.cols for _ in range(n)]
+
+    def _scroll_up(self, n: int):
+        top, bottom = self.top, self.bottom + 1
+        n = min(n, bottom - top)
+        chars, attrs = self._blank_rows(n)
+        self.chars[top:bottom] = self.chars[top + n:bottom] + chars
+        self.attrs[top:bottom] = self.attrs[top + n:bottom] + attrs
+
+    def _scroll_down(self, n: int):
+        top, bottom = self.top, self.bottom + 1
+        n = min(n, bottom - top)
+        chars, attrs = self._blank_rows(n)
+        self.chars[top:bottom] = chars + self.chars[top:bottom - n]
+        self.attrs[top:bottom] = attrs + self.attrs[top:bottom - n]
+
+    def _erase(self, y: int, start: int, end: int):
+        self.chars[y][start:end] = [' '] * (end - start)
+        self.attrs[y][start:end] = [self._fill()] * (end - start)
+
+    def _save(self):
+        self.saved = (self.x, self.y, self.attr)
+
+    def _restore(self):
+        x, y, self.attr = self.saved or (0, 0, DEFAULT_ATTR)
+        self.x, self.y = min(x, self.cols - 1), min(y, self.rows - 1)
+
+    def _alternate(self, on: bool, cursor: bool):
+        if on == (self.main is not None):
+            return
+        if on:
+            if cursor:
+                self._save()
+            self.main = (self.chars, self.attrs)
+            self.chars, self.attrs = self._blank_screen()
+        else:
+            self.chars, self.attrs = self.main
+            self.main = None
+            if cursor:
+                self._restore()
+
+    def _csi(self, params: str, intermediates: str, final: str):
+        private = params[:1] if params[:1] in ('<', '=', '>', '?') else ''
+        params = params[len(private):]
+        if intermediates or (private and not (private == '?' and final in 'hl')):
+            return
+        if final == 'm':
+            self._sgr(params)
+            return
+        values = [_number(p) for p in params.split(';')] if params else []
+        if None in values:
+            return
+
+        def arg(i: int, default: int = 1) -> int:
+            return (values[i] if i < len(values) else 0) or default
+
+        cols, rows = self.cols, self.rows
+        self.wrap = False
+        if final == 'A':
+            self.y = max(0, self.y - arg(0))
+        elif final == 'B':
+            self.y = min(rows - 1, self.y + arg(0))
+        elif final == 'C':
+            self.x = min(cols - 1, self.x + arg(0))
+        elif final == 'D':
+            self.x = max(0, self.x - arg(0))
+        elif final == 'E':
+            self.x, self.y = 0, min(rows - 1, self.y + arg(0))
+        elif final == 'F':
+            self.x, self.y = 0, max(0, self.y - arg(0))
+        elif final in 'G`':
+            self.x = min(cols, arg(0)) - 1
+        elif final == 'd':
+            self.y = min(rows, arg(0)) - 1
+        elif final in 'Hf':
+            self.x, self.y = min(cols, arg(1)) - 1, min(rows, arg(0)) - 1
+        elif final == 'J':
+            mode = arg(0, 0)
+            if mode == 0:
+                self._erase(self.y, self.x, cols)
+                for y in range(self.y + 1, rows):
+                    self._erase(y, 0, cols)
+            elif mode == 1:
+                for y in range(self.y):
+                    self._erase(y, 0, cols)
+                self._erase(self.y, 0, self.x + 1)
+            elif mode in (2, 3):
+                for y in range(rows):
+                    self._erase(y, 0, cols)
+        elif final == 'K':
+            mode = arg(0, 0)
+            if mode == 0:
+                self._erase(self.y, self.x, cols)
+            elif mode == 1:
+                self._erase(self.y, 0, self.x + 1)
+            elif mode == 2:
+                self._erase(self.y, 0, cols)
+        elif final in '@P':
+            x, n = self.x, min(arg(0), cols - self.x)
+            chars, attrs = self.chars[self.y], self.attrs[self.y]
+            if final == '@':
+                chars[x:] = [' '] * n + chars[x:cols - n]
+                attrs[x:] = [self._fill()] * n + attrs[x:cols - n]
+            else:
+                chars[x:] = chars[x + n:] + [' '] * n
+                attrs[x:] = attrs[x + n:] + [self._fill()] * n
+        elif final == 'X':
+            self._erase(self.y, self.x, self.x + min(arg(0), cols - self.x))
+        elif final in 'LM':
+            if self.top <= self.y <= self.bottom:
+                y, bottom = self.y, self.bottom + 1
+                n = min(arg(0), bottom - y)
+                chars, attrs = self._blank_rows(n)
+                if final == 'L':
+                    self.chars[y:bottom] = chars + self.chars[y:bottom - n]
+                    self.attrs[y:bottom] = attrs + self.attrs[y:bottom - n]
+                else:
+                    self.chars[y:bottom] = self.chars[y + n:bottom] + chars
+                    self.attrs[y:bottom] = self.attrs[y + n:bottom] + attrs
+                self.x = 0
+        elif final == 'S':
+            self._scroll_up(arg(0))
+        elif final == 'T':
+            self._scroll_down(arg(0))
+        elif final == 'r':
+            top, bottom = arg(0) - 1, min(arg(1, rows), rows) - 1
+            if top < bottom:
+                self.top, self.bottom = top, bottom
+                self.x = self.y = 0
+        elif final == 's':
+            self._save()
+        elif final == 'u':
+            self._restore()
+        elif final in 'hl' and private:
+            for mode in values:
+                if mode == 25:
+                    self.hidden = final == 'l'
+                elif mode in (47, 1047, 1049):
+                    self._alternate(final == 'h', mode == 1049)
+
+    def _sgr(self, params: str):
+        fg, bg, flags = self.attr
+        parts = params.split(';')
+        i = 0
+        while i < len(parts):
+            part = parts[i]
+            i += 1
+            if ':' in part:
+                # ITU form: 38:5:N, 38:2:[colorspace:]R:G:B, 4:STYLE
+                sub = part.split(':')
+                code = _number(sub[0])
+                if code in (38, 48):
+                    color = _color(sub[1:], True)[0]
+                    if color is not None:
+                        if code == 38:
+                            fg = color
+                        else:
+                            bg = color
+                elif code == 4:
+                    flags = flags | UNDERLINE if _number(sub[1]) else flags & ~UNDERLINE
+                continue
+            code = _number(part)
+            if code is None:
+                continue
+            if code == 0:
+                fg, bg, flags = DEFAULT_ATTR
+            elif code in SGR_ON:
+                flags |= SGR_ON[code]
+            elif code in SGR_OFF:
+                flags &= ~SGR_OFF[code]
+            elif 30 <= code <= 37:
+                fg = code - 30
+            elif 40 <= code <= 47:
+                bg = code - 40
+            elif 90 <= code <= 97:
+                fg = code - 82
+            elif 100 <= code <= 107:
+                bg = code - 92
+            elif code == 39:
+                fg = -1
+            elif code == 49:
+                bg = -1
+            elif code in (38, 48):
+                color, used = _color(parts[i:], False)
+                i += used
+                if color is not None:
+                    if code == 38:
+                        fg = color
+                    else:
+                        bg = color
+        self.attr = (fg, bg, flags)
+
+    def resize(self, cols: int, rows: int):
+        """Change the screen size, keeping the cursor's line on screen"""
+        cols, rows = max(1, cols), max(1, rows)
+        drop = max(0, self.y + 1 - rows)
+        screens = [(self.chars, self.attrs)] + ([self.main] if self.main else [])
+        for chars, attrs in screens:
+            del chars[:drop], attrs[:drop]
+            for line_chars, line_attrs in zip(chars, attrs):
+                del line_chars[cols:], line_attrs[cols:]
+                line_chars.extend([' '] * (cols - len(line_chars)))
+                line_attrs.extend([DEFAULT_ATTR] * (cols - len(line_attrs)))
+            del chars[rows:], attrs[rows:]
+            while len(chars) < rows:
+                chars.append([' '] * cols)
+                attrs.append([DEFAULT_ATTR] * cols)
+        self.cols, self.rows = cols, rows
+        self.x, self.y = min(self.x, cols - 1), min(self.y - drop, rows - 1)
+        self.top, self.bottom = 0, rows - 1
+        self.wrap = False
+
+    def keyframe(self) -> Dict:
+        """The whole terminal state, as the player restores it"""
+        return {
+            'cols': self.cols, 'rows': self.rows, 'x': self.x, 'y': self.y, 'wrap': self.wrap,
+            'attr': list(self.attr), 'top': self.top, 'bottom': self.bottom, 'hidden': self.hidden,
+            'saved': [self.saved[0], self.saved[1], list(self.saved[2])] if self.saved else None,
+            'lines': _encode_lines(self.chars, self.attrs),
+            'main': _encode_lines(*self.main) if self.main else None,
+        }
+
+
+def _color(parts: List[str], colon: bool) -> Tuple[Optional[int], int]:
+    """
+    Extended color after a 38/48
+
+    Returns:
+        (color or None, parameters used)
+    """
+    if not parts:
+        return None, 0
+    if parts[0] == '5' and len(parts) >= 2:
+        return (_number(parts[1]) or 0) & 255, 2
+    if parts[0] == '2' and len(parts) >= 4:
+        rgb = parts[-3:] if colon else parts[1:4]
+        r, g, b = ((_number(p) or 0) & 255 for p in rgb)
+        return 256 + (r << 16 | g << 8 | b), 4
+    return None, len(parts)
+
+
+def _encode_lines(chars: List[List[str]], attrs: List[List[tuple]]) -> List:
+    """Screen lines as [text, [length, fg, bg, flags, ...]] with runs of one attribute"""
+    lines = []
+    for line_chars, line_attrs in zip(chars, attrs):
+        if line_attrs.count(line_attrs[0]) == len(line_attrs):
+            runs = [len(line_attrs), *line_attrs[0]]  # Most lines: one attribute throughout
+        else:
+            runs = []
+            for attr, cells in groupby(line_attrs):
+                runs.append(len(list(cells)))
+                runs.extend(attr)
+        lines.append([''.join(line_chars), runs])
+    return lines
+
+
+def collapse(ids: List[int], max_cycle: int = MAX_CYCLE) -> List[int]:
+    """
+    Frame ids with repeated cycles folded into back-references
+
+    A spinner redrawing the same few frames turns into its first cycle
+    and one pair -p, n: "copy the next n ids from p back" (which may
+    overlap what it copies, so one pair covers every repetition).
+    """
+    ops: List[int] = []
+    last: Dict[int, int] = {}
+    i, end = 0, len(ids)
+    while i < end:
+        frame = ids[i]
+        period = i - last.get(frame, -max_cycle - 1)
+        if period <= max_cycle:
+            j = i + 1
+            while j < end and ids[j] == ids[j - period]:
+                j += 1
+            if j - i >= 3:
+                for k in range(i, j):
+                    last[ids[k]] = k
+                ops += (-period, j - i)
+                i = j
+                continue
+        last[frame] = i
+        ops.append(frame)
+        i += 1
+    return ops
+
+
+class _Segment:
+    """Events from one keyframe to the next"""
+
+    def __init__(self, start: int, keyframe: Dict):
+        self.start = start
+        self.keyframe = keyframe
+        self.payloads: List[Union[str, List[int]]] = []
+        self.known: Dict = {}
+        self.ids: List[int] = []
+        self.deltas: List[int] = []
+        self.last = start
+        self.size = 0
+
+    def add(self, time: int, key, payload: Union[str, List[int]]):
+        frame = self.known.get(key)
+        if frame is None:
+            frame = self.known[key] = len(self.payloads)
+            self.payloads.append(payload)
+            self.size += len(key) if isinstance(key, str) else 8
+        self.ids.append(frame)
+        self.deltas.append(time - self.last)
+        self.last = time
+
+    def full(self, time: int) -> bool:
+        return time - self.start >= KEYFRAME_MS or self.size >= KEYFRAME_BYTES
+
+    def pack(self) -> bytes:
+        data = json.dumps({'keyframe': self.keyframe, 'payloads': self.payloads,
+                           'ops': collapse(self.ids), 'deltas': self.deltas},
+                          ensure_ascii=False, separators=(',', ':'))
+        return base64.b64encode(zlib.compress(data.encode('utf-8', 'surrogatepass'), COMPRESS_LEVEL))
+
+
+def cast_size(header: bytes) -> Tuple[int, int]:
+    """Terminal (cols, rows) from a cast's header line (asciicast v2 or v3), 80x24 if missing"""
+    try:
+        meta = json.loads(header)
+        term = meta.get('term') if isinstance(meta.get('term'), dict) else meta
+        return int(term.get('cols', term.get('width', 80))), int(term.get('rows', term.get('height', 24)))
+    except (ValueError, TypeError, AttributeError):
+        return 80, 24
+
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Session: {session_id}</title>
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 20px;
+            background: #f5f5f5;
+        }}
+        .header {{
+            background: white;
+            padding: 20px;
+            border-radius: 8px;
+            margin-bottom: 20px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }}
+        .header h1 {{
+            margin: 0 0 10px 0;
+            color: #333;
+        }}
+        .metadata {{
+            color: #666;
+            font-size: 14px;
+        }}
+        .player {{
+            background: #1e1e1e;
+            border-radius: 8px;
+            overflow: hidden;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+        }}
+        .screen {{
+            margin: 0;
+            padding: 20px;
+            overflow-x: auto;
+            color: #d4d4d4;
+            font-family: 'Monaco', 'Menlo', 'Consolas', monospace;
+            font-size: 13px;
+            line-height: 1.25;
+            white-space: pre;
+        }}
+        .screen div {{
+            height: 1.25em;
+        }}
+        .controls {{
+            display: flex;
+            gap: 10px;
+            align-items: center;
+            padding: 8px 20px;
+            background: #2a2a2a;
+            color: #ccc;
+            font-size: 13px;
+        }}
+        .controls button, .controls select {{
+            background: #3a3a3a;
+            color: #eee;
+            border: 1px solid #555;
+            border-radius: 4px;
+            padding: 3px 10px;
+            cursor: pointer;
+        }}
+        .controls input {{
+            flex: 1;
+        }}
+        .controls span {{
+            font-variant-numeric: tabular-nums;
+            min-width: 90px;
+            text-align: right;
+        }}
+        .footer {{
+            text-align: center;
+            margin-top: 20px;
+            color: #999;
+            font-size: 12px;
+        }}
+        .footer a {{
+            color: #27ae60;
+            text-decoration: none;
+        }}
+        .footer a:hover {{
+            text-decoration: underline;
+        }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Session: {session_id}</h1>
+        <div class="metadata">
+            <strong>Duration:</strong> {duration} |
+            <strong>Date:</strong> {timestamp}
+        </div>
+    </div>
+
+    <div class="player">
+        <pre class="screen" id="screen"></pre>
+        <div class="controls">
+            <button id="play" title="Play/pause (Space)">&#9654;</button>
+            <input id="seek" type="range" min="0" max="0" value="0" step="1" title="Seek (&larr;/&rarr;: 5s)">
+            <span id="clock">0:00 / 0:00</span>
+            <select id="speed" title="Speed">
+                <option value="0.5">0.5&times;</option>
+                <option value="1" selected>1&times;</option>
+                <option value="2">2&times;</option>
+                <option value="4">4&times;</option>
+                <option value="16">16&times;</option>
+            </select>
+        </div>
+    </div>
+    <noscript>This recording plays with JavaScript enabled.</noscript>
+
+    <div class="footer">
+        Recorded with <a href="https://github.com/willluecke/RecCli" target="_blank">RecCli</a>
+    </div>
+"""
+
+# Segments are base64 of zlib-compressed JSON: the keyframe (terminal
+# state at the segment's start), its distinct payloads (strings, or
+# [cols, rows] for a resize), the frame ids (see collapse) and the time
+# deltas in ms. The index lists each segment's start time and size.
+# Term below must stay in step with Screen.
+PAGE_SCRIPT = r"""    <script type="application/json" id="index">{index}</script>
+    <script>
+(() => {
+    const index = JSON.parse(document.getElementById('index').textContent);
+    const DEFAULT_FG = '#d4d4d4', DEFAULT_BG = '#1e1e1e';
+    const BOLD = 1, DIM = 2, ITALIC = 4, UNDERLINE = 8, INVERSE = 16, STRIKE = 32;
+    const SGR_ON = {1: BOLD, 2: DIM, 3: ITALIC, 4: UNDERLINE, 7: INVERSE, 9: STRIKE};
+    const SGR_OFF = {22: BOLD | DIM, 23: ITALIC, 24: UNDERLINE, 27: INVERSE, 29: STRIKE};
+    const MAX_PENDING = 4096;
+    const TOKEN = /\x1b\[([0-?]*)([ -\/]*)([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[PX^_][^\x1b]*\x1b\\|\x1b[ -\/]+[0-~]|\x1b([0-OQ-WYZ\\`-~])|([\x00-\x1a\x1c-\x1f\x7f])|([^\x00-\x1f\x7f]+)/y;
+    const PARTIAL = /^\x1b(?:\[[0-?]*[ -\/]*|\][^\x07\x1b]*\x1b?|[PX^_][^\x1b]*\x1b?|[ -\/]*)$/;
+
+    const attrs = new Map();
+    function attrOf(fg, bg, flags) {
+        const key = fg + ',' + bg + ',' + flags;
+        let attr = attrs.get(key);
+        if (!attr) attrs.set(key, attr = Object.freeze({fg, bg, flags}));
+        return attr;
+    }
+    const DEFAULT_ATTR = attrOf(-1, -1, 0);
+
+    function number(param) {
+        if (param === '') return 0;
+        return /^[0-9]+$/.test(param) ? Math.min(parseInt(param, 10), 65535) : null;
+    }
+
+    function color(parts, colon) {
+        if (!parts.length) return [null, 0];
+        if (parts[0] === '5' && parts.length >= 2) return [(number(parts[1]) || 0) & 255, 2];
+        if (parts[0] === '2' && parts.length >= 4) {
+            const [r, g, b] = (colon ? parts.slice(-3) : parts.slice(1, 4)).map(p => (number(p) || 0) & 255);
+            return [256 + (r << 16 | g << 8 | b), 4];
+        }
+        return [null, parts.length];
+    }
+
+    class Term {
+        constructor(cols, rows) {
+            this.cols = Math.max(1, cols);
+            this.rows = Math.max(1, rows);
+            this.pending = '';
+            this.reset();
+        }
+
+        reset() {
+            this.attr = DEFAULT_ATTR;
+            [this.chars, this.attrs] = this.blankScreen();
+            this.main = null;
+            this.x = this.y = 0;
+            this.wrap = false;
+            this.top = 0;
+            this.bottom = this.rows - 1;
+            this.hidden = false;
+            this.saved = null;
+            this.full = true;
+        }
+
+        blankScreen() {
+            const chars = [], attrs = [];
+            for (let y = 0; y < this.rows; y++) {
+                chars.push(new Array(this.cols).fill(' '));
+                attrs.push(new Array(this.cols).fill(DEFAULT_ATTR));
+            }
+            return [chars, attrs];
+        }
+
+        fill() { return attrOf(-1, this.attr.bg, 0); }
+
+        feed(text) {
+            if (this.pending) {
+                text = this.pending + text;
+                this.pending = '';
+            }
+            let position = 0;
+            const end = text.length;
+            while (position < end) {
+                TOKEN.lastIndex = position;
+                const match = TOKEN.exec(text);
+                if (match === null) {
+                    if (end - position < MAX_PENDING && PARTIAL.test(text.slice(position))) {
+                        this.pending = text.slice(position);
+                        return;
+                    }
+                    position++;
+                    continue;
+                }
+                position = TOKEN.lastIndex;
+                if (match[6] !== undefined) this.print(Array.from(match[6]));
+                else if (match[5] !== undefined) this.control(match[5]);
+                else if (match[3] !== undefined) this.csi(match[1], match[2], match[3]);
+                else if (match[4] !== undefined) this.esc(match[4]);
+            }
+        }
+
+        print(run) {
+            let start = 0;
+            const end = run.length;
+            while (start < end) {
+                if (this.wrap) {
+                    this.x = 0;
+                    this.linefeed();
+                    this.wrap = false;
+                }
+                const x = this.x;
+                const n = Math.min(end - start, this.cols - x);
+                const chars = this.chars[this.y], attrs = this.attrs[this.y];
+                for (let k = 0; k < n; k++) {
+                    chars[x + k] = run[start + k];
+                    attrs[x + k] = this.attr;
+                }
+                this.touch(this.y);
+                start += n;
+                if (x + n >= this.cols) {
+                    this.x = this.cols - 1;
+                    this.wrap = true;
+                } else {
+                    this.x = x + n;
+                }
+            }
+        }
+
+        touch(y) {
+            if (!this.full) this.dirty.add(y);
+        }
+
+        control(char) {
+            if (char === '\r') this.x = 0;
+            else if (char === '\n' || char === '\x0b' || char === '\x0c') this.linefeed();
+            else if (char === '\b') this.x = Math.max(0, this.x - 1);
+            else if (char === '\t') this.x = Math.min(this.cols - 1, (Math.floor(this.x / 8) + 1) * 8);
+            else return;
+            this.wrap = false;
+        }
+
+        esc(final) {
+            if (final === '7') {
+                this.save();
+                return;
+            }
+            if (final === '8') this.restoreCursor();
+            else if (final === 'c') this.reset();
+            else if (final === 'D') this.linefeed();
+            else if (final === 'E') {
+                this.x = 0;
+                this.linefeed();
+            } else if (final === 'M') {
+                if (this.y === this.top) this.scrollDown(1);
+                else if (this.y > 0) this.y--;
+            } else return;
+            this.wrap = false;
+        }
+
+        linefeed() {
+            if (this.y === this.bottom) this.scrollUp(1);
+            else if (this.y < this.rows - 1) this.y++;
+        }
+
+        blankRows(n) {
+            const fill = this.fill(), chars = [], attrs = [];
+            for (let k = 0; k < n; k++) {
+                chars.push(new Array(this.cols).fill(' '));
+                attrs.push(new Array(this.cols).fill(fill));
+            }
+            return [chars, attrs];
+        }
+
+        // Rows first..end-1 become rows taken from before plus new ones
+        shift(first, end, n, up) {
+            const [chars, attrs] = this.blankRows(n);
+            if (up) {
+                this.chars.splice(first, n);
+                this.attrs.splice(first, n);
+                this.chars.splice(end - n, 0, ...chars);
+                this.attrs.splice(end - n, 0, ...attrs);
+            } else {
+                this.chars.splice(end - n, n);
+                this.attrs.splice(end - n, n);
+                this.chars.splice(first, 0, ...chars);
+                this.attrs.splice(first, 0, ...attrs);
+            }
+            for (let y = first; y < end; y++) this.touch(y);
+        }
+
+        scrollUp(n) {
+            const top = this.top, bottom = this.bottom + 1;
+            this.shift(top, bottom, Math.min(n, bottom - top), true);
+        }
+
+        scrollDown(n) {
+            const top = this.top, bottom = this.bottom + 1;
+            this.shift(top, bottom, Math.min(n, bottom - top), false);
+        }
+
+        erase(y, start, end) {
+            const fill = this.fill();
+            this.chars[y].fill(' ', start, end);
+            this.attrs[y].fill(fill, start, end);
+            this.touch(y);
+        }
+
+        save() {
+            this.saved = [this.x, this.y, this.attr];
+        }
+
+        restoreCursor() {
+            const [x, y, attr] = this.saved || [0, 0, DEFAULT_ATTR];
+            this.attr = attr;
+            this.x = Math.min(x, this.cols - 1);
+            this.y = Math.min(y, this.rows - 1);
+        }
+
+        alternate(on, cursor) {
+            if (on === (this.main !== null)) return;
+            if (on) {
+                if (cursor) this.save();
+                this.main = [this.chars, this.attrs];
+                [this.chars, this.attrs] = this.blankScreen();
+            } else {
+                [this.chars, this.attrs] = this.main;
+                this.main = null;
+                if (cursor) this.restoreCursor();
+            }
+            this.full = true;
+        }
+
+        csi(params, intermediates, final) {
+            const private_ = /^[<=>?]/.test(params) ? params[0] : '';
+            params = params.slice(private_.length);
+            if (intermediates || (private_ && !(private_ === '?' && (final === 'h' || final === 'l')))) return;
+            if (final === 'm') {
+                this.sgr(params);
+                return;
+            }
+            const values = params ? params.split(';').map(number) : [];
+            if (values.includes(null)) return;
+            const arg = (i, fallback = 1) => (i < values.length ? values[i] : 0) || fallback;
+            const cols = this.cols, rows = this.rows;
+            this.wrap = false;
+            switch (final) {
+                case 'A': this.y = Math.max(0, this.y - arg(0)); break;
+                case 'B': this.y = Math.min(rows - 1, this.y + arg(0)); break;
+                case 'C': this.x = Math.min(cols - 1, this.x + arg(0)); break;
+                case 'D': this.x = Math.max(0, this.x - arg(0)); break;
+                case 'E': this.x = 0; this.y = Math.min(rows - 1, this.y + arg(0)); break;
+                case 'F': this.x = 0; this.y = Math.max(0, this.y - arg(0)); break;
+                case 'G': case '`': this.x = Math.min(cols, arg(0)) - 1; break;
+                case 'd': this.y = Math.min(rows, arg(0)) - 1; break;
+                case 'H': case 'f':
+                    this.x = Math.min(cols, arg(1)) - 1;
+                    this.y = Math.min(rows, arg(0)) - 1;
+                    break;
+                case 'J': {
+                    const mode = arg(0, 0);
+                    if (mode === 0) {
+                        this.erase(this.y, this.x, cols);
+                        for (let y = this.y + 1; y < rows; y++) this.erase(y, 0, cols);
+                    } else if (mode === 1) {
+                        for (let y = 0; y < this.y; y++) this.erase(y, 0, cols);
+                        this.erase(this.y, 0, this.x + 1);
+                    } else if (mode === 2 || mode === 3) {
+                        for (let y = 0; y < rows; y++) this.erase(y, 0, cols);
+                    }
+                    break;
+                }
+                case 'K': {
+                    const mode = arg(0, 0);
+                    if (mode === 0) this.erase(this.y, this.x, cols);
+                    else if (mode === 1) this.erase(this.y, 0, this.x + 1);
+                    else if (mode === 2) this.erase(this.y, 0, cols);
+                    break;
+                }
+                case '@': case 'P': {
+                    const x = this.x, n = Math.min(arg(0), cols - x);
+                    const chars = this.chars[this.y], attrs = this.attrs[this.y], fill = this.fill();
+                    if (final === '@') {
+                        chars.splice(cols - n, n);
+                        attrs.splice(cols - n, n);
+                        chars.splice(x, 0, ...new Array(n).fill(' '));
+                        attrs.splice(x, 0, ...new Array(n).fill(fill));
+                    } else {
+                        chars.splice(x, n);
+                        attrs.splice(x, n);
+                        chars.push(...new Array(n).fill(' '));
+                        attrs.push(...new Array(n).fill(fill));
+                    }
+                    this.touch(this.y);
+                    break;
+                }
+                case 'X': this.erase(this.y, this.x, this.x + Math.min(arg(0), cols - this.x)); break;
+                case 'L': case 'M':
+                    if (this.top <= this.y && this.y <= this.bottom) {
+                        const bottom = this.bottom + 1;
+                        this.shift(this.y, bottom, Math.min(arg(0), bottom - this.y), final === 'M');
+                        this.x = 0;
+                    }
+                    break;
+                case 'S': this.scrollUp(arg(0)); break;
+                case 'T': this.scrollDown(arg(0)); break;
+                case 'r': {
+                    const top = arg(0) - 1, bottom = Math.min(arg(1, rows), rows) - 1;
+                    if (top < bottom) {
+                        this.top = top;
+                        this.bottom = bottom;
+                        this.x = this.y = 0;
+                    }
+                    break;
+                }
+                case 's': this.save(); break;
+                case 'u': this.restoreCursor(); break;
+                case 'h': case 'l':
+                    if (!private_) break;
+                    for (const mode of values) {
+                        if (mode === 25) this.hidden = final === 'l';
+                        else if (mode === 47 || mode === 1047 || mode === 1049) this.alternate(final === 'h', mode === 1049);
+                    }
+                    break;
+            }
+        }
+
+        sgr(params) {
+            let {fg, bg, flags} = this.attr;
+            const parts = params.split(';');
+            let i = 0;
+            while (i < parts.length) {
+                const part = parts[i++];
+                if (part.includes(':')) {
+                    const sub = part.split(':');
+                    const code = number(sub[0]);
+                    if (code === 38 || code === 48) {
+                        const value = color(sub.slice(1), true)[0];
+                        if (value !== null) {
+                            if (code === 38) fg = value; else bg = value;
+                        }
+                    } else if (code === 4) {
+                        flags = number(sub[1]) ? flags | UNDERLINE : flags & ~UNDERLINE;
+                    }
+                    continue;
+                }
+                const code = number(part);
+                if (code === null) continue;
+                if (code === 0) { fg = -1; bg = -1; flags = 0; }
+                else if (code in SGR_ON) flags |= SGR_ON[code];
+                else if (code in SGR_OFF) flags &= ~SGR_OFF[code];
+                else if (code >= 30 && code <= 37) fg = code - 30;
+                else if (code >= 40 && code <= 47) bg = code - 40;
+                else if (code >= 90 && code <= 97) fg = code - 82;
+                else if (code >= 100 && code <= 107) bg = code - 92;
+                else if (code === 39) fg = -1;
+                else if (code === 49) bg = -1;
+                else if (code === 38 || code === 48) {
+                    const [value, used] = color(parts.slice(i), false);
+                    i += used;
+                    if (value !== null) {
+                        if (code === 38) fg = value; else bg = value;
+                    }
+                }
+            }
+            this.attr = attrOf(fg, bg, flags);
+        }
+
+        resize(cols, rows) {
+            cols = Math.max(1, cols);
+            rows = Math.max(1, rows);
+            const drop = Math.max(0, this.y + 1 - rows);
+            const screens = [[this.chars, this.attrs]].concat(this.main ? [this.main] : []);
+            for (const [chars, attrs] of screens) {
+                chars.splice(0, drop);
+                attrs.splice(0, drop);
+                for (let y = 0; y < chars.length; y++) {
+                    const width = chars[y].length;
+                    chars[y].length = attrs[y].length = Math.min(width, cols);
+                    for (let x = width; x < cols; x++) {
+                        chars[y].push(' ');
+                        attrs[y].push(DEFAULT_ATTR);
+                    }
+                }
+                chars.length = attrs.length = Math.min(chars.length, rows);
+                while (chars.length < rows) {
+                    chars.push(new Array(cols).fill(' '));
+                    attrs.push(new Array(cols).fill(DEFAULT_ATTR));
+                }
+            }
+            this.cols = cols;
+            this.rows = rows;
+            this.x = Math.min(this.x, cols - 1);
+            this.y = Math.min(this.y - drop, rows - 1);
+            this.top = 0;
+            this.bottom = rows - 1;
+            this.wrap = false;
+            this.full = true;
+        }
+
+        restore(keyframe) {
+            const decode = lines => {
+                const chars = [], attrs = [];
+                for (const [text, runs] of lines) {
+                    chars.push(Array.from(text));
+                    const line = [];
+                    for (let k = 0; k < runs.length; k += 4) {
+                        const attr = attrOf(runs[k + 1], runs[k + 2], runs[k + 3]);
+                        for (let n = 0; n < runs[k]; n++) line.push(attr);
+                    }
+                    attrs.push(line);
+                }
+                return [chars, attrs];
+            };
+            Object.assign(this, {
+                cols: keyframe.cols, rows: keyframe.rows, x: keyframe.x, y: keyframe.y, wrap: keyframe.wrap,
+                top: keyframe.top, bottom: keyframe.bottom, hidden: keyframe.hidden, pending: '',
+                attr: attrOf(...keyframe.attr),
+                saved: keyframe.saved && [keyframe.saved[0], keyframe.saved[1], attrOf(...keyframe.saved[2])],
+                main: keyframe.main && decode(keyframe.main),
+                full: true,
+            });
+            [this.chars, this.attrs] = decode(keyframe.lines);
+        }
+    }
+
+    // Drawing
+    const PALETTE = ['#000000', '#cd3131', '#0dbc79', '#e5e510', '#2472c8', '#bc3fbc', '#11a8cd', '#e5e5e5',
+                     '#666666', '#f14c4c', '#23d18b', '#f5f543', '#3b8eea', '#d670d6', '#29b8db', '#ffffff'];
+    for (let i = 0; i < 216; i++) {
+        const level = v => v ? v * 40 + 55 : 0;
+        PALETTE.push(`rgb(${level(Math.floor(i / 36))},${level(Math.floor(i / 6) % 6)},${level(i % 6)})`);
+    }
+    for (let i = 0; i < 24; i++) PALETTE.push(`rgb(${i * 10 + 8},${i * 10 + 8},${i * 10 + 8})`);
+
+    function css(value, fallback) {
+        if (value < 0) return fallback;
+        if (value < 256) return PALETTE[value];
+        value -= 256;
+        return `rgb(${value >> 16 & 255},${value >> 8 & 255},${value & 255})`;
+    }
+
+    const styles = new Map();
+    function style(attr, cursor) {
+        const key = attr.fg + ',' + attr.bg + ',' + attr.flags + ',' + cursor;
+        let result = styles.get(key);
+        if (result === undefined) {
+            let fg = css(attr.fg, DEFAULT_FG), bg = css(attr.bg, DEFAULT_BG);
+            if (!!(attr.flags & INVERSE) !== cursor) [fg, bg] = [bg, fg];
+            const rules = [];
+            if (fg !== DEFAULT_FG) rules.push('color:' + fg);
+            if (bg !== DEFAULT_BG) rules.push('background:' + bg);
+            if (attr.flags & BOLD) rules.push('font-weight:bold');
+            if (attr.flags & DIM) rules.push('opacity:.6');
+            if (attr.flags & ITALIC) rules.push('font-style:italic');
+            const lines = (attr.flags & UNDERLINE ? ['underline'] : []).concat(attr.flags & STRIKE ? ['line-through'] : []);
+            if (lines.length) rules.push('text-decoration:' + lines.join(' '));
+            result = rules.join(';');
+            styles.set(key, result);
+        }
+        return result;
+    }
+
+    const escapes = {'&': '&amp;', '<': '&lt;', '>': '&gt;'};
+    function rowHTML(term, y) {
+        const chars = term.chars[y], attrs = term.attrs[y];
+        const cursor = !term.hidden && y === term.y ? term.x : -1;
+        let html = '', start = 0;
+        for (let x = 1; x <= term.cols; x++) {
+            if (x < term.cols && attrs[x] === attrs[start] && x !== cursor && x !== cursor + 1) continue;
+            const text = chars.slice(start, x).join('').replace(/[&<>]/g, c => escapes[c]);
+            const rules = style(attrs[start], start === cursor);
+            html += rules ? `<span style="${rules}">${text}</span>` : text;
+            start = x;
+        }
+        return html;
+    }
+
+    const screen = document.getElementById('screen');
+    let drawnCursor = -1;
+    function draw(term) {
+        if (term.full || screen.children.length !== term.rows) {
+            const rows = [];
+            for (let y = 0; y < term.rows; y++) rows.push(`<div>${rowHTML(term, y)}</div>`);
+            screen.innerHTML = rows.join('');
+            screen.style.width = term.cols + 'ch';
+            term.full = false;
+            term.dirty = new Set();
+        } else {
+            term.dirty.add(term.y);
+            if (drawnCursor >= 0 && drawnCursor < term.rows) term.dirty.add(drawnCursor);
+            for (const y of term.dirty) screen.children[y].innerHTML = rowHTML(term, y);
+            term.dirty.clear();
+        }
+        drawnCursor = term.y;
+    }
+
+    // Segments
+    async function inflate(id) {
+        const binary = atob(document.getElementById(id).textContent);
+        const bytes = new Uint8Array(binary.length);
+        for (let k = 0; k < binary.length; k++) bytes[k] = binary.charCodeAt(k);
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+        return JSON.parse(await new Response(stream).text());
+    }
+
+    const loaded = new Map();
+    async function load(i) {
+        if (loaded.has(i)) return loaded.get(i);
+        const data = await inflate('s' + i);
+        const ids = [];
+        for (let k = 0; k < data.ops.length; k++) {
+            const op = data.ops[k];
+            if (op >= 0) {
+                ids.push(op);
+                continue;
+            }
+            const from = ids.length + op, count = data.ops[++k];
+            for (let n = 0; n < count; n++) ids.push(ids[from + n]);
+        }
+        const times = new Float64Array(ids.length);
+        let time = index.segments[i][0];
+        for (let k = 0; k < ids.length; k++) times[k] = time += data.deltas[k];
+        const segment = {keyframe: data.keyframe, payloads: data.payloads, ids, times};
+        loaded.set(i, segment);
+        if (loaded.size > 4) loaded.delete(loaded.keys().next().value);
+        return segment;
+    }
+
+    const segments = index.segments;
+    function segmentAt(time) {
+        let low = 0, high = segments.length - 1;
+        while (low < high) {
+            const mid = (low + high + 1) >> 1;
+            if (segments[mid][0] <= time) low = mid; else high = mid - 1;
+        }
+        return low;
+    }
+
+    // Playback
+    const term = new Term(index.cols, index.rows);
+    term.dirty = new Set();
+    let seg = -1, current = null, next = 0, position = 0;
+
+    async function advance(time) {
+        // Apply every event up to time, moving on through segments without their keyframes
+        while (current) {
+            const {payloads, ids, times} = current;
+            for (; next < ids.length && times[next] <= time; next++) {
+                const payload = payloads[ids[next]];
+                if (typeof payload === 'string') term.feed(payload);
+                else term.resize(payload[0], payload[1]);
+            }
+            if (next < ids.length || seg + 1 >= segments.length || segments[seg + 1][0] > time) break;
+            current = await load(++seg);
+            next = 0;
+        }
+    }
+
+    async function jump(time) {
+        const i = segmentAt(time);
+        if (i !== seg || time < position) {
+            current = await load(i);
+            seg = i;
+            next = 0;
+            term.restore(current.keyframe);
+        }
+        position = time;
+        await advance(time);
+    }
+
+    const play = document.getElementById('play');
+    const seek = document.getElementById('seek');
+    const clock = document.getElementById('clock');
+    const speed = document.getElementById('speed');
+    seek.max = index.duration;
+
+    function hms(ms) {
+        const s = Math.floor(ms / 1000), pad = n => String(n).padStart(2, '0');
+        const h = Math.floor(s / 3600), m = Math.floor(s / 60) % 60;
+        return (h ? h + ':' + pad(m) : m) + ':' + pad(s % 60);
+    }
+
+    let playing = false, wanted = segments.length ? 0 : null, busy = false, last = null;
+    function toggle() {
+        if (!playing && position >= index.duration) wanted = 0;
+        playing = !playing;
+    }
+    play.addEventListener('click', toggle);
+    seek.addEventListener('input', () => { wanted = Number(seek.value); });
+    document.addEventListener('keydown', event => {
+        if (event.target.tagName === 'SELECT') return;
+        if (event.key === ' ') { event.preventDefault(); toggle(); }
+        else if (event.key === 'ArrowLeft') wanted = Math.max(0, position - 5000);
+        else if (event.key === 'ArrowRight') wanted = Math.min(index.duration, position + 5000);
+    });
+
+    async function frame(now) {
+        requestAnimationFrame(frame);
+        const elapsed = last === null ? 0 : Math.min(now - last, 1000);
+        last = now;
+        if (busy) return;
+        busy = true;
+        try {
+            if (wanted !== null) {
+                const time = wanted;
+                wanted = null;
+                await jump(time);
+            } else if (playing) {
+                position = Math.min(index.duration, position + elapsed * Number(speed.value));
+                await advance(position);
+                if (position >= index.duration) playing = false;
+            }
+            draw(term);
+            play.innerHTML = playing ? '&#10074;&#10074;' : '&#9654;';
+            if (document.activeElement !== seek) seek.value = position;
+            clock.textContent = hms(position) + ' / ' + hms(index.duration);
+        } finally {
+            busy = false;
+        }
+    }
+
+    if (!('DecompressionStream' in window)) {
+        screen.textContent = 'This browser cannot decompress the recording (needs DecompressionStream).';
+        return;
+    }
+    draw(term);
+    requestAnimationFrame(frame);
+})();
+    </script>
+</body>
+</html>
+"""
+
+
+def write_player(f: IO[str], session_file: Path, session_id: str, duration: str, timestamp: str):
+    """
+    Write a cast as a self-contained page that plays it back
+
+    Output and resize events are cut into segments, each starting with a
+    keyframe - the terminal state there, from Screen - so seeking
+    replays one segment instead of the whole recording. Within a
+    segment, identical payloads are stored once, repeating cycles of
+    them (spinners) collapse into one back-reference and times are ms
+    deltas; segments are then compressed on a thread pool.
+
+    Args:
+        f: Text file to write the page to
+        session_file: .cast recording (plain or stored)
+        session_id, duration, timestamp: Shown in the page header
+    """
+    f.write(PAGE_HEAD.format(session_id=escape(session_id), duration=escape(duration),
+                             timestamp=escape(timestamp)))
+    index = {'segments': []}
+    workers = os.cpu_count() or 1
+    with mapped(session_file) as data, ThreadPoolExecutor(max_workers=workers) as pool:
+        header = data[:data.find(b'\n')] if data.find(b'\n') != -1 else data[:]
+        index['cols'], index['rows'] = cast_size(header)
+        screen = Screen(index['cols'], index['rows'])
+        pending = []
+        written = 0
+        segment = None
+        time = 0
+        for seconds, code, payload in cast_events(data):
+            if code not in ('o', 'r'):
+                continue
+            time = max(time, round(seconds * 1000))
+            if segment is None or (not screen.pending and segment.full(time)):
+                if segment is not None:
+                    pending.append(pool.submit(segment.pack))
+                    if len(pending) > 2 * workers:
+                        _write_segment(f, written, pending.pop(0).result())
+                        written += 1
+                segment = _Segment(time, screen.keyframe())
+                index['segments'].append([time, 0])
+            if code == 'o':
+                text = payload.decode('utf-8', 'replace')
+                screen.feed(text)
+                segment.add(time, text, text)
+            else:
+                try:
+                    cols, rows = (int(n) for n in payload.decode('ascii').split('x'))
+                except ValueError:
+                    continue
+                screen.resize(cols, rows)
+                segment.add(time, (cols, rows), [cols, rows])
+            index['segments'][-1][1] += 1
+        if segment is not None:
+            pending.append(pool.submit(segment.pack))
+        for future in pending:
+            _write_segment(f, written, future.result())
+            written += 1
+    index['duration'] = time
+    f.write(PAGE_SCRIPT.replace('{index}', json.dumps(index)))
+
+
+def _write_segment(f: IO[str], number: int, data: bytes):
+    f.write(f'    <script type="application/octet-stream" id="s{number}">')
+    f.write(data.decode('ascii'))
+    f.write('</script>\n')
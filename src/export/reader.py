@@ -0,0 +1,271 @@
+"""
+Bytes-first session readers for RecCli exports
+Sessions are memory-mapped and handled as bytes; text is decoded last
+"""
+
+import codecs
+import json
+import mmap
+import re
+from contextlib import contextmanager
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+# '[12.345678, "o", "..."]' - an output event whose payload can be sliced out of
+# the line; group 1 is the JSON string body (escapes still encoded)
+OUTPUT_EVENT = re.compile(
+    rb'^\[[ \t]*[-+0-9.eE]+[ \t]*,[ \t]*"o"[ \t]*,[ \t]*'
+    rb'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"[ \t]*\][ \t\r]*$', re.M)
+
+# Any event, with its time, code and JSON string body
+EVENT = re.compile(
+    rb'\[[ \t]*([-+0-9.eE]+)[ \t]*,[ \t]*"([a-z])"[ \t]*,[ \t]*'
+    rb'"([^"\\\n]*(?:\\.[^"\\\n]*)*)"[ \t]*\][ \t\r]*$')
+# The same, as a whole line anywhere in a buffer
+EVENT_LINE = re.compile(b'^' + EVENT.pattern, re.M)
+
+# Universal newlines, as text-mode reads of .txt sessions always did
+NEWLINES = re.compile(rb'\r\n?')
+
+DECODE_BLOCK = 1024 * 1024
+UNESCAPE_BATCH = 1024 * 1024
+
+
+@contextmanager
+def mapped(session_file: Path) -> Iterator[Buffer]:
+    """
+    Session contents as a read-only buffer
+
+    Plain files are memory-mapped, so nothing is copied onto the heap;
+    retention-compressed (.gz) and deduplicated (.dedup) sessions can't be
+    mapped and are read into bytes.
+    """
+    session_file = Path(session_file)
+    if session_file.suffix in ('.gz', '.dedup'):
+        from .exporters import open_session
+        with open_session(session_file, 'rb') as f:
+            yield f.read()
+        return
+
+    with open(session_file, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''  # Empty files can't be mapped
+            return
+        try:
+            yield data
+        finally:
+            data.close()
+
+
+def iter_lines(buf: Buffer, start: int = 0) -> Iterator[bytes]:
+    """Lines of a buffer (without their newline), copying one line at a time"""
+    end = len(buf)
+    while start < end:
+        newline = buf.find(b'\n', start)
+        if newline == -1:
+            newline = end
+        yield buf[start:newline]
+        start = newline + 1
+
+
+def _unescape(body: bytes) -> bytes:
+    """Decode a JSON string body's escapes, staying in UTF-8"""
+    if b'\\' not in body:
+        return body  # Stored verbatim - nothing to decode
+    text, _ = scanstring(body.decode('utf-8', 'surrogateescape') + '"', 0)
+    return text.encode('utf-8', 'surrogatepass')
+
+
+def _unescape_batch(bodies: List[bytes]) -> bytes:
+    """
+    _unescape many bodies in one call
+
+    Concatenated string bodies are themselves a valid body, so a batch
+    decodes in one pass; if one of them is malformed only that one is
+    dropped.
+    """
+    try:
+        return _unescape(b''.join(bodies))
+    except ValueError:
+        pass
+    decoded = []
+    for body in bodies:
+        try:
+            decoded.append(_unescape(body))
+        except ValueError:
+            continue  # Invalid JSON string - skipped, like any malformed event
+    return b''.join(decoded)
+
+
+def _output_payload(line: bytes) -> bytes:
+    """Output payload of a line OUTPUT_EVENT didn't match (b'' if it isn't an output event)"""
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return b''
+    if isinstance(event, list) and len(event) >= 3 and event[1] == 'o':
+        return str(event[2]).encode('utf-8', 'surrogatepass')
+    return b''
+
+
+def cast_output(buf: Buffer, start: Optional[int] = None) -> bytearray:
+    """
+    Concatenated output events of a cast
+
+    Output events are found by one regex scan over the buffer and their
+    payloads sliced straight out of it, then unescaped in batches of
+    about UNESCAPE_BATCH bytes; only lines the scan skipped (header,
+    input events, unusual formatting) go through the JSON parser. The result is UTF-8
+    bytes, so a character split across events is whole again once they
+    are joined.
+
+    Args:
+        buf: Cast contents
+        start: Offset of the first event line to read (default: the one
+               after the header) - for reading a growing cast piecewise
+    """
+    output = bytearray()
+    if start is None:
+        header_end = buf.find(b'\n')
+        if header_end == -1:
+            return output
+        start = header_end + 1
+
+    position = start
+    batch: List[bytes] = []
+    batched = 0
+    for match in OUTPUT_EVENT.finditer(buf, position):
+        if match.start() > position:
+            output += _unescape_batch(batch)
+            batch, batched = [], 0
+            for line in iter_lines(buf[position:match.start()]):
+                output += _output_payload(line)
+        body = match.group(1)
+        batch.append(body)
+        batched += len(body)
+        if batched >= UNESCAPE_BATCH:
+            output += _unescape_batch(batch)
+            batch, batched = [], 0
+        position = match.end() + 1
+    output += _unescape_batch(batch)
+    for line in iter_lines(buf[position:]):
+        output += _output_payload(line)
+    return output
+
+
+def parse_event(line: bytes) -> Optional[Tuple[float, str, bytes]]:
+    """
+    One cast event line
+
+    Returns:
+        (time, code, data) - code is 'o', 'i', 'm' or 'r', data UTF-8
+        bytes - or None if the line isn't an event
+    """
+    match = EVENT.match(line)
+    try:
+        if match:
+            return float(match.group(1)), match.group(2).decode(), _unescape(match.group(3))
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(event, list) and len(event) >= 3 and isinstance(event[1], str):
+        try:
+            return float(event[0]), event[1], str(event[2]).encode('utf-8', 'surrogatepass')
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+def iter_cast(buf: Buffer) -> Iterator[Tuple[bytes, Optional[Tuple[float, str, bytes]]]]:
+    """Every line of a cast with its parsed event (None for the header and non-events)"""
+    if not len(buf):
+        return
+    header_end = buf.find(b'\n')
+    if header_end == -1:
+        header_end = len(buf)
+    yield buf[:header_end], None
+    for line in iter_lines(buf, header_end + 1):
+        yield line, parse_event(line)
+
+
+def _gap_payloads(buf: Buffer, start: int, end: int) -> Iterator[Tuple[int, int, bytes]]:
+    """event_payloads for lines EVENT_LINE skipped, parsed one by one"""
+    while start < end:
+        newline = buf.find(b'\n', start, end)
+        if newline == -1:
+            newline = end
+        event = parse_event(buf[start:newline])
+        if event is not None:
+            yield start, newline, event[2]
+        start = newline + 1
+
+
+def event_payloads(buf: Buffer) -> Iterator[Tuple[int, int, bytes]]:
+    """
+    Where every event of a cast is, with its payload
+
+    Like cast_output, event lines are found by one regex scan over the
+    buffer, and only lines it skips are parsed separately.
+
+    Yields:
+        (line start, line end, payload) - offsets into buf (end before
+        the newline), payload as UTF-8 bytes
+    """
+    header_end = buf.find(b'\n')
+    if header_end == -1:
+        return
+    position = header_end + 1
+    for match in EVENT_LINE.finditer(buf, position):
+        if match.start() > position:
+            yield from _gap_payloads(buf, position, match.start())
+        try:
+            payload = _unescape(match.group(3))
+        except ValueError:
+            payload = None  # Invalid JSON string - not an event
+        if payload is not None:
+            yield match.start(), match.end(), payload
+        position = match.end() + 1
+    yield from _gap_payloads(buf, position, len(buf))
+
+
+def cast_events(buf: Buffer) -> Iterator[Tuple[float, str, bytes]]:
+    """Events of a cast, in file order (see parse_event)"""
+    for _, event in iter_cast(buf):
+        if event is not None:
+            yield event
+
+
+def text_output(buf: Buffer) -> Buffer:
+    """Output of a plain-text (script) session, with \\r\\n and \\r normalised to \\n"""
+    if buf.find(b'\r') == -1:
+        return buf
+    return NEWLINES.sub(b'\n', buf)
+
+
+def decode_lines(data: Buffer) -> List[str]:
+    """
+    Decode UTF-8 output into lines
+
+    Decodes block by block through an incremental decoder, which carries
+    a multibyte character cut by a block edge over to the next block.
+    Invalid bytes are dropped.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    view = memoryview(data)
+    lines: List[str] = []
+    rest = ''
+    try:
+        for start in range(0, len(view), DECODE_BLOCK):
+            *complete, rest = (rest + decoder.decode(view[start:start + DECODE_BLOCK])).split('\n')
+            lines.extend(complete)
+    finally:
+        view.release()
+    *complete, rest = (rest + decoder.decode(b'', final=True)).split('\n')
+    lines.extend(complete)
+    lines.append(rest)
+    return lines
@@ -0,0 +1,369 @@
+"""
+Secret redaction for RecCli exports
+Key/token detectors, high-entropy strings and custom patterns in one scanner
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from .reader import event_payloads, mapped, parse_event
+
+# (name, kept prefix, secret) - only the secret part is masked
+DETECTORS = [
+    ('private-key', '', r'-----BEGIN[A-Z ]{0,30} PRIVATE KEY-----'
+                        r'(?:[\s\S]{0,16384}?-----END[A-Z ]{0,30} PRIVATE KEY-----)?'),
+    ('aws-access-key', '', r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b'),
+    ('github-token', '', r'\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})'),
+    ('anthropic-key', '', r'\bsk-ant-[A-Za-z0-9_-]{20,}'),
+    ('openai-key', '', r'\bsk-(?:proj-)?[A-Za-z0-9_-]{20,}'),
+    ('slack-token', '', r'\bxox[abposr]-[A-Za-z0-9-]{10,}'),
+    ('google-api-key', '', r'\bAIza[0-9A-Za-z_-]{35}'),
+    ('stripe-key', '', r'\b[rs]k_(?:live|test)_[0-9A-Za-z]{16,}'),
+    ('jwt', '', r'\beyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}'),
+    ('bearer-token', r'(?i:\bbearer[ \t]+)', r'[A-Za-z0-9._~+/-]{16,}=*'),
+    # Keywords start a word (DB_PASSWORD but not bypass, OLDPWD); values
+    # aren't masks, labels, paths (PWD=/home/...) or booleans (pass: False)
+    ('password', r'(?<![A-Za-z0-9])(?i:(?:pass(?:word|wd)?|pwd|secret|token|api[_-]?key|access[_-]?key)'
+                 r'["\']?[ \t]*[:=][ \t]*["\']?)',
+     r'(?!(?i:true|false|none|null|nil|yes|no|undefined)(?![^\s"\',;]))[^\s"\'*\[/~][^\s"\']{3,}'),
+]
+
+# Long base62-ish tokens, kept only if they look random (see _random). Not
+# '/' or '.': path segments, URLs and file names are never candidates
+ENTROPY_CANDIDATE = r'(?<![A-Za-z0-9+/_.-])[A-Za-z0-9+_-]{24,}={0,2}(?![A-Za-z0-9+/_.=-])'
+ENTROPY_BITS = 4.0
+
+# Prefilter: every built-in secret lies inside a run of at least MIN_TOKEN
+# of these bytes, follows one of KEYWORDS (matched case-insensitively) or
+# is a private key block
+TOKEN_BYTES = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/_=.-'
+MIN_TOKEN = 15
+# A keyword introduces a secret when a value is assigned to it (or, for
+# bearer, follows it); each search starts with its keyword as a literal,
+# which re looks for in C
+ASSIGNED = rb'[a-z]{0,4}["\']?[ \t]*[:=][ \t]*["\']?[^\s"\']*'
+KEYWORDS = [(keyword, re.compile(re.escape(keyword) + follows)) for keyword, follows in [
+    (b'pass', ASSIGNED), (b'pwd', ASSIGNED), (b'secret', ASSIGNED), (b'token', ASSIGNED), (b'key', ASSIGNED),
+    (b'bearer', rb'[ \t]+[^\s"\']*')]]
+KEYWORD_LOOKBEHIND = 7     # 'api_key', 'access-key' start before their keyword
+PRIVATE_KEY = b'-----BEGIN'
+PRIVATE_KEY_SPAN = 20 * 1024
+# Distinct token runs remembered per scan (status lines repeat the same ones)
+RUN_CACHE = 4096
+
+_SHAPE = bytes(0x61 if b in TOKEN_BYTES else 0x20 for b in range(256))
+# Spelled out rather than a{15,} so re searches for it as a literal prefix (~10x faster)
+_LONG_RUN = re.compile(b'a' * MIN_TOKEN + b'a*')
+
+MASK = '[REDACTED:{}]'
+
+
+def shannon_bits(token) -> float:
+    """Shannon entropy in bits per character (str) or byte"""
+    counts = Counter(token)
+    total = len(token)
+    return -sum(c / total * math.log2(c / total) for c in counts.values())
+
+
+def unsplit_keys(lines: List[str], settled: int) -> int:
+    """
+    How many of the first settled lines can be redacted without the rest
+
+    Moves the cut back to the start of a private key block whose END line
+    hasn't come yet, so the block is masked as a whole - unless
+    PRIVATE_KEY_SPAN of text already follows its BEGIN line.
+    """
+    for i in range(settled - 1, -1, -1):
+        if '-----BEGIN' in lines[i]:
+            after = lines[i + 1:]
+            if not any('-----END' in line for line in after) \
+                    and sum(len(line) + 1 for line in after) < PRIVATE_KEY_SPAN:
+                return i
+            break
+    return settled
+
+
+class Redactor:
+    """
+    Secret scanner
+
+    All detectors and the entropy candidate are compiled into one
+    alternation, but it only runs where a secret could be: long runs of
+    token characters (found by translating the data to a two-letter
+    shape and searching it for a long run), values assigned to keywords
+    (password, token, ...) and private key blocks. Those searches run at
+    C speed, so clean output costs a few memory passes rather than a
+    regex attempt per character - an unfiltered alternation manages well
+    under 50MB/s in CPython's re. A run is scanned on its own, so a
+    repeated one is only scanned once. Custom patterns can't be
+    prefiltered and get one full scan of their own.
+
+    Scanning happens on UTF-8 bytes: redact() labels secrets in exports,
+    redact_file() masks them in recordings.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), entropy: bool = False,
+                 entropy_bits: float = ENTROPY_BITS):
+        """
+        Initialize redactor
+
+        Args:
+            patterns: Extra regexes (whole match is redacted); invalid ones are skipped
+            entropy: Also redact random-looking tokens of 24+ characters (off by
+                     default - it catches hashes and IDs as well as secrets)
+            entropy_bits: Entropy (bits/char) above which a token counts as random
+        """
+        self.entropy_bits = entropy_bits
+        self.names: Dict[str, str] = {}
+        self.hits = 0
+
+        branches = []
+        for i, (name, prefix, secret) in enumerate(DETECTORS):
+            branches.append(f'(?P<d{i}>{prefix}(?P<s{i}>{secret}))')
+            self.names[f'd{i}'] = name
+        # Re-checks entropy candidates that turned out not to be random
+        self.detectors = re.compile('|'.join(branches).encode())
+        if entropy:
+            branches.append(f'(?P<e>{ENTROPY_CANDIDATE})')
+            self.names['e'] = 'high-entropy'
+        self.pattern = re.compile('|'.join(branches).encode())
+
+        custom = []
+        for j, pattern in enumerate(patterns):
+            try:
+                re.compile(pattern.encode())
+            except (re.error, AttributeError) as e:
+                log.warning("Skipping invalid redaction pattern %r: %s", pattern, e)
+                continue
+            custom.append(f'(?P<c{j}>{pattern})')
+            self.names[f'c{j}'] = 'custom'
+        self.custom = re.compile('|'.join(custom).encode()) if custom else None
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional['Redactor']:
+        """
+        Redactor for the user's settings
+
+        Returns:
+            None if redaction is turned off (redact_exports: false)
+        """
+        if not config.get('redact_exports', True):
+            return None
+        return cls(patterns=config.get('redact_patterns', []),
+                   entropy=config.get('redact_entropy', False))
+
+    def _random(self, token: bytes) -> bool:
+        has = set(token)
+        return (not has.isdisjoint(b'0123456789') and not has.isdisjoint(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                and not has.isdisjoint(b'abcdefghijklmnopqrstuvwxyz')
+                and shannon_bits(token) > self.entropy_bits)
+
+    def _run_matches(self, data) -> List[Tuple[int, int, str]]:
+        """Secrets inside long token runs"""
+        # A run is maximal, so its edges are word boundaries whatever
+        # surrounds it: scanning it alone finds what scanning it in place would
+        found = []
+        cache: Dict[bytes, List[Tuple[int, int, str]]] = {}
+        shape = data.translate(_SHAPE)
+        for match in _LONG_RUN.finditer(shape):
+            start, end = match.span()
+            run = bytes(data[start:end])
+            hits = cache.get(run)
+            if hits is None:
+                hits = self._matches(self.pattern, run, 0, len(run))
+                if len(cache) >= RUN_CACHE:
+                    cache.clear()
+                cache[run] = hits
+            found.extend((start + s, start + e, name) for s, e, name in hits)
+        return found
+
+    def _regions(self, data) -> List[Tuple[int, int]]:
+        """Sorted, merged byte ranges around keywords and private keys"""
+        regions = []
+        lowered = data.lower()
+        for keyword, assigned in KEYWORDS:
+            if keyword not in lowered:
+                continue  # bytes search is about twice as fast as re's
+            for match in assigned.finditer(lowered):
+                regions.append((max(0, match.start() - KEYWORD_LOOKBEHIND), match.end()))
+        del lowered
+
+        position = data.find(PRIVATE_KEY)
+        while position != -1:
+            regions.append((position, min(position + PRIVATE_KEY_SPAN, len(data))))
+            position = data.find(PRIVATE_KEY, position + 1)
+
+        merged = []
+        for start, end in sorted(regions):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _matches(self, pattern, data, start: int, end: int) -> List[Tuple[int, int, str]]:
+        found = []
+        for match in pattern.finditer(data, start, end):
+            group = match.lastgroup
+            if group == 'e' and not self._random(match.group()):
+                # Not random after all - it may still contain a key
+                found.extend(self._matches(self.detectors, data, match.start(), match.end()))
+                continue
+            offset = match.start(f's{group[1:]}') if group[0] == 'd' else match.start()
+            found.append((offset, match.end(), self.names[group]))
+        return found
+
+    def spans(self, data) -> List[Tuple[int, int, str]]:
+        """
+        Secrets in UTF-8 data
+
+        Returns:
+            Sorted, non-overlapping (start, end, detector name) byte ranges
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)  # mmap has no translate()/lower()
+        found = self._run_matches(data)
+        for start, end in self._regions(data):
+            found.extend(self._matches(self.pattern, data, start, end))
+        if self.custom is not None:
+            found.extend(self._matches(self.custom, data, 0, len(data)))
+        return _merge(found)
+
+    def redact(self, text: str) -> str:
+        """
+        Replace every secret in text with [REDACTED:<detector>]
+
+        A secret spanning lines (a private key) keeps its newlines after
+        the label, so the text has as many lines as before.
+        """
+        with metrics.timer('export.redact'):
+            data = text.encode('utf-8', 'surrogatepass')
+            found = self.spans(data)
+            if not found:
+                return text
+            pieces = []
+            position = 0
+            for start, end, name in found:
+                pieces.append(data[position:start])
+                pieces.append(MASK.format(name).encode() + b'\n' * data.count(b'\n', start, end))
+                position = end
+            pieces.append(data[position:])
+        self.hits += len(found)
+        metrics.incr('export.redact.hits', len(found))
+        return b''.join(pieces).decode('utf-8', 'surrogatepass')
+
+    def redact_file(self, session_file: Path, output_file: Optional[Path] = None) -> int:
+        """
+        Mask secrets in a recording (.cast or .txt) with asterisks
+
+        Masks keep the secret's length, so replays and cursor-addressed
+        output line up as before. In a cast, secrets are found in the
+        joined stream of event payloads, so one typed or printed across
+        several events is still caught. Only events that change are
+        re-encoded; the rest are copied byte for byte.
+
+        Args:
+            session_file: .cast or .txt recording, or a stored (.gz/.dedup) one
+            output_file: Where to write (default: atomically replace the
+                         recording - plain recordings only)
+
+        Returns:
+            Number of secrets masked
+        """
+        session_file = Path(session_file)
+        stored = session_file.suffix in ('.gz', '.dedup')
+        if stored and not output_file:
+            raise ValueError(f"Can't redact stored session {session_file.name} in place")
+        kind = Path(session_file.stem).suffix if stored else session_file.suffix
+        target = Path(output_file) if output_file else session_file
+        fd, tmp = tempfile.mkstemp(prefix=target.name + '.', dir=str(target.parent))
+        try:
+            with os.fdopen(fd, 'wb') as out, mapped(session_file) as buf:
+                if kind == '.cast':
+                    count = self._redact_cast(buf, out)
+                else:
+                    spans = self.spans(buf)
+                    _write_masked(out, buf, spans)
+                    count = len(spans)
+            os.replace(tmp, target)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        metrics.incr('export.redact.hits', count)
+        return count
+
+    def _redact_cast(self, buf, out) -> int:
+        # Pass 1: find secrets in the payloads back to back
+        payloads = bytearray()
+        starts, lines, ends = array('Q'), array('Q'), array('Q')
+        for line_start, line_end, payload in event_payloads(buf):
+            starts.append(len(payloads))
+            lines.append(line_start)
+            ends.append(line_end)
+            payloads += payload
+        starts.append(len(payloads))
+        spans = self.spans(payloads)
+        del payloads
+        if not spans:
+            out.write(buf)
+            return 0
+
+        # Which parts of which events each secret covers
+        masks: Dict[int, List[Tuple[int, int]]] = {}
+        for first, last, _ in spans:
+            i = bisect_right(starts, first) - 1
+            while i < len(lines) and starts[i] < last:
+                if starts[i + 1] > starts[i]:
+                    masks.setdefault(i, []).append(
+                        (max(first, starts[i]) - starts[i], min(last, starts[i + 1]) - starts[i]))
+                i += 1
+
+        # Pass 2: copy the file, re-encoding only the events with a secret
+        position = 0
+        for i in sorted(masks):
+            out.write(buf[position:lines[i]])
+            time, code, payload = parse_event(buf[lines[i]:ends[i]])
+            masked = bytearray(payload)
+            for first, last in masks[i]:
+                masked[first:last] = b'*' * (last - first)
+            text = masked.decode('utf-8', 'replace')
+            out.write(json.dumps([time, code, text], ensure_ascii=False).encode('utf-8'))
+            position = ends[i]
+        out.write(buf[position:])
+        return len(spans)
+
+
+def _merge(spans: List[Tuple[int, int, str]]) -> List[Tuple[int, int, str]]:
+    """Sort spans and fold overlapping ones together"""
+    merged = []
+    for start, end, name in sorted(spans):
+        if merged and start < merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end, merged[-1][2])
+        else:
+            merged.append((start, end, name))
+    return merged
+
+
+def _write_masked(out, buf, spans: List[Tuple[int, int, str]]):
+    """Copy buf to out with every span replaced by asterisks"""
+    position = 0
+    for start, end, _ in spans:
+        out.write(buf[position:start])
+        out.write(b'*' * (end - start))
+        position = end
+    out.write(buf[position:])
@@ -0,0 +1,527 @@
+"""
+Local HTTP server for RecCli recordings
+Browse a recordings folder and export sessions on demand, with rendered
+exports cached on disk by session mtime
+"""
+
+import email.utils
+import hashlib
+import html
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from src.storage.retention import SESSION_SUFFIXES
+from .exporters import SessionExporter, cast_duration, export_extension, format_duration, session_metadata
+from .redact import Redactor
+
+DEFAULT_PORT = 8470
+CACHE_DIR = Path.home() / '.reccli' / 'cache' / 'exports'
+CACHE_BYTES = 512 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+STREAM_AFTER = 0.5       # Renders still running after this are streamed (chunked) as they're written
+FOLLOW_INTERVAL = 0.1
+RENDER_THREADS = 2
+STALE_PARTIAL = 3600     # Leftovers of a render that never finished (crashed server)
+
+# Host headers we answer - anything else is another machine or a DNS-rebinding page
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+
+CONTENT_TYPES = {
+    'html': 'text/html; charset=utf-8',
+    'player': 'text/html; charset=utf-8',
+    'md': 'text/markdown; charset=utf-8',
+    'txt': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'chunks': 'application/x-ndjson',
+    'cast': 'application/x-asciicast',
+}
+
+
+class _Render:
+    """An export being rendered into the cache, followed by every request for it"""
+
+    def __init__(self, partial: Path, target: Path):
+        self.partial = partial
+        self.target = target
+        self.done = threading.Event()
+        self.ok = False
+
+
+class RenderCache:
+    """
+    Rendered exports on disk
+
+    Entries are keyed by session path, mtime, size and format, so a
+    session that changes gets a new key and nothing ever needs
+    invalidating: older renders of the same export are deleted when the
+    new one lands, and the least recently served go once the cache
+    outgrows max_bytes. Concurrent requests for an export that isn't
+    cached yet share one render.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR, max_bytes: int = CACHE_BYTES, variant: str = ''):
+        """
+        Initialize cache
+
+        Args:
+            directory: Where rendered exports are kept
+            max_bytes: Size the cache is pruned back to after each render
+            variant: Anything else the output depends on (redaction settings);
+                     caches with different variants can share a directory
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.variant = variant
+        self.lock = threading.Lock()
+        self.renders: Dict[str, _Render] = {}
+        self.slots = threading.Semaphore(RENDER_THREADS)
+        self._remove_stale_partials()
+
+    def _remove_stale_partials(self):
+        cutoff = time.time() - STALE_PARTIAL
+        for path in self.directory.glob('*.partial'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def key(self, session_file: Path, fmt: str) -> Tuple[str, str]:
+        """
+        Cache key of an export
+
+        Returns:
+            (prefix shared by every render of this session and variant, digest)
+        """
+        stat = session_file.stat()
+        prefix = hashlib.sha1(f"{session_file.resolve()}\0{self.variant}".encode()).hexdigest()[:16]
+        digest = hashlib.sha1(f"{prefix}\0{stat.st_mtime_ns}\0{stat.st_size}\0{fmt}".encode()).hexdigest()[:20]
+        return prefix, digest
+
+    def get(self, prefix: str, digest: str, fmt: str,
+            render: Callable[[Path], bool]) -> Tuple[Optional[BinaryIO], Optional[_Render]]:
+        """
+        Cached export, or the render producing it
+
+        Args:
+            prefix, digest: From key()
+            fmt: Export format
+            render: Writes the export to the given path, returns success
+
+        Returns:
+            (open file, None) on a hit, (None, render in progress) on a miss
+        """
+        target = self.directory / f"{prefix}-{fmt}-{digest}.{fmt}"
+        with self.lock:
+            job = self.renders.get(digest)
+            if job is None:
+                try:
+                    f = open(target, 'rb')
+                except FileNotFoundError:
+                    pass
+                else:
+                    try:
+                        os.utime(target)  # Recently served - pruned last
+                    except OSError:
+                        pass
+                    metrics.incr('serve.cache.hit')
+                    return f, None
+
+                self.directory.mkdir(parents=True, exist_ok=True)
+                job = _Render(target.with_name(f"{target.name}.{os.getpid()}.partial"), target)
+                job.partial.touch()
+                self.renders[digest] = job
+                metrics.incr('serve.cache.miss')
+                threading.Thread(target=self._render, args=(job, digest, prefix, fmt, render),
+                                 daemon=True).start()
+        return None, job
+
+    def _render(self, job: _Render, digest: str, prefix: str, fmt: str, render: Callable[[Path], bool]):
+        try:
+            with self.slots, metrics.timer(f'serve.render.{fmt}'):
+                job.ok = bool(render(job.partial))
+            if job.ok:
+                os.replace(job.partial, job.target)
+        except Exception as e:
+            log.warning("Rendering %s failed: %s", job.target.name, e)
+            job.ok = False
+        finally:
+            if not job.ok:
+                job.partial.unlink(missing_ok=True)
+            with self.lock:
+                self.renders.pop(digest, None)
+            job.done.set()
+        if job.ok:
+            self._prune(f"{prefix}-{fmt}-", job.target)
+
+    def _prune(self, stale_prefix: str, keep: Path):
+        """Delete older renders of the same export, then the least recently served down to max_bytes"""
+        entries = []
+        total = 0
+        for path in self.directory.iterdir():
+            if path == keep or path.name.endswith('.partial'):
+                continue
+            try:
+                if path.name.startswith(stale_prefix):
+                    path.unlink()
+                    continue
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        try:
+            total += keep.stat().st_size
+        except OSError:
+            pass
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)  # Open responses keep reading the unlinked file
+            total -= size
+
+
+class SessionServer:
+    """
+    Localhost HTTP server for a recordings folder
+
+        /                         recordings, newest first, with export links
+        /sessions.json            the same as JSON
+        /session/NAME?format=FMT  NAME exported as FMT (default html);
+                                  add &download=1 to save it instead
+
+    Exports are rendered through SessionExporter on first request and
+    served from the RenderCache after that, with an ETag and
+    Last-Modified so browsers revalidate with a 304 instead of
+    downloading again. A render that takes longer than STREAM_AFTER is
+    streamed with chunked encoding while it is being written.
+
+    Binds to the loopback interface only and answers only requests
+    addressed to it, so neither other machines nor web pages can read
+    recordings through it.
+    """
+
+    def __init__(self, root: Path, port: int = DEFAULT_PORT, config: Optional[Dict] = None,
+                 redact: bool = True, cache: Optional[RenderCache] = None):
+        """
+        Initialize server
+
+        Args:
+            root: Recordings folder to serve
+            port: Port on 127.0.0.1 (0 picks a free one)
+            config: ReccliConfig settings (redaction, serve_cache_mb)
+            redact: Mask secrets as configured (redact_exports); False serves them as recorded
+            cache: Render cache (default: ~/.reccli/cache/exports)
+        """
+        self.root = Path(root).expanduser().resolve()
+        self.config = config or {}
+        self.redact = redact and self.config.get('redact_exports', True)
+        if cache is None:
+            redaction = [self.config.get('redact_patterns', []), self.config.get('redact_entropy', False)] \
+                if self.redact else 'raw'
+            variant = json.dumps([redaction, self.config.get('chunk_tokens'), self.config.get('tokenizer', 'auto')])
+            cache = RenderCache(CACHE_DIR, int(self.config.get('serve_cache_mb', 512)) * 1024 * 1024, variant)
+        self.cache = cache
+        self.durations: Dict[Tuple[str, int, int], float] = {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.app = self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/"
+
+    def serve_forever(self):
+        """Serve until shutdown() (or Ctrl+C)"""
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+
+    def shutdown(self):
+        """Stop serve_forever (from another thread)"""
+        self.httpd.shutdown()
+
+    def resolve(self, name: str) -> Optional[Path]:
+        """Session file NAME directly in the recordings folder (None if there is none)"""
+        if not name or '/' in name or '\\' in name or name.startswith('.') \
+                or not name.endswith(SESSION_SUFFIXES):
+            return None
+        path = self.root / name
+        return path if path.is_file() else None
+
+    def _duration(self, path: Path, stat: os.stat_result) -> float:
+        key = (path.name, stat.st_mtime_ns, stat.st_size)
+        duration = self.durations.get(key)
+        if duration is None:
+            if len(self.durations) > 4096:
+                self.durations.clear()
+            duration = self.durations[key] = cast_duration(path) if '.cast' in path.name else 0.0
+        return duration
+
+    def sessions(self) -> List[Dict]:
+        """Recordings in the folder, newest first"""
+        found = []
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return found
+        for entry in entries:
+            if not entry.name.endswith(SESSION_SUFFIXES) or entry.name.startswith('.'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if not entry.is_file():
+                continue
+            found.append({
+                'name': entry.name,
+                'size': stat.st_size,
+                'modified': stat.st_mtime,
+                'duration': self._duration(Path(entry.path), stat),
+            })
+        found.sort(key=lambda s: s['modified'], reverse=True)
+        return found
+
+    def renderer(self, session_file: Path, fmt: str) -> Callable[[Path], bool]:
+        """Render function for RenderCache.get"""
+        def render(output_file: Path) -> bool:
+            redactor = Redactor.from_config(self.config) if self.redact else None
+            exporter = SessionExporter(session_file, session_metadata(session_file), redactor=redactor,
+                                       chunk_tokens=self.config.get('chunk_tokens'),
+                                       tokenizer=self.config.get('tokenizer', 'auto'))
+            return exporter.export(output_file, fmt)
+        return render
+
+
+def _size(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+INDEX_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>RecCli recordings</title>
+    <style>
+        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+               max-width: 1200px; margin: 0 auto; padding: 20px; background: #f5f5f5; color: #333; }}
+        h1 {{ margin: 0 0 4px 0; }}
+        .folder {{ color: #666; font-size: 14px; margin-bottom: 20px; }}
+        table {{ width: 100%; border-collapse: collapse; background: white; border-radius: 8px;
+                box-shadow: 0 2px 4px rgba(0,0,0,0.1); font-size: 14px; }}
+        th, td {{ text-align: left; padding: 8px 12px; border-bottom: 1px solid #eee; }}
+        th {{ color: #666; font-weight: 600; }}
+        td.num {{ text-align: right; font-variant-numeric: tabular-nums; }}
+        a {{ color: #27ae60; text-decoration: none; }}
+        a:hover {{ text-decoration: underline; }}
+        .formats a {{ margin-right: 8px; }}
+    </style>
+</head>
+<body>
+    <h1>Recordings</h1>
+    <div class="folder">{folder} &middot; {count}</div>
+    <table>
+        <tr><th>Session</th><th>Date</th><th class="num">Duration</th><th class="num">Size</th><th>Export</th></tr>
+{rows}
+    </table>
+</body>
+</html>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, and chunked streaming
+    server_version = 'reccli'
+
+    def log_message(self, format, *args):
+        log.info("serve: %s " + format, self.address_string(), *args)
+
+    def do_GET(self):
+        host = (self.headers.get('Host') or '').rsplit(':', 1)[0].lower()
+        if host not in LOCAL_HOSTS:
+            self.send_error(HTTPStatus.FORBIDDEN, "reccli serve only answers requests to localhost")
+            return
+        url = urlsplit(self.path)
+        try:
+            if url.path == '/':
+                self._index()
+            elif url.path == '/sessions.json':
+                self._listing()
+            elif url.path.startswith('/session/'):
+                self._session(unquote(url.path[len('/session/'):]), parse_qs(url.query))
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client went away mid-response
+
+    def _not_modified(self, etag: str, modified: float) -> bool:
+        """Whether the request's validators still match (If-None-Match wins over If-Modified-Since)"""
+        match = self.headers.get('If-None-Match')
+        if match is not None:
+            return match.strip() == '*' or etag in [tag.strip() for tag in match.split(',')]
+        since = self.headers.get('If-Modified-Since')
+        if since:
+            try:
+                return email.utils.parsedate_to_datetime(since).timestamp() >= int(modified)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _validators(self, etag: str, modified: float):
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', email.utils.formatdate(modified, usegmt=True))
+        self.send_header('Cache-Control', 'no-cache')  # Always revalidate - sessions can still be growing
+
+    def _send_bytes(self, body: bytes, content_type: str, etag: str, modified: float):
+        if self._not_modified(etag, modified):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._validators(etag, modified)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self._validators(etag, modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _listing_validators(self, sessions: List[Dict]) -> Tuple[str, float]:
+        state = json.dumps([(s['name'], s['size'], s['modified']) for s in sessions]).encode()
+        modified = max((s['modified'] for s in sessions), default=0.0)
+        return f'"{hashlib.sha1(state).hexdigest()[:20]}"', modified
+
+    def _listing(self):
+        sessions = self.server.app.sessions()
+        etag, modified = self._listing_validators(sessions)
+        self._send_bytes(json.dumps(sessions).encode(), 'application/json', etag, modified)
+
+    def _index(self):
+        app = self.server.app
+        sessions = app.sessions()
+        etag, modified = self._listing_validators(sessions)
+        rows = []
+        for s in sessions:
+            link = f"/session/{quote(s['name'])}"
+            formats = ' '.join(f'<a href="{link}?format={fmt}">{fmt}</a>' for fmt in CONTENT_TYPES)
+            date = time.strftime('%Y-%m-%d %H:%M', time.localtime(s['modified']))
+            duration = format_duration(s['duration']) if s['duration'] else ''
+            rows.append(f'        <tr><td><a href="{link}">{html.escape(s["name"])}</a></td><td>{date}</td>'
+                        f'<td class="num">{duration}</td><td class="num">{_size(s["size"])}</td>'
+                        f'<td class="formats">{formats}</td></tr>')
+        page = INDEX_PAGE.format(folder=html.escape(str(app.root)), rows='\n'.join(rows),
+                                 count=f"{len(sessions)} recording{'s' if len(sessions) != 1 else ''}")
+        self._send_bytes(page.encode('utf-8'), CONTENT_TYPES['html'], etag, modified)
+
+    def _session(self, name: str, query: Dict[str, List[str]]):
+        app = self.server.app
+        fmt = query.get('format', ['html'])[0].lower().lstrip('.')
+        if fmt not in CONTENT_TYPES:
+            self.send_error(HTTPStatus.BAD_REQUEST, f"Unknown format: {fmt}")
+            return
+        session_file = app.resolve(name)
+        if session_file is None:
+            self.send_error(HTTPStatus.NOT_FOUND, f"No recording {name}")
+            return
+        try:
+            modified = session_file.stat().st_mtime
+            prefix, digest = app.cache.key(session_file, fmt)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, f"No recording {name}")
+            return
+
+        etag = f'"{digest}"'
+        if self._not_modified(etag, modified):
+            metrics.incr('serve.not_modified')
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._validators(etag, modified)
+            self.end_headers()
+            return
+
+        f, job = app.cache.get(prefix, digest, fmt, app.renderer(session_file, fmt))
+        if job is not None and job.done.wait(STREAM_AFTER):
+            # Quick render - send it whole, or a proper error
+            if not job.ok:
+                self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, f"Exporting {name} as {fmt} failed")
+                return
+            try:
+                f, job = open(job.target, 'rb'), None
+            except OSError:
+                self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Export was evicted, try again")
+                return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', CONTENT_TYPES[fmt])
+        self._validators(etag, modified)
+        if query.get('download', ['0'])[0] not in ('', '0'):
+            base = name.rsplit('.', 2 if name.endswith(('.gz', '.dedup')) else 1)[0]
+            self.send_header('Content-Disposition', f'attachment; filename="{base}.{export_extension(fmt)}"')
+        if f is not None:
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                self.send_header('Content-Length', str(size))
+                self.end_headers()
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self._follow(job)
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b'%x\r\n' % len(data) + data + b'\r\n')
+
+    def _follow(self, job: _Render):
+        """Stream a render as it is written, then the rest of the finished file"""
+        sent = 0
+        try:
+            f = open(job.partial, 'rb')
+        except FileNotFoundError:
+            f = None  # Finished (renamed into place) in the meantime
+        if f is not None:
+            with f:
+                while True:
+                    done = job.done.is_set()
+                    chunk = f.read(CHUNK_SIZE)
+                    if chunk:
+                        self._write_chunk(chunk)
+                        sent += len(chunk)
+                    elif done:
+                        break
+                    else:
+                        job.done.wait(FOLLOW_INTERVAL)
+
+        # Exporters that replace their output atomically (cast) leave the
+        # followed file empty - the rest comes from the finished one
+        try:
+            if not job.ok:
+                raise OSError("render failed")
+            with open(job.target, 'rb') as f:
+                f.seek(sent)
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self._write_chunk(chunk)
+        except OSError as e:
+            log.warning("serve: %s ended early: %s", job.target.name, e)
+            self.close_connection = True  # No terminating chunk - the client sees a truncated response
+            return
+        self.wfile.write(b'0\r\n\r\n')
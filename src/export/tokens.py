@@ -0,0 +1,235 @@
+"""
+Token counting for RecCli transcripts
+Splits cleaned transcripts into chunks that fit an LLM's context budget
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from .cleaning import is_prompt
+
+CACHE_DIR = Path.home() / '.reccli' / 'cache' / 'tokens'
+DEFAULT_ENCODING = 'cl100k_base'
+DEFAULT_CHUNK_TOKENS = 8000
+TIKTOKEN_BATCH = 8192
+
+# Roughly what a BPE tokenizer (cl100k and the like) makes one token of:
+# a short word with its leading space, up to three digits, a few ASCII
+# symbols, one other character (CJK, emoji), a run of whitespace
+ESTIMATE_PIECE = re.compile(r' ?[A-Za-z]{1,8}| ?[0-9]{1,3}| ?[!-/:-@\[-`{-~]{1,3}|[^\x00-\x7f]|\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text, without a tokenizer"""
+    return len(ESTIMATE_PIECE.findall(text))
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken when it's available, else estimates
+
+    tiktoken is optional (pip install tiktoken). The estimate needs
+    nothing and is fast, but only approximate - budgets should leave
+    some headroom when it's in use.
+    """
+
+    def __init__(self, backend: str = 'auto', encoding: str = DEFAULT_ENCODING):
+        """
+        Initialize counter
+
+        Args:
+            backend: 'tiktoken', 'estimate', or 'auto' (tiktoken if installed)
+            encoding: tiktoken encoding name
+
+        Raises:
+            ValueError: Unknown backend, or 'tiktoken' when it can't be loaded
+        """
+        if backend not in ('auto', 'tiktoken', 'estimate'):
+            raise ValueError(f"Unknown tokenizer: {backend}")
+        self.encoding = None
+        if backend != 'estimate':
+            try:
+                import tiktoken
+                self.encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:  # Not installed, or its BPE file can't be fetched
+                if backend == 'tiktoken':
+                    raise ValueError(f"tiktoken is not available: {e}") from e
+                log.info("tokens: tiktoken unavailable (%s), estimating", e)
+        self.name = f'tiktoken:{encoding}' if self.encoding is not None else 'estimate'
+
+    def count(self, text: str) -> int:
+        """Tokens in text"""
+        if self.encoding is None:
+            return estimate_tokens(text)
+        return len(self.encoding.encode_ordinary(text))
+
+    def count_lines(self, lines: Sequence[str]) -> array:
+        """
+        Tokens of each line, counted with its newline
+
+        Returns:
+            array('I') of counts, one per line
+        """
+        counts = array('I')
+        with metrics.timer(f'export.tokens.{self.name.split(":")[0]}'):
+            if self.encoding is None:
+                findall = ESTIMATE_PIECE.findall
+                counts.extend(len(findall(line)) + 1 for line in lines)
+            else:
+                for start in range(0, len(lines), TIKTOKEN_BATCH):
+                    batch = [line + '\n' for line in lines[start:start + TIKTOKEN_BATCH]]
+                    counts.extend(len(tokens) for tokens in self.encoding.encode_ordinary_batch(batch))
+        return counts
+
+
+class TokenCache:
+    """
+    Per-line token counts of sessions, on disk
+
+    Entries are keyed by session path, mtime, size and tokenizer, and
+    checked against a digest of the transcript (which also depends on
+    redaction settings), so a session is tokenized once and can then be
+    chunked for any budget. A session's older entries are deleted when
+    a new one is written.
+    """
+
+    def __init__(self, directory: Path = CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _paths(self, session_file: Path, counter: TokenCounter):
+        stat = session_file.stat()
+        prefix = hashlib.sha1(f"{session_file.resolve()}\0{counter.name}".encode()).hexdigest()[:16]
+        digest = hashlib.sha1(f"{prefix}\0{stat.st_mtime_ns}\0{stat.st_size}".encode()).hexdigest()[:20]
+        return prefix, self.directory / f"{prefix}-{digest}.tokens"
+
+    def line_counts(self, session_file: Path, lines: List[str], counter: TokenCounter) -> array:
+        """
+        Token counts of a session's transcript lines, from the cache or counted now
+
+        Args:
+            session_file: Session the transcript came from
+            lines: Transcript lines
+            counter: Tokenizer to count with
+
+        Returns:
+            array('I') of counts, one per line (see TokenCounter.count_lines)
+        """
+        session_file = Path(session_file)
+        transcript = hashlib.sha1('\n'.join(lines).encode('utf-8', 'surrogatepass')).digest()
+        try:
+            prefix, path = self._paths(session_file, counter)
+        except OSError:
+            return counter.count_lines(lines)
+
+        try:
+            with open(path, 'rb') as f:
+                if f.read(len(transcript)) == transcript:
+                    counts = array('I')
+                    counts.frombytes(f.read())
+                    if len(counts) == len(lines):
+                        metrics.incr('export.tokens.cache_hits')
+                        return counts
+        except (OSError, ValueError):
+            pass
+
+        counts = counter.count_lines(lines)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=path.name + '.', dir=str(self.directory))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(transcript)
+                counts.tofile(f)
+            os.replace(tmp, path)
+            for stale in self.directory.glob(f"{prefix}-*.tokens"):
+                if stale != path:
+                    stale.unlink()
+        except OSError as e:
+            log.warning("tokens: can't cache counts for %s: %s", session_file.name, e)
+        return counts
+
+
+def chunk_lines(lines: List[str], counts: Sequence[int], max_tokens: int,
+                counter: Optional[TokenCounter] = None, merge: bool = True) -> Iterator[Dict]:
+    """
+    Pack transcript lines into chunks of at most max_tokens
+
+    Chunks break between command blocks (a block starts at each prompt
+    line, as in NDJSON exports), taking as many whole blocks as fit. A
+    block bigger than the budget is split between lines, and a line
+    bigger than the budget is cut into pieces.
+
+    Args:
+        lines: Cleaned transcript lines
+        counts: Tokens of each line (see TokenCounter.count_lines)
+        max_tokens: Budget per chunk
+        counter: Counts the pieces of cut lines (default: estimate)
+        merge: False gives each block its own chunk(s), however small
+
+    Yields:
+        {'tokens', 'blocks': [first, last], 'lines': [start, end), 'text'}
+    """
+    max_tokens = max(1, max_tokens)
+    # Block n is the one after the nth prompt: (first line, tokens)
+    blocks: List[List[int]] = []
+    for i, line in enumerate(lines):
+        if not blocks or is_prompt(line):
+            blocks.append([i, 0])
+        blocks[-1][1] += counts[i]
+    number = 1 if lines and is_prompt(lines[0]) else 0  # Of blocks[0]
+
+    def end(b: int) -> int:
+        return blocks[b + 1][0] if b + 1 < len(blocks) else len(lines)
+
+    def chunk(start: int, stop: int, first: int, last: int, tokens: int) -> Dict:
+        return {'tokens': tokens, 'blocks': [first + number, last + number], 'lines': [start, stop],
+                'text': '\n'.join(lines[start:stop])}
+
+    pending = None  # Whole blocks taken so far: [first, last, tokens]
+    for b, (start, tokens) in enumerate(blocks):
+        if merge and pending is not None and pending[2] + tokens <= max_tokens:
+            pending[1], pending[2] = b, pending[2] + tokens
+            continue
+        if pending is not None:
+            yield chunk(blocks[pending[0]][0], end(pending[1]), *pending)
+            pending = None
+        if tokens <= max_tokens:
+            pending = [b, b, tokens]
+            continue
+        # One block over the budget: split it between lines
+        first, used = start, 0
+        for i in range(start, end(b)):
+            if used and used + counts[i] > max_tokens:
+                yield chunk(first, i, b, b, used)
+                first, used = i, 0
+            if counts[i] > max_tokens:
+                yield from _cut_line(lines[i], i, b + number, max_tokens, counter)
+                first = i + 1
+            else:
+                used += counts[i]
+        if first < end(b):
+            yield chunk(first, end(b), b, b, used)
+    if pending is not None:
+        yield chunk(blocks[pending[0]][0], end(pending[1]), *pending)
+
+
+def _cut_line(line: str, i: int, block: int, max_tokens: int,
+              counter: Optional[TokenCounter]) -> Iterator[Dict]:
+    """Pieces of one line too long for the budget, cut by characters"""
+    count = counter.count if counter is not None else estimate_tokens
+    position = 0
+    while position < len(line):
+        # Characters per token of what's left, then shrink until it fits
+        left = line[position:]
+        size = max(1, len(left) * max_tokens // max(1, count(left)))
+        while size > 1 and count(left[:size]) > max_tokens:
+            size = size * 9 // 10
+        piece = left[:size]
+        yield {'tokens': count(piece), 'blocks': [block, block], 'lines': [i, i + 1], 'text': piece}
+        position += size
@@ -0,0 +1,373 @@
+"""
+Chunked HTML transcript viewer for RecCli exports
+Huge transcripts embedded as compressed chunks, rendered only where visible
+"""
+
+import base64
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from html import escape
+from typing import IO, Iterator, List, Tuple
+
+CHUNK_CHARS = 256 * 1024
+COMPRESS_LEVEL = 6
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Session: {session_id}</title>
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            max-width: 1200px;
+            margin: 0 auto;
+            padding: 20px;
+            background: #f5f5f5;
+        }}
+        .header {{
+            background: white;
+            padding: 20px;
+            border-radius: 8px;
+            margin-bottom: 20px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }}
+        .header h1 {{
+            margin: 0 0 10px 0;
+            color: #333;
+        }}
+        .metadata {{
+            color: #666;
+            font-size: 14px;
+        }}
+        .search {{
+            display: flex;
+            gap: 8px;
+            align-items: center;
+            margin-top: 12px;
+            font-size: 14px;
+            color: #666;
+        }}
+        .search input {{
+            flex: 0 1 320px;
+            padding: 6px 10px;
+            border: 1px solid #ccc;
+            border-radius: 4px;
+            font-size: 14px;
+        }}
+        .search button {{
+            padding: 5px 10px;
+            border: 1px solid #ccc;
+            border-radius: 4px;
+            background: white;
+            cursor: pointer;
+        }}
+        .terminal {{
+            position: relative;
+            height: calc(100vh - 240px);
+            min-height: 300px;
+            background: #1e1e1e;
+            color: #d4d4d4;
+            border-radius: 8px;
+            overflow: auto;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.2);
+            font-family: 'Monaco', 'Menlo', 'Consolas', monospace;
+            font-size: 13px;
+            line-height: 1.5;
+        }}
+        .rows {{
+            position: absolute;
+            left: 0;
+            padding: 0 20px;
+            white-space: pre;
+            min-width: calc(100% - 40px);
+        }}
+        .rows div {{
+            height: 1.5em;
+        }}
+        .rows mark {{
+            background: #8a6d00;
+            color: inherit;
+        }}
+        .rows .current mark {{
+            background: #e0a800;
+            color: #1e1e1e;
+        }}
+        .footer {{
+            text-align: center;
+            margin-top: 20px;
+            color: #999;
+            font-size: 12px;
+        }}
+        .footer a {{
+            color: #27ae60;
+            text-decoration: none;
+        }}
+        .footer a:hover {{
+            text-decoration: underline;
+        }}
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>Session: {session_id}</h1>
+        <div class="metadata">
+            <strong>Duration:</strong> {duration} |
+            <strong>Date:</strong> {timestamp} |
+            <strong>Lines:</strong> {lines:,}
+        </div>
+        <div class="search">
+            <input id="search" type="search" placeholder="Search transcript" autocomplete="off">
+            <button id="previous" title="Previous match (Shift+Enter)">&uarr;</button>
+            <button id="next" title="Next match (Enter)">&darr;</button>
+            <span id="status"></span>
+        </div>
+    </div>
+
+    <div class="terminal" id="terminal"><div id="spacer"></div><div class="rows" id="rows"></div></div>
+    <noscript>This transcript is compressed; open it with JavaScript enabled.</noscript>
+
+    <div class="footer">
+        Recorded with <a href="https://github.com/willluecke/RecCli" target="_blank">RecCli</a>
+    </div>
+"""
+
+# Chunks are base64 of zlib-compressed UTF-8 lines; the index lists each
+# chunk's line count. Only rows in view exist in the DOM, and a scroll
+# range too tall for the browser is scaled down.
+PAGE_SCRIPT = """    <script type="application/json" id="index">{index}</script>
+    <script>
+(() => {
+    const counts = JSON.parse(document.getElementById('index').textContent);
+    const starts = [0];
+    for (const n of counts) starts.push(starts[starts.length - 1] + n);
+    const total = starts[starts.length - 1];
+    const view = document.getElementById('terminal');
+    const spacer = document.getElementById('spacer');
+    const rows = document.getElementById('rows');
+    const input = document.getElementById('search');
+    const status = document.getElementById('status');
+    const MAX_HEIGHT = 8000000;   // Browsers cap element heights at a few million px
+    const CACHED_CHUNKS = 32;
+    const MAX_MATCHES = 100000;
+
+    if (!('DecompressionStream' in window)) {
+        rows.textContent = 'This browser cannot decompress the transcript (needs DecompressionStream).';
+        return;
+    }
+
+    rows.innerHTML = '<div>&nbsp;</div>';
+    const lineHeight = rows.firstChild.getBoundingClientRect().height || 19.5;
+    const height = Math.min(total * lineHeight, MAX_HEIGHT);
+    spacer.style.height = height + 'px';
+
+    const cache = new Map();
+    async function chunk(i, keep = true) {
+        if (cache.has(i)) {
+            const lines = cache.get(i);
+            cache.delete(i);
+            cache.set(i, lines);
+            return lines;
+        }
+        const binary = atob(document.getElementById('c' + i).textContent);
+        const bytes = new Uint8Array(binary.length);
+        for (let k = 0; k < binary.length; k++) bytes[k] = binary.charCodeAt(k);
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+        const lines = (await new Response(stream).text()).split('\\n');
+        if (keep) {
+            cache.set(i, lines);
+            if (cache.size > CACHED_CHUNKS) cache.delete(cache.keys().next().value);
+        }
+        return lines;
+    }
+
+    function chunkOf(line) {
+        let low = 0, high = counts.length - 1;
+        while (low < high) {
+            const mid = (low + high + 1) >> 1;
+            if (starts[mid] <= line) low = mid; else high = mid - 1;
+        }
+        return low;
+    }
+
+    function visibleCount() {
+        // Whole rows only - a partial one would stretch the scroll range
+        return Math.max(1, Math.floor(view.clientHeight / lineHeight));
+    }
+
+    function topLine() {
+        const range = height - view.clientHeight;
+        if (range <= 0) return 0;
+        return Math.round(view.scrollTop / range * Math.max(0, total - visibleCount()));
+    }
+
+    function scrollToLine(line) {
+        const range = height - view.clientHeight;
+        const lines = Math.max(1, total - visibleCount());
+        const target = Math.max(0, line - Math.floor(visibleCount() / 3));
+        view.scrollTop = range <= 0 ? 0 : Math.min(target, lines) / lines * range;
+    }
+
+    let query = '', matches = [], current = -1;
+
+    function row(text, line) {
+        const div = document.createElement('div');
+        if (!query) {
+            div.textContent = text || '\\u00a0';
+            return div;
+        }
+        if (line === matches[current]) div.className = 'current';
+        const lower = text.toLowerCase();
+        let position = 0, found;
+        while ((found = lower.indexOf(query, position)) !== -1) {
+            div.append(text.slice(position, found));
+            const mark = document.createElement('mark');
+            mark.textContent = text.slice(found, found + query.length);
+            div.append(mark);
+            position = found + query.length;
+        }
+        div.append(text.slice(position) || (position ? '' : '\\u00a0'));
+        return div;
+    }
+
+    let drawn = 0;
+    async function draw() {
+        const generation = ++drawn;
+        const first = topLine();
+        const last = Math.min(total, first + visibleCount());
+        const nodes = [];
+        for (let line = first; line < last;) {
+            const i = chunkOf(line);
+            const lines = await chunk(i);
+            if (generation !== drawn) return;
+            const end = Math.min(last, starts[i + 1]);
+            for (; line < end; line++) nodes.push(row(lines[line - starts[i]], line));
+        }
+        rows.style.top = view.scrollTop + 'px';
+        rows.replaceChildren(...nodes);
+    }
+
+    let scheduled = false;
+    view.addEventListener('scroll', () => {
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(() => { scheduled = false; draw(); });
+    });
+    window.addEventListener('resize', () => draw());
+
+    function show() {
+        if (!query) status.textContent = '';
+        else if (!matches.length) status.textContent = searching ? 'Searching…' : 'No matches';
+        else status.textContent = `${current + 1} of ${matches.length}${matches.length >= MAX_MATCHES ? '+' : ''}`
+            + (searching ? ' (searching…)' : '');
+    }
+
+    function go(step) {
+        if (!matches.length) return;
+        current = (current + step + matches.length) % matches.length;
+        scrollToLine(matches[current]);
+        show();
+        draw();
+    }
+
+    let searched = 0, searching = false;
+    async function search() {
+        const generation = ++searched;
+        query = input.value.toLowerCase();
+        matches = [];
+        current = -1;
+        searching = !!query;
+        show();
+        draw();
+        if (!query) return;
+        for (let i = 0; i < counts.length && matches.length < MAX_MATCHES; i++) {
+            const lines = await chunk(i, cache.has(i));
+            if (generation !== searched) return;
+            for (let j = 0; j < lines.length && matches.length < MAX_MATCHES; j++) {
+                if (lines[j].toLowerCase().includes(query)) matches.push(starts[i] + j);
+            }
+            if (current < 0 && matches.length) go(1);
+            else show();
+        }
+        searching = false;
+        show();
+        draw();
+    }
+
+    let typing;
+    input.addEventListener('input', () => { clearTimeout(typing); typing = setTimeout(search, 200); });
+    input.addEventListener('keydown', event => {
+        if (event.key === 'Enter') { event.preventDefault(); go(event.shiftKey ? -1 : 1); }
+    });
+    document.getElementById('next').addEventListener('click', () => go(1));
+    document.getElementById('previous').addEventListener('click', () => go(-1));
+    // The browser's own find can't see rows that aren't drawn
+    document.addEventListener('keydown', event => {
+        if ((event.ctrlKey || event.metaKey) && event.key === 'f') { event.preventDefault(); input.focus(); input.select(); }
+    });
+
+    draw();
+})();
+    </script>
+</body>
+</html>
+"""
+
+
+def iter_chunks(text: str, size: int = CHUNK_CHARS) -> Iterator[str]:
+    """Consecutive pieces of text of about size characters, cut after a newline"""
+    position = 0
+    while position < len(text):
+        end = text.find('\n', position + size)
+        if end == -1:
+            yield text[position:]
+            return
+        yield text[position:end]
+        position = end + 1
+    yield ''  # Text ended with a newline (or was empty): the empty last line
+
+
+def _pack(piece: str) -> Tuple[int, bytes]:
+    return piece.count('\n') + 1, base64.b64encode(zlib.compress(piece.encode('utf-8'), COMPRESS_LEVEL))
+
+
+def write_viewer(f: IO[str], text: str, session_id: str, duration: str, timestamp: str):
+    """
+    Write a transcript as a self-contained page that renders only what's in view
+
+    Chunks are compressed on a thread pool (zlib releases the GIL) and
+    written in order as they finish, so memory stays at a few chunks
+    beyond the transcript itself.
+
+    Args:
+        f: Text file to write the page to
+        text: Transcript
+        session_id, duration, timestamp: Shown in the page header
+    """
+    # Line breaks as the HTML parser reads them in the inline page (\r\n and \r are newlines)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    f.write(PAGE_HEAD.format(session_id=escape(session_id), duration=escape(duration),
+                             timestamp=escape(timestamp), lines=text.count('\n') + 1))
+    counts: List[int] = []
+    workers = os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for piece in iter_chunks(text):
+            pending.append(pool.submit(_pack, piece))
+            if len(pending) > 2 * workers:
+                _write_chunk(f, counts, pending.pop(0).result())
+        for future in pending:
+            _write_chunk(f, counts, future.result())
+    f.write(PAGE_SCRIPT.replace('{index}', json.dumps(counts)))
+
+
+def _write_chunk(f: IO[str], counts: List[int], packed: Tuple[int, bytes]):
+    lines, data = packed
+    f.write(f'    <script type="application/octet-stream" id="c{len(counts)}">')
+    f.write(data.decode('ascii'))
+    f.write('</script>\n')
+    counts.append(lines)
@@ -0,0 +1,9 @@
+"""
+RecCli Search Module
+Offline semantic search over recorded sessions
+"""
+
+from .embedders import EMBEDDERS, HashingEmbedder, SentenceTransformerEmbedder, load_embedder
+from .index import SearchIndex
+
+__all__ = ['EMBEDDERS', 'HashingEmbedder', 'SentenceTransformerEmbedder', 'load_embedder', 'SearchIndex']
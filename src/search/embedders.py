@@ -0,0 +1,215 @@
+"""
+Embedders for RecCli search
+Turn transcript text into unit vectors - hashed n-grams, or a local model
+"""
+
+import math
+import os
+import re
+import tempfile
+import zlib
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from src.core.log import logger as log
+
+DIM = 512
+DF_BUCKETS = 1 << 20
+HASH_CACHE = 1 << 20  # Features whose hashes are remembered (cleared when full)
+SIGN = 1 << 31
+
+# Words as a shell user would search them: commands, flags, paths split at punctuation
+WORD = re.compile(r'[a-z0-9_]{2,}')
+
+
+class HashingEmbedder:
+    """
+    TF-IDF of word unigrams and bigrams, hashed into a fixed-size vector
+
+    Needs nothing installed and no training. Each feature is hashed
+    (crc32 - stable across runs, unlike hash()) to a dimension and a
+    sign; documents are stored with sublinear term frequencies only,
+    and IDF weights the query instead (squared, so a dot product scores
+    both sides), which means stored vectors never go stale as the corpus
+    grows. Document frequencies are kept per feature bucket, not per
+    dimension, so a rare word isn't drowned by common ones sharing its
+    dimension. They only ever grow: a re-indexed session counts twice,
+    which barely moves the weights of a corpus of any size.
+    """
+
+    def __init__(self, dim: int = DIM):
+        """
+        Initialize embedder
+
+        Args:
+            dim: Vector size ('hashing:1024' in the search_model setting)
+        """
+        self.dim = int(dim)
+        if self.dim < 16:
+            raise ValueError(f"Vector size too small: {self.dim}")
+        self.name = f'hashing-{self.dim}'
+        self.documents = 0
+        self.df = array('I', bytes(4 * DF_BUCKETS))
+        self._hashes: Dict[str, int] = {}
+        self._idf: Dict[int, float] = {}  # Squared, by feature hash - until the frequencies change
+
+    def _features(self, text: str) -> Counter:
+        """Feature hashes of text, with their counts"""
+        words = WORD.findall(text.lower())
+        features = Counter(words)
+        features.update(map(' '.join, zip(words, words[1:])))
+        hashes = self._hashes
+        if len(hashes) > HASH_CACHE:
+            hashes.clear()
+        counts = Counter()
+        for feature, n in features.items():
+            h = hashes.get(feature)
+            if h is None:
+                h = hashes[feature] = zlib.crc32(feature.encode())
+            counts[h] += n
+        return counts
+
+    def _vector(self, weights: Dict[int, float]) -> array:
+        dim = self.dim
+        vector = [0.0] * dim
+        for h, weight in weights.items():
+            vector[h % dim] += -weight if h & SIGN else weight
+        norm = math.sqrt(sum(x * x for x in vector))
+        return array('f', [x / norm for x in vector] if norm else vector)
+
+    def embed_documents(self, texts: Sequence[str]) -> List[array]:
+        """
+        Unit vectors of texts being indexed, counting them into the document frequencies
+
+        Returns:
+            array('f') of dim floats per text
+        """
+        vectors = []
+        df = self.df
+        self._idf = {}
+        for text in texts:
+            counts = self._features(text)
+            self.documents += 1
+            for h in counts:
+                df[h % DF_BUCKETS] += 1
+            vectors.append(self._vector({h: 1 + math.log(n) if n > 1 else 1.0 for h, n in counts.items()}))
+        return vectors
+
+    def embed_query(self, text: str) -> array:
+        """Unit vector of a query, weighted by IDF squared"""
+        documents, df, cached = self.documents, self.df, self._idf
+        if len(cached) > HASH_CACHE:
+            cached.clear()
+        weights = {}
+        for h, n in self._features(text).items():
+            idf = cached.get(h)
+            if idf is None:
+                idf = math.log((1 + documents) / (1 + df[h % DF_BUCKETS])) + 1
+                idf = cached[h] = idf * idf
+            weights[h] = idf if n == 1 else (1 + math.log(n)) * idf
+        return self._vector(weights)
+
+    def load(self, directory: Path, documents: int):
+        """Restore document frequencies saved by save() (none saved: start empty)"""
+        df = array('I')
+        try:
+            with open(Path(directory) / 'df.u32', 'rb') as f:
+                df.frombytes(f.read())
+        except OSError:
+            pass
+        self._idf = {}
+        if len(df) == DF_BUCKETS and documents:
+            self.df, self.documents = df, documents
+        else:
+            self.df, self.documents = array('I', bytes(4 * DF_BUCKETS)), 0
+
+    def save(self, directory: Path) -> int:
+        """
+        Write document frequencies to directory
+
+        Returns:
+            Documents counted (for load())
+        """
+        fd, tmp = tempfile.mkstemp(prefix='df.u32.', dir=str(directory))
+        with os.fdopen(fd, 'wb') as f:
+            self.df.tofile(f)
+        os.replace(tmp, Path(directory) / 'df.u32')
+        return self.documents
+
+
+class SentenceTransformerEmbedder:
+    """
+    A sentence-transformers model, loaded from the local cache only
+
+    Optional (pip install sentence-transformers); the model has to have
+    been downloaded before - search never goes online.
+    """
+
+    def __init__(self, model: str = 'all-MiniLM-L6-v2'):
+        """
+        Initialize embedder
+
+        Args:
+            model: Model name or local path
+
+        Raises:
+            ValueError: sentence-transformers or the model isn't available
+        """
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        try:
+            from sentence_transformers import SentenceTransformer
+            self.model = SentenceTransformer(model)
+        except Exception as e:  # Not installed, or the model isn't in the cache
+            raise ValueError(f"Can't load sentence-transformers model {model}: {e}") from e
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f'sentence-transformers-{model}'
+        self.documents = 0
+
+    def _encode(self, texts: Sequence[str]) -> List[array]:
+        vectors = []
+        for row in self.model.encode(list(texts), batch_size=32, normalize_embeddings=True):
+            vector = array('f')
+            vector.frombytes(row.astype('float32').tobytes())
+            vectors.append(vector)
+        return vectors
+
+    def embed_documents(self, texts: Sequence[str]) -> List[array]:
+        """Unit vectors of texts, array('f') each"""
+        self.documents += len(texts)
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> array:
+        return self._encode([text])[0]
+
+    def load(self, directory: Path, documents: int):
+        self.documents = documents
+
+    def save(self, directory: Path) -> int:
+        return self.documents
+
+
+# search_model setting: '<kind>' or '<kind>:<argument>'
+EMBEDDERS = {
+    'hashing': HashingEmbedder,
+    'sentence-transformers': SentenceTransformerEmbedder,
+}
+
+
+def load_embedder(spec: str = 'hashing'):
+    """
+    Embedder for a search_model setting
+
+    Args:
+        spec: 'hashing', 'hashing:<dim>' or 'sentence-transformers:<model>'
+
+    Raises:
+        ValueError: Unknown kind, or the embedder can't be loaded
+    """
+    kind, _, argument = (spec or 'hashing').partition(':')
+    if kind not in EMBEDDERS:
+        raise ValueError(f"Unknown search model: {spec} (choose from {', '.join(EMBEDDERS)})")
+    embedder = EMBEDDERS[kind](argument) if argument else EMBEDDERS[kind]()
+    log.info("search: using %s", embedder.name)
+    return embedder
@@ -0,0 +1,396 @@
+"""
+Vector index of RecCli sessions
+Every command block of every transcript as a unit vector, memory-mapped for search
+"""
+
+import bisect
+import fcntl
+import heapq
+import json
+import os
+import re
+import tempfile
+from array import array
+from contextlib import contextmanager
+from operator import mul
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from .embedders import HashingEmbedder
+
+INDEX_DIR = Path.home() / '.reccli' / 'search'
+FORMAT_VERSION = 1
+BLOCK_TOKENS = 512      # Bigger command blocks are indexed as passages of this size
+SNIPPET_CHARS = 400     # Of each block, kept to show in results
+EMBED_BATCH = 256
+COMMIT_EVERY = 50       # Sessions indexed between commits, so an interrupted build keeps its work
+CANDIDATES = 100        # Best blocks per wanted session considered when ranking whole sessions
+TOP_BLOCKS = 3          # A session scores the mean of its best blocks
+COPY_BLOCK = 8 * 1024 * 1024
+
+
+def _numpy():
+    """numpy if it's installed (optional - search falls back to pure Python, much slower)"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+class SearchIndex:
+    """
+    Embeddings of transcript command blocks, searched by dot product
+
+    Blocks come from SessionExporter's cleaned (and, by default,
+    redacted) transcripts, split at prompts as in chunks exports. Files,
+    in one folder per embedder under ~/.reccli/search:
+
+        vectors.f32   float32 unit vectors, one row per block - append-only,
+                      memory-mapped with numpy so a query reads it in one pass
+        rows.jsonl    each row's block and lines, and the start of its text
+        offsets.u64   where each row's line starts in rows.jsonl
+        index.json    row count and, per session, its mtime/size and rows -
+                      written last, so it is the commit point of an update
+
+    A changed session is indexed again and its old rows are left behind,
+    dead, until they are half of the index and it gets compacted. Updates
+    hold an exclusive lock, searches a shared one while they open files.
+    """
+
+    def __init__(self, embedder=None, directory: Optional[Path] = None):
+        """
+        Initialize index
+
+        Args:
+            embedder: Turns text into unit vectors (default: HashingEmbedder)
+            directory: Index folder (default: ~/.reccli/search/<embedder name>)
+        """
+        self.embedder = embedder or HashingEmbedder()
+        name = re.sub(r'[^A-Za-z0-9._-]+', '-', self.embedder.name)
+        self.directory = Path(directory) if directory else INDEX_DIR / name
+        self.np = _numpy()
+
+    @property
+    def vectorized(self) -> bool:
+        """Searches run on numpy (else in pure Python)"""
+        return self.np is not None
+
+    def _path(self, name: str) -> Path:
+        return self.directory / name
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path('.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _empty_meta(self, redacted: Optional[bool] = None) -> Dict:
+        return {'version': FORMAT_VERSION, 'embedder': self.embedder.name, 'dim': self.embedder.dim,
+                'rows': 0, 'rows_bytes': 0, 'documents': 0, 'redacted': redacted, 'sessions': {}}
+
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._path('index.json'), 'r') as f:
+                meta = json.load(f)
+            if (meta.get('version') == FORMAT_VERSION and meta.get('embedder') == self.embedder.name
+                    and meta.get('dim') == self.embedder.dim):
+                return meta
+            log.info("search: index in %s is for another embedder, rebuilding", self.directory)
+        except (OSError, ValueError):
+            pass
+        return self._empty_meta()
+
+    def _write_meta(self, meta: Dict):
+        fd, tmp = tempfile.mkstemp(prefix='index.json.', dir=str(self.directory))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path('index.json'))
+
+    def _truncate(self, meta: Dict):
+        """Drop whatever an interrupted update appended after the last commit"""
+        sizes = {'vectors.f32': meta['rows'] * meta['dim'] * 4, 'rows.jsonl': meta['rows_bytes'],
+                 'offsets.u64': meta['rows'] * 8}
+        for name, size in sizes.items():
+            with open(self._path(name), 'ab') as f:
+                if f.tell() != size:
+                    f.truncate(size)
+
+    def blocks(self, session_file: Path, redactor=None) -> Iterator[Dict]:
+        """
+        Command blocks of a session's transcript, as indexed
+
+        Yields:
+            {'blocks': [first, last], 'lines': [start, end), 'text'} -
+            one per block, or per passage of a block over BLOCK_TOKENS
+        """
+        from src.export import SessionExporter
+        exporter = SessionExporter(session_file, redactor=redactor, tokenizer='estimate')
+        for chunk in exporter.iter_chunks(BLOCK_TOKENS, merge=False):
+            if chunk['text'].strip():
+                yield {'blocks': chunk['blocks'], 'lines': chunk['lines'], 'text': chunk['text']}
+
+    def update(self, sessions: Iterable[Path], redactor=None, prune: bool = False,
+               progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Index new and changed sessions
+
+        Args:
+            sessions: Session files to have in the index
+            redactor: Masks secrets before indexing (None indexes them as
+                      recorded); switching between the two rebuilds the index
+            prune: Also drop indexed sessions that aren't in sessions
+            progress: Called with (sessions done, sessions to index)
+
+        Returns:
+            {'indexed', 'removed', 'rows'} - sessions (re)indexed and dropped, rows live
+        """
+        redacted = redactor is not None
+        paths = {str(Path(p).expanduser().resolve()): Path(p).expanduser() for p in sessions}
+        with self._locked(), metrics.timer('search.update'):
+            meta = self._read_meta()
+            if meta['redacted'] != redacted:
+                meta = self._empty_meta(redacted)
+            self._truncate(meta)
+            self.embedder.load(self.directory, meta['documents'])
+
+            indexed = meta['sessions']
+            removed = [key for key in indexed if prune and key not in paths]
+            for key in removed:
+                del indexed[key]
+            todo = []
+            for key, path in paths.items():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entry = indexed.get(key)
+                if entry is None or (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+                    todo.append((key, path, stat))
+
+            with open(self._path('vectors.f32'), 'ab') as vectors, \
+                    open(self._path('rows.jsonl'), 'ab') as rows, open(self._path('offsets.u64'), 'ab') as offsets:
+                for done, (key, path, stat) in enumerate(todo, 1):
+                    indexed.pop(key, None)
+                    start = meta['rows']
+                    self._append(meta, self.blocks(path, redactor), vectors, rows, offsets)
+                    indexed[key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'rows': [start, meta['rows']]}
+                    if done % COMMIT_EVERY == 0 or done == len(todo):
+                        for f in (vectors, rows, offsets):
+                            f.flush()
+                        meta['documents'] = self.embedder.save(self.directory)
+                        self._write_meta(meta)
+                    if progress is not None:
+                        progress(done, len(todo))
+
+            live = sum(end - start for start, end in (s['rows'] for s in indexed.values()))
+            if removed or meta['rows'] > 2 * live:
+                if meta['rows'] > 2 * live:
+                    meta = self._compact(meta)
+                self._write_meta(meta)
+        return {'indexed': len(todo), 'removed': len(removed), 'rows': live}
+
+    def _append(self, meta: Dict, blocks: Iterator[Dict], vectors, rows, offsets):
+        """Embed blocks and append them after the index's rows"""
+        batch: List[Dict] = []
+        for block in blocks:
+            batch.append(block)
+            if len(batch) < EMBED_BATCH:
+                continue
+            self._append_batch(meta, batch, vectors, rows, offsets)
+            batch = []
+        if batch:
+            self._append_batch(meta, batch, vectors, rows, offsets)
+
+    def _append_batch(self, meta: Dict, batch: List[Dict], vectors, rows, offsets):
+        starts = array('Q')
+        for vector in self.embedder.embed_documents([block['text'] for block in batch]):
+            vector.tofile(vectors)
+        for block in batch:
+            line = json.dumps({'blocks': block['blocks'], 'lines': block['lines'],
+                               'text': block['text'][:SNIPPET_CHARS]}, ensure_ascii=False).encode('utf-8') + b'\n'
+            starts.append(meta['rows_bytes'])
+            rows.write(line)
+            meta['rows_bytes'] += len(line)
+        starts.tofile(offsets)
+        meta['rows'] += len(batch)
+
+    def _compact(self, meta: Dict) -> Dict:
+        """Rewrite the index without dead rows"""
+        row_size = meta['dim'] * 4
+        offsets = self._offsets(meta['rows'])
+        compacted = dict(meta, rows=0, rows_bytes=0, sessions={})
+        names = ('vectors.f32', 'rows.jsonl', 'offsets.u64')
+        temps = {name: tempfile.mkstemp(prefix=name + '.', dir=str(self.directory)) for name in names}
+        try:
+            with open(self._path('vectors.f32'), 'rb') as old_vectors, open(self._path('rows.jsonl'), 'rb') as old_rows, \
+                    os.fdopen(temps['vectors.f32'][0], 'wb') as vectors, \
+                    os.fdopen(temps['rows.jsonl'][0], 'wb') as rows, \
+                    os.fdopen(temps['offsets.u64'][0], 'wb') as new_offsets:
+                for key, entry in sorted(meta['sessions'].items(), key=lambda item: item[1]['rows'][0]):
+                    start, end = entry['rows']
+                    first = compacted['rows']
+                    _copy(old_vectors, vectors, start * row_size, (end - start) * row_size)
+                    row_start = offsets[start] if start < end else 0
+                    row_end = offsets[end] if end < len(offsets) else meta['rows_bytes']
+                    shift = compacted['rows_bytes'] - row_start
+                    array('Q', (offsets[i] + shift for i in range(start, end))).tofile(new_offsets)
+                    if start < end:
+                        _copy(old_rows, rows, row_start, row_end - row_start)
+                        compacted['rows_bytes'] += row_end - row_start
+                    compacted['rows'] += end - start
+                    compacted['sessions'][key] = dict(entry, rows=[first, compacted['rows']])
+            for name in names:
+                os.replace(temps[name][1], self._path(name))
+        except BaseException:
+            for _, tmp in temps.values():
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            raise
+        log.info("search: compacted %d rows to %d", meta['rows'], compacted['rows'])
+        return compacted
+
+    def _offsets(self, count: int) -> array:
+        offsets = array('Q')
+        with open(self._path('offsets.u64'), 'rb') as f:
+            offsets.frombytes(f.read(count * 8))
+        return offsets
+
+    @contextmanager
+    def _opened(self):
+        """Committed metadata, vectors, row offsets and rows file - consistent with each other and the embedder"""
+        with self._locked(shared=True):
+            meta = self._read_meta()
+            self.embedder.load(self.directory, meta['documents'])
+            count, dim = meta['rows'], meta['dim']
+            if not count:
+                vectors = offsets = rows = None
+            else:
+                if self.np is not None:
+                    vectors = self.np.memmap(self._path('vectors.f32'), dtype=self.np.float32, mode='r',
+                                             shape=(count, dim))
+                else:
+                    vectors = array('f')
+                    with open(self._path('vectors.f32'), 'rb') as f:
+                        vectors.frombytes(f.read(count * dim * 4))
+                offsets = self._offsets(count)
+                rows = open(self._path('rows.jsonl'), 'rb')
+        try:
+            yield meta, vectors, offsets, rows
+        finally:
+            if rows is not None:
+                rows.close()
+
+    def _scores(self, vectors, query: array, dim: int):
+        """Dot product of every row with query"""
+        if self.np is not None:
+            return vectors @ self.np.frombuffer(query, dtype=self.np.float32)
+        return [sum(map(mul, vectors[i:i + dim], query)) for i in range(0, len(vectors), dim)]
+
+    def _top(self, scores, ranges: List[Tuple[int, int]], count: int) -> List[Tuple[int, float]]:
+        """Best count rows in ranges, as (row, score), best first"""
+        if self.np is not None:
+            np = self.np
+            live = np.zeros(len(scores), dtype=bool)
+            for start, end in ranges:
+                live[start:end] = True
+            scores = np.where(live, scores, -np.inf)
+            count = min(count, int(live.sum()))
+            if count <= 0:
+                return []
+            best = np.argpartition(-scores, count - 1)[:count]
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [(int(row), float(scores[row])) for row in best]
+        rows = (row for start, end in ranges for row in range(start, end))
+        return [(row, scores[row]) for row in heapq.nlargest(count, rows, key=scores.__getitem__)]
+
+    def _search(self, opened: Tuple, query: array, count: int, exclude: Optional[str] = None):
+        """Best rows for a query vector, with the session of each"""
+        meta, vectors, offsets, rows = opened
+        if vectors is None:
+            return []
+        sessions = sorted((entry['rows'][0], entry['rows'][1], key)
+                          for key, entry in meta['sessions'].items() if key != exclude)
+        scores = self._scores(vectors, query, meta['dim'])
+        best = self._top(scores, [(start, end) for start, end, _ in sessions], count)
+        starts = [start for start, _, _ in sessions]
+        hits = []
+        for row, score in best:
+            session = sessions[bisect.bisect_right(starts, row) - 1][2]
+            rows.seek(offsets[row])
+            hits.append(dict(json.loads(rows.readline()), session=session, row=row, score=score))
+        return hits
+
+    def ask(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Command blocks most like a query
+
+        Args:
+            query: Free text - commands, errors, words
+            limit: Blocks to return
+
+        Returns:
+            {'session', 'score', 'blocks', 'lines', 'text'} per block, best first
+        """
+        with metrics.timer('search.ask'), self._opened() as opened:
+            hits = self._search(opened, self.embedder.embed_query(query), limit)
+        return [_hit(hit) for hit in hits]
+
+    def similar(self, session_file: Path, redactor=None, limit: int = 10) -> List[Dict]:
+        """
+        Other sessions most like one
+
+        The session's blocks are embedded as queries and summed; a session
+        scores the mean of its TOP_BLOCKS best blocks against that.
+
+        Args:
+            session_file: Session to compare (needn't be indexed)
+            redactor: Masks secrets in its transcript, as for update()
+            limit: Sessions to return
+
+        Returns:
+            {'session', 'score', 'blocks', 'lines', 'text'} per session,
+            with its best-matching block, best first
+        """
+        with metrics.timer('search.similar'), self._opened() as opened:
+            query = None
+            for block in self.blocks(session_file, redactor):
+                vector = self.embedder.embed_query(block['text'])
+                query = vector if query is None else array('f', map(sum, zip(query, vector)))
+            if query is None:
+                return []
+            norm = sum(x * x for x in query) ** 0.5
+            query = array('f', (x / norm for x in query)) if norm else query
+            key = str(Path(session_file).expanduser().resolve())
+            by_session: Dict[str, List[Dict]] = {}
+            for hit in self._search(opened, query, CANDIDATES * limit, exclude=key):
+                by_session.setdefault(hit['session'], []).append(hit)
+        results = []
+        for hits in by_session.values():
+            best = hits[:TOP_BLOCKS]
+            results.append(dict(_hit(best[0]), score=sum(hit['score'] for hit in best) / TOP_BLOCKS))
+        results.sort(key=lambda hit: -hit['score'])
+        return results[:limit]
+
+
+def _hit(hit: Dict) -> Dict:
+    return {'session': hit['session'], 'score': round(hit['score'], 4), 'blocks': hit['blocks'],
+            'lines': hit['lines'], 'text': hit['text']}
+
+
+def _copy(source, target, start: int, size: int):
+    source.seek(start)
+    while size > 0:
+        data = source.read(min(size, COPY_BLOCK))
+        if not data:
+            break
+        target.write(data)
+        size -= len(data)
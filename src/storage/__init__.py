@@ -0,0 +1,10 @@
+"""
+RecCli Storage Module
+Where recordings live on disk and how long they stay there
+"""
+
+from .retention import (
+    SessionIndex, RetentionPolicy, RetentionEngine, RetentionWorker, IOThrottle, find_sessions,
+)
+
+__all__ = ['SessionIndex', 'RetentionPolicy', 'RetentionEngine', 'RetentionWorker', 'IOThrottle', 'find_sessions']
@@ -0,0 +1,377 @@
+"""
+Deduplicated recording store for RecCli
+Content-defined chunks, blake2 addressed, stored once in an SQLite file
+"""
+
+import io
+import json
+import re
+import sqlite3
+import time
+import zlib
+from hashlib import blake2b
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+
+DEFAULT_STORE = Path.home() / '.reccli' / 'store' / 'chunks.db'
+STUB_SUFFIX = '.dedup'
+
+DIGEST_SIZE = 20
+MIN_CHUNK = 2 * 1024
+AVG_CHUNK = 8 * 1024
+MAX_CHUNK = 64 * 1024
+
+# '[12.345678, "o", ' - the part of a cast event that changes between
+# otherwise identical output (the timestamp) is split off into the layout
+EVENT_PREFIX = re.compile(rb'^\[[ \t]*[-+0-9.eE]+[ \t]*,[ \t]*"[a-z]"[ \t]*,[ \t]*')
+
+SCHEMA = """
+PRAGMA auto_vacuum = INCREMENTAL;
+CREATE TABLE IF NOT EXISTS chunks (
+    hash BLOB PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    layout BLOB NOT NULL,
+    chunks BLOB NOT NULL,
+    stub TEXT,
+    payload INTEGER
+);
+"""
+
+
+def split_events(lines: Iterable[bytes]) -> Iterator[tuple]:
+    """
+    Split cast lines into (prefix, payload)
+
+    The prefix holds the timestamp and event type, the payload the
+    JSON-encoded output (plus the closing bracket and newline), so the
+    same output recorded at different times has identical payloads.
+    Lines that aren't events (the header) are all payload, which keeps
+    newlines out of prefixes.
+    """
+    for line in lines:
+        match = EVENT_PREFIX.match(line)
+        if match:
+            yield line[:match.end()], line[match.end():]
+        else:
+            yield b'', line
+
+
+def chunk_payloads(payloads: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Content-defined chunking of the payload stream
+
+    Chunks end after a payload whose crc32 falls under a threshold
+    proportional to its length, so cut points depend only on content
+    (averaging AVG_CHUNK bytes) and survive insertions elsewhere in the
+    stream. Oversized payloads are split at MAX_CHUNK.
+    """
+    pending = []
+    size = 0
+    for payload in payloads:
+        while len(payload) > MAX_CHUNK:
+            if pending:
+                yield b''.join(pending)
+                pending, size = [], 0
+            yield payload[:MAX_CHUNK]
+            payload = payload[MAX_CHUNK:]
+        if not payload:
+            continue
+        pending.append(payload)
+        size += len(payload)
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(payload) % AVG_CHUNK < len(payload)):
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def is_stub(path: Path) -> bool:
+    return Path(path).suffix == STUB_SUFFIX
+
+
+def read_stub(path: Path) -> Dict:
+    """The small JSON file left in place of a session moved into the store"""
+    with open(path, 'r') as f:
+        stub = json.load(f)
+    if not isinstance(stub, dict) or 'id' not in stub:
+        raise ValueError(f"Not a dedup stub: {path}")
+    return stub
+
+
+class ChunkStore:
+    """
+    Content-addressed chunk store
+
+    Each session becomes a manifest: a zlib-compressed layout (event
+    prefixes and payload lengths) plus the ordered list of payload chunk
+    hashes. Chunks are blake2b-addressed, zlib-compressed and reference
+    counted, so identical banners, test output and TUI frames across
+    recordings are stored once. Each manifest remembers where its stub
+    was written, so sweep() only releases sessions whose stub is gone.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE):
+        self.path = Path(path)
+        self._db = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), timeout=30)
+            self._db.executescript(SCHEMA)
+            columns = {row[1] for row in self._db.execute('PRAGMA table_info(manifests)')}
+            # Stores from before these were recorded: sweep() keeps manifests
+            # without a stub, stats() counts their whole size as payload
+            for column, kind in (('stub', 'TEXT'), ('payload', 'INTEGER')):
+                if column not in columns:
+                    self._db.execute(f'ALTER TABLE manifests ADD COLUMN {column} {kind}')
+            self._db.commit()
+        return self._db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def ingest(self, source: Path, stub_path: Path,
+               throttle=None, should_pause: Callable[[], bool] = lambda: False,
+               stopped: Callable[[], bool] = lambda: False) -> Optional[str]:
+        """
+        Move a session file into the store and write its stub
+
+        Args:
+            source: Session file (.cast or .txt)
+            stub_path: Where to write the stub (normally source + '.dedup')
+            throttle: Optional IOThrottle for background use
+            should_pause: Polled per chunk; waits while True
+            stopped: Polled per chunk; aborts (rolling back) when True
+
+        Returns:
+            Manifest id, or None if aborted. The source file is left alone -
+            the caller removes it once the stub is in place.
+        """
+        started = time.perf_counter()
+        layout = zlib.compressobj(6)
+        layout_parts = []
+        hashes = []
+        size = payload_size = 0
+
+        def payloads(f):
+            nonlocal size, payload_size
+            for prefix, payload in split_events(f):
+                size += len(prefix) + len(payload)
+                payload_size += len(payload)
+                layout_parts.append(layout.compress(prefix + b'\0' + str(len(payload)).encode() + b'\n'))
+                yield payload
+
+        db = self.db
+        try:
+            with open(source, 'rb') as f:
+                db.execute('BEGIN')
+                for chunk in chunk_payloads(payloads(f)):
+                    while should_pause() and not stopped():
+                        time.sleep(0.2)
+                    if stopped():
+                        db.rollback()
+                        return None
+                    if throttle:
+                        throttle.consume(len(chunk))
+                    digest = blake2b(chunk, digest_size=DIGEST_SIZE).digest()
+                    hashes.append(digest)
+                    db.execute('INSERT OR IGNORE INTO chunks (hash, data, size) VALUES (?, ?, ?)',
+                               (digest, zlib.compress(chunk, 6), len(chunk)))
+            layout_parts.append(layout.flush())
+
+            manifest_id = blake2b(b''.join(hashes) + str(time.time()).encode(), digest_size=12).hexdigest()
+            for digest in set(hashes):
+                db.execute('UPDATE chunks SET refs = refs + 1 WHERE hash = ?', (digest,))
+            db.execute('INSERT INTO manifests (id, name, size, created, layout, chunks, stub, payload) '
+                       'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (manifest_id, source.name, size, time.time(), b''.join(layout_parts), b''.join(hashes),
+                        str(Path(stub_path).resolve()), payload_size))
+
+            stub = {'reccli_dedup': 1, 'id': manifest_id, 'name': source.name, 'size': size,
+                    'store': str(self.path)}
+            with open(stub_path, 'w') as out:
+                json.dump(stub, out)
+            db.commit()
+        except BaseException:
+            if db.in_transaction:
+                db.rollback()
+            try:
+                Path(stub_path).unlink()
+            except OSError:
+                pass
+            raise
+
+        metrics.observe('storage.dedup.ingest', (time.perf_counter() - started) * 1000)
+        log.info("Dedup: stored %s as %s (%d bytes, %d chunks)", source, manifest_id, size, len(hashes))
+        return manifest_id
+
+    def release(self, manifest_id: str):
+        """Drop a manifest and every chunk no other manifest uses"""
+        db = self.db
+        with db:
+            row = db.execute('SELECT chunks FROM manifests WHERE id = ?', (manifest_id,)).fetchone()
+            if row is None:
+                return
+            blob = row[0]
+            unique = {blob[i:i + DIGEST_SIZE] for i in range(0, len(blob), DIGEST_SIZE)}
+            db.executemany('UPDATE chunks SET refs = refs - 1 WHERE hash = ?', ((h,) for h in unique))
+            db.execute('DELETE FROM chunks WHERE refs <= 0')
+            db.execute('DELETE FROM manifests WHERE id = ?', (manifest_id,))
+        # Give the freed pages back to the filesystem (executescript runs the
+        # pragma to completion; execute() would free a single page)
+        db.executescript('PRAGMA incremental_vacuum;')
+
+    def sweep(self) -> int:
+        """
+        Drop manifests whose stub was deleted outside reccli
+
+        Only a manifest whose recorded stub path no longer exists (or now
+        holds another session's stub) is released. Manifests without a
+        recorded stub, or whose stub can't be read, are kept.
+
+        Returns:
+            Number of manifests released
+        """
+        orphans = []
+        for manifest_id, stub in self.db.execute('SELECT id, stub FROM manifests WHERE stub IS NOT NULL').fetchall():
+            try:
+                if read_stub(Path(stub))['id'] == manifest_id:
+                    continue
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError):
+                continue  # Can't confirm it's gone
+            orphans.append(manifest_id)
+        for manifest_id in orphans:
+            self.release(manifest_id)
+        return len(orphans)
+
+    def iter_bytes(self, manifest_id: str) -> Iterator[bytes]:
+        """Reassemble a session, one event line at a time"""
+        row = self.db.execute('SELECT layout, chunks FROM manifests WHERE id = ?', (manifest_id,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"Manifest {manifest_id} not in {self.path}")
+        layout_blob, blob = row
+
+        def chunks():
+            for i in range(0, len(blob), DIGEST_SIZE):
+                data = self.db.execute('SELECT data FROM chunks WHERE hash = ?',
+                                       (blob[i:i + DIGEST_SIZE],)).fetchone()
+                if data is None:
+                    raise IOError(f"Chunk {blob[i:i + DIGEST_SIZE].hex()} missing from store")
+                yield zlib.decompress(data[0])
+
+        def layout_lines():
+            decompressor = zlib.decompressobj()
+            rest = b''
+            # Decompress the layout incrementally so huge sessions never expand it all at once
+            for start in range(0, len(layout_blob), 65536):
+                rest += decompressor.decompress(layout_blob[start:start + 65536])
+                *lines, rest = rest.split(b'\n')
+                yield from lines
+            rest += decompressor.flush()
+            if rest:
+                yield rest
+
+        data = chunks()
+        buffer = b''
+        offset = 0
+        for entry in layout_lines():
+            prefix, _, length = entry.rpartition(b'\0')
+            length = int(length)
+            while len(buffer) - offset < length:
+                buffer = buffer[offset:] + next(data)
+                offset = 0
+            yield prefix + buffer[offset:offset + length]
+            offset += length
+
+    def open(self, manifest_id: str) -> io.BufferedReader:
+        """
+        Streaming binary file object for a stored session
+
+        Raises:
+            FileNotFoundError: The manifest isn't in the store
+        """
+        if self.db.execute('SELECT 1 FROM manifests WHERE id = ?', (manifest_id,)).fetchone() is None:
+            raise FileNotFoundError(f"Manifest {manifest_id} not in {self.path}")
+        return io.BufferedReader(_IterReader(self.iter_bytes(manifest_id)), buffer_size=256 * 1024)
+
+    def stats(self) -> Dict:
+        """
+        Store totals
+
+        Returns:
+            Dict with sessions, logical_bytes (sum of session sizes),
+            unique_bytes (distinct chunk payloads), stored_bytes (after
+            compression, plus layouts), dedup_ratio (event payloads over
+            unique_bytes) and total_ratio
+        """
+        db = self.db
+        # Layout prefixes never reach the chunk table, so dedup_ratio compares
+        # payload bytes only (manifests from before they were counted use size)
+        sessions, logical, payload, layouts = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(COALESCE(payload, size)), 0), '
+            'COALESCE(SUM(LENGTH(layout)), 0) FROM manifests').fetchone()
+        chunks, unique, stored = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM chunks').fetchone()
+        return {
+            'sessions': sessions,
+            'chunks': chunks,
+            'logical_bytes': logical,
+            'unique_bytes': unique,
+            'stored_bytes': stored + layouts,
+            'dedup_ratio': round(payload / unique, 2) if unique else None,
+            'total_ratio': round(logical / (stored + layouts), 2) if stored else None,
+        }
+
+
+class _IterReader(io.RawIOBase):
+    """Raw file object over an iterator of byte strings"""
+
+    def __init__(self, pieces: Iterator[bytes]):
+        self.pieces = pieces
+        self.pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            try:
+                self.pending = next(self.pieces)
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+def open_stub(stub_path: Path) -> io.BufferedReader:
+    """
+    Open the session behind a .dedup stub
+
+    Raises:
+        FileNotFoundError: The store or the stub's manifest is missing
+        ValueError: stub_path isn't a stub
+    """
+    stub = read_stub(stub_path)
+    store = Path(stub.get('store', DEFAULT_STORE))
+    if not store.exists():
+        raise FileNotFoundError(f"Dedup store {store} not found")
+    return ChunkStore(store).open(stub['id'])
@@ -0,0 +1,475 @@
+"""
+Retention for RecCli recordings
+Byte quota, age limits, LRU eviction and background compression
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.core.log import logger as log
+from src.core.metrics import metrics
+from src.core.registry import LockedJSONFile, pid_alive
+
+DEFAULT_INDEX = Path.home() / '.reccli' / 'sessions.json'
+RECORDINGS_DIR = Path.home() / '.reccli' / 'recordings'
+SESSION_SUFFIXES = ('.cast', '.txt', '.cast.gz', '.txt.gz', '.cast.dedup', '.txt.dedup')
+# asciinema writes into the terminal's working directory (usually $HOME) -
+# found for search, but only sessions the index marks as recorded by reccli
+# are ever compressed or deleted
+HOME_PATTERN = 'session_*'
+
+ACTIVE_GRACE = 600  # Never touch a file modified in the last 10 minutes - it may still be recording
+CHUNK_SIZE = 1024 * 1024
+DAY = 86400
+
+Session = namedtuple('Session', ['path', 'size', 'modified', 'last_used', 'pinned', 'active'])
+
+
+def is_session_file(path: Path) -> bool:
+    return path.name.endswith(SESSION_SUFFIXES)
+
+
+def find_sessions(roots: Optional[Iterable[Tuple[Path, str]]] = None) -> List[Path]:
+    """
+    Recordings on disk
+
+    Args:
+        roots: (directory, glob) pairs; defaults to everything in the
+               recordings folder plus session_* files in the home directory
+
+    Returns:
+        Resolved paths of session files
+    """
+    if roots is None:
+        roots = [(RECORDINGS_DIR, '*'), (Path.home(), HOME_PATTERN)]
+    found = set()
+    for directory, pattern in roots:
+        try:
+            for path in directory.glob(pattern):
+                if is_session_file(path) and path.is_file():
+                    found.add(path.resolve())
+        except OSError:
+            continue
+    return sorted(found)
+
+
+class SessionIndex(LockedJSONFile):
+    """
+    Per-session bookkeeping the filesystem can't give us reliably
+
+    Maps absolute session path -> {'last_used', 'pinned', 'recording',
+    'recorder_pid', 'recorded'}. Written by recorders and exporters, read
+    by the retention engine, which only manages sessions marked recorded.
+    """
+
+    def __init__(self, path: Path = DEFAULT_INDEX):
+        super().__init__(path)
+
+    def _decode(self, data) -> Dict[str, Dict]:
+        return {str(k): dict(v) for k, v in data.items()}
+
+    def _update(self, path: Path, **fields):
+        key = str(Path(path).expanduser().resolve())
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.transaction() as entries:
+                entries.setdefault(key, {}).update(fields)
+        except OSError as e:
+            log.warning("Session index update failed for %s: %s", key, e)
+
+    def touch(self, path: Path, when: Optional[float] = None):
+        """Mark a session as just used (recorded, opened or exported)"""
+        self._update(path, last_used=when or time.time())
+
+    def pin(self, path: Path, pinned: bool = True):
+        """Exempt a session from compression and eviction (or lift that)"""
+        self._update(path, pinned=pinned)
+
+    def set_recording(self, path: Path, recording: bool):
+        """
+        Flag a session as being written right now by this process
+
+        Starting a recording also marks the session as reccli's own, which
+        puts it under retention. If the process dies without clearing the
+        flag, is_recording() stops honouring it.
+        """
+        if recording:
+            self._update(path, recording=True, recorder_pid=os.getpid(), recorded=True)
+        else:
+            self._update(path, recording=False)
+
+    @staticmethod
+    def is_recording(entry: Dict) -> bool:
+        """Whether an entry's recording flag is still backed by a live recorder"""
+        pid = entry.get('recorder_pid')
+        return bool(entry.get('recording') and pid and pid_alive(pid))
+
+    def clear_stale(self) -> List[str]:
+        """
+        Clear recording flags left behind by recorders that died
+
+        Returns:
+            Paths whose flag was cleared
+        """
+        entries = self.load()
+        if not any(e.get('recording') and not self.is_recording(e) for e in entries.values()):
+            return []
+        cleared = []
+        with self.transaction() as entries:
+            for key, entry in entries.items():
+                if entry.get('recording') and not self.is_recording(entry):
+                    entry['recording'] = False
+                    cleared.append(key)
+        return cleared
+
+    def recorded(self) -> List[Path]:
+        """Sessions reccli recorded itself - the only ones retention manages"""
+        return sorted(Path(key) for key, entry in self.load().items() if entry.get('recorded'))
+
+    def moved(self, old: Path, new: Optional[Path]):
+        """Carry an entry over to a session's new path (or drop it if new is None)"""
+        with self.transaction() as entries:
+            entry = entries.pop(str(old), None)
+            if entry is not None and new is not None:
+                entries[str(new)] = entry
+
+
+class RetentionPolicy:
+    """Limits for the retention engine (0 disables a limit)"""
+
+    def __init__(self, quota_bytes: int = 0, max_age_days: float = 0,
+                 compress_after_days: float = 0, io_bytes_per_s: int = 8 * 1024 ** 2,
+                 compress_with: str = 'gzip'):
+        self.quota_bytes = quota_bytes
+        self.max_age_days = max_age_days
+        self.compress_after_days = compress_after_days
+        self.io_bytes_per_s = io_bytes_per_s
+        self.compress_with = compress_with  # 'gzip' or 'dedup' (shared chunk store)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RetentionPolicy':
+        """Build from ~/.reccli/config.json (retention_* keys, missing keys are off)"""
+        return cls(
+            quota_bytes=int(float(config.get('retention_quota_mb', 0)) * 1024 * 1024),
+            max_age_days=float(config.get('retention_max_age_days', 0)),
+            compress_after_days=float(config.get('retention_compress_after_days', 0)),
+            io_bytes_per_s=int(float(config.get('retention_io_mb_per_s', 8)) * 1024 * 1024),
+            compress_with=config.get('retention_compress_with', 'gzip'),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.quota_bytes or self.max_age_days or self.compress_after_days)
+
+
+class IOThrottle:
+    """Token bucket capping background I/O in bytes per second"""
+
+    def __init__(self, bytes_per_s: int, burst: int = 4 * CHUNK_SIZE):
+        self.rate = bytes_per_s
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def consume(self, amount: int):
+        """Block until amount bytes of I/O are allowed"""
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        self.tokens -= amount
+        if self.tokens < 0:
+            time.sleep(-self.tokens / self.rate)
+
+
+class RetentionEngine:
+    """
+    Applies a RetentionPolicy to the recordings reccli made
+
+    Only sessions the index marks as recorded by reccli are managed - never
+    other files that happen to look like recordings.
+
+    Order of work in each pass: delete sessions past the age limit,
+    gzip sessions older than compress_after_days, then evict the least
+    recently used sessions until the total fits the quota. "Used" is the
+    latest of the file's mtime/atime and the index's last_used (set on
+    record and export). Sessions in the dedup store count their share of
+    the store's on-disk size. Pinned sessions and sessions that are (or may
+    still be) recording are never touched.
+    """
+
+    def __init__(self, policy: RetentionPolicy, index: Optional[SessionIndex] = None):
+        self.policy = policy
+        self.index = index or SessionIndex()
+        self.throttle = IOThrottle(policy.io_bytes_per_s)
+        self._store = None
+
+    @property
+    def store(self):
+        """Chunk store for .dedup sessions (opened on first use)"""
+        if self._store is None:
+            from .dedup import ChunkStore
+            self._store = ChunkStore()
+        return self._store
+
+    def scan(self, now: Optional[float] = None) -> List[Session]:
+        """Current managed sessions with their size and usage"""
+        now = now or time.time()
+        for path in self.index.clear_stale():
+            log.info("Retention: %s is no longer recording (its recorder exited)", path)
+        entries = self.index.load()
+        paths = self.index.recorded()
+        stored_ratio = self._stored_ratio() if any(p.suffix == '.dedup' for p in paths) else 0
+        sessions = []
+        for path in paths:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entry = entries.get(str(path), {})
+            size = st.st_size
+            last_used = max(st.st_mtime, entry.get('last_used', 0))
+            if path.suffix == '.dedup':
+                # The stub is tiny - count the session's share of the chunk store. Reading
+                # stubs (sweeps) bumps their atime, so only reccli's own index counts as use
+                size = self._stub_size(path, stored_ratio)
+            else:
+                last_used = max(last_used, st.st_atime)
+            active = SessionIndex.is_recording(entry) or now - st.st_mtime < ACTIVE_GRACE
+            sessions.append(Session(path, size, st.st_mtime, last_used,
+                                    entry.get('pinned', False), active))
+        return sessions
+
+    def _stored_ratio(self) -> float:
+        """Bytes the chunk store keeps per logical byte of stored session"""
+        try:
+            stats = self.store.stats()
+        except Exception as e:
+            log.warning("Retention: chunk store unavailable: %s", e)
+            return 0
+        return stats['stored_bytes'] / stats['logical_bytes'] if stats['logical_bytes'] else 0
+
+    def _stub_size(self, path: Path, stored_ratio: float) -> int:
+        from .dedup import read_stub
+        try:
+            return int(read_stub(path).get('size', 0) * stored_ratio)
+        except (OSError, ValueError):
+            return 0
+
+    def plan(self, now: Optional[float] = None) -> List[Tuple[str, Session]]:
+        """
+        Work a pass would do, without doing it
+
+        Returns:
+            (action, session) pairs, action being 'expire', 'compress' or
+            'evict'. Quota eviction is estimated on current sizes; run()
+            re-checks it after compressing.
+        """
+        now = now or time.time()
+        policy = self.policy
+        sessions = self.scan(now)
+        movable = [s for s in sessions if not s.pinned and not s.active]
+        actions = []
+
+        expired = set()
+        if policy.max_age_days:
+            for s in movable:
+                if now - s.last_used > policy.max_age_days * DAY:
+                    actions.append(('expire', s))
+                    expired.add(s.path)
+
+        if policy.compress_after_days:
+            for s in movable:
+                if (s.path not in expired and s.path.suffix not in ('.gz', '.dedup')
+                        and now - s.modified > policy.compress_after_days * DAY):
+                    actions.append(('compress', s))
+
+        if policy.quota_bytes:
+            total = sum(s.size for s in sessions if s.path not in expired)
+            for s in sorted(movable, key=lambda s: s.last_used):
+                if total <= policy.quota_bytes:
+                    break
+                if s.path not in expired:
+                    actions.append(('evict', s))
+                    total -= s.size
+        return actions
+
+    def run(self, should_pause: Callable[[], bool] = lambda: False,
+            stopped: Callable[[], bool] = lambda: False) -> Dict[str, int]:
+        """
+        One retention pass
+
+        Args:
+            should_pause: Polled between I/O chunks; work waits while it is True
+            stopped: Polled between actions and chunks; abandons the pass
+
+        Returns:
+            Counts of expired, compressed and evicted sessions and bytes freed
+        """
+        stats = {'expired': 0, 'compressed': 0, 'evicted': 0, 'freed_bytes': 0}
+        started = time.perf_counter()
+
+        for action, session in self.plan():
+            if stopped():
+                return stats
+            if action == 'expire':
+                if self._delete(session, 'expired'):
+                    stats['expired'] += 1
+                    stats['freed_bytes'] += session.size
+            elif action == 'compress':
+                saved = self._compress(session, should_pause, stopped)
+                if saved is not None:
+                    stats['compressed'] += 1
+                    stats['freed_bytes'] += saved
+
+        # Compression changed sizes - recompute what still doesn't fit
+        for action, session in self.plan():
+            if stopped():
+                break
+            if action == 'evict' and self._delete(session, 'over quota'):
+                stats['evicted'] += 1
+                stats['freed_bytes'] += session.size
+
+        # Stubs deleted by hand leave their chunks behind
+        self.sweep_store()
+
+        metrics.observe('retention.pass', (time.perf_counter() - started) * 1000)
+        for name in ('expired', 'compressed', 'evicted', 'freed_bytes'):
+            if stats[name]:
+                metrics.incr(f'retention.{name}', stats[name])
+        return stats
+
+    def sweep_store(self) -> int:
+        """Release stored sessions whose .dedup stub was deleted"""
+        if not self.store.path.exists():
+            return 0
+        return self.store.sweep()
+
+    def _delete(self, session: Session, reason: str) -> bool:
+        if session.path.suffix == '.dedup':
+            from .dedup import read_stub
+            try:
+                self.store.release(read_stub(session.path)['id'])
+            except (OSError, ValueError) as e:
+                log.warning("Retention: could not release %s: %s", session.path, e)
+        try:
+            session.path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.warning("Retention: could not delete %s: %s", session.path, e)
+            return False
+        self.index.moved(session.path, None)
+        log.info("Retention: deleted %s (%s, %d bytes)", session.path, reason, session.size)
+        return True
+
+    def _compress(self, session: Session, should_pause: Callable[[], bool],
+                  stopped: Callable[[], bool]) -> Optional[int]:
+        """
+        gzip a session (or move it into the dedup store), throttled, then replace the original
+
+        Returns:
+            Bytes saved, or None if skipped/aborted
+        """
+        source = session.path
+        suffix = '.dedup' if self.policy.compress_with == 'dedup' else '.gz'
+        target = source.with_name(source.name + suffix)
+        partial = source.with_name(source.name + suffix + '.partial')
+        manifest_id = None
+        try:
+            before = source.stat()
+            if suffix == '.dedup':
+                manifest_id = self.store.ingest(source, partial, self.throttle, should_pause, stopped)
+                if manifest_id is None:
+                    raise InterruptedError
+            else:
+                self._gzip(source, partial, should_pause, stopped)
+            after = source.stat()
+            if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+                raise InterruptedError  # Written to while we compressed - try again next pass
+            os.utime(partial, ns=(before.st_atime_ns, before.st_mtime_ns))  # Our own read bumped atime
+            os.replace(partial, target)
+            source.unlink()
+        except (OSError, InterruptedError) as e:
+            if manifest_id and not target.exists():
+                self.store.release(manifest_id)
+            try:
+                partial.unlink()
+            except OSError:
+                pass
+            if not isinstance(e, InterruptedError):
+                log.warning("Retention: could not compress %s: %s", source, e)
+            return None
+
+        saved = session.size - target.stat().st_size
+        self.index.moved(source, target)
+        log.info("Retention: compressed %s (saved %d bytes)", source, saved)
+        return saved
+
+    def _gzip(self, source: Path, partial: Path, should_pause: Callable[[], bool],
+              stopped: Callable[[], bool]):
+        """Stream source into a gzip file, throttled and pausable"""
+        import gzip
+
+        with open(source, 'rb') as src, open(partial, 'wb') as raw:
+            # mtime=0 keeps the output reproducible; the file's own mtime is restored afterwards
+            with gzip.GzipFile(filename=source.name, mode='wb', fileobj=raw, mtime=0) as gz:
+                while True:
+                    while should_pause() and not stopped():
+                        time.sleep(0.2)
+                    if stopped():
+                        raise InterruptedError
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self.throttle.consume(len(chunk))
+                    gz.write(chunk)
+
+
+class RetentionWorker(threading.Thread):
+    """
+    Runs retention passes in the background of a long-lived process
+
+    Work only happens while the host is idle: call busy() whenever the
+    host has something to do and any in-progress compression pauses until
+    it has been quiet for idle_after seconds.
+    """
+
+    def __init__(self, engine: RetentionEngine, interval: float = 900, idle_after: float = 2.0):
+        super().__init__(name='reccli-retention', daemon=True)
+        self.engine = engine
+        self.interval = interval
+        self.idle_after = idle_after
+        self.last_busy = time.monotonic()
+        self._stop_event = threading.Event()
+
+    def busy(self):
+        """The host is doing real work - back off"""
+        self.last_busy = time.monotonic()
+
+    def idle(self) -> bool:
+        return time.monotonic() - self.last_busy >= self.idle_after
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        # Let startup settle before the first pass
+        delay = min(60.0, self.interval)
+        while not self._stop_event.wait(delay):
+            delay = self.interval
+            while not self.idle() and not self._stop_event.wait(self.idle_after):
+                pass
+            if self._stop_event.is_set():
+                break
+            try:
+                stats = self.engine.run(should_pause=lambda: not self.idle(),
+                                        stopped=self._stop_event.is_set)
+                log.info("Retention pass: %s", stats)
+            except Exception as e:
+                log.error("Retention pass failed: %s", e)
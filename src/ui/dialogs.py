@@ -12,7 +12,7 @@ import sys
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.export import SessionExporter, format_duration
+from src.export import Redactor, SessionExporter, export_extension, format_duration
 
 
 class ExportDialog:
@@ -109,7 +109,10 @@ class ExportDialog:
             ('txt', 'Plain Text (.txt)', 'Simple text file with terminal output'),
             ('md', 'Markdown (.md)', 'Markdown format with code blocks'),
             ('json', 'JSON (.json)', 'Structured JSON with metadata'),
+            ('ndjson', 'NDJSON (.ndjson)', 'One timestamped JSON record per line (jq, log pipelines)'),
+            ('chunks', 'LLM Chunks (.chunks.jsonl)', 'Transcript split into token-budgeted chunks for LLM context'),
             ('html', 'HTML (.html)', 'Styled HTML page'),
+            ('player', 'HTML Player (.player.html)', 'Self-contained page that replays the session'),
             ('cast', 'Asciinema Cast (.cast)', 'Native asciinema format (replayable)')
         ]
 
@@ -177,7 +180,7 @@ class ExportDialog:
 
         # Update extension when format changes
         def update_extension(*args):
-            self.extension_label.config(text=f".{self.format_var.get()}")
+            self.extension_label.config(text=f".{export_extension(self.format_var.get())}")
         self.format_var.trace_add('write', update_extension)
 
     def _browse_location(self):
@@ -217,7 +220,7 @@ class ExportDialog:
             return
 
         # Build output path
-        output_file = location / f"{filename}.{format_type}"
+        output_file = location / f"{filename}.{export_extension(format_type)}"
 
         # Check if file exists
         if output_file.exists():
@@ -229,7 +232,10 @@ class ExportDialog:
 
         # Export
         try:
-            exporter = SessionExporter(self.session_file, self.metadata)
+            exporter = SessionExporter(self.session_file, self.metadata,
+                                       redactor=Redactor.from_config(self.config),
+                                       chunk_tokens=self.config.get('chunk_tokens'),
+                                       tokenizer=self.config.get('tokenizer', 'auto'))
             success = exporter.export(output_file, format_type)
 
             if success:
@@ -312,7 +318,7 @@ class SettingsDialog:
         format_combo = ttk.Combobox(
             export_frame,
             textvariable=self.format_var,
-            values=['txt', 'md', 'json', 'html', 'cast'],
+            values=['txt', 'md', 'json', 'ndjson', 'chunks', 'html', 'player', 'cast'],
             state='readonly',
             width=20
         )
@@ -339,6 +345,13 @@ class SettingsDialog:
             width=10
         ).pack(side=tk.RIGHT, padx=(5, 0))
 
+        self.redact_var = tk.BooleanVar(value=self.config.get('redact_exports', True))
+        ttk.Checkbutton(
+            export_frame,
+            text="Redact secrets (API keys, tokens, passwords)",
+            variable=self.redact_var
+        ).pack(anchor=tk.W, pady=(10, 0))
+
         # Recording Settings Frame
         recording_frame = ttk.LabelFrame(self.dialog, text="Recording Settings", padding=15)
         recording_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -400,6 +413,7 @@ class SettingsDialog:
         # Update config
         self.config['default_export_format'] = self.format_var.get()
         self.config['default_save_location'] = self.location_var.get()
+        self.config['redact_exports'] = self.redact_var.get()
         self.config['show_recording_indicator'] = self.show_indicator_var.get()
         self.config['show_duration_timer'] = self.show_duration_var.get()
         self.config['auto_pause_on_idle'] = self.auto_pause_var.get()
@@ -0,0 +1,10 @@
+"""
+RecCli Watcher Module
+Terminal window event sources for the background watcher
+"""
+
+from .backends import (
+    WindowEvent, WindowBackend, PollingBackend, FakeWindowSystem, FakeBackend
+)
+
+__all__ = ['WindowEvent', 'WindowBackend', 'PollingBackend', 'FakeWindowSystem', 'FakeBackend']
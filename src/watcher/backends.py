@@ -0,0 +1,251 @@
+"""
+Window event backends for the RecCli watcher
+Turn terminal window snapshots or notifications into open/close events
+"""
+
+import random
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional, Set
+
+from src.core.metrics import metrics
+
+
+# kind is 'opened' or 'closed'; timestamp is when the backend saw the change
+WindowEvent = namedtuple('WindowEvent', ['kind', 'terminal_id', 'timestamp'])
+
+
+class WindowBackend:
+    """Base class - a source of terminal window open/close events"""
+
+    def __init__(self):
+        self.known: Set[str] = set()
+        self.wake_event = threading.Event()
+        self.closed = False
+
+        # Stats
+        self.cycles = 0
+        self.cycle_time = 0.0
+        self.events_seen = 0
+
+    def wait_events(self, timeout: Optional[float] = None) -> List[WindowEvent]:
+        """
+        Block until window events arrive
+
+        Args:
+            timeout: Seconds to wait before returning an empty list
+
+        Returns:
+            Events since the last call, oldest first
+        """
+        raise NotImplementedError
+
+    def wake(self):
+        """Push notification: a window probably opened or closed, look now"""
+        self.wake_event.set()
+
+    def close(self):
+        """Stop the backend and release any waiter"""
+        self.closed = True
+        self.wake_event.set()
+
+    def stats(self) -> dict:
+        """Cycle count, mean cycle cost and events seen"""
+        return {
+            'cycles': self.cycles,
+            'avg_cycle_ms': round(self.cycle_time / self.cycles * 1000, 3) if self.cycles else 0.0,
+            'events': self.events_seen,
+            'windows': len(self.known),
+        }
+
+
+class PollingBackend(WindowBackend):
+    """
+    Smart polling of a window-listing function
+
+    Polls at min_interval after any change or wake(), then backs off by
+    backoff per quiet cycle up to max_interval. Each sleep is jittered so
+    several watchers never poll in lockstep. wake() interrupts the sleep,
+    which is how push notifications (e.g. the 'reccli notify' shell hook)
+    get near-instant detection on top of polling.
+    """
+
+    def __init__(self, list_windows: Callable[[], Optional[Iterable[str]]],
+                 min_interval: float = 0.5, max_interval: float = 2.0,
+                 backoff: float = 1.5, jitter: float = 0.1):
+        """
+        Initialize polling backend
+
+        Args:
+            list_windows: Returns the IDs of all current terminal windows, or
+                          None if they couldn't be listed (that poll is skipped)
+            min_interval: Seconds between polls right after activity
+            max_interval: Ceiling in seconds for the backed-off interval
+            backoff: Interval multiplier per quiet poll
+            jitter: Random +/- fraction applied to every sleep
+        """
+        super().__init__()
+        self.list_windows = list_windows
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = min_interval
+
+    def poll(self) -> List[WindowEvent]:
+        """Take one snapshot and diff it against the known windows"""
+        started = time.perf_counter()
+        listed = self.list_windows()
+        if listed is None:
+            # A failed query says nothing about which windows closed
+            metrics.incr('watcher.poll_failed')
+            return []
+        current = set(listed)
+        now = time.time()
+
+        events = [WindowEvent('opened', t, now) for t in sorted(current - self.known)]
+        events += [WindowEvent('closed', t, now) for t in sorted(self.known - current)]
+        self.known = current
+
+        elapsed = time.perf_counter() - started
+        self.cycles += 1
+        self.cycle_time += elapsed
+        self.events_seen += len(events)
+        metrics.observe('watcher.poll', elapsed * 1000)
+        if events:
+            metrics.incr('watcher.events', len(events))
+        return events
+
+    def wait_events(self, timeout: Optional[float] = None) -> List[WindowEvent]:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while not self.closed:
+            self.wake_event.clear()
+            events = self.poll()
+            if events:
+                self.interval = self.min_interval
+                return events
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+            delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                delay = min(delay, remaining)
+
+            if self.wake_event.wait(delay):
+                # Pushed - poll straight away and stay responsive for a while
+                self.interval = self.min_interval
+        return []
+
+
+class FakeWindowSystem:
+    """
+    Deterministic simulation of many terminal windows opening and closing
+
+    Used with FakeBackend to benchmark watcher scaling without Terminal.app.
+    """
+
+    def __init__(self, initial_windows: int = 100, seed: int = 0):
+        """
+        Initialize simulation
+
+        Args:
+            initial_windows: Windows open at start
+            seed: Random seed for reproducible runs
+        """
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.windows: Set[str] = set()
+        self.changed_at = {}  # terminal_id -> time.time() of last open/close
+        for _ in range(initial_windows):
+            self.open_window()
+        # Only churn counts towards detection latency
+        self.changed_at.clear()
+
+    def open_window(self) -> str:
+        """Open one window and return its ID"""
+        with self.lock:
+            terminal_id = str(self.next_id)
+            self.next_id += 1
+            self.windows.add(terminal_id)
+            self.changed_at[terminal_id] = time.time()
+        return terminal_id
+
+    def close_window(self) -> Optional[str]:
+        """Close a random window and return its ID"""
+        with self.lock:
+            if not self.windows:
+                return None
+            terminal_id = self.rng.choice(sorted(self.windows))
+            self.windows.discard(terminal_id)
+            self.changed_at[terminal_id] = time.time()
+        return terminal_id
+
+    def step(self):
+        """Open or close one window, keeping the population roughly stable"""
+        if self.rng.random() < 0.5:
+            self.open_window()
+        else:
+            self.close_window()
+
+    def list_windows(self) -> List[str]:
+        """Window listing in the same shape as the osascript query"""
+        with self.lock:
+            return list(self.windows)
+
+
+class FakeBackend(PollingBackend):
+    """
+    Polling backend over a FakeWindowSystem with simulated push events
+
+    A churn thread opens and closes windows at churn_rate changes/second
+    and, when push is enabled, wakes the backend like a platform
+    notification would. Detection latency per event is recorded.
+    """
+
+    def __init__(self, system: FakeWindowSystem, churn_rate: float = 10.0,
+                 push: bool = True, **kwargs):
+        """
+        Initialize fake backend
+
+        Args:
+            system: Simulated window system
+            churn_rate: Window opens/closes per second (0 disables churn)
+            push: Wake the backend on every change instead of relying on polling
+            **kwargs: Passed to PollingBackend
+        """
+        super().__init__(system.list_windows, **kwargs)
+        self.system = system
+        self.churn_rate = churn_rate
+        self.push = push
+        self.latencies: List[float] = []
+        if churn_rate > 0:
+            threading.Thread(target=self._churn, daemon=True).start()
+
+    def _churn(self):
+        """Simulate users opening and closing windows"""
+        while not self.closed:
+            time.sleep(1.0 / self.churn_rate)
+            self.system.step()
+            if self.push:
+                self.wake()
+
+    def poll(self) -> List[WindowEvent]:
+        events = super().poll()
+        for event in events:
+            changed_at = self.system.changed_at.get(event.terminal_id)
+            if changed_at:
+                self.latencies.append(event.timestamp - changed_at)
+        return events
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            stats['latency_avg_ms'] = round(sum(ordered) / len(ordered) * 1000, 2)
+            stats['latency_p95_ms'] = round(ordered[int(len(ordered) * 0.95)] * 1000, 2)
+        return stats
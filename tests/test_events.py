@@ -0,0 +1,101 @@
+"""
+Tests for the in-memory event store
+Run with: python -m unittest discover tests
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.export.events import EventStore  # noqa: E402
+
+EVENTS = [
+    (0.0, 'o', b'$ '),
+    (0.5, 'i', b'ls\r'),
+    (0.6, 'o', b'ls\r\n'),
+    (1.0, 'o', b'README.md  src\r\n'),
+    (1.0, 'm', b'done'),
+    (2.5, 'r', b'100x30'),
+    (3.0, 'o', b''),
+    (4.0, 'o', b'$ '),
+]
+
+
+def filled() -> EventStore:
+    store = EventStore()
+    for event in EVENTS:
+        store.append(*event)
+    return store
+
+
+class EventStoreTest(unittest.TestCase):
+
+    def test_indexing(self):
+        store = filled()
+        self.assertEqual(len(store), len(EVENTS))
+        for index, (time, code, payload) in enumerate(EVENTS):
+            with self.subTest(index=index):
+                event = store[index]
+                self.assertEqual((event.time, event.code, bytes(event.data)), (time, code, payload))
+        self.assertEqual(bytes(store[-1].data), b'$ ')
+        with self.assertRaises(IndexError):
+            store[len(EVENTS)]
+        self.assertEqual(store.duration, 4.0)
+
+    def test_time_lookups(self):
+        store = filled()
+        self.assertEqual(store.index_at(-1.0), -1)
+        self.assertEqual(store.index_at(0.55), 1)
+        self.assertEqual(store.index_at(1.0), 4)     # last of the events at 1.0
+        self.assertEqual(store.index_at(99.0), len(EVENTS) - 1)
+        window = store.between(1.0, 3.0)
+        self.assertEqual([event.code for event in window], ['o', 'm', 'r'])
+        self.assertEqual(len(store.between(4.5)), 0)
+        # Lookups on a view are relative to it
+        self.assertEqual(window.index_at(2.5), 2)
+        self.assertEqual(window.index_at(0.9), -1)
+
+    def test_slices_share_buffers(self):
+        store = filled()
+        view = store[2:4]
+        self.assertIs(view._data, store._data)
+        self.assertIs(view._times, store._times)
+        self.assertEqual(bytes(view.data()), b'ls\r\nREADME.md  src\r\n')
+        data = view.data()
+        self.assertIs(data.obj, store._data)
+        data.release()
+        self.assertEqual(b''.join(store.output()), b'$ ls\r\nREADME.md  src\r\n$ ')
+        with self.assertRaises(ValueError):
+            view.append(5.0, 'o', b'x')
+        with self.assertRaises(ValueError):
+            store[::2]
+
+    def test_times_must_not_decrease(self):
+        store = filled()
+        with self.assertRaises(ValueError):
+            store.append(3.5, 'o', b'late')
+        self.assertEqual(len(store), len(EVENTS))
+        store.append(4.0, 'o', b'same time is fine')
+        self.assertEqual(len(store), len(EVENTS) + 1)
+
+    def test_from_cast(self):
+        lines = [json.dumps({'version': 2, 'width': 80, 'height': 24}),
+                 json.dumps([0.1, 'o', 'one\r\n']),
+                 json.dumps([0.4, 'ox', 'malformed']),
+                 json.dumps([0.9, 'o', 'two\r\n']),
+                 json.dumps([0.7, 'o', 'three\r\n'])]     # written out of order
+        with tempfile.TemporaryDirectory() as tmp:
+            cast = Path(tmp) / 'session.cast'
+            cast.write_text('\n'.join(lines) + '\n')
+            store = EventStore.from_cast(cast)
+        self.assertEqual([(event.time, bytes(event.data)) for event in store],
+                         [(0.1, b'one\r\n'), (0.9, b'two\r\n'), (0.9, b'three\r\n')])
+        self.assertEqual(store.index_at(0.8), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
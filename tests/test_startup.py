@@ -0,0 +1,61 @@
+"""
+Tests for subcommand cold starts
+Run with: python -m unittest discover tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import reccli  # noqa: E402
+
+# Heavy modules -> the subcommands allowed to load them at startup
+HEAVY_MODULES = {
+    'tkinter': {'gui', 'host'},
+    'src.ui': {'gui', 'host'},
+    'numpy': set(),
+    'src.export.player': set(),
+}
+
+# Runs a subcommand's startup imports (--startup-check) in a fresh
+# interpreter and prints which heavy modules ended up loaded
+PROBE = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+import reccli
+try:
+    reccli.main([sys.argv[2], '--startup-check'])
+except SystemExit:
+    pass
+print(json.dumps([name for name in sys.argv[3:] if name in sys.modules]))
+"""
+
+
+class StartupImportsTest(unittest.TestCase):
+
+    def test_commands_skip_heavy_modules(self):
+        with tempfile.TemporaryDirectory() as home:
+            env = dict(os.environ, HOME=home)
+            for command in reccli.COMMAND_MODULES:
+                with self.subTest(command=command):
+                    result = subprocess.run(
+                        [sys.executable, '-c', PROBE, str(REPO_ROOT), command] + list(HEAVY_MODULES),
+                        capture_output=True, text=True, env=env, timeout=60)
+                    self.assertEqual(result.returncode, 0, result.stderr)
+                    loaded = json.loads(result.stdout.strip().splitlines()[-1])
+                    unexpected = [name for name in loaded if command not in HEAVY_MODULES[name]]
+                    self.assertEqual(unexpected, [], f"'{command}' loads {unexpected} at startup")
+
+    def test_every_command_has_a_budget(self):
+        self.assertEqual(set(reccli.COMMAND_MODULES) - set(reccli.STARTUP_BUDGETS_MS), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,8 +22,11 @@ pkill -f "reccli.py" || true
 
 # Clean up temp files
 echo "🧹 Cleaning up..."
-rm -f /tmp/reccli_processes.json
-rm -f /tmp/reccli_debug.log
+rm -f /tmp/reccli_processes.json /tmp/reccli_processes.json.lock
+rm -f /tmp/reccli_host.sock
+rm -f /tmp/reccli_watcher.sock
+rm -f /tmp/reccli_zygote.sock
+rm -f /tmp/reccli_debug.log*
 rm -f /tmp/reccli_watcher.log
 rm -f /tmp/reccli_watcher_error.log
 